@@ -10,6 +10,7 @@ import threading
 import time
 from copy import copy
 
+import numpy as np
 from usb.core import NoBackendError
 
 from meerk40t.balormk.mock_connection import MockConnection
@@ -207,6 +208,19 @@ BUSY = 0x04
 READY = 0x20
 AXIS = 0x40
 
+# A list command is six little-endian words, a list packet holds 0x100 commands.
+list_command_dtype = np.dtype(
+    [
+        ("command", "<u2"),
+        ("v1", "<u2"),
+        ("v2", "<u2"),
+        ("v3", "<u2"),
+        ("v4", "<u2"),
+        ("v5", "<u2"),
+    ]
+)
+LIST_COMMANDS = 0x100
+
 
 def _bytes_to_words(r):
     b0 = r[1] << 8 | r[0]
@@ -216,6 +230,60 @@ def _bytes_to_words(r):
     return b0, b1, b2, b3
 
 
+def _list_command_text(command, packet):
+    v = struct.unpack("<6H", packet)
+    cmdstr = list_command_lookup.get(command, "unknown")
+    remainder = f"{v[1]} {v[2]} {v[3]} {v[4]} {v[5]}"
+    while remainder.endswith(" 0"):
+        remainder = remainder[:-2]
+    hexstr = " ".join(f"{x:02X}" for x in packet)
+    return f"> {hexstr} -- {cmdstr} {remainder}"
+
+
+class ListProgram:
+    """
+    Compiled list commands of a job, ready to be sent as 0xC00 byte list packets.
+
+    The program is recorded by the controller while the job is streamed the first time and
+    is replayed without running the driver or the list command methods again. The start
+    position is the position the head had when the recording started, a replay is only
+    valid from there. The end position is where the head stands after the program.
+    """
+
+    def __init__(self, commands, start_position=None, end_position=None):
+        self.commands = np.array(commands, dtype=list_command_dtype).reshape(-1)
+        self.start_position = start_position
+        self.end_position = end_position
+        self.marks = 0
+        count = len(self.commands)
+        lists = max(1, -(-count // LIST_COMMANDS))
+        padded = np.zeros(lists * LIST_COMMANDS, dtype=list_command_dtype)
+        padded["command"] = listEndOfList
+        padded[:count] = self.commands
+        self._lists = padded.reshape(lists, LIST_COMMANDS)
+
+    def __len__(self):
+        return len(self.commands)
+
+    def packets(self, mark_count=None):
+        """
+        Yields the list packets and the number of bytes used within each packet.
+
+        @param mark_count: value patched into every listChangeMarkCount command.
+        @return:
+        """
+        lists = self._lists
+        if mark_count is not None:
+            patch = lists["command"] == listChangeMarkCount
+            if patch.any():
+                lists = lists.copy()
+                lists["v1"][patch] = int(mark_count) & 0xFFFF
+        count = len(self.commands)
+        for i, packet in enumerate(lists):
+            used = min(count - i * LIST_COMMANDS, LIST_COMMANDS)
+            yield bytearray(packet.tobytes()), used * 12
+
+
 class GalvoController:
     """
     Galvo controller is tasked with sending queued data to the controller board and ensuring that the connection to the
@@ -247,6 +315,9 @@ class GalvoController:
             f"{self.service.safe_label}/usb", buffer_size=500
         )
         self.usb_log.watch(lambda e: service.signal("pipe;usb_status", e))
+        self.list_log = service.channel(
+            f"{self.service.safe_label}/list", buffer_size=500
+        )
 
         self.connection = None
         self._is_opening = False
@@ -289,6 +360,8 @@ class GalvoController:
         self._active_index = 0
         self._list_executing = False
         self._number_of_list_packets = 0
+        self._list_recording = None
+        self._list_recording_start = None
         self.paused = False
         self.service.setting(bool, "signal_updates", True)
 
@@ -456,6 +529,8 @@ class GalvoController:
     def rapid_mode(self):
         if self.mode == DRIVER_STATE_RAPID:
             return
+        # A list interrupted by rapid mode cannot be replayed.
+        self._list_recording = None
         self.list_end_of_list()  # Ensure at least one list_end_of_list
         self._list_end()
         if not self._list_executing and self._number_of_list_packets:
@@ -594,19 +669,134 @@ class GalvoController:
                 "<6H", int(command), int(v1), int(v2), int(v3), int(v4), int(v5)
             )
             if self.DEBUG:
-                cmdstr = list_command_lookup.get(command, "unknown")
-                remainder = f"{v1} {v2} {v3} {v4} {v5}"
-                while remainder.endswith(" 0"):
-                    remainder = remainder[:-2]
-                packet = struct.pack(
-                    "<6H", int(command), int(v1), int(v2), int(v3), int(v4), int(v5)
+                # Formatted only if someone reads the list log.
+                self.list_log.log(_list_command_text, command, msg)
+            self._active_list[index : index + 12] = msg
+            self._active_index += 12
+            if self._list_recording is not None:
+                self._list_recording.append(
+                    (int(command), int(v1), int(v2), int(v3), int(v4), int(v5))
                 )
-                hexstr = " ".join(f"{x:02X}" for x in packet)
-                self.usb_log(f"> {hexstr} -- {cmdstr} {remainder}")
-            self._active_list[index : index + 12] = struct.pack(
-                "<6H", int(command), int(v1), int(v2), int(v3), int(v4), int(v5)
+
+    def list_write_moves(self, commands):
+        """
+        Writes compiled jump and mark commands, see listcompiler. The commands are copied
+        into the list packets a packet at a time and the last command sets the position.
+
+        @param commands: list_command_dtype array
+        @return:
+        """
+        count = len(commands)
+        if not count:
+            return
+        with self._list_lock:
+            if self.DEBUG:
+                self.list_log.log("> %d compiled list commands", count)
+            written = 0
+            while written < count:
+                if self._active_index >= 0xC00:
+                    self._list_end()
+                if self._active_list is None:
+                    self._list_new()
+                index = self._active_index
+                n = min(count - written, (0xC00 - index) // 12)
+                self._active_list[index : index + n * 12] = commands[
+                    written : written + n
+                ].tobytes()
+                self._active_index += n * 12
+                written += n
+            if self._list_recording is not None:
+                self._list_recording.extend(commands.tolist())
+        x = int(commands["v1"][-1])
+        y = int(commands["v2"][-1])
+        if self.service.signal_updates:
+            view = self.service.view
+            l_x, l_y = view.iposition(self._last_x, self._last_y)
+            n_x, n_y = view.iposition(x, y)
+            self.service.signal(
+                "driver;position",
+                (l_x, l_y, n_x, n_y),
             )
-            self._active_index += 12
+        self._last_x = x
+        self._last_y = y
+
+    #######################
+    # LIST RECORDING
+    #######################
+
+    def list_record_start(self):
+        """
+        Starts recording the list commands written from here on into a ListProgram.
+
+        Recording must start in rapid mode, ahead of program_mode(), so the program holds
+        the full list from its start.
+        """
+        with self._list_lock:
+            if self.mode != DRIVER_STATE_RAPID:
+                self._list_recording = None
+                return
+            self._list_recording = []
+            self._list_recording_start = (self._last_x, self._last_y)
+
+    def list_record_stop(self):
+        """
+        Stops recording. Must be called ahead of rapid_mode(), the final end of list is not
+        part of the program.
+
+        @return: recorded ListProgram, or None if the recording was interrupted.
+        """
+        with self._list_lock:
+            commands = self._list_recording
+            self._list_recording = None
+            if commands is None:
+                return None
+            return ListProgram(
+                commands,
+                start_position=self._list_recording_start,
+                end_position=(self._last_x, self._last_y),
+            )
+
+    def list_replay(self, program, mark_count=None, abort=None):
+        """
+        Sends a recorded ListProgram in program mode. This does the work of program_mode()
+        and of every list command of the program, the caller finishes with rapid_mode().
+
+        @param program: ListProgram to send
+        @param mark_count: mark count patched into the program.
+        @param abort: function checked between packets, returning True aborts the replay.
+        @return: whether the program was sent completely.
+        """
+        if self.mode != DRIVER_STATE_RAPID:
+            return False
+        self.mode = DRIVER_STATE_PROGRAM
+        self.reset_list()
+        self.port_on(bit=0)
+        self.write_port()
+        self.mode_shift(1)
+        # The cached list settings are whatever the program left them at.
+        self._ready = None
+        self._speed = None
+        self._travel_speed = None
+        self._frequency = None
+        self._power = None
+        self._pulse_width = None
+
+        self._delay_jump = None
+        self._delay_on = None
+        self._delay_off = None
+        self._delay_poly = None
+        self._delay_end = None
+        for packet, used in program.packets(mark_count):
+            if abort is not None and abort():
+                return False
+            with self._list_lock:
+                self._list_end()
+                self._active_list = packet
+                self._active_index = used
+        self.usb_log(f"Replayed list program of {len(program)} commands")
+        if program.end_position is not None:
+            self._last_x, self._last_y = program.end_position
+        return True
 
     def _command(self, command, v1=0, v2=0, v3=0, v4=0, v5=0, read=True):
         cmd = struct.pack(
@@ -812,6 +1002,7 @@ class GalvoController:
     def abort(self, dummy_packet=True):
         if self.mode == DRIVER_STATE_RAW:
             return
+        self._list_recording = None
         self.stop_execute()
         self.paused = False
         self.set_fiber_mo(0)
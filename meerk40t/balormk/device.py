@@ -8,7 +8,11 @@ from meerk40t.balormk.driver import BalorDriver
 from meerk40t.core.spoolers import Spooler
 from meerk40t.core.units import Angle, Length
 from meerk40t.core.view import View
-from meerk40t.device.devicechoices import get_effect_choices, get_operation_choices
+from meerk40t.device.devicechoices import (
+    get_effect_choices,
+    get_motion_choices,
+    get_operation_choices,
+)
 from meerk40t.device.mixins import Status
 from meerk40t.kernel import Service, signal_listener
 
@@ -369,6 +373,16 @@ class BalorDevice(Service, Status):
             },
         ]
         self.register_choices("balor", choices)
+        # Galvo mirrors are not limited by the acceleration of a gantry.
+        self.register_choices(
+            "balor",
+            get_motion_choices(
+                self,
+                default_acceleration=0,
+                default_corner_speed=0,
+                default_turnaround=0,
+            ),
+        )
 
         def _use_percent_for_power():
             return getattr(self, "use_percent_for_power_display", True)
@@ -687,6 +701,30 @@ class BalorDevice(Service, Status):
                 # Hint for translation _("Other")
                 "section": "_90_Other",
             },
+            {
+                "attr": "list_replay",
+                "object": self,
+                "default": True,
+                "type": bool,
+                "label": _("Replay repeated jobs"),
+                "tip": _(
+                    "Record the list packets of a job and resend them unchanged if the same job is run again with the same settings"
+                ),
+                # Hint for translation _("Other")
+                "section": "_90_Other",
+            },
+            {
+                "attr": "list_mark_count",
+                "object": self,
+                "default": False,
+                "type": bool,
+                "label": _("Update mark count"),
+                "tip": _(
+                    "Write the number of times a job was marked into the list sent to the controller"
+                ),
+                # Hint for translation _("Other")
+                "section": "_90_Other",
+            },
         ]
         self.register_choices("balor-global-timing", choices)
 
@@ -5,11 +5,14 @@ The Driver has a set of different commands which are standardly sent and utilize
 driver.
 """
 
+import os
 import time
 
+import numpy as np
 from usb.core import NoBackendError
 
 from meerk40t.balormk.controller import GalvoController
+from meerk40t.balormk.listcompiler import compile_segments
 from meerk40t.core.cutcode.cubiccut import CubicCut
 from meerk40t.core.cutcode.dwellcut import DwellCut
 from meerk40t.core.cutcode.gotocut import GotoCut
@@ -22,7 +25,35 @@ from meerk40t.core.cutcode.quadcut import QuadCut
 from meerk40t.core.cutcode.waitcut import WaitCut
 from meerk40t.core.plotplanner import PlotPlanner
 from meerk40t.device.basedevice import PLOT_FINISH, PLOT_JOG, PLOT_RAPID, PLOT_SETTING
-from meerk40t.tools.geomstr import Geomstr
+from meerk40t.tools.geomstr import (
+    TYPE_ARC,
+    TYPE_CUBIC,
+    TYPE_LINE,
+    TYPE_QUAD,
+    Geomstr,
+)
+
+SEGMENT_TYPES = {
+    "line": TYPE_LINE,
+    "quad": TYPE_QUAD,
+    "cubic": TYPE_CUBIC,
+    "arc": TYPE_ARC,
+}
+# Segments compiled at once, the job can be aborted between these.
+COMPILE_CHUNK = 1000
+
+
+def _fingerprint(settings):
+    """
+    Hashable snapshot of the plain values of a settings dict.
+    """
+    return tuple(
+        sorted(
+            (k, v)
+            for k, v in settings.items()
+            if isinstance(v, (str, int, float, bool)) and not k.startswith("_")
+        )
+    )
 
 
 class BalorDriver:
@@ -57,6 +88,8 @@ class BalorDriver:
         self.plot_planner.settings_then_jog = True
         self._aborting = False
         self._list_bits = None
+        # Recorded list program of the last job: (key, queue, program).
+        self._program = None
         self.service.setting(bool, "signal_updates", True)
 
     def __repr__(self):
@@ -173,7 +206,27 @@ class BalorDriver:
         con.program_mode()
         self._list_bits = con._port_bits
         g = Geomstr()
+        compiled = self._compiles(con)
+        pending = []
+        pending_sets = None
         for segment_type, start, c1, c2, end, sets in geom.as_lines():
+            if compiled and segment_type in SEGMENT_TYPES:
+                # Runs of segments with the same settings are compiled together.
+                if pending and (
+                    sets is not pending_sets or len(pending) >= COMPILE_CHUNK
+                ):
+                    if not self._geometry_compiled(con, pending, pending_sets):
+                        return
+                    pending = []
+                pending_sets = sets
+                pending.append((start, c1, SEGMENT_TYPES[segment_type], c2, end))
+                continue
+            if compiled and segment_type == "end":
+                continue
+            if pending:
+                if not self._geometry_compiled(con, pending, pending_sets):
+                    return
+                pending = []
             con.set_settings(sets)
             # LOOP CHECKS
             if self._abort_mission():
@@ -270,6 +323,9 @@ class BalorDriver:
                 elif function == "output":
                     con.port_set(sets.get("output_mask"), sets.get("output_value"))
                     con.list_write_port()
+        if pending:
+            if not self._geometry_compiled(con, pending, pending_sets):
+                return
         con.list_delay_time(int(self.service.delay_end / 10.0))
         self._list_bits = None
         con.rapid_mode()
@@ -330,27 +386,134 @@ class BalorDriver:
         con._light_speed = None
         con._dark_speed = None
         con._goto_speed = None
-        con.program_mode()
-        self._list_bits = con._port_bits
-        last_on = None
         queue = self.queue
         self.queue = list()
+        key = self._program_key(con, queue)
+        cached = self._program
+        replayed = False
+        if key is not None and cached is not None and cached[0] == key:
+            # Same job from the same state, send the recorded list packets.
+            program = cached[2]
+            self._set_queue_status(len(queue), len(queue))
+            aborted = False
+
+            def interrupted():
+                nonlocal aborted
+                # LOOP CHECKS
+                if self._abort_mission():
+                    aborted = True
+                    return True
+                while self.paused:
+                    time.sleep(0.05)
+                return False
+
+            replayed = con.list_replay(
+                program,
+                mark_count=program.marks + 1 if self.service.list_mark_count else None,
+                abort=interrupted,
+            )
+            if aborted:
+                return
+            if replayed:
+                program.marks += 1
+            else:
+                con.usb_log("List program replay refused, compiling the job.")
+        if not replayed:
+            self._program = None
+            if key is not None:
+                con.list_record_start()
+            con.program_mode()
+            self._list_bits = con._port_bits
+            if self.service.list_mark_count:
+                con.list_change_mark_count(1)
+            if not self._plot_queue(con, queue):
+                return
+            con.list_delay_time(int(self.service.delay_end / 10.0))
+            if key is not None:
+                program = con.list_record_stop()
+                if program is not None:
+                    program.marks = 1
+                    self._program = (key, queue, program)
+        self._list_bits = None
+        con.rapid_mode()
+        self.service.laser_status = "idle"
+        self._set_queue_status(0, 0)
+
+        if self.service.redlight_preferred:
+            con.light_on()
+            con.write_port()
+        else:
+            con.light_off()
+            con.write_port()
+
+    def _program_key(self, con, queue):
+        """
+        Key of the recorded list program for this queue, None if the queue is not replayable.
+
+        The key holds everything the list commands depend on: the cutcode objects, their
+        settings, the device settings, the correction file and the controller state.
+        """
+        if not self.service.list_replay or not queue:
+            return None
+        if not isinstance(con, GalvoController):
+            # Wrapped connections (cylinder correction) keep state of their own.
+            return None
+        settings = {}
+        for q in queue:
+            settings[id(q.settings)] = q.settings
+        corfile = None
+        if self.service.corfile_enabled and self.service.corfile:
+            try:
+                corfile = (
+                    self.service.corfile,
+                    os.path.getmtime(self.service.corfile),
+                )
+            except OSError:
+                corfile = (self.service.corfile, None)
+        return (
+            tuple(id(q) for q in queue),
+            tuple(_fingerprint(s) for s in settings.values()),
+            _fingerprint(vars(self.service)),
+            corfile,
+            con.get_last_xy(),
+            con._port_bits,
+            con._fpk,
+            id(self.value_penbox),
+        )
+
+    def _plot_queue(self, con, queue):
+        """
+        Writes the list commands for the queued cutcode.
+
+        @return: False if the job was aborted.
+        """
+        last_on = None
         total = len(queue)
         current = 0
+        compiled = self._compiles(con)
+        pending = []
         for q in queue:
             current += 1
             self._set_queue_status(current, total)
-            settings = q.settings
-            penbox = settings.get("penbox_value")
-            if penbox is not None:
-                try:
-                    self.value_penbox = self.service.penbox.pens[penbox]
-                except KeyError:
-                    self.value_penbox = None
-            con.set_settings(settings)
+            if compiled and isinstance(q, (LineCut, QuadCut, CubicCut)):
+                # Runs of cuts with the same settings are compiled together.
+                if pending and (
+                    q.settings is not pending[0].settings
+                    or len(pending) >= COMPILE_CHUNK
+                ):
+                    if not self._plot_compiled(con, pending):
+                        return False
+                    pending = []
+                pending.append(q)
+                continue
+            if pending:
+                if not self._plot_compiled(con, pending):
+                    return False
+                pending = []
+            self._apply_settings(con, q.settings)
             # LOOP CHECKS
             if self._abort_mission():
-                return
+                return False
             if isinstance(q, LineCut):
                 last_x, last_y = con.get_last_xy()
                 x, y = q.start
@@ -369,7 +532,7 @@ class BalorDriver:
                 for p in list(g.as_equal_interpolated_points(distance=interp))[1:]:
                     # LOOP CHECKS
                     if self._abort_mission():
-                        return
+                        return False
                     while self.paused:
                         time.sleep(0.05)
                     con.mark(p.real, p.imag)
@@ -390,7 +553,7 @@ class BalorDriver:
                 for p in list(g.as_equal_interpolated_points(distance=interp))[1:]:
                     # LOOP CHECKS
                     if self._abort_mission():
-                        return
+                        return False
                     while self.paused:
                         time.sleep(0.05)
                     con.mark(p.real, p.imag)
@@ -402,7 +565,7 @@ class BalorDriver:
                 for ox, oy, on, x, y in q.plot:
                     # LOOP CHECKS
                     if self._abort_mission():
-                        return
+                        return False
                     while self.paused:
                         time.sleep(0.05)
 
@@ -466,7 +629,7 @@ class BalorDriver:
                 for x, y, on in self.plot_planner.gen():
                     # LOOP CHECKS
                     if self._abort_mission():
-                        return
+                        return False
                     while self.paused:
                         time.sleep(0.05)
 
@@ -520,18 +683,80 @@ class BalorDriver:
                                 )
                                 con.power(percent_power * on)
                         con.mark(x, y)
-        con.list_delay_time(int(self.service.delay_end / 10.0))
-        self._list_bits = None
-        con.rapid_mode()
-        self.service.laser_status = "idle"
-        self._set_queue_status(0, 0)
+        if pending:
+            return self._plot_compiled(con, pending)
+        return True
+
+    def _apply_settings(self, con, settings):
+        penbox = settings.get("penbox_value")
+        if penbox is not None:
+            try:
+                self.value_penbox = self.service.penbox.pens[penbox]
+            except KeyError:
+                self.value_penbox = None
+        con.set_settings(settings)
+
+    @staticmethod
+    def _compiles(con):
+        """
+        Whether lines and curves can be compiled for this connection. Wrapped connections
+        (cylinder correction) and fixed move speeds need the single point methods.
+        """
+        return (
+            isinstance(con, GalvoController)
+            and con._mark_speed is None
+            and con._goto_speed is None
+        )
 
-        if self.service.redlight_preferred:
-            con.light_on()
-            con.write_port()
-        else:
-            con.light_off()
-            con.write_port()
+    def _plot_compiled(self, con, cuts):
+        """
+        Compiles a run of line, quad and cubic cuts sharing their settings.
+
+        @return: False if the job was aborted.
+        """
+        self._apply_settings(con, cuts[0].settings)
+        # LOOP CHECKS
+        if self._abort_mission():
+            return False
+        while self.paused:
+            time.sleep(0.05)
+        segments = np.empty((len(cuts), 5), dtype=complex)
+        for i, q in enumerate(cuts):
+            start = complex(*q.start)
+            end = complex(*q.end)
+            if isinstance(q, QuadCut):
+                c1 = c2 = complex(*q.c())
+                kind = TYPE_QUAD
+            elif isinstance(q, CubicCut):
+                c1 = complex(*q.c1())
+                c2 = complex(*q.c2())
+                kind = TYPE_CUBIC
+            else:
+                c1 = start
+                c2 = end
+                kind = TYPE_LINE
+            segments[i] = (start, c1, kind, c2, end)
+        con.list_write_moves(
+            compile_segments(segments, self.service.interp, con.get_last_xy())
+        )
+        return True
+
+    def _geometry_compiled(self, con, segments, settings):
+        """
+        Compiles a run of geometry segments sharing their settings.
+
+        @return: False if the job was aborted.
+        """
+        con.set_settings(settings)
+        # LOOP CHECKS
+        if self._abort_mission():
+            return False
+        while self.paused:
+            time.sleep(0.05)
+        con.list_write_moves(
+            compile_segments(segments, self.service.interp, con.get_last_xy())
+        )
+        return True
 
     def move_abs(self, x, y):
         """
@@ -0,0 +1,161 @@
+"""
+Galvo List Compiler
+
+Compiles runs of geometry segments into galvo list commands with numpy. Curves are
+interpolated at equal distances, points outside the galvo field are dropped and moves to
+the current position are skipped, the same way GalvoController.goto() and mark() treat
+single points, but for whole runs of segments at once.
+
+Every segment starts with a jump to its start which is skipped if the head is already
+there, followed by marks to the interpolated points and its end.
+"""
+
+import numpy as np
+
+from meerk40t.balormk.controller import list_command_dtype, listJumpTo, listMarkTo
+from meerk40t.tools.geomstr import TYPE_ARC, TYPE_CUBIC, TYPE_QUAD, Geomstr
+
+# Positions evaluated along each curve to find the equal distance points.
+SAMPLES = 1000
+# Curves evaluated at once, bounds the memory of the sample arrays.
+CURVE_CHUNK = 256
+
+
+def _curve_positions(segments, kinds, t):
+    """
+    Positions at t for every curve segment, shape (curves, len(t)).
+    """
+    p0 = segments[:, 0, None]
+    p1 = segments[:, 1, None]
+    p2 = segments[:, 3, None]
+    p3 = segments[:, 4, None]
+    # Same factors as Geomstr._quad_position and _cubic_position, for the same points.
+    n_t = 1 - t
+    t_2 = t * t
+    n_t_2 = n_t * n_t
+    n_t_t = n_t * t
+    quad = (n_t_2 * p0.real + 2 * n_t_t * p1.real + t_2 * p3.real) + (
+        n_t_2 * p0.imag + 2 * n_t_t * p1.imag + t_2 * p3.imag
+    ) * 1j
+    t_3 = t * t * t
+    n_t_3 = n_t * n_t * n_t
+    t_2_n_t = t * t * n_t
+    n_t_2_t = n_t * n_t * t
+    cubic = (
+        n_t_3 * p0.real + 3 * (n_t_2_t * p1.real + t_2_n_t * p2.real) + t_3 * p3.real
+    ) + (
+        n_t_3 * p0.imag + 3 * (n_t_2_t * p1.imag + t_2_n_t * p2.imag) + t_3 * p3.imag
+    ) * 1j
+    positions = np.where((kinds == TYPE_CUBIC)[:, None], cubic, quad)
+    arcs = np.flatnonzero(kinds == TYPE_ARC)
+    if len(arcs):
+        g = Geomstr()
+        for i in arcs:
+            positions[i] = g._arc_position(segments[i], t)
+    return positions
+
+
+def interpolate_curves(segments, kinds, distance):
+    """
+    Equal distance points of curve segments, matching Geomstr.as_equal_interpolated_points.
+
+    @param segments: geomstr segments, quads, cubics or arcs
+    @param kinds: segment type of every segment
+    @param distance: distance between the interpolated points
+    @return: number of interior points per segment, interior points of all segments
+    """
+    t = np.linspace(0, 1, SAMPLES)
+    counts = []
+    points = []
+    for i in range(0, len(segments), CURVE_CHUNK):
+        positions = _curve_positions(
+            segments[i : i + CURVE_CHUNK], kinds[i : i + CURVE_CHUNK], t
+        )
+        steps = np.cumsum(np.abs(np.diff(positions, axis=1)), axis=1)
+        length = steps[:, -1]
+        intervals = np.ceil(length / distance).astype(int)
+        count = np.maximum(intervals - 1, 0)
+        rows = np.repeat(np.arange(len(positions)), count)
+        # Index j of the point within its curve, 1 up to intervals - 1.
+        j = np.arange(len(rows)) - np.repeat(np.cumsum(count) - count, count) + 1
+        # Spaced like np.linspace(0, length, intervals, endpoint=False)[1:].
+        targets = j * (length / np.maximum(intervals, 1))[rows]
+        columns = np.empty(len(rows), dtype=int)
+        end = 0
+        for row in np.flatnonzero(count):
+            begin = end
+            end += count[row]
+            columns[begin:end] = np.searchsorted(
+                steps[row], targets[begin:end], side="right"
+            )
+        counts.append(count)
+        points.append(positions[rows, columns])
+    if not counts:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=complex)
+    return np.concatenate(counts), np.concatenate(points)
+
+
+def compile_segments(segments, distance, position):
+    """
+    Compiles lines, quads, cubics and arcs into jump and mark list commands.
+
+    @param segments: geomstr segments
+    @param distance: interpolation distance for curves
+    @param position: (x, y) current position of the head
+    @return: list commands, as list_command_dtype array
+    """
+    segments = np.asarray(segments, dtype=complex).reshape(-1, 5)
+    kinds = segments[:, 2].real.astype(int) & 0xFF
+    count = len(segments)
+    interior = np.zeros(count, dtype=int)
+    curves = np.flatnonzero(
+        (kinds == TYPE_QUAD) | (kinds == TYPE_CUBIC) | (kinds == TYPE_ARC)
+    )
+    curve_counts, curve_points = interpolate_curves(
+        segments[curves], kinds[curves], distance
+    )
+    interior[curves] = curve_counts
+
+    # Point stream: start jump, interior marks and end mark of every segment.
+    sizes = interior + 2
+    offsets = np.cumsum(sizes) - sizes
+    points = np.empty(int(np.sum(sizes)), dtype=complex)
+    jump = np.zeros(len(points), dtype=bool)
+    points[offsets] = segments[:, 0]
+    jump[offsets] = True
+    points[offsets + sizes - 1] = segments[:, 4]
+    if len(curve_points):
+        starts = np.repeat(offsets[curves] + 1, curve_counts)
+        points[
+            starts
+            + np.arange(len(curve_points))
+            - np.repeat(np.cumsum(curve_counts) - curve_counts, curve_counts)
+        ] = curve_points
+
+    # Moves out of range are not performed.
+    x = points.real
+    y = points.imag
+    valid = (x >= 0) & (x <= 0xFFFF) & (y >= 0) & (y <= 0xFFFF)
+    x = x[valid]
+    y = y[valid]
+    jump = jump[valid]
+    xi = x.astype(np.int64)
+    yi = y.astype(np.int64)
+
+    # Moves to the current position are skipped, they do not change the position.
+    last_x = np.empty(len(xi), dtype=float)
+    last_y = np.empty(len(yi), dtype=float)
+    if len(xi):
+        last_x[0], last_y[0] = position
+        last_x[1:] = xi[:-1]
+        last_y[1:] = yi[:-1]
+    moved = (x != last_x) | (y != last_y)
+    commands = np.zeros(int(np.count_nonzero(moved)), dtype=list_command_dtype)
+    commands["command"] = np.where(jump[moved], listJumpTo, listMarkTo)
+    commands["v1"] = xi[moved]
+    commands["v2"] = yi[moved]
+    commands["v4"] = np.minimum(
+        np.hypot(x[moved] - last_x[moved], y[moved] - last_y[moved]).astype(np.int64),
+        0xFFFF,
+    )
+    return commands
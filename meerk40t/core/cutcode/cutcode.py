@@ -12,6 +12,7 @@ are references to settings which may be shared by all CutObjects created by a La
 from ...svgelements import Color, Path, Point
 from .cubiccut import CubicCut
 from .cutgroup import CutGroup
+from .kinematics import KinematicEstimator
 from .linecut import LineCut
 from .plotcut import PlotCut
 from .quadcut import QuadCut
@@ -89,97 +90,17 @@ class CutCode(CutGroup):
             yield "plot", cutobject
         yield "plot_start"
 
-    def provide_statistics(self, include_start=False):
-        result = []
-        cutcode = list(self.flat())
-        if len(cutcode) == 0:
-            item = {
-                "type": "",
-                "total_distance_travel": 0,
-                "total_distance_cut": 0,
-                "total_time_extra": 0,
-                "total_time_travel": 0,
-                "total_time_cut": 0,
-                "time_at_start": 0,
-                "time_at_end_of_travel": 0,
-                "time_at_end_of_burn": 0,
-                "total_internal_travel": 0,
-            }
-            result.append(item)
-            return result
-        stop_at = len(cutcode)
-        total_distance_travel = 0
-        total_distance_cut = 0
-        total_extra = 0
-        total_duration_cut = 0
-        total_duration_travel = 0
-        total_internal_travel = 0
-        if include_start:
-            if self.start is not None:
-                total_distance_travel += abs(
-                    complex(*self.start) - complex(*cutcode[0].start)
-                )
-            else:
-                total_distance_travel += abs(0 - complex(*cutcode[0].start))
-        previous_total_time = 0
-        for i in range(0, stop_at):
-            duration_of_this_travel = 0
-            duration_of_this_burn = 0
-            length_of_previous_travel = 0
-            current = cutcode[i]
-            if i > 0:
-                prev = cutcode[i - 1]
-                length_of_previous_travel = Point.distance(prev.end, current.start)
-                total_distance_travel += length_of_previous_travel
-            rapid_speed = self._native_speed(cutcode)
-            if rapid_speed is not None and rapid_speed != 0:
-                total_duration_travel = total_distance_travel / rapid_speed
-                duration_of_this_travel = length_of_previous_travel / rapid_speed
-
-            cut_type = type(current).__name__
-            current_length = current.internal_length()
-            current_travel = current.internal_travel()
-            total_internal_travel += current_travel
-            total_distance_cut += current_length + current_travel
-            current_extra = current.extra()
-            total_extra += current_extra
-            cs = current.settings
-            # Speed is in mm/sec while native_speed and distance need to be in native units!
-            native_mm = cs.get("native_mm", 39.3701)
-            default_speed = cs.get("speed", 0) * native_mm
-            native_speed = cs.get("native_speed", default_speed)
-            native_speed *= 0.91
-            default_speed *= 0.91
-            if native_speed != 0:
-                duration_of_this_burn = (current_length + current_travel) / native_speed
-                total_duration_cut += duration_of_this_burn
-
-            end_of_this_travel = previous_total_time + duration_of_this_travel
-            end_of_this_burn = (
-                previous_total_time
-                + duration_of_this_travel
-                + current_extra
-                + duration_of_this_burn
-            )
-            item = {
-                "type": cut_type,
-                "total_distance_travel": total_distance_travel,
-                "total_distance_cut": total_distance_cut,
-                "total_time_extra": total_extra,
-                "total_time_travel": total_duration_travel,
-                "total_time_cut": total_duration_cut,
-                "time_at_start": previous_total_time,
-                "time_at_end_of_travel": end_of_this_travel,
-                "time_at_end_of_burn": end_of_this_burn,
-                "total_internal_travel": total_internal_travel,
-            }
-            # print (item)
-            result.append(item)
-            previous_total_time = (
-                total_duration_cut + total_duration_travel + total_extra
-            )
+    def provide_statistics(self, include_start=False, estimator=None):
+        """
+        Cumulative distances and times for every cut within this cutcode.
 
-        return result
+        @param include_start: should the travel from the start be included
+        @param estimator: KinematicEstimator to use, default motion settings if None
+        @return: list of dicts, one per cut
+        """
+        if estimator is None:
+            estimator = KinematicEstimator()
+        return estimator.statistics(self, include_start=include_start)
 
     def length_travel(self, include_start=False, stop_at=-1):
         """
@@ -239,26 +160,21 @@ class CutCode(CutGroup):
             extra += current.extra()
         return extra
 
-    def duration_cut(self, stop_at=None):
+    def duration_cut(self, stop_at=None, estimator=None):
         """
         Time taken to cut this cutcode object. Since objects can cut at different speed each individual object
         speed is taken into account.
 
         @param stop_at: stop index
+        @param estimator: KinematicEstimator to use, default motion settings if None
         @return:
         """
-        cutcode = list(self.flat())
-        duration = 0
-        if stop_at is None or stop_at < 0 or stop_at > len(cutcode):
-            stop_at = len(cutcode)
-        for current in cutcode[0:stop_at]:
-            cs = current.settings
-            native_mm = cs.get("native_mm", 39.3701)
-            default_speed = cs.get("speed", 0) * native_mm
-            native_speed = cs.get("native_speed", default_speed)
-            if native_speed != 0:
-                duration += current.length() / native_speed
-        return duration
+        if estimator is None:
+            estimator = KinematicEstimator()
+        cuts, timings = estimator.timings(self)
+        if stop_at is None or stop_at < 0 or stop_at > len(cuts):
+            stop_at = len(cuts)
+        return float(timings["time_cut"][:stop_at].sum())
 
     def _native_speed(self, cutcode):
         if cutcode:
@@ -276,19 +192,20 @@ class CutCode(CutGroup):
         native_speed = cs.get("native_rapid_speed", cs.get("native_speed", None))
         return native_speed
 
-    def duration_travel(self, stop_at=None):
+    def duration_travel(self, stop_at=None, estimator=None):
         """
         Duration of travel time taken within the cutcode.
 
         @param stop_at: stop index
+        @param estimator: KinematicEstimator to use, default motion settings if None
         @return:
         """
-        travel = self.length_travel(stop_at=stop_at)
-        cutcode = list(self.flat())
-        rapid_speed = self._native_speed(cutcode)
-        if rapid_speed is None:
-            return 0
-        return travel / rapid_speed
+        if estimator is None:
+            estimator = KinematicEstimator()
+        cuts, timings = estimator.timings(self)
+        if stop_at is None or stop_at < 0 or stop_at > len(cuts):
+            stop_at = len(cuts)
+        return float(timings["time_travel"][:stop_at].sum())
 
     def reordered(self, order):
         """
@@ -0,0 +1,264 @@
+"""
+Kinematic time estimation for cutcode.
+
+The estimator models every move with a trapezoidal velocity profile: the head
+accelerates with a constant acceleration up to the requested speed, cruises and
+decelerates again. Short moves never reach their speed and are triangular.
+
+Consecutive cuts that join without a travel do not stop at their junction, they pass
+it with a corner speed that depends on the angle between both cuts: full speed for
+collinear cuts, the configured corner speed for a right angle and zero for a reversal.
+Travels start and end at rest.
+
+Rasters are split into their scanlines, each scanline starts and ends at rest, and
+every scanline pays the step-over move to the next one plus a fixed turnaround time.
+The overscan is part of the scanline distance, so a raster with too little overscan
+is not faster; the head is simply still accelerating while burning.
+
+All values are gathered with a single pass over the cutcode, the timing itself is
+computed with numpy over all cuts at once.
+
+Acceleration and corner speed are given in mm/s² and mm/s, the turnaround in seconds.
+An acceleration of 0 disables the motion model, every move is then taken at its speed.
+"""
+
+import numpy as np
+
+from .rastercut import RasterCut
+
+DEFAULT_ACCELERATION = 500.0
+DEFAULT_CORNER_SPEED = 5.0
+DEFAULT_RASTER_TURNAROUND = 0.02
+
+STATISTIC_KEYS = (
+    "type",
+    "total_distance_travel",
+    "total_distance_cut",
+    "total_time_extra",
+    "total_time_travel",
+    "total_time_cut",
+    "time_at_start",
+    "time_at_end_of_travel",
+    "time_at_end_of_burn",
+    "total_internal_travel",
+)
+
+
+def move_time(distance, speed, acceleration, v_in=0.0, v_out=0.0):
+    """
+    Time for moves of the given distance with a trapezoidal speed profile.
+
+    All parameters may be numpy arrays of the same shape. Moves with a speed of 0 take
+    no time, moves with an acceleration of 0 (or less) are taken at constant speed.
+
+    @param distance: length of the move
+    @param speed: requested speed
+    @param acceleration: acceleration in the same units as distance and speed
+    @param v_in: speed at the start of the move
+    @param v_out: speed at the end of the move
+    @return: array of times
+    """
+    d = np.asarray(distance, dtype=float)
+    v = np.asarray(speed, dtype=float)
+    a = np.asarray(acceleration, dtype=float)
+    v0 = np.minimum(np.asarray(v_in, dtype=float), v)
+    v1 = np.minimum(np.asarray(v_out, dtype=float), v)
+    d, v, a, v0, v1 = np.broadcast_arrays(d, v, a, v0, v1)
+    moving = v > 0
+    accelerated = moving & (a > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        constant = np.where(moving, d / v, 0.0)
+        ramp_in = (v * v - v0 * v0) / (2 * a)
+        ramp_out = (v * v - v1 * v1) / (2 * a)
+        cruise = d - ramp_in - ramp_out
+        trapezoid = (2 * v - v0 - v1) / a + cruise / v
+        # Moves too short to reach their speed peak somewhere below it.
+        peak = np.sqrt(np.maximum(a * d + (v0 * v0 + v1 * v1) / 2, 0))
+        triangle = (2 * peak - v0 - v1) / a
+        # Junction speeds that cannot be reconciled within the move, take the mean.
+        direct = np.where(v0 + v1 > 0, 2 * d / (v0 + v1), 0.0)
+        short = np.where(peak >= np.maximum(v0, v1), triangle, direct)
+        timed = np.where(cruise >= 0, trapezoid, short)
+    return np.where(accelerated, timed, constant)
+
+
+class KinematicEstimator:
+    """
+    Estimates the time cutcode takes to run on a device with limited acceleration.
+    """
+
+    def __init__(
+        self,
+        acceleration=DEFAULT_ACCELERATION,
+        corner_speed=DEFAULT_CORNER_SPEED,
+        raster_turnaround=DEFAULT_RASTER_TURNAROUND,
+    ):
+        self.acceleration = float(acceleration or 0)
+        self.corner_speed = float(corner_speed or 0)
+        self.raster_turnaround = float(raster_turnaround or 0)
+
+    @classmethod
+    def from_device(cls, device):
+        """
+        Estimator with the motion settings of the given device, defaults where the
+        device does not provide them.
+        """
+        return cls(
+            acceleration=getattr(device, "motion_acceleration", DEFAULT_ACCELERATION),
+            corner_speed=getattr(device, "motion_corner_speed", DEFAULT_CORNER_SPEED),
+            raster_turnaround=getattr(
+                device, "motion_raster_turnaround", DEFAULT_RASTER_TURNAROUND
+            ),
+        )
+
+    def _gather(self, cutcode, include_start=False):
+        """
+        Single pass over the flattened cutcode collecting the values of every cut.
+        """
+        cuts = list(cutcode.flat())
+        count = len(cuts)
+        values = np.zeros((count, 11), dtype=float)
+        rapid_speed = cutcode._native_speed(cuts)
+        for i, cut in enumerate(cuts):
+            cs = cut.settings
+            native_mm = cs.get("native_mm", 39.3701)
+            speed = cs.get("native_speed", (cs.get("speed", 0) or 0) * native_mm)
+            sx, sy = cut.start
+            ex, ey = cut.end
+            row = values[i]
+            row[0] = sx
+            row[1] = sy
+            row[2] = ex
+            row[3] = ey
+            row[4] = cut.internal_length()
+            row[5] = cut.internal_travel()
+            row[6] = speed or 0
+            row[7] = native_mm
+            if isinstance(cut, RasterCut):
+                lines = cut.height if cut.horizontal else cut.width
+                row[8] = max(lines, 1)
+                row[9] = cut.step_y if cut.horizontal else cut.step_x
+            else:
+                # Dwell and wait cuts hold for their dwell time, given in ms.
+                row[10] = cut.extra() + (getattr(cut, "dwell_time", 0) or 0) / 1000.0
+        if count and include_start:
+            start = cutcode.start if cutcode.start is not None else (0, 0)
+        else:
+            start = None
+        return cuts, values, rapid_speed, start
+
+    def timings(self, cutcode, include_start=False):
+        """
+        Per cut distances and times of the cutcode.
+
+        @param cutcode: cutcode to estimate
+        @param include_start: include the travel from the cutcode start to the first cut
+        @return: cuts and dict of arrays: travel, cut, internal, time_travel, time_cut, time_extra
+        """
+        cuts, values, rapid_speed, start = self._gather(cutcode, include_start)
+        sx, sy, ex, ey = values[:, 0], values[:, 1], values[:, 2], values[:, 3]
+        internal_length = values[:, 4]
+        internal_travel = values[:, 5]
+        speed = values[:, 6]
+        native_mm = values[:, 7]
+        lines = values[:, 8]
+        step = values[:, 9]
+        extra = values[:, 10]
+        raster = lines > 0
+        acceleration = self.acceleration * native_mm
+        corner = self.corner_speed * native_mm
+
+        travel = np.zeros(len(cuts))
+        if len(cuts):
+            travel[1:] = np.hypot(sx[1:] - ex[:-1], sy[1:] - ey[:-1])
+            if start is not None:
+                travel[0] = np.hypot(sx[0] - start[0], sy[0] - start[1])
+        rapid = float(rapid_speed or 0)
+        time_travel = move_time(travel, rapid, acceleration)
+
+        # Junction speeds between cuts that follow each other without travel.
+        v_in = np.zeros(len(cuts))
+        if len(cuts) > 1:
+            dx = ex - sx
+            dy = ey - sy
+            norm = np.hypot(dx, dy)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                cos = (dx[:-1] * dx[1:] + dy[:-1] * dy[1:]) / (norm[:-1] * norm[1:])
+            cos = np.nan_to_num(cos, nan=0.0)
+            limit = np.minimum(speed[:-1], speed[1:])
+            junction = np.where(
+                cos >= 0,
+                corner[1:] + (limit - corner[1:]) * cos,
+                corner[1:] * (1 + cos),
+            )
+            junction = np.clip(junction, 0, limit)
+            joined = (travel[1:] == 0) & ~raster[:-1] & ~raster[1:]
+            v_in[1:] = np.where(joined, junction, 0)
+        v_out = np.zeros(len(cuts))
+        v_out[:-1] = v_in[1:]
+
+        distance = internal_length + internal_travel
+        scanlines = np.where(raster, lines, 1)
+        time_cut = (
+            move_time(
+                distance / scanlines,
+                speed,
+                acceleration,
+                np.where(raster, 0, v_in),
+                np.where(raster, 0, v_out),
+            )
+            * scanlines
+        )
+        # Rasters step over to the next scanline and turn around at every line.
+        turnaround = move_time(step, rapid, acceleration) + self.raster_turnaround
+        time_extra = np.where(raster, turnaround * lines, extra)
+        return cuts, {
+            "travel": travel,
+            "cut": distance,
+            "internal": internal_travel,
+            "time_travel": time_travel,
+            "time_cut": time_cut,
+            "time_extra": time_extra,
+        }
+
+    def estimate(self, cutcode, include_start=False):
+        """
+        Total time in seconds the cutcode takes.
+        """
+        cuts, t = self.timings(cutcode, include_start)
+        return float(
+            np.sum(t["time_travel"]) + np.sum(t["time_cut"]) + np.sum(t["time_extra"])
+        )
+
+    def statistics(self, cutcode, include_start=False):
+        """
+        Cumulative statistics for every cut of the cutcode, see CutCode.provide_statistics.
+        """
+        cuts, t = self.timings(cutcode, include_start)
+        if not cuts:
+            item = dict.fromkeys(STATISTIC_KEYS, 0)
+            item["type"] = ""
+            return [item]
+        total_travel = np.cumsum(t["travel"])
+        total_cut = np.cumsum(t["cut"])
+        total_internal = np.cumsum(t["internal"])
+        total_time_travel = np.cumsum(t["time_travel"])
+        total_time_cut = np.cumsum(t["time_cut"])
+        total_time_extra = np.cumsum(t["time_extra"])
+        end_of_burn = total_time_travel + total_time_cut + total_time_extra
+        at_start = np.zeros(len(cuts))
+        at_start[1:] = end_of_burn[:-1]
+        end_of_travel = at_start + t["time_travel"]
+        columns = zip(
+            (type(cut).__name__ for cut in cuts),
+            total_travel.tolist(),
+            total_cut.tolist(),
+            total_time_extra.tolist(),
+            total_time_travel.tolist(),
+            total_time_cut.tolist(),
+            at_start.tolist(),
+            end_of_travel.tolist(),
+            end_of_burn.tolist(),
+            total_internal.tolist(),
+        )
+        return [dict(zip(STATISTIC_KEYS, row)) for row in columns]
@@ -25,6 +25,7 @@ import numpy as np
 
 from ..svgelements import Group, Matrix
 from ..tools.geomstr import Geomstr, stitch_geometries, stitcheable_nodes
+from ..tools.rtree import RTree, valid_bounds
 from .cutcode.cutcode import CutCode
 from .cutcode.cutgroup import CutGroup
 from .cutcode.cutobject import CutObject
@@ -1996,10 +1997,8 @@ def is_inside(inner, outer, tolerance=0, debug=False):
         inner_path = inner.path
     if hasattr(outer, "path") and outer.path is not None:
         outer_path = outer.path
-    if not hasattr(inner, "bounding_box"):
-        inner.bounding_box = Group.union_bbox([inner_path])
-    if not hasattr(outer, "bounding_box"):
-        outer.bounding_box = Group.union_bbox([outer_path])
+    cut_bounds(inner)
+    cut_bounds(outer)
     if outer.bounding_box is None:
         if debug:
             print("DEBUG is_inside: outer.bounding_box is None - returning False")
@@ -2094,25 +2093,42 @@ def is_inside(inner, outer, tolerance=0, debug=False):
             if outer_geom is None or inner_geom is None:
                 return None  # Fall back if geometry not available
 
-            # Build scanbeam from outer geometry
-            outer_points = list(outer_geom.as_equal_interpolated_points(distance=20))
-            outer_polygon = Gpoly(*outer_points)
-            scanbeam = Scanbeam(outer_polygon.geomstr)
-
-            # Adaptive sampling: fewer points for simple shapes
-            inner_bbox = getattr(inner, "bounding_box", None)
-            if inner_bbox:
-                bbox_perimeter = 2 * (
-                    (inner_bbox[2] - inner_bbox[0]) + (inner_bbox[3] - inner_bbox[1])
+            # Build scanbeam from outer geometry, once for all inner candidates.
+            cached = getattr(outer, "_inside_scanbeam", None)
+            if cached is not None and cached[0] is outer_geom:
+                scanbeam = cached[1]
+            else:
+                outer_points = list(
+                    outer_geom.as_equal_interpolated_points(distance=20)
                 )
-                sample_distance = max(15, min(50, bbox_perimeter / 100))
+                outer_polygon = Gpoly(*outer_points)
+                scanbeam = Scanbeam(outer_polygon.geomstr)
+                outer._inside_scanbeam = outer_geom, scanbeam
+
+            cached = getattr(inner, "_inside_points", None)
+            if cached is not None and cached[0] is inner_geom:
+                test_points = cached[1]
             else:
-                sample_distance = 25
+                # Adaptive sampling: fewer points for simple shapes
+                inner_bbox = getattr(inner, "bounding_box", None)
+                if inner_bbox:
+                    bbox_perimeter = 2 * (
+                        (inner_bbox[2] - inner_bbox[0])
+                        + (inner_bbox[3] - inner_bbox[1])
+                    )
+                    sample_distance = max(15, min(50, bbox_perimeter / 100))
+                else:
+                    sample_distance = 25
 
-            # Sample points from inner geometry directly
-            test_points = np.array(
-                list(inner_geom.as_equal_interpolated_points(distance=sample_distance))
-            )
+                # Sample points from inner geometry directly
+                test_points = np.array(
+                    list(
+                        inner_geom.as_equal_interpolated_points(
+                            distance=sample_distance
+                        )
+                    )
+                )
+                inner._inside_points = inner_geom, test_points
 
             # Use scanbeam's optimized point-in-polygon test
             results = scanbeam.points_in_polygon(test_points)
@@ -2303,6 +2319,65 @@ def is_inside(inner, outer, tolerance=0, debug=False):
     return result
 
 
+def cut_bounds(cut):
+    """
+    Bounding box of a cut group or raster cut, computed once and kept as .bounding_box.
+
+    @param cut: cut group or raster cut
+    @return: bounds or None
+    """
+    if not hasattr(cut, "bounding_box"):
+        path = cut
+        if hasattr(cut, "path") and cut.path is not None:
+            path = cut.path
+        cut.bounding_box = Group.union_bbox([path])
+    return cut.bounding_box
+
+
+def inside_candidates(groups, outers, tolerance=0):
+    """
+    Pairs each outer group with the groups which can be inside of it.
+
+    is_inside rejects any group whose bounds do not overlap the bounds of the outer
+    widened by the tolerance. The bounds of the groups are indexed in an RTree so each
+    outer only meets the groups overlapping it, rather than every group.
+
+    @param groups: groups that may be inside
+    @param outers: closed groups
+    @param tolerance: tolerance of the containment test
+    @return: list of (outer, candidates), candidates in the order of groups
+    """
+    indexed = []
+    unindexed = []
+    for index, group in enumerate(groups):
+        bounds = cut_bounds(group)
+        if valid_bounds(bounds):
+            indexed.append((index, bounds))
+        elif bounds is not None:
+            # Not comparable by overlap, leave it to is_inside.
+            unindexed.append(index)
+    tree = RTree(indexed)
+    pairs = []
+    for outer in outers:
+        bounds = cut_bounds(outer)
+        if bounds is None:
+            pairs.append((outer, []))
+            continue
+        if not valid_bounds(bounds):
+            pairs.append((outer, list(groups)))
+            continue
+        x0, y0, x1, y1 = bounds
+        found = list(
+            tree.query_rect(
+                (x0 - tolerance, y0 - tolerance, x1 + tolerance, y1 + tolerance)
+            )
+        )
+        found.extend(unindexed)
+        found.sort()
+        pairs.append((outer, [groups[i] for i in found]))
+    return pairs
+
+
 def reify_matrix(self):
     """Apply the matrix to the path and reset matrix."""
     self.element = abs(self.element)
@@ -2370,11 +2445,14 @@ def inner_first_ident(context: CutGroup, kernel=None, channel=None, tolerance=0)
 
     groups = [cut for cut in context if isinstance(cut, (CutGroup, RasterCut))]
     closed_groups = [g for g in groups if isinstance(g, CutGroup) and g.closed]
-    total_pass = len(groups) * len(closed_groups)
     context.contains = closed_groups
+    # Only groups overlapping the bounds of a closed group can be inside of it.
+    candidates = inside_candidates(groups, closed_groups, tolerance)
+    total_pass = sum(len(inners) for outer, inners in candidates)
     if channel:
         channel(
-            f"Compare {len(groups)} groups against {len(closed_groups)} closed groups"
+            f"Compare {len(groups)} groups against {len(closed_groups)} closed groups, "
+            f"{total_pass} overlapping pairs"
         )
 
     constrained = False
@@ -2390,8 +2468,8 @@ def inner_first_ident(context: CutGroup, kernel=None, channel=None, tolerance=0)
         # print(f"Chosen resolution: {resolution} - minscale = {min_res}")
     else:
         busy = None
-    for outer in closed_groups:
-        for inner in groups:
+    for outer, inners in candidates:
+        for inner in inners:
             current_pass += 1
             if outer is inner:
                 continue
@@ -1878,6 +1878,7 @@ def init_commands(kernel):
                     from_idx,
                 ) = merge_paths(other, path, nostitch, tolerance)
                 if to_set_seg is not None:
+                    path.unshare()
                     path.segments[to_set_seg, to_set_idx] = other.segments[
                         from_seg, from_idx
                     ]
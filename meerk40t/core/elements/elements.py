@@ -31,6 +31,7 @@ from meerk40t.core.units import Length
 from meerk40t.core.wordlist import Wordlist
 from meerk40t.kernel import ConsoleFunction, Service, Settings
 from meerk40t.svgelements import Color, Path, Point, SVGElement
+from meerk40t.tools.rtree import RTree
 
 from . import offset_clpr, offset_mk
 from .element_types import elem_group_nodes, elem_nodes, op_parent_nodes, place_nodes
@@ -250,6 +251,23 @@ def plugin(kernel, lifecycle=None):
                 "conditional": (elements, "use_undo"),
                 "signals": "restart",
             },
+            {
+                "attr": "undo_memory",
+                "object": elements,
+                "default": 0,
+                "type": int,
+                "lower": 0,
+                "upper": 4096,
+                "label": _("Memory for Undo-States (MB)"),
+                "tip": _(
+                    "How much memory the undo-states may use at most, older states will be discarded (0 = unlimited)"
+                ),
+                "page": "Start",
+                # Hint for translation _("Undo")
+                "section": "_60_Undo",
+                "conditional": (elements, "use_undo"),
+                "signals": "restart",
+            },
             {
                 "attr": "classify_new",
                 "object": elements,
@@ -675,11 +693,18 @@ class Elemental(Service):
         self.remembered_keyhole_nodes = []
         self.setting(bool, "use_undo", True)
         self.setting(int, "undo_levels", 20)
+        self.setting(int, "undo_memory", 0)
         self.setting(bool, "filenode_selection", False)
 
         undo_active = self.use_undo
         undo_levels = self.undo_levels
-        self.undo = Undo(self, self._tree, active=undo_active, levels=undo_levels)
+        self.undo = Undo(
+            self,
+            self._tree,
+            active=undo_active,
+            levels=undo_levels,
+            max_bytes=self.undo_memory * 1024 * 1024,
+        )
         self.do_undo = True
         self.suppress_updates = False
         self.suppress_signalling = False
@@ -1421,6 +1446,7 @@ class Elemental(Service):
         self.op_data.write_configuration()
         for e in self.flat():
             e.unregister()
+        self.undo.release()
 
     def safe_section_name(self, name):
         res = name
@@ -2252,7 +2278,7 @@ class Elemental(Service):
         """
         Returns whether any element is emphasized
         """
-        for e in self.elems_nodes(emphasized=True):
+        for e in self._tree.flat_emphasized(self.elem_branch, elem_group_nodes):
             if hasattr(e, "hidden") and e.hidden:
                 continue
             return True
@@ -2623,8 +2649,16 @@ class Elemental(Service):
         If any element is emphasized, all operations a references to that element are 'targeted'.
         """
         self.set_start_time("set_emphasis")
+        if emphasize is not None:
+            emphasize = list(emphasize)
+        in_emphasize = set() if emphasize is None else set(emphasize)
+        tree = self._tree
+        # Only nodes carrying a flag or about to be emphasized can change.
+        nodes = dict.fromkeys(tree.flagged_nodes())
+        if emphasize is not None:
+            nodes.update(dict.fromkeys(n for n in emphasize if tree._is_attached(n)))
         with self.signalfree("emphasized"):
-            for s in self._tree.flat():
+            for s in nodes:
                 if s.highlighted:
                     s.highlighted = False
                 if s.targeted:
@@ -2633,7 +2667,7 @@ class Elemental(Service):
                     s.selected = False
                 if not s.can_emphasize:
                     continue
-                in_list = emphasize is not None and s in emphasize
+                in_list = s in in_emphasize
                 if s.emphasized:
                     if not in_list:
                         s.emphasized = False
@@ -2730,27 +2764,25 @@ class Elemental(Service):
         e_list = []
         f_list = []  # found elements...
         if keep_old_selection:
-            for node in self.elems(emphasized=True):
+            for node in self._tree.flat_emphasized(self.elem_branch, elem_nodes):
                 e_list.append(node)
-        for node in self.elems_nodes(emphasized=False):
+        for node in self.elems_nodes_at(position):
+            if node.emphasized:
+                continue
             if not force_filenodes_too and node.type == "file":
                 continue
-            try:
-                bounds = node.bounds
-            except AttributeError:
-                continue  # No bounds.
             if hasattr(node, "hidden") and node.hidden:
                 continue
             # Empty group / files may cause problems
             if node.type in ("group", "file") and not node._children:
-                bounds = None
-            if bounds is None:
                 continue
-            if contains(bounds, position):
-                f_list.append(node)
+            f_list.append(node)
         bounds = None
         bounds_painted = None
         if len(f_list) > 0:
+            # Candidates in tree order, ties are decided by that order.
+            if len(f_list) > 1:
+                f_list.sort(key=self._tree.tree_position)
             # We checked that before, f_list contains only elements with valid bounds...
             e = None
             if use_smallest:
@@ -2802,6 +2834,69 @@ class Elemental(Service):
             self._emphasized_bounds_painted = None
             self.set_emphasis(None)
 
+    def _in_branch(self, node, branch):
+        while node is not None:
+            if node is branch:
+                return True
+            node = node._parent
+        return False
+
+    def elems_nodes_at(self, position, attr="bounds"):
+        """
+        Element and group nodes of the element branch whose bounds contain the position,
+        uses the spatial index of the tree.
+
+        @param position: (x, y) point
+        @param attr: "bounds" or "paint_bounds"
+        @return: list of nodes
+        """
+        branch = self.elem_branch
+        return [
+            node
+            for node in self._tree.nodes_at(position[0], position[1], attr=attr)
+            if self._in_branch(node, branch)
+        ]
+
+    def elems_in_area(self, bounds, contained=False, types=elem_nodes, attr="bounds"):
+        """
+        Nodes of the element branch whose bounds overlap (or are contained by) the given
+        bounds, uses the spatial index of the tree.
+
+        @param bounds: (xmin, ymin, xmax, ymax)
+        @param contained: only nodes fully within bounds
+        @param types: node types to return
+        @param attr: "bounds" or "paint_bounds"
+        @return: list of nodes
+        """
+        branch = self.elem_branch
+        return [
+            node
+            for node in self._tree.nodes_in(bounds, attr=attr, contained=contained)
+            if node.type in types and self._in_branch(node, branch)
+        ]
+
+    def elems_nearest(self, position, count=1, types=elem_nodes, attr="bounds"):
+        """
+        Nodes of the element branch nearest to the position, nearest first.
+
+        @param position: (x, y) point
+        @param count: maximum number of nodes
+        @param types: node types to return
+        @param attr: "bounds" or "paint_bounds"
+        @return: list of (distance, node) tuples
+        """
+        branch = self.elem_branch
+        result = []
+        tree = self._tree
+        for distance, node in tree.nodes_nearest(
+            position[0], position[1], count=len(tree.spatial_index(attr)), attr=attr
+        ):
+            if node.type in types and self._in_branch(node, branch):
+                result.append((distance, node))
+                if len(result) >= count:
+                    break
+        return result
+
     def _valid_color(self, color):
         try:
             if color is not None and color.argb is not None:
@@ -4172,10 +4267,16 @@ class Elemental(Service):
         return False
 
     def group_elements_overlap(self, g1, g2):
+        if len(g1) * len(g2) <= 64:
+            for e1 in g1:
+                for e2 in g2:
+                    if self.bbox_overlap(e1[1], e2[1]):
+                        return True
+            return False
+        index = RTree((idx, e2[1]) for idx, e2 in enumerate(g2))
         for e1 in g1:
-            for e2 in g2:
-                if self.bbox_overlap(e1[1], e2[1]):
-                    return True
+            for idx in index.query_rect(e1[1]):
+                return True
         return False
 
     def remove_invalid_references(self):
@@ -4375,10 +4476,16 @@ class Elemental(Service):
         return "|".join(filetypes)
 
     def find_node(self, identifier):
-        for node in self.flat():
-            if node.id == identifier:
-                return node
-        return None
+        return self._tree.find_id(identifier)
+
+    def find_nodes(self, identifiers):
+        """
+        Looks up several ids at once.
+
+        @param identifiers: iterable of node ids
+        @return: dict of id to node for all ids present in the tree
+        """
+        return self._tree.find_ids(identifiers)
 
     def has_keyhole_subscribers(self, node):
         if node is None or node.id is None:
@@ -947,7 +947,9 @@ def init_commands(kernel):
             node_path.validate_connections()
             with self.node_lock:
                 newnode = self.elem_branch.add(
-                    path=node_path, type="elem path", stroke=node.stroke
+                    path=node_path,
+                    type="elem path",
+                    stroke=getattr(node, "stroke", None),
                 )
             newnode.stroke_width = UNITS_PER_PIXEL
             newnode.linejoin = Linejoin.JOIN_ROUND
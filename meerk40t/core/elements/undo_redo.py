@@ -113,5 +113,6 @@ def init_commands(kernel):
     def undo_list(command, channel, _, **kwgs):
         for entry in self.undo.undolist():
             channel(entry)
+        channel(_("Memory used: {size:.1f} kB").format(size=self.undo.memory / 1024))
 
     # --------------------------- END COMMANDS ------------------------------
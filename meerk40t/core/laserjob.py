@@ -11,6 +11,7 @@ import time
 from math import isinf
 
 from meerk40t.core.cutcode.cutcode import CutCode
+from meerk40t.core.cutcode.kinematics import KinematicEstimator
 
 
 class LaserJob:
@@ -36,11 +37,10 @@ class LaserJob:
 
         self._estimate = 0
 
+        estimator = KinematicEstimator.from_device(getattr(driver, "service", None))
         for item in self.items:
             if isinstance(item, CutCode):
-                stats = item.provide_statistics()
-                final_values = stats[-1]
-                self._estimate = final_values["time_at_end_of_burn"]
+                self._estimate += estimator.estimate(item)
         self.outline = outline
 
     def __str__(self):
@@ -1,14 +1,14 @@
 from copy import copy
 from math import sqrt
 
-from meerk40t.core.node.mixins import Suppressable
+from meerk40t.core.node.mixins import CachedEffect, Suppressable
 from meerk40t.core.node.node import Node
 from meerk40t.core.units import Angle, Length
 from meerk40t.svgelements import Color, Point
 from meerk40t.tools.geomstr import Geomstr  # ,  Scanbeam
 
 
-class HatchEffectNode(Node, Suppressable):
+class HatchEffectNode(Node, Suppressable, CachedEffect):
     """
     Effect node performing a hatch with multiple algorithm options for optimal performance.
 
@@ -163,12 +163,14 @@ class HatchEffectNode(Node, Suppressable):
         Node.notify_modified(self, node=node, **kwargs)
         if node is self:
             return
+        self.effect_cache_clear()
         self.altered()
 
     def notify_altered(self, node=None, **kwargs):
         Node.notify_altered(self, node=node, **kwargs)
         if node is self:
             return
+        self.effect_cache_clear()
         self.altered()
 
     def notify_scaled(self, node=None, sx=1, sy=1, ox=0, oy=0, interim=False, **kwargs):
@@ -178,6 +180,7 @@ class HatchEffectNode(Node, Suppressable):
         if interim:
             self.set_interim()
         else:
+            self.effect_cache_clear()
             self.altered()
 
     def notify_translated(self, node=None, dx=0, dy=0, interim=False, **kwargs):
@@ -187,6 +190,7 @@ class HatchEffectNode(Node, Suppressable):
         if interim:
             self.set_interim()
         else:
+            # Translations keep the cached hatch, it is moved along.
             self.altered()
 
     @property
@@ -341,14 +345,17 @@ class HatchEffectNode(Node, Suppressable):
 
         return result
 
-    def as_geometry(self, **kws) -> Geomstr:
-        """
-        Calculates the hatch effect geometry. The pass index is the number of copies of this geometry whereas the
-        internal loops value is rotated each pass by the angle-delta.
+    def effect_key(self):
+        return (
+            self.hatch_algorithm,
+            self._distance,
+            self._angle,
+            self._angle_delta,
+            self.loops,
+            self.unidirectional,
+        )
 
-        @param kws:
-        @return:
-        """
+    def outlines(self, **kws) -> Geomstr:
         outlines = Geomstr()
         for node in self.affected_children():
             try:
@@ -356,11 +363,25 @@ class HatchEffectNode(Node, Suppressable):
             except AttributeError:
                 # If direct children lack as_geometry(), do nothing.
                 pass
+        return outlines
+
+    def as_geometry(self, **kws) -> Geomstr:
+        """
+        Calculates the hatch effect geometry. The pass index is the number of copies of this geometry whereas the
+        internal loops value is rotated each pass by the angle-delta.
+
+        @param kws:
+        @return:
+        """
         if self._interim:
-            return outlines
-        path = Geomstr()
+            return self.outlines(**kws)
         if self._distance is None:
             self.recalculate()
+        return self.cached_geometry(self._hatch_geometry, **kws)
+
+    def _hatch_geometry(self, **kws) -> Geomstr:
+        outlines = self.outlines(**kws)
+        path = Geomstr()
         for p in range(self.loops):
             # Choose algorithm based on selection and complexity
             if self._should_use_direct_grid():
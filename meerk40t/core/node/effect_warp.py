@@ -1,13 +1,13 @@
 from copy import copy
 
-from meerk40t.core.node.mixins import FunctionalParameter, Suppressable
+from meerk40t.core.node.mixins import CachedEffect, FunctionalParameter, Suppressable
 from meerk40t.core.node.node import Node
 from meerk40t.svgelements import Color
 from meerk40t.tools.geomstr import Geomstr
 from meerk40t.tools.pmatrix import PMatrix
 
 
-class WarpEffectNode(Node, FunctionalParameter, Suppressable):
+class WarpEffectNode(Node, FunctionalParameter, Suppressable, CachedEffect):
     """
     Effect node performing a warp. Effects are themselves a sort of geometry node that contains other geometry and
     the required data to produce additional geometry.
@@ -158,6 +158,7 @@ class WarpEffectNode(Node, FunctionalParameter, Suppressable):
         Node.notify_modified(self, node=node, **kwargs)
         if node is self:
             return
+        self.effect_cache_clear()
         self.altered()
         self.set_bounds_parameters()
 
@@ -165,6 +166,7 @@ class WarpEffectNode(Node, FunctionalParameter, Suppressable):
         Node.notify_altered(self, node=node, **kwargs)
         if node is self:
             return
+        self.effect_cache_clear()
         self.altered()
         self.set_bounds_parameters()
 
@@ -283,13 +285,10 @@ class WarpEffectNode(Node, FunctionalParameter, Suppressable):
         nodes = right_types(self)
         return nodes
 
-    def as_geometry(self, **kws) -> Geomstr:
-        """
-        Calculates the warp effect geometry.
+    def effect_key(self):
+        return (self.d1, self.d2, self.d3, self.d4)
 
-        @param kws:
-        @return:
-        """
+    def outlines(self, **kws) -> Geomstr:
         outlines = Geomstr()
         for node in self.affected_children():
             try:
@@ -297,9 +296,21 @@ class WarpEffectNode(Node, FunctionalParameter, Suppressable):
             except AttributeError:
                 # If direct children lack as_geometry(), do nothing.
                 pass
+        return outlines
+
+    def as_geometry(self, **kws) -> Geomstr:
+        """
+        Calculates the warp effect geometry.
+
+        @param kws:
+        @return:
+        """
         if self._interim:
-            return outlines
+            return self.outlines(**kws)
+        return self.cached_geometry(self._warp_geometry, **kws)
 
+    def _warp_geometry(self, **kws) -> Geomstr:
+        outlines = self.outlines(**kws)
         self.set_bounds_parameters()
 
         self.perspective_matrix = PMatrix.map(
@@ -333,6 +344,7 @@ class WarpEffectNode(Node, FunctionalParameter, Suppressable):
         if interim:
             self.set_interim()
         else:
+            self.effect_cache_clear()
             self.altered()
 
     def notify_translated(self, node=None, dx=0, dy=0, interim=False, **kwargs):
@@ -342,6 +354,7 @@ class WarpEffectNode(Node, FunctionalParameter, Suppressable):
         if interim:
             self.set_interim()
         else:
+            # Translations keep the cached warp, it is moved along.
             self.altered()
 
     def can_drop(self, drag_node):
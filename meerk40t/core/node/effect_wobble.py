@@ -2,14 +2,14 @@ import math
 from copy import copy
 from math import sqrt
 
-from meerk40t.core.node.mixins import Suppressable
+from meerk40t.core.node.mixins import CachedEffect, Suppressable
 from meerk40t.core.node.node import Node
 from meerk40t.core.units import Length
 from meerk40t.svgelements import Color
 from meerk40t.tools.geomstr import Geomstr  # ,  Scanbeam
 
 
-class WobbleEffectNode(Node, Suppressable):
+class WobbleEffectNode(Node, Suppressable, CachedEffect):
     """
     Effect node performing a wobble. Effects are themselves a sort of geometry node that contains other geometry and
     the required data to produce additional geometry.
@@ -131,12 +131,14 @@ class WobbleEffectNode(Node, Suppressable):
         Node.notify_modified(self, node=node, **kwargs)
         if node is self:
             return
+        self.effect_cache_clear()
         self.altered()
 
     def notify_altered(self, node=None, **kwargs):
         Node.notify_altered(self, node=node, **kwargs)
         if node is self:
             return
+        self.effect_cache_clear()
         self.altered()
 
     def notify_scaled(self, node=None, sx=1, sy=1, ox=0, oy=0, interim=False, **kwargs):
@@ -146,6 +148,7 @@ class WobbleEffectNode(Node, Suppressable):
         if interim:
             self.set_interim()
         else:
+            self.effect_cache_clear()
             self.altered()
 
     def notify_translated(self, node=None, dx=0, dy=0, interim=False, **kwargs):
@@ -155,6 +158,7 @@ class WobbleEffectNode(Node, Suppressable):
         if interim:
             self.set_interim()
         else:
+            # Translations keep the cached wobble, it is moved along.
             self.altered()
 
     def append_child(self, new_child):
@@ -304,14 +308,10 @@ class WobbleEffectNode(Node, Suppressable):
         self.recalculate()
         return result
 
-    def as_geometry(self, **kws) -> Geomstr:
-        """
-        Calculates the hatch effect geometry. The pass index is the number of copies of this geometry whereas the
-        internal loops value is rotated each pass by the angle-delta.
+    def effect_key(self):
+        return (self.wobble_type, self._radius, self._interval, self.wobble_speed)
 
-        @param kws:
-        @return:
-        """
+    def outlines(self, **kws) -> Geomstr:
         outlines = Geomstr()
         for node in self.affected_children():
             try:
@@ -319,12 +319,24 @@ class WobbleEffectNode(Node, Suppressable):
             except AttributeError:
                 # If direct children lack as_geometry(), do nothing.
                 pass
-        if self._interim:
-            return outlines
+        return outlines
 
-        path = Geomstr()
+    def as_geometry(self, **kws) -> Geomstr:
+        """
+        Calculates the wobble effect geometry.
+
+        @param kws:
+        @return:
+        """
+        if self._interim:
+            return self.outlines(**kws)
         if self._radius is None or self._interval is None:
             self.recalculate()
+        return self.cached_geometry(self._wobble_geometry, **kws)
+
+    def _wobble_geometry(self, **kws) -> Geomstr:
+        outlines = self.outlines(**kws)
+        path = Geomstr()
 
         if self.wobble_type == "circle":
             path.append(
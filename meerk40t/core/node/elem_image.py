@@ -217,7 +217,7 @@ class ImageNode(Node, LabelDisplay, Suppressable):
     def keyhole_reference(self, value):
         self._keyhole_reference = value
         self._keyhole_geometry = None
-        self._bounds_dirty = True
+        self.set_dirty_bounds()
 
     def set_keyhole(self, keyhole_ref, geom=None):
         # This is useful if we do want to set it after loading a file
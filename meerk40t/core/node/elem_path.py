@@ -1,6 +1,7 @@
 from copy import copy
 
 from meerk40t.core.node.mixins import (
+    CachedGeometry,
     FunctionalParameter,
     LabelDisplay,
     Stroked,
@@ -15,7 +16,9 @@ from meerk40t.svgelements import (
 from meerk40t.tools.geomstr import Geomstr
 
 
-class PathNode(Node, Stroked, FunctionalParameter, LabelDisplay, Suppressable):
+class PathNode(
+    Node, Stroked, FunctionalParameter, LabelDisplay, Suppressable, CachedGeometry
+):
     """
     PathNode is the bootstrapped node type for the 'elem path' type.
     """
@@ -27,23 +30,23 @@ class PathNode(Node, Stroked, FunctionalParameter, LabelDisplay, Suppressable):
                 kwargs["geometry"] = args[0]
             else:
                 kwargs["path"] = args[0]
-        if "geometry" not in kwargs:
-            shape = kwargs.get("path")
-            if shape is not None:
-                # path is type Path.
-                if "stroke" not in kwargs:
-                    kwargs["stroke"] = shape.stroke
-                if "stroke_width" not in kwargs:
-                    kwargs["stroke_width"] = shape.implicit_stroke_width
-                if "fill" not in kwargs:
-                    kwargs["fill"] = shape.fill
-                if "matrix" not in kwargs:
-                    kwargs["matrix"] = shape.transform
-                if "stroke_scale" not in kwargs:
-                    kwargs["stroke_scale"] = (
-                        shape.values.get(SVG_ATTR_VECTOR_EFFECT)
-                        != SVG_VALUE_NON_SCALING_STROKE
-                    )
+        # path is type Path, it is converted once here rather than again by the path setter.
+        shape = kwargs.pop("path", None)
+        if shape is not None:
+            if "stroke" not in kwargs:
+                kwargs["stroke"] = shape.stroke
+            if "stroke_width" not in kwargs:
+                kwargs["stroke_width"] = shape.implicit_stroke_width
+            if "fill" not in kwargs:
+                kwargs["fill"] = shape.fill
+            if "matrix" not in kwargs:
+                kwargs["matrix"] = shape.transform
+            if "stroke_scale" not in kwargs:
+                kwargs["stroke_scale"] = (
+                    shape.values.get(SVG_ATTR_VECTOR_EFFECT)
+                    != SVG_VALUE_NON_SCALING_STROKE
+                )
+            if "geometry" not in kwargs:
                 self.geometry = Geomstr.svg(shape)
         self.matrix = None
         self.fill = None
@@ -107,14 +110,11 @@ class PathNode(Node, Stroked, FunctionalParameter, LabelDisplay, Suppressable):
         self.geometry = Geomstr.svg(new_path)
 
     def as_geometry(self, **kws) -> Geomstr:
-        path = Geomstr(self.geometry)
-        path.transform(self.matrix)
-        return path
+        return self.transformed_geometry()
 
     def final_geometry(self, **kws) -> Geomstr:
         unit_factor = kws.get("unitfactor", 1)
-        path = Geomstr(self.geometry)
-        path.transform(self.matrix)
+        path = self.transformed_geometry()
         # This is only true in scene units but will be compensated for devices by unit_factor
         unit_mm = 65535 / 2.54 / 10
         resolution = 0.05 * unit_mm
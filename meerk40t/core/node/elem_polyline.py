@@ -1,6 +1,7 @@
 from copy import copy
 
 from meerk40t.core.node.mixins import (
+    CachedGeometry,
     FunctionalParameter,
     LabelDisplay,
     Stroked,
@@ -18,7 +19,9 @@ from meerk40t.svgelements import (
 from meerk40t.tools.geomstr import Geomstr
 
 
-class PolylineNode(Node, Stroked, FunctionalParameter, LabelDisplay, Suppressable):
+class PolylineNode(
+    Node, Stroked, FunctionalParameter, LabelDisplay, Suppressable, CachedGeometry
+):
     """
     PolylineNode is the bootstrapped node type for the 'elem polyline' type.
     """
@@ -135,14 +138,11 @@ class PolylineNode(Node, Stroked, FunctionalParameter, LabelDisplay, Suppressabl
         self.geometry = Geomstr.svg(Path(new_shape))
 
     def as_geometry(self, **kws) -> Geomstr:
-        path = Geomstr(self.geometry)
-        path.transform(self.matrix)
-        return path
+        return self.transformed_geometry()
 
     def final_geometry(self, **kws) -> Geomstr:
         unit_factor = kws.get("unitfactor", 1)
-        path = Geomstr(self.geometry)
-        path.transform(self.matrix)
+        path = self.transformed_geometry()
         # This is only true in scene units but will be compensated for devices by unit_factor
         unit_mm = 65535 / 2.54 / 10
         resolution = 0.05 * unit_mm
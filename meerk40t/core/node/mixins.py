@@ -8,6 +8,8 @@ The use of ABC allows @abstractmethod decorators which require any subclass to i
 from abc import ABC
 from math import sqrt
 
+from meerk40t.tools.geomstr import Geomstr
+
 
 class Stroked(ABC):
     """
@@ -89,15 +91,16 @@ class Stroked(ABC):
         self._stroke_zero = sqrt(abs(matrix.determinant))
 
     def set_geometry(self, geom):
-        # We have been given a new geometry. 
+        # We have been given a new geometry.
         # If we have a "geometry" property then we need to set it
-        # This method needs to be overridden in subclasses 
+        # This method needs to be overridden in subclasses
         # if a special handling is required, eg. node type change.
         if hasattr(self, "geometry"):
             self.geometry = geom
             self.altered()
         return self
-    
+
+
 class FunctionalParameter(ABC):
     """
     Functional Parameters mixin allows the use and utility of functional parameters for this node type.
@@ -142,3 +145,117 @@ class Suppressable(ABC):
                     kwargs["hidden"] = False
             self.hidden = kwargs["hidden"]
         super().__init__()
+
+
+class CachedGeometry(ABC):
+    """
+    Nodes inheriting this keep their .geometry transformed by their .matrix.
+
+    The cache is keyed on the matrix and on the version of the geometry, its segment array
+    and length. The cached geometry shares the segments of .geometry copy-on-write, so any
+    edit of .geometry replaces its segment array. Callers get geomstr sharing the cached
+    segments, repeated reads do not copy and only a caller editing its geometry allocates.
+    """
+
+    _transformed_geometry = None
+
+    def transformed_geometry(self) -> Geomstr:
+        geometry = self.geometry
+        matrix = self.matrix
+        key = (
+            geometry,
+            geometry.segments,
+            geometry.index,
+            (matrix.a, matrix.b, matrix.c, matrix.d, matrix.e, matrix.f),
+        )
+        cache = self._transformed_geometry
+        if (
+            cache is None
+            or cache[0] is not key[0]
+            or cache[1] is not key[1]
+            or cache[2:4] != key[2:4]
+        ):
+            path = Geomstr(geometry)
+            path.transform(matrix)
+            cache = self._transformed_geometry = key + (path,)
+        return Geomstr(cache[4])
+
+
+class CachedEffect(ABC):
+    """
+    Effect nodes inheriting this memoize the geometry they calculate from their children.
+
+    Cached geometries are keyed on the effect parameters given by effect_key() and on
+    the geometry version and linear transformation of every affected child. Changes of
+    the children arrive through notify_modified, notify_altered and notify_scaled which
+    drop the cache. Children that were all translated by the same offset keep the cached
+    geometry, the offset is applied to it instead of recalculating the effect.
+
+    Cached geometries are held as precise CompactGeomstr, which does not store the unused
+    control points of hatch lines and restores the exact geometry.
+    """
+
+    _effect_cache = None
+    effect_cache_size = 4
+
+    def effect_key(self):
+        """
+        Hashable tuple of all parameters the effect geometry depends on.
+        """
+        raise NotImplementedError
+
+    def effect_cache_clear(self):
+        self._effect_cache = None
+
+    @staticmethod
+    def _effect_child_state(children):
+        key = []
+        positions = []
+        for c in children:
+            matrix = getattr(c, "matrix", None)
+            if matrix is None:
+                key.append((id(c), c._geometry_version, None))
+                positions.append(0j)
+            else:
+                key.append(
+                    (
+                        id(c),
+                        c._geometry_version,
+                        (matrix.a, matrix.b, matrix.c, matrix.d),
+                    )
+                )
+                positions.append(complex(matrix.e, matrix.f))
+        return tuple(key), positions
+
+    def cached_geometry(self, compute, **kws):
+        """
+        Geometry of compute(**kws), taken from the cache if nothing relevant changed.
+
+        @param compute: function calculating the effect geometry
+        @param kws: arguments for compute, part of the cache key
+        @return: copy of the effect geometry
+        """
+        try:
+            key = (self.effect_key(), tuple(sorted(kws.items())))
+            hash(key)
+        except TypeError:
+            return compute(**kws)
+        children_key, positions = self._effect_child_state(self.affected_children())
+        cache = self._effect_cache
+        if cache is None:
+            cache = self._effect_cache = {}
+        entry = cache.get(key)
+        if entry is not None and entry[0] == children_key:
+            compact, cached_positions = entry[1], entry[2]
+            offsets = {p - q for p, q in zip(positions, cached_positions)}
+            if len(offsets) <= 1:
+                offset = offsets.pop() if offsets else 0j
+                if offset:
+                    compact.translate(offset.real, offset.imag)
+                    entry[2] = positions
+                return compact.as_geomstr()
+        geometry = compute(**kws)
+        if key not in cache and len(cache) >= self.effect_cache_size:
+            cache.pop(next(iter(cache)))
+        cache[key] = [children_key, geometry.as_compact(precise=True), positions]
+        return geometry
@@ -78,6 +78,9 @@ class Node:
     Nodes can be targeted.
     """
 
+    # Version of the node data, bumped by its change notifications (see TreeSnapshots).
+    _version = 0
+
     def __init__(self, *args, **kwargs):
         self.type = None
         self.id = None
@@ -118,6 +121,8 @@ class Node:
 
         self._paint_bounds = None
         self._paint_bounds_dirty = True
+        # Incremented whenever the node data or matrix is invalidated.
+        self._geometry_version = 0
 
         self._item = None
         self._cache = None
@@ -179,6 +184,18 @@ class Node:
             nd[k] = v
         return nd
 
+    @property
+    def id(self):
+        return self.__dict__.get("id")
+
+    @id.setter
+    def id(self, value):
+        # The value is kept in the node dict, so it is part of the node_dict.
+        old = self.__dict__.get("id")
+        self.__dict__["id"] = value
+        if old != value and self.__dict__.get("_root") is not None:
+            self.notify_id_changed(self, old)
+
     @property
     def children(self):
         return self._children
@@ -405,6 +422,7 @@ class Node:
         self._paint_bounds_dirty = True
         self._bounds_dirty = True
         self._points_dirty = True
+        self.notify_bounds_dirty(self)
 
     def set_dirty(self):
         self.points_dirty = True
@@ -528,7 +546,6 @@ class Node:
         for c in self._children:
             assert c._parent is self
             assert c._root is self._root
-            assert c in c._parent._children
             for q in c._references:
                 assert q.node is c
             if (
@@ -815,6 +832,14 @@ class Node:
                 node = self
             self._parent.notify_detached(node=node, **kwargs)
 
+    def notify_id_changed(self, node, old_id):
+        if self._parent is not None:
+            self._parent.notify_id_changed(node, old_id)
+
+    def notify_bounds_dirty(self, node):
+        if self._parent is not None:
+            self._parent.notify_bounds_dirty(node)
+
     def notify_changed(self, node, **kwargs):
         if self._parent is not None:
             if node is None:
@@ -935,6 +960,7 @@ class Node:
         """
         Invalidation of the individual node.
         """
+        self._geometry_version += 1
         self.set_dirty_bounds()
         self._bounds = None
         self._paint_bounds = None
@@ -1,4 +1,8 @@
+from math import inf
+
+from meerk40t.core.elements.element_types import elem_group_nodes
 from meerk40t.core.node.node import Node
+from meerk40t.tools.rtree import RTree, valid_bounds
 
 
 class RootNode(Node):
@@ -14,6 +18,14 @@ class RootNode(Node):
         self._root = self
         self.context = context
         self.listeners = []
+        # Lookup of nodes by their id, built on first use
+        self._id_index = None
+        # Child positions per parent node, see tree_position
+        self._positions = dict()
+        # Nodes that may carry a selection flag, built on first use
+        self._flagged = None
+        # Spatial indexes of element bounds, attribute -> (RTree, dirty nodes)
+        self._spatial = dict()
         self.add(type="branch ops", label=_("Operations"))
         self.add(type="branch elems", label=_("Elements"))
         self.add(type="branch reg", label=_("Regmarks"))
@@ -27,6 +39,352 @@ class RootNode(Node):
     def is_draggable(self):
         return False
 
+    def restore_tree(self, tree_data):
+        super().restore_tree(tree_data)
+        self.reset_indexes()
+
+    def reset_indexes(self):
+        """
+        Drops the id and spatial indexes, they will be rebuilt on their next use.
+        This needs to be called whenever the tree structure was changed without
+        notifications.
+        """
+        self.reset_id_index()
+        self._positions.clear()
+        self._flagged = None
+        self._spatial.clear()
+
+    def reset_id_index(self):
+        """
+        Drops the id index, it will be rebuilt on the next lookup. This needs to be
+        called whenever the tree structure was changed without notifications.
+        """
+        self._id_index = None
+
+    def _ids(self):
+        index = self._id_index
+        if index is None:
+            index = dict()
+            self._id_index = index
+            self._index_ids(self)
+        return index
+
+    def _index_ids(self, node):
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            stack.extend(reversed(n._children))
+            self._index_id(n)
+
+    def _index_id(self, node):
+        identifier = node.id
+        if not identifier:
+            # Nodes without id are not indexed.
+            return
+        try:
+            nodes = self._id_index.get(identifier)
+        except TypeError:
+            # Unhashable id, can't be indexed.
+            return
+        if nodes is None:
+            self._id_index[identifier] = {node: None}
+        elif node not in nodes:
+            last = next(reversed(nodes))
+            nodes[node] = None
+            if self.tree_position(node) < self.tree_position(last):
+                # Keep the nodes of an id in tree order.
+                self._sort_id_nodes(nodes)
+
+    def _sort_id_nodes(self, nodes):
+        ordered = sorted(nodes, key=self.tree_position)
+        nodes.clear()
+        nodes.update(dict.fromkeys(ordered))
+
+    def _unindex_ids(self, node):
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            stack.extend(n._children)
+            self._unindex_id(n, n.id)
+
+    def _unindex_id(self, node, identifier):
+        if not identifier:
+            return
+        try:
+            nodes = self._id_index.get(identifier)
+        except TypeError:
+            return
+        if nodes is None or node not in nodes:
+            return
+        del nodes[node]
+        if not nodes:
+            del self._id_index[identifier]
+
+    def _is_attached(self, node):
+        while node._parent is not None:
+            node = node._parent
+        return node is self
+
+    def tree_position(self, node):
+        """
+        Sort key ordering nodes like flat() yields them. The positions of the children
+        are cached per parent and checked on use, so changes of the tree without
+        notifications only cost a rebuild of the affected parent.
+        """
+        positions = self._positions
+        key = []
+        while node._parent is not None:
+            parent = node._parent
+            children = parent._children
+            index = positions.get(parent)
+            i = None if index is None else index.get(node)
+            if i is None or i >= len(children) or children[i] is not node:
+                i = len(children) - 1
+                if index is not None and i >= 0 and children[i] is node:
+                    # Appended, the other positions are unchanged.
+                    index[node] = i
+                else:
+                    index = {c: j for j, c in enumerate(children)}
+                    positions[parent] = index
+                    i = index.get(node, len(children))
+            key.append(i)
+            node = parent
+        key.reverse()
+        return key
+
+    def nodes_with_id(self, identifier):
+        """
+        All nodes within the tree that carry the given id, in tree order.
+
+        @param identifier: id to look for
+        @return: list of nodes
+        """
+        if not identifier:
+            # Not indexed.
+            return [n for n in self.flat() if n.id == identifier]
+        try:
+            nodes = self._ids().get(identifier)
+        except TypeError:
+            return []
+        if not nodes:
+            return []
+        valid = [n for n in nodes if n.id == identifier and self._is_attached(n)]
+        if len(valid) != len(nodes):
+            # Removed without notification, prune the stale entries.
+            nodes.clear()
+            nodes.update(dict.fromkeys(valid))
+            if not valid:
+                del self._id_index[identifier]
+        return valid
+
+    @staticmethod
+    def _is_flagged(node):
+        return node._selected or node._emphasized or node._highlighted or node._target
+
+    def _flag(self, node):
+        if self._is_flagged(node):
+            self._flagged[node] = None
+
+    def flagged_nodes(self):
+        """
+        Nodes within the tree that are selected, emphasized, highlighted or targeted.
+        These are tracked by the notifications of these flags, so they are found
+        without a walk of the tree.
+
+        @return: list of nodes, in no particular order
+        """
+        flagged = self._flagged
+        if flagged is None:
+            flagged = dict()
+            self._flagged = flagged
+            for node in self._flatten(self):
+                self._flag(node)
+        nodes = []
+        for node in list(flagged):
+            if self._is_flagged(node) and self._is_attached(node):
+                nodes.append(node)
+            else:
+                del flagged[node]
+        return nodes
+
+    def flat_emphasized(self, branch, types=None):
+        """
+        Same as branch.flat(types=types, emphasized=True), from the flagged nodes
+        rather than a walk of the branch.
+        """
+        tops = []
+        for node in self.flagged_nodes():
+            if not node.emphasized:
+                continue
+            # Like flat, the topmost emphasized node gives its whole subtree.
+            top = True
+            ancestor = node
+            while ancestor is not branch and ancestor is not None:
+                ancestor = ancestor._parent
+                if ancestor is not None and ancestor.emphasized:
+                    top = False
+            if ancestor is branch and top:
+                tops.append(node)
+        tops.sort(key=self.tree_position)
+        for node in tops:
+            for n in self._flatten(node):
+                if types is None or n.type in types:
+                    yield n
+
+    def find_id(self, identifier):
+        """
+        Returns the first node in the tree with the given id or None.
+        """
+        nodes = self.nodes_with_id(identifier)
+        return nodes[0] if nodes else None
+
+    def find_ids(self, identifiers):
+        """
+        Bulk lookup of several ids.
+
+        @param identifiers: iterable of ids
+        @return: dict of id to node, ids not found within the tree are omitted
+        """
+        found = dict()
+        for identifier in identifiers:
+            node = self.find_id(identifier)
+            if node is not None:
+                found[identifier] = node
+        return found
+
+    def validate_id_index(self):
+        """
+        Checks the id index against a full walk of the tree.
+        """
+        expected = dict()
+        for node in self.flat():
+            expected.setdefault(node.id, []).append(node)
+        for identifier, nodes in expected.items():
+            assert set(self.nodes_with_id(identifier)) == set(nodes), identifier
+        for identifier in list(self._ids()):
+            if identifier not in expected:
+                assert not self.nodes_with_id(identifier), identifier
+
+    @staticmethod
+    def _node_bounds(node, attr):
+        try:
+            return getattr(node, attr)
+        except AttributeError:
+            return None
+
+    def spatial_index(self, attr="bounds"):
+        """
+        R-tree of all element and group nodes of the tree over the given bounds
+        attribute ("bounds" or "paint_bounds"). The index is built on first use and
+        then maintained by the attach, detach, destroy, modified, translated, scaled
+        and altered notifications, and whenever the bounds of a node are flagged dirty.
+
+        Keys of the index may refer to nodes no longer within the tree if these were
+        removed without notification, use the query methods to filter these.
+        """
+        index = self._spatial.get(attr)
+        if index is None:
+            tree = RTree(
+                (node, self._node_bounds(node, attr))
+                for node in self.flat(types=elem_group_nodes)
+            )
+            self._spatial[attr] = (tree, set())
+            return tree
+        tree, dirty = index
+        if dirty:
+            # Reading the bounds may flag nodes again, these are kept for the next use.
+            nodes = list(dirty)
+            dirty.clear()
+            for node in nodes:
+                if node.type in elem_group_nodes and self._is_attached(node):
+                    tree.insert(node, self._node_bounds(node, attr))
+                else:
+                    tree.remove(node)
+        return tree
+
+    def _spatial_dirty(self, node, subtree=False):
+        if not self._spatial:
+            return
+        nodes = [node]
+        if subtree:
+            stack = list(node._children)
+            while stack:
+                n = stack.pop()
+                nodes.append(n)
+                stack.extend(n._children)
+        # The bounds of groups depend on their children.
+        parent = node._parent
+        while parent is not None and parent.type in ("group", "file"):
+            nodes.append(parent)
+            parent = parent._parent
+        for tree, dirty in self._spatial.values():
+            dirty.update(nodes)
+
+    def nodes_at(self, x, y, attr="bounds"):
+        """
+        Element and group nodes whose bounds contain the given point.
+        """
+        return [
+            n
+            for n in self.spatial_index(attr).query_point(x, y)
+            if self._is_attached(n)
+        ]
+
+    def nodes_in(self, bounds, attr="bounds", contained=False):
+        """
+        Element and group nodes whose bounds overlap the given bounds, or that are
+        contained by these bounds.
+        """
+        return [
+            n
+            for n in self.spatial_index(attr).query_rect(bounds, contained=contained)
+            if self._is_attached(n)
+        ]
+
+    def nodes_nearest(self, x, y, count=1, attr="bounds", max_distance=inf):
+        """
+        Up to count (distance, node) tuples of the element and group nodes nearest to
+        the given point, nearest first.
+        """
+        result = []
+        tree = self.spatial_index(attr)
+        # Stale entries are skipped, so more candidates may be needed.
+        for distance, node in tree.nearest(x, y, len(tree), max_distance):
+            if self._is_attached(node):
+                result.append((distance, node))
+                if len(result) >= count:
+                    break
+        return result
+
+    def validate_spatial_index(self, attr="bounds"):
+        """
+        Checks the spatial index against the current bounds of the nodes.
+        """
+        tree = self.spatial_index(attr)
+        tree.validate()
+        nodes = set()
+        for node in self.flat(types=elem_group_nodes):
+            bounds = self._node_bounds(node, attr)
+            if node in tree:
+                nodes.add(node)
+                assert tuple(tree.bounds(node)) == tuple(bounds), node
+            else:
+                assert not valid_bounds(bounds), node
+        for node in tree:
+            assert node in nodes or not self._is_attached(node), node
+
+    def notify_bounds_dirty(self, node):
+        if node is not self:
+            self._spatial_dirty(node)
+
+    def notify_id_changed(self, node, old_id):
+        if self._id_index is not None:
+            self._unindex_id(node, old_id)
+            self._index_id(node)
+        for listen in self.listeners:
+            if hasattr(listen, "id_changed"):
+                listen.id_changed(node, old_id)
+
     def listen(self, listener):
         self.listeners.append(listener)
 
@@ -49,6 +407,10 @@ class RootNode(Node):
     def notify_destroyed(self, node=None, **kwargs):
         if node is None:
             node = self
+        if self._id_index is not None and node is not self:
+            self._unindex_id(node, node.id)
+        self._positions.pop(node, None)
+        self._spatial_dirty(node)
         for listen in self.listeners:
             if hasattr(listen, "node_destroyed"):
                 listen.node_destroyed(node, **kwargs)
@@ -56,6 +418,12 @@ class RootNode(Node):
     def notify_attached(self, node=None, **kwargs):
         if node is None:
             node = self
+        if self._flagged is not None and node is not self:
+            for n in self._flatten(node):
+                self._flag(n)
+        if self._id_index is not None and node is not self:
+            self._index_ids(node)
+        self._spatial_dirty(node, subtree=True)
         for listen in self.listeners:
             if hasattr(listen, "node_attached"):
                 listen.node_attached(node, **kwargs)
@@ -63,6 +431,10 @@ class RootNode(Node):
     def notify_detached(self, node=None, **kwargs):
         if node is None:
             node = self
+        if self._id_index is not None and node is not self:
+            self._unindex_ids(node)
+        self._positions.pop(node, None)
+        self._spatial_dirty(node, subtree=True)
         for listen in self.listeners:
             if hasattr(listen, "node_detached"):
                 listen.node_detached(node, **kwargs)
@@ -77,6 +449,8 @@ class RootNode(Node):
     def notify_selected(self, node=None, **kwargs):
         if node is None:
             node = self
+        if self._flagged is not None:
+            self._flag(node)
         for listen in self.listeners:
             if hasattr(listen, "selected"):
                 listen.selected(node, **kwargs)
@@ -84,6 +458,8 @@ class RootNode(Node):
     def notify_emphasized(self, node=None, **kwargs):
         if node is None:
             node = self
+        if self._flagged is not None:
+            self._flag(node)
         for listen in self.listeners:
             if hasattr(listen, "emphasized"):
                 listen.emphasized(node, **kwargs)
@@ -91,6 +467,8 @@ class RootNode(Node):
     def notify_targeted(self, node=None, **kwargs):
         if node is None:
             node = self
+        if self._flagged is not None:
+            self._flag(node)
         for listen in self.listeners:
             if hasattr(listen, "targeted"):
                 listen.targeted(node, **kwargs)
@@ -98,6 +476,8 @@ class RootNode(Node):
     def notify_highlighted(self, node=None, **kwargs):
         if node is None:
             node = self
+        if self._flagged is not None:
+            self._flag(node)
         for listen in self.listeners:
             if hasattr(listen, "highlighted"):
                 listen.highlighted(node, **kwargs)
@@ -113,6 +493,7 @@ class RootNode(Node):
         if node is None:
             node = self
         self._bounds = None
+        self._spatial_dirty(node)
         for listen in self.listeners:
             if hasattr(listen, "modified"):
                 listen.modified(node, **kwargs)
@@ -136,6 +517,7 @@ class RootNode(Node):
                 self._bounds[2] + dx,
                 self._bounds[3] + dy,
             ]
+        self._spatial_dirty(node)
         for listen in self.listeners:
             if hasattr(listen, "translated"):
                 listen.translated(node, dx=dx, dy=dy, interim=interim)  # , **kwargs)
@@ -169,9 +551,12 @@ class RootNode(Node):
                 y1 = oy + sy * d2
             self._bounds = [min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)]
 
+        self._spatial_dirty(node)
         for listen in self.listeners:
             if hasattr(listen, "scaled"):
-                listen.scaled(node, sx=sx, sy=sy, ox=ox, oy=oy, interim=interim)  # , **kwargs)
+                listen.scaled(
+                    node, sx=sx, sy=sy, ox=ox, oy=oy, interim=interim
+                )  # , **kwargs)
 
     def notify_altered(self, node=None, **kwargs):
         """
@@ -185,6 +570,7 @@ class RootNode(Node):
         """
         if node is None:
             node = self
+        self._spatial_dirty(node)
         for listen in self.listeners:
             if hasattr(listen, "altered"):
                 listen.altered(node, **kwargs)
@@ -206,6 +592,11 @@ class RootNode(Node):
     def notify_reorder(self, node=None, **kwargs):
         if node is None:
             node = self
+        if self._id_index is not None:
+            # Children were reordered, restore the tree order of shared ids.
+            for nodes in self._id_index.values():
+                if len(nodes) > 1:
+                    self._sort_id_nodes(nodes)
         for listen in self.listeners:
             if hasattr(listen, "reorder"):
                 listen.reorder(node, **kwargs)
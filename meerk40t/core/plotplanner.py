@@ -1,4 +1,7 @@
 import random
+from itertools import islice
+
+import numpy as np
 
 from meerk40t.tools.zinglplotter import ZinglPlotter
 
@@ -36,8 +39,46 @@ of zero will remain zero.
 * Dot Length requires any train of on-values must be of at least the proscribed length.
 * Shift moves isolated single-on values to be adjacent to other on-values.
 * Groups manipulates the output as max-length changeless orthogonal/diagonal positions.
+
+In array mode the plots are read in blocks and each manipulation transforms the steps of
+a block as numpy arrays, carrying its state from block to block. The output is the same
+as processing the plots one at a time. Blocks that cannot be converted into integer steps
+are processed one at a time.
 """
 
+# Number of plots read into one block in array mode.
+PLOT_BLOCK_SIZE = 4096
+
+
+def _shift_states():
+    """
+    States of the 4 bit shift register of Shift() after each of 8 steps.
+
+    Indexed by the 8 on bits of the steps, the first step in the highest bit, and the
+    state before the steps.
+    """
+    transitions = np.zeros((2, 16), dtype=np.uint8)
+    for on in range(2):
+        for pixels in range(16):
+            shifted = ((pixels << 1) | on) & 0b1111
+            if shifted == 0b0101:
+                shifted = 0b0011
+            elif shifted == 0b1010:
+                shifted = 0b1100
+            transitions[on, pixels] = shifted
+    steps = np.arange(256)[:, None]
+    pixels = np.broadcast_to(np.arange(16, dtype=np.uint8), (256, 16))
+    states = np.zeros((256, 16, 8), dtype=np.uint8)
+    for i in range(8):
+        pixels = transitions[(steps >> (7 - i)) & 1, pixels]
+        states[:, :, i] = pixels
+    return states
+
+
+SHIFT_STATES = _shift_states()
+# State after 8 steps, as lists for stepping through a block byte by byte.
+SHIFT_FINAL = SHIFT_STATES[:, :, 7].tolist()
+
 
 class PlotPlanner(Parameters):
     def __init__(
@@ -48,10 +89,12 @@ class PlotPlanner(Parameters):
         shift=True,
         group=True,
         require_uniform_movement=True,
+        array_mode=False,
         **kwargs,
     ):
         super().__init__(settings, **kwargs)
         self.debug = False
+        self.array_mode = array_mode
 
         self.abort = False
         self.force_shift = False
@@ -228,6 +271,19 @@ class PlotPlanner(Parameters):
         @param plot: plottable element that should be wrapped
         @return: generator to produce plottable elements.
         """
+        if (
+            plot is not None
+            and self.array_mode
+            and not self.debug
+            and self.single is not None
+        ):
+            return self._process_blocks(plot)
+        return self._process_tuples(plot)
+
+    def _process_tuples(self, plot):
+        """
+        Chains the manipulations processing the plots one at a time.
+        """
 
         def debug(plot, manipulator):
             for q in plot:
@@ -252,6 +308,37 @@ class PlotPlanner(Parameters):
             plot = debug(plot, self.group)
         return plot
 
+    def _process_blocks(self, plot):
+        """
+        Processes the plots in blocks, each manipulation transforming arrays of steps.
+
+        @param plot: plottable element that should be wrapped
+        @return: generator to produce plottable elements.
+        """
+        plot = iter(plot)
+        while True:
+            events = list(islice(plot, PLOT_BLOCK_SIZE))
+            if not events:
+                return
+            if self.abort:
+                self.single.clear()
+                return
+            steps = self.single.process_array(events)
+            if steps is None:
+                # Not integer positions, processed one at a time.
+                yield from self._process_tuples(events)
+                continue
+            x, y, on = steps
+            if not len(x):
+                continue
+            if self.ppi is not None:
+                on = self.ppi.process_array(on)
+            if self.shift is not None:
+                x, y, on = self.shift.process_array(x, y, on)
+            if self.group is not None:
+                x, y, on = self.group.process_array(x, y, on)
+            yield from zip(x.tolist(), y.tolist(), on.tolist())
+
     def step_move(self, x0, y0, x1, y1):
         """
         Step move walks a line from a point to another point.
@@ -308,6 +395,25 @@ class PlotManipulation:
     def flushed(self):
         return True
 
+    @staticmethod
+    def _arrays(plots):
+        """
+        Arrays of x, y and on of a list of plot tuples.
+        """
+        if not plots:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        return tuple(np.array(values) for values in zip(*plots))
+
+    @staticmethod
+    def _concatenate(first, second):
+        """
+        Concatenates two sets of x, y and on arrays.
+        """
+        if not len(first[0]):
+            return second
+        return tuple(np.concatenate((a, b)) for a, b in zip(first, second))
+
 
 class Single(PlotManipulation):
     def __init__(self, planner: PlotPlanner):
@@ -369,6 +475,66 @@ class Single(PlotManipulation):
                 self.single_y = cy + (i * dy)
                 yield self.single_x, self.single_y, on
 
+    def process_array(self, plot):
+        """
+        Converts a block of positions into arrays of single unit steps.
+
+        @param plot: list of 3 (X,Y,On) or 2 (X,Y) item events
+        @return: x, y, on arrays of the steps, None if the positions are not integers
+        """
+        try:
+            data = np.array(plot)
+        except ValueError:
+            # Mixed event lengths.
+            return None
+        if data.ndim != 2 or data.shape[1] not in (2, 3):
+            return None
+        if data.dtype.kind not in "iuf":
+            return None
+        x = data[:, 0]
+        y = data[:, 1]
+        if data.dtype.kind == "f":
+            # Only the on values may be floats, positions are stepped as integers.
+            if any(isinstance(e[0], float) or isinstance(e[1], float) for e in plot):
+                return None
+            x = x.astype(np.int64)
+            y = y.astype(np.int64)
+        if data.shape[1] == 3:
+            on = data[:, 2]
+        else:
+            on = np.full(len(data), self.single_default)
+        if self.single_x is None or self.single_y is None:
+            # Our single_x or single_y position is not established.
+            self.single_x = int(x[0])
+            self.single_y = int(y[0])
+        total_dx = np.diff(x, prepend=self.single_x)
+        total_dy = np.diff(y, prepend=self.single_y)
+        dx = np.sign(total_dx)
+        dy = np.sign(total_dy)
+        uneven = total_dy * dx != total_dx * dy
+        if np.any(uneven):
+            if not self.planner.require_uniform_movement:
+                # Steps are diagonal from wherever the previous event ended.
+                return None
+            i = int(np.argmax(uneven))
+            raise ValueError(
+                f"Must be uniformly diagonal or orthogonal: ({total_dx[i]}, "
+                f"{total_dy[i]}) is not."
+            )
+        counts = np.maximum(np.abs(total_dx), np.abs(total_dy))
+        total = int(counts.sum())
+        if total == 0:
+            return x[:0], y[:0], on[:0]
+        ends = np.cumsum(counts)
+        step = np.arange(1, total + 1) - np.repeat(ends - counts, counts)
+        start_x = np.concatenate(([self.single_x], x[:-1]))
+        start_y = np.concatenate(([self.single_y], y[:-1]))
+        x = np.repeat(start_x, counts) + step * np.repeat(dx, counts)
+        y = np.repeat(start_y, counts) + step * np.repeat(dy, counts)
+        self.single_x = int(x[-1])
+        self.single_y = int(y[-1])
+        return x, y, np.repeat(on, counts)
+
     def flush(self):
         yield None, None, self.single_default
 
@@ -441,6 +607,49 @@ class PPI(PlotManipulation):
                     on = 0
             yield x, y, on
 
+    def process_array(self, on):
+        """
+        Applies PPI to the on values of a block of single steps.
+
+        Without dot length and with whole increments below 1000 each step fires when the
+        running total passes a multiple of 1000, which is found from the cumulative sum.
+        Otherwise the steps are carried forward one at a time.
+
+        @param on: on values of single steps
+        @return: on values of the steps, with PPI.
+        """
+        power = self.planner.power
+        dotlength = self.planner.implicit_dotlength
+        increments = power * on
+        total = self.ppi_total
+        if (
+            dotlength == 1
+            and self.dot_left == 0
+            and 0 <= total < 1000
+            and total == int(total)
+            and np.all(increments >= 0)
+            and np.all(increments <= 1000)
+            and np.all(increments == np.floor(increments))
+        ):
+            totals = np.cumsum(increments.astype(np.int64)) + int(total)
+            fired = np.diff(totals // 1000, prepend=0)
+            self.ppi_total = float(totals[-1] % 1000)
+            return fired
+        result = np.zeros(len(on), dtype=np.int64)
+        dot_left = self.dot_left
+        for i, value in enumerate(on.tolist()):
+            total += power * value
+            if value and dot_left > 0:
+                dot_left -= 1
+                result[i] = 1
+            elif total >= 1000.0:
+                result[i] = 1
+                total -= 1000.0 * dotlength
+                dot_left = dotlength - 1
+        self.ppi_total = total
+        self.dot_left = dot_left
+        return result
+
 
 class Shift(PlotManipulation):
     def __init__(self, planner: PlotPlanner):
@@ -489,6 +698,38 @@ class Shift(PlotManipulation):
                 yield bx, by, bon
         # There are no more plots.
 
+    def process_array(self, x, y, on):
+        """
+        Shifts the on values of a block of single steps.
+
+        The shift register is a state machine of 4 bits. The steps are taken 8 at a
+        time, from tables of the states after each of 8 steps.
+
+        @return: x, y, on arrays of the shifted steps
+        """
+        if not self.planner.force_shift and not self.planner.shift_enabled:
+            flushed = self._arrays(list(self.flush()))
+            return self._concatenate(flushed, (x, y, on))
+        if not len(x):
+            return x, y, on
+        chunks = np.packbits(on != 0).tolist()
+        starts = []
+        pixels = self.shift_pixels
+        for chunk in chunks:
+            starts.append(pixels)
+            pixels = SHIFT_FINAL[chunk][pixels]
+        states = SHIFT_STATES[chunks, starts].ravel()[: len(on)].astype(np.int64)
+        self.shift_pixels = int(states[-1])
+
+        buffered = self.shift_buffer[::-1]
+        all_x = np.concatenate(([p[0] for p in buffered], x)).astype(np.int64)
+        all_y = np.concatenate(([p[1] for p in buffered], y)).astype(np.int64)
+        count = max(0, len(all_x) - 3)
+        first = len(x) - count
+        kept = list(zip(all_x[count:].tolist(), all_y[count:].tolist()))
+        self.shift_buffer[:] = kept[::-1]
+        return all_x[:count], all_y[:count], (states[first:] >> 3) & 1
+
     def flush(self):
         while len(self.shift_buffer) > 0:
             self.shift_pixels <<= 1
@@ -597,6 +838,54 @@ class Group(PlotManipulation):
             self.group_on = on
         # There are no more plots.
 
+    def process_array(self, x, y, on):
+        """
+        Groups a block of single steps into orthogonal/diagonal plots.
+
+        A step ends the buffered group when the group has a direction and the step
+        changes the direction or the on value. The group then drops its last position.
+
+        @return: x, y, on arrays of the grouped plots
+        """
+        if not len(x):
+            return x, y, on
+        if not self.planner.group_enabled:
+            # Ungrouped steps interleave with flushes, processed one at a time.
+            plot = zip(x.tolist(), y.tolist(), on.tolist())
+            return self._arrays(list(self.process(plot)))
+        if self.group_x is None:
+            self.group_x = int(x[0])
+        if self.group_y is None:
+            self.group_y = int(y[0])
+        if self.group_on is None:
+            self.group_on = on[0].item()
+        prev_x = np.concatenate(([self.group_x], x))
+        prev_y = np.concatenate(([self.group_y], y))
+        dx = np.diff(prev_x)
+        dy = np.diff(prev_y)
+        invalid = (np.abs(dx) > 1) | (np.abs(dy) > 1)
+        if np.any(invalid):
+            # Group() requires single step values.
+            i = int(np.argmax(invalid))
+            raise ValueError(f"dx({dx[i]}) or dy({dy[i]}) exceeds 1")
+        prev_dx = np.concatenate(([self.group_dx], dx[:-1]))
+        prev_dy = np.concatenate(([self.group_dy], dy[:-1]))
+        prev_on = np.concatenate(([self.group_on], on[:-1]))
+        dropped = ((prev_dx != 0) | (prev_dy != 0)) & (
+            (dx != prev_dx) | (dy != prev_dy) | (on != prev_on)
+        )
+        self.group_x = int(x[-1])
+        self.group_y = int(y[-1])
+        self.group_on = on[-1].item()
+        self.group_dx = int(dx[-1])
+        self.group_dy = int(dy[-1])
+        result = prev_x[:-1][dropped], prev_y[:-1][dropped], prev_on[dropped]
+        if len(result[0]):
+            self.last_x = int(result[0][-1])
+            self.last_y = int(result[1][-1])
+            self.last_on = result[2][-1].item()
+        return result
+
     def flush(self):
         if not self.flushed():
             # If we have an established buffer, flush the buffer.
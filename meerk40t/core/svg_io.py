@@ -12,6 +12,7 @@ from xml.etree.ElementTree import Element, ElementTree, ParseError, SubElement
 
 from meerk40t.core.exceptions import BadFileError
 from meerk40t.core.node.node import Fillrule, Linecap, Linejoin
+from meerk40t.tools.geomstr import Geomstr
 
 from ..svgelements import (
     SVG,
@@ -771,6 +772,8 @@ class SVGProcessor:
         # Element Classific  |   1,7  |   1,1   |   59%   |  0,6   |   0,4   |  54%
         # Egyptian Bark      |  72,1  |  43,9   |   64%   | 34,6   |  20,1   |  72%
         self.precalc_bbox = True
+        # Number of parsed svg elements, for progress.
+        self.parsed = 0
 
     def process(self, svg, pathname):
         """
@@ -966,6 +969,28 @@ class SVGProcessor:
             node.stroke_scale = False
             # print ("Hairline set")
 
+    @staticmethod
+    def path_geometry(element):
+        """
+        Paths loaded with parse_path_data=False keep their path data, which is tokenized straight into geomstr here
+        with arcs approximated as approximate_arcs_with_cubics() would. This skips building svgelements segments.
+        Short paths, which could be dots, are parsed into segments instead.
+
+        @param element: svgelements Path
+        @return: geomstr or None if the path has segments.
+        """
+        if len(element) or SVG_ATTR_DATA not in element.values:
+            return None
+        path_d = element.values[SVG_ATTR_DATA]
+        geometry = Geomstr.svg_path_data(path_d, arc_error=0.1)
+        if geometry.index <= 2:
+            try:
+                element.parse(path_d)
+            except ValueError:
+                pass
+            return None
+        return geometry
+
     @staticmethod
     def is_dot(element):
         """
@@ -1073,7 +1098,7 @@ class SVGProcessor:
         e_list.append(node)
 
     def _parse_path(
-        self, element, ident, label, lock, context_node, e_list, set_hidden
+        self, element, ident, label, lock, context_node, e_list, set_hidden, geometry
     ):
         """
         Parses an SVG Path object.
@@ -1087,10 +1112,14 @@ class SVGProcessor:
         @param lock:
         @param context_node:
         @param e_list:
+        @param geometry: geomstr of the path data, if it was not parsed into segments.
         @return:
         """
-        if len(element) == 0:
-            return
+        if geometry is None:
+            if len(element) == 0:
+                return
+            element.approximate_arcs_with_cubics()
+            geometry = Geomstr.svg(element)
 
         if element.values.get("type") == "elem polyline":
             # Type is polyline we should restore the node type if we have sufficient info to do so.
@@ -1103,10 +1132,10 @@ class SVGProcessor:
             pass
         if element.values.get("type") == "elem line":
             pass
-        element.approximate_arcs_with_cubics()
         with self.elements.node_lock:
             node = context_node.add(
                 path=element,
+                geometry=geometry,
                 type="elem path",
                 id=ident,
                 label=label,
@@ -1603,6 +1632,16 @@ class SVGProcessor:
                 set_hidden = True
 
         ident = element.id
+        self.parsed += 1
+        if self.parsed % 1000 == 0:
+            busy = self.elements.kernel.busyinfo
+            if busy.shown:
+                _ = self.elements.kernel.translation
+                busy.change(
+                    msg=_("Loaded {count} elements").format(count=self.parsed),
+                    keep=2,
+                )
+                busy.show()
 
         _label = uselabel if uselabel else self.get_tag_label(element)
         _lock = None
@@ -1611,7 +1650,13 @@ class SVGProcessor:
         except (ValueError, TypeError):
             pass
 
-        is_dot, dot_point = SVGProcessor.is_dot(element)
+        geometry = None
+        if isinstance(element, Path):
+            geometry = SVGProcessor.path_geometry(element)
+        if geometry is None:
+            is_dot, dot_point = SVGProcessor.is_dot(element)
+        else:
+            is_dot = False
         if is_dot:
             with self.elements.node_lock:
                 node = context_node.add(
@@ -1633,7 +1678,14 @@ class SVGProcessor:
             )
         elif isinstance(element, Path):
             self._parse_path(
-                element, ident, _label, _lock, context_node, e_list, set_hidden
+                element,
+                ident,
+                _label,
+                _lock,
+                context_node,
+                e_list,
+                set_hidden,
+                geometry,
             )
         elif isinstance(element, (Polygon, Polyline)):
             self._parse_polyline(
@@ -1871,6 +1923,7 @@ class SVGLoader:
                 color="black",
                 parse_display_none=True,
                 transform=f"scale({scale_factor})",
+                parse_path_data=False,
             )
         except ParseError as e:
             raise BadFileError(str(e)) from e
@@ -1924,6 +1977,7 @@ class SVGLoaderPlain:
                 ppi=ppi,
                 color="black",
                 transform=f"scale({scale_factor})",
+                parse_path_data=False,
             )
         except ParseError as e:
             raise BadFileError(str(e)) from e
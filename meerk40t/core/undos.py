@@ -7,14 +7,58 @@ execute undo and redo operations for the tree.
 
 
 For every change announced in the program ( with elements.undoscope("tag"): ) 
-a complete backup of the element tree is being made before applying the changes
+a snapshot of the element tree is being made before applying the changes
 So the undo_stack contains the state before the change. And "undo" of that 
 undo_index will restore the state before.
 If we have already made an undo (ie the undo_index is not the highest number 
 but below) then another mark will effectively create a new history.
 
+Snapshots are delta based: every node carries a version that is bumped by its
+change notifications, only the nodes whose version changed since the last mark are
+copied. Every other node
+(and every unchanged subtree) is shared with the previous snapshot. Image data is
+stored by reference. Memory used by the snapshots is accounted for, so the stack
+can be limited by bytes rather than just by the number of levels.
 """
+import sys
 import threading
+from copy import copy
+from itertools import count
+
+# Attributes which are not part of the node_dict but need to be restored.
+RESTORED_ATTRIBUTES = (
+    "_selected",
+    "_emphasized",
+    "_emphasized_time",
+    "_highlighted",
+    "_expanded",
+    "_translated_text",
+)
+
+# Image data is shared between the snapshots and the tree.
+IMAGE_ATTRIBUTES = ("image", "_processed_image")
+
+# Attributes describing the processed image, copied along with it.
+PROCESSED_ATTRIBUTES = ("_processed_matrix", "_actualized_matrix")
+
+
+class NodeState:
+    """
+    Immutable record of a node within a snapshot. The node is a detached copy of
+    the tree node, children are the records of its children. Records are shared
+    between snapshots for as long as their node and children are unchanged.
+    """
+
+    __slots__ = ("node", "children", "key", "target", "version", "nbytes", "refs")
+
+    def __init__(self, node, children, key, target=None, version=0, nbytes=0):
+        self.node = node
+        self.children = children
+        self.key = key
+        self.target = target
+        self.version = version
+        self.nbytes = nbytes
+        self.refs = 0
 
 
 class UndoState:
@@ -27,34 +71,275 @@ class UndoState:
 
     @property
     def tree_representation(self):
-        def node_representation(node):
-            t = node.type 
-            if node.children:
+        def node_representation(record):
+            node = record.node
+            t = node.type
+            if record.children:
                 t = f"{t}{'+' if node.expanded else ''}("
-                for n in node.children:
+                for n in record.children:
                     t = f"{t}{node_representation(n)},"
                 t += ")"
             return t
 
         s = ""
-        for node in self.state:
-            s += f"{node_representation(node)}, "
+        for record in self.state:
+            s += f"{node_representation(record)}, "
         return s
     
     def __str__(self):
         return self.message # + ". " + self.tree_representation
 
 
+class TreeSnapshots:
+    """
+    Creates and restores delta based snapshots of the tree.
+
+    The snapshots listens to the tree, every notification about a change of a node
+    bumps the version of that node. Taking a snapshot walks the tree structure, copies
+    the new nodes and those whose version differs from their last record and reuses
+    the records of all other nodes, which costs nothing beyond the walk. Like for the
+    other caches of the tree, an edit of a node needs a notification to be seen.
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._live = {}
+        self._pending = {}
+        self._keys = count()
+        self.memory = 0
+        self.copied = 0
+        tree.listen(self)
+
+    def detach(self):
+        """
+        Stops listening to the tree.
+        """
+        self.tree.unlisten(self)
+
+    # Tree listener, any change of a node makes a new version.
+
+    def _changed(self, node, *args, **kwargs):
+        node._version += 1
+
+    node_changed = _changed
+    modified = _changed
+    translated = _changed
+    scaled = _changed
+    altered = _changed
+    update = _changed
+    selected = _changed
+    emphasized = _changed
+    highlighted = _changed
+    expand = _changed
+    collapse = _changed
+    id_changed = _changed
+
+    def _key(self, node):
+        entry = self._live.get(id(node))
+        if entry is not None and entry[0] is node:
+            return entry[1].key
+        pending = self._pending.get(id(node))
+        if pending is None or pending[0] is not node:
+            pending = (node, next(self._keys))
+            self._pending[id(node)] = pending
+        return pending[1]
+
+    @staticmethod
+    def _copy(node):
+        """
+        Copies the node, sharing rather than duplicating its image data.
+        """
+        images = [
+            attr for attr in IMAGE_ATTRIBUTES if node.__dict__.get(attr) is not None
+        ]
+        if not images:
+            return copy(node)
+        # Copying a node may copy its images, so we copy a shallow clone without them.
+        shell = node.__class__.__new__(node.__class__)
+        shell.__dict__.update(node.__dict__)
+        for attr in images:
+            shell.__dict__[attr] = None
+        duplicate = copy(shell)
+        for attr in images:
+            setattr(duplicate, attr, node.__dict__[attr])
+        if "_processed_image" in images:
+            for attr in PROCESSED_ATTRIBUTES:
+                if attr in node.__dict__:
+                    setattr(duplicate, attr, copy(node.__dict__[attr]))
+        return duplicate
+
+    @staticmethod
+    def _image_bytes(image):
+        try:
+            return image.width * image.height * len(image.getbands())
+        except AttributeError:
+            return 0
+
+    def _estimate(self, node, previous):
+        nbytes = sys.getsizeof(node.__dict__)
+        geometry = getattr(node, "geometry", None)
+        segments = getattr(geometry, "segments", None)
+        if segments is not None:
+            nbytes += segments.nbytes
+        for attr in IMAGE_ATTRIBUTES:
+            image = getattr(node, attr, None)
+            if image is None:
+                continue
+            if previous is not None and getattr(previous, attr, None) is image:
+                # Already accounted for by the previous record.
+                continue
+            nbytes += self._image_bytes(image)
+        return nbytes
+
+    def _freeze(self, node, children, previous):
+        frozen = self._copy(node)
+        for attr in RESTORED_ATTRIBUTES:
+            if hasattr(node, attr):
+                setattr(frozen, attr, getattr(node, attr))
+        target = None
+        if node.type == "reference":
+            frozen.node = None
+            if node.node is not None:
+                target = self._key(node.node)
+        pending = self._pending.pop(id(node), None)
+        if previous is not None:
+            key = previous.key
+        elif pending is not None and pending[0] is node:
+            key = pending[1]
+        else:
+            key = next(self._keys)
+        self.copied += 1
+        return NodeState(
+            frozen,
+            children,
+            key,
+            target=target,
+            version=node._version,
+            nbytes=self._estimate(
+                frozen, previous.node if previous is not None else None
+            ),
+        )
+
+    def _capture(self, node, live, created):
+        children = tuple([self._capture(c, live, created) for c in node._children])
+        entry = self._live.get(id(node))
+        previous = None
+        if entry is not None and entry[0] is node:
+            previous = entry[1]
+        record = previous
+        if (
+            previous is None
+            or previous.version != node._version
+            or (
+                node.type == "reference"
+                and previous.target
+                != (None if node.node is None else self._key(node.node))
+            )
+        ):
+            record = self._freeze(node, children, previous)
+            created.append(record)
+        elif previous.children != children:
+            # Unchanged node with a changed structure below, share the node copy.
+            record = NodeState(
+                previous.node,
+                children,
+                previous.key,
+                target=previous.target,
+                version=previous.version,
+                nbytes=sys.getsizeof(children),
+            )
+            created.append(record)
+        live[id(node)] = (node, record)
+        return record
+
+    def snapshot(self):
+        """
+        Create a snapshot of the current tree.
+
+        @return: tuple of records of the branches of the tree.
+        """
+        live = {}
+        created = []
+        self.copied = 0
+        try:
+            state = tuple(
+                [self._capture(c, live, created) for c in self.tree._children]
+            )
+        finally:
+            self._pending.clear()
+        self._live = live
+        for record in created:
+            self.memory += record.nbytes
+            for child in record.children:
+                child.refs += 1
+        for record in state:
+            record.refs += 1
+        return state
+
+    def release(self, state):
+        """
+        Releases a snapshot, accounting for the records that are no longer shared.
+        """
+        stack = list(state)
+        while stack:
+            record = stack.pop()
+            record.refs -= 1
+            if record.refs <= 0:
+                self.memory -= record.nbytes
+                stack.extend(record.children)
+
+    def _thaw(self, record, parent, live, keys, references):
+        node = self._copy(record.node)
+        for attr in RESTORED_ATTRIBUTES:
+            if hasattr(record.node, attr):
+                setattr(node, attr, getattr(record.node, attr))
+        # The fresh node matches its record.
+        node._version = record.version
+        node._parent = parent
+        node._root = self.tree._root
+        parent._children.append(node)
+        keys[record.key] = node
+        if record.target is not None:
+            references.append((node, record.target))
+        live[id(node)] = (node, record)
+        for child in record.children:
+            self._thaw(child, node, live, keys, references)
+
+    def restore(self, state):
+        """
+        Restores the tree to the given snapshot. The records themselves stay
+        untouched, fresh nodes are created from them.
+        """
+        tree = self.tree
+        live = {}
+        keys = {}
+        references = []
+        tree._children.clear()
+        for record in state:
+            self._thaw(record, tree, live, keys, references)
+        for node, target in references:
+            referenced = keys.get(target)
+            node.node = referenced
+            if referenced is not None:
+                referenced._references.append(node)
+        self._live = live
+        tree.reset_indexes()
+        tree._validate_tree()
+
+
 class Undo:
     LAST_STATE = "Last status"
 
-    def __init__(self, service, tree, active=True, levels=20):
+    def __init__(self, service, tree, active=True, levels=20, max_bytes=0):
         self.debug_active = False
         self.service = service
         self.tree = tree
         self.active = active
         self.levels = max(3, levels) # at least three
+        # Upper limit of memory used by the undo states, 0 = unlimited
+        self.max_bytes = max_bytes
         self._lock = threading.Lock()
+        self._snapshots = TreeSnapshots(tree)
         self._undo_stack = []
         self._undo_index = -1
         self.mark("init")  # Set initial tree state.
@@ -96,7 +381,7 @@ class Undo:
             try:
                 self._undo_stack.insert(
                     self._undo_index,
-                    UndoState(self.tree.backup_tree(), message=message, hold=hold),
+                    UndoState(self._snapshots.snapshot(), message=message, hold=hold),
                 )
             except KeyError as e:
                 # Hit a concurrent issue.
@@ -104,9 +389,12 @@ class Undo:
                 self._undo_index = old_idx
                 return
             # print (f"Deleting #{self._undo_index + 1} and above...")
-            del self._undo_stack[self._undo_index + 1 :]
-            while len(self._undo_stack) > self.levels:
-                self._undo_stack.pop(0)
+            self._discard(self._undo_index + 1)
+            while len(self._undo_stack) > 2 and (
+                len(self._undo_stack) > self.levels
+                or (self.max_bytes and self.memory > self.max_bytes)
+            ):
+                self._snapshots.release(self._undo_stack.pop(0).state)
                 self._undo_index -= 1
             self.debug_me(f"Successfully inserted {message} at {self._undo_index} (old index was {old_idx})")
         self.message = None
@@ -132,14 +420,14 @@ class Undo:
             if to_be_restored == len(self._undo_stack) - 1 and self._undo_stack[to_be_restored].message != self.LAST_STATE:
                 # We store the current state, as none was stored so far
                 self._undo_stack.append(
-                    UndoState(self.tree.backup_tree(), message=self.LAST_STATE),
+                    UndoState(self._snapshots.snapshot(), message=self.LAST_STATE),
                 )
                 # print ("**** Did add a last state to go back to if needed ****")
             elif to_be_restored == len(self._undo_stack) - 2 and self._undo_stack[to_be_restored + 1].message == self.LAST_STATE:
                 # We are at the last actively monitored index but we already have a current state -> replace it
-                self._undo_stack.pop(-1)
+                self._snapshots.release(self._undo_stack.pop(-1).state)
                 self._undo_stack.append(
-                    UndoState(self.tree.backup_tree(), message=self.LAST_STATE),
+                    UndoState(self._snapshots.snapshot(), message=self.LAST_STATE),
                 )
                 # print ("**** Did add a last state to go back to if needed, and overwrote the last state ****")
             # print (f"Index: {self._undo_index} / {len(self._undo_stack)} - To be restored: {to_be_restored}, param: {index}")
@@ -150,7 +438,7 @@ class Undo:
                 # Invalid? Reset to bottom of stack
                 self._undo_index = 0
                 return False
-            self.tree.restore_tree(undo.state)
+            self._snapshots.restore(undo.state)
             # try:
             #     undo.state = self.tree.backup_tree()  # Get unused copy
             # except KeyError:
@@ -174,7 +462,7 @@ class Undo:
                 # Invalid? Reset to top of stack
                 self._undo_index = len(self._undo_stack)
                 return False
-            self.tree.restore_tree(redo.state)
+            self._snapshots.restore(redo.state)
             # try:
             #     redo.state = self.tree.backup_tree()  # Get unused copy
             # except KeyError:
@@ -183,6 +471,32 @@ class Undo:
             self.debug_me("Redo done")
             return True
 
+    @property
+    def memory(self):
+        """
+        Estimated amount of bytes held by the undo states.
+        """
+        return self._snapshots.memory
+
+    def release(self):
+        """
+        Releases all undo states and stops listening to the tree. The undo is no longer
+        usable afterwards.
+        """
+        with self._lock:
+            self._discard(0)
+            self._undo_index = -1
+            self.active = False
+            self._snapshots.detach()
+
+    def _discard(self, index):
+        """
+        Removes all states from index onwards and releases their records.
+        """
+        for undo_state in self._undo_stack[index:]:
+            self._snapshots.release(undo_state.state)
+        del self._undo_stack[index:]
+
     def undolist(self):
         covered = False
         for i, v in enumerate(self._undo_stack):
@@ -230,7 +544,7 @@ class Undo:
                 self._undo_index += 1
             # print ("** Validate called and appending last state **")
             self._undo_stack.append(
-                UndoState(self.tree.backup_tree(), message=self.LAST_STATE),
+                UndoState(self._snapshots.snapshot(), message=self.LAST_STATE),
             )
 
     def find(self, scope:str):
@@ -248,7 +562,7 @@ class Undo:
         if 0 <= index < len(self._undo_stack):
             # print (f"Removing index {index}")
             # self.debug_me("before")
-            del self._undo_stack[index :]
+            self._discard(index)
             self._undo_index = len(self._undo_stack) - 1
             self.validate()
             # self._undo_stack.pop(index)
@@ -270,9 +584,9 @@ class Undo:
 
     def debug_tree(self, state):
         def show_children(parent, header):
-            for e in parent._children:
-                print (f"{header} {e.type}")
+            for e in parent.children:
+                print (f"{header} {e.node.type}")
                 show_children(e, header + "--")
         for idx, n in enumerate(state):
-            print(f"[{idx}] {n.type}")
+            print(f"[{idx}] {n.node.type}")
             show_children(n, "--")
\ No newline at end of file
@@ -1,7 +1,6 @@
-
-
 def get_effect_choices(context):
     _ = context.kernel.translation
+
     def get_wobble_options():
         return list(context.match("wobble", suffix=True))
 
@@ -132,3 +131,48 @@ def get_operation_choices(
         )
 
     return choices
+
+
+def get_motion_choices(
+    context, default_acceleration=500, default_corner_speed=5, default_turnaround=0.02
+):
+    """
+    Motion characteristics of the device, used to estimate the duration of jobs.
+    """
+    _ = context.kernel.translation
+    return [
+        {
+            "attr": "motion_acceleration",
+            "object": context,
+            "default": default_acceleration,
+            "type": float,
+            "label": _("Acceleration"),
+            "trailer": "mm/s²",
+            "tip": _(
+                "Acceleration of the laserhead, used to estimate the duration of a job. 0 ignores acceleration."
+            ),
+            "section": "_97_" + _("Time estimation"),
+        },
+        {
+            "attr": "motion_corner_speed",
+            "object": context,
+            "default": default_corner_speed,
+            "type": float,
+            "label": _("Corner speed"),
+            "trailer": "mm/s",
+            "tip": _("Speed the laserhead keeps while passing a right angle corner."),
+            "section": "_97_" + _("Time estimation"),
+        },
+        {
+            "attr": "motion_raster_turnaround",
+            "object": context,
+            "default": default_turnaround,
+            "type": float,
+            "label": _("Raster turnaround"),
+            "trailer": "s",
+            "tip": _(
+                "Additional time needed at the end of every raster line to turn around."
+            ),
+            "section": "_97_" + _("Time estimation"),
+        },
+    ]
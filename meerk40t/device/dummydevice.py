@@ -1,6 +1,10 @@
 from meerk40t.core.spoolers import Spooler
 from meerk40t.core.view import View
-from meerk40t.device.devicechoices import get_effect_choices, get_operation_choices
+from meerk40t.device.devicechoices import (
+    get_effect_choices,
+    get_motion_choices,
+    get_operation_choices,
+)
 from meerk40t.kernel import Service, signal_listener
 
 from .mixins import Status
@@ -93,6 +97,7 @@ class DummyDevice(Service, Status):
             },
         ]
         self.register_choices("bed_dim", choices)
+        self.register_choices("bed_dim", get_motion_choices(self))
 
         self.register_choices("dummy-effects", get_effect_choices(self))
         self.register_choices(
@@ -4,6 +4,8 @@ from functools import lru_cache
 from glob import glob
 from os.path import basename, exists, join, realpath, splitext
 
+import numpy as np
+
 from meerk40t.core.node.elem_path import PathNode
 from meerk40t.core.node.node import Fillrule, Linejoin
 from meerk40t.core.units import UNITS_PER_INCH, Length
@@ -12,7 +14,9 @@ from meerk40t.tools.jhfparser import JhfFont
 from meerk40t.tools.shxparser import ShxFont, ShxFontParseError
 from meerk40t.tools.ttfparser import TrueTypeFont, TTFParsingError
 
-# import numpy as np
+# Point columns of geomstr segments and the type bits saying the segment uses them.
+GLYPH_POINT_COLUMNS = [0, 1, 3, 4]
+GLYPH_POINT_BITS = np.array([0b1000, 0b0100, 0b0010, 0b0001])
 
 
 class FontPath:
@@ -52,6 +56,21 @@ class FontPath:
     def new_path(self):
         self.geom.end()
 
+    def glyph(self, outline, offset_x, offset_y, scale):
+        """
+        Adds a glyph outline in font units (y up), translated by the offset and scaled.
+
+        The outline is shared, only the rows copied into this path are transformed.
+        Points a segment type does not use (line controls, ends) are left as they are.
+        """
+        start = self.geom.index
+        self.geom.append(outline, end=False)
+        segments = self.geom.segments[start : self.geom.index]
+        points = segments[:, GLYPH_POINT_COLUMNS]
+        defined = (np.real(segments[:, 2:3]).astype(int) & GLYPH_POINT_BITS) != 0
+        placed = np.conj((points + complex(offset_x, offset_y)) * scale)
+        segments[:, GLYPH_POINT_COLUMNS] = np.where(defined, placed, points)
+
     def move(self, x, y):
         # self.geom.move((x, -y))
         if self.start is not None:
@@ -15,10 +15,12 @@ import ast
 import re
 import threading
 import time
+from collections import deque
 
 from meerk40t.kernel import signal_listener
 
 SETTINGS_MESSAGE = re.compile(r"^\$([0-9]+)=(.*)")
+FORWARD_LINE = re.compile(rb"[^\r\n]*(?:\r\n?|\n)|[^\r\n]+")
 
 
 def hardware_settings(code):
@@ -459,16 +461,24 @@ class GrblController:
         self._sending_lock = threading.Lock()
         self._realtime_lock = threading.Lock()
         self._loop_cond = threading.Condition()
-        self._sending_queue = []
-        self._realtime_queue = []
+        self._resume_pending = False
+        self._sending_queue = deque()
+        self._realtime_queue = deque()
         # buffer for feedback...
         self._assembled_response = []
-        self._forward_buffer = bytearray()
+        # Lines sent to the device and not yet acknowledged, with their total size.
+        self._forward_buffer = deque()
+        self._forward_bytes = 0
+        # Buffer signals are coalesced to at most one per interval.
+        self.buffer_signal_interval = 0.1
+        self._buffer_signal_time = 0
+        self._buffer_signal_value = None
         self._device_buffer_size = self.service.planning_buffer_size
         self._log = None
 
         self._paused = False
         self._watchers = []
+        self._log_channels = {}
         self.is_shutdown = False
         self._last_state = None
 
@@ -488,9 +498,7 @@ class GrblController:
 
     def __len__(self):
         return (
-            len(self._sending_queue)
-            + len(self._realtime_queue)
-            + len(self._forward_buffer)
+            len(self._sending_queue) + len(self._realtime_queue) + self._forward_bytes
         )
 
     @property
@@ -503,21 +511,47 @@ class GrblController:
             return 0
         return len(self._sending_queue[0])
 
-    @property
-    def _index_of_forward_line(self):
-        try:
-            r = self._forward_buffer.index(b"\r")
-        except ValueError:
-            r = -1
-        try:
-            n = self._forward_buffer.index(b"\n")
-        except ValueError:
-            n = -1
+    def _forward_append(self, data):
+        """
+        Adds the sent data to the forward buffer, one entry per terminated line. Data
+        without a line end (realtime commands) is joined with the line that follows.
 
-        if n != -1:
-            return min(n, r) if r != -1 else n
-        else:
-            return r
+        @param data: bytes sent to the device
+        @return:
+        """
+        buffer = self._forward_buffer
+        if buffer and buffer[-1][-1:] not in (b"\r", b"\n"):
+            self._forward_bytes -= len(buffer[-1])
+            data = buffer.pop() + data
+        self._forward_bytes += len(data)
+        buffer.extend(FORWARD_LINE.findall(data))
+
+    def _forward_clear(self):
+        with self._forward_lock:
+            self._forward_buffer.clear()
+            self._forward_bytes = 0
+
+    def _signal_buffer(self, force=False):
+        """
+        Signals the number of queued lines. Signals are throttled to the
+        buffer_signal_interval, except when forced or when the queues ran empty.
+
+        @param force:
+        @return:
+        """
+        value = len(self._sending_queue) + len(self._realtime_queue)
+        if value == self._buffer_signal_value:
+            return
+        now = time.time()
+        if (
+            not force
+            and value
+            and now - self._buffer_signal_time < self.buffer_signal_interval
+        ):
+            return
+        self._buffer_signal_time = now
+        self._buffer_signal_value = value
+        self.service.signal("grbl;buffer", value)
 
     @signal_listener("update_interface")
     def update_connection(self, origin=None, *args):
@@ -558,19 +592,22 @@ class GrblController:
             w(data, type=type)
 
     def _channel_log(self, data, type=None):
-        name = self.service.safe_label
-        if type == "send":
-            if not hasattr(self, "_grbl_send"):
-                self._grbl_send = self.service.channel(f"send-{name}", pure=True)
-            self._grbl_send(data)
-        elif type == "recv":
-            if not hasattr(self, "_grbl_recv"):
-                self._grbl_recv = self.service.channel(f"recv-{name}", pure=True)
-            self._grbl_recv(data)
-        elif type == "event":
-            if not hasattr(self, "_grbl_events"):
-                self._grbl_events = self.service.channel(f"events-{name}")
-            self._grbl_events(data)
+        try:
+            chan = self._log_channels[type]
+        except KeyError:
+            name = self.service.safe_label
+            if type == "send":
+                chan = self.service.channel(f"send-{name}", pure=True)
+            elif type == "recv":
+                chan = self.service.channel(f"recv-{name}", pure=True)
+            elif type == "event":
+                chan = self.service.channel(f"events-{name}")
+            else:
+                return
+            self._log_channels[type] = chan
+        if chan:
+            # Only sent if someone is listening.
+            chan(data)
 
     def open(self):
         """
@@ -629,9 +666,7 @@ class GrblController:
         self.service.signal("grbl;write", data)
         with self._sending_lock:
             self._sending_queue.append(data)
-        self.service.signal(
-            "grbl;buffer", len(self._sending_queue) + len(self._realtime_queue)
-        )
+        self._signal_buffer()
         self._send_resume()
 
     def realtime(self, data):
@@ -650,9 +685,7 @@ class GrblController:
         if "\x18" in data:
             with self._sending_lock:
                 self._sending_queue.clear()
-        self.service.signal(
-            "grbl;buffer", len(self._sending_queue) + len(self._realtime_queue)
-        )
+        self._signal_buffer(force=True)
         self._send_resume()
 
     ####################
@@ -692,7 +725,7 @@ class GrblController:
 
     def shutdown(self):
         self.is_shutdown = True
-        self._forward_buffer.clear()
+        self._forward_clear()
 
     def validate_start(self, cmd):
         if cmd == "$":
@@ -716,10 +749,9 @@ class GrblController:
             return
         self.service(f".timer-{name}{cmd} -q --off")
         if cmd == "$":
-            if len(self._forward_buffer) > 3:
+            if self._forward_bytes > 3:
                 # If the forward planning buffer is longer than 3 it must have filled with failed attempts.
-                with self._forward_lock:
-                    self._forward_buffer.clear()
+                self._forward_clear()
 
     def _rstop(self, *args):
         self._recving_thread = None
@@ -752,7 +784,7 @@ class GrblController:
         @return:
         """
         with self._forward_lock:
-            self._forward_buffer += bytes(line, encoding="latin-1")
+            self._forward_append(bytes(line, encoding="latin-1"))
         self.connection.write(line)
         # print(f"OUT: {line.strip()} [timestamp={time.time():.2f}]")
 
@@ -765,7 +797,7 @@ class GrblController:
         @return:
         """
         with self._realtime_lock:
-            line = self._realtime_queue.pop(0)
+            line = self._realtime_queue.popleft()
         if "!" in line:
             self._paused = True
         if "~" in line:
@@ -774,8 +806,7 @@ class GrblController:
             self._send(line)
         if "\x18" in line:
             self._paused = False
-            with self._forward_lock:
-                self._forward_buffer.clear()
+            self._forward_clear()
 
     def _sending_single_line(self):
         """
@@ -784,19 +815,22 @@ class GrblController:
         @return:
         """
         with self._sending_lock:
-            line = self._sending_queue.pop(0)
+            line = self._sending_queue.popleft()
         if line:
             self._send(line)
-        self.service.signal("grbl;buffer", len(self._sending_queue))
+        self._signal_buffer()
         return True
 
     def _send_halt(self):
         """
-        This is called internally in the _sending command.
+        This is called internally in the _sending command. A resume that happened since
+        the last halt returns immediately, so no wakeup is lost between the check and the wait.
         @return:
         """
         with self._loop_cond:
-            self._loop_cond.wait()
+            if not self._resume_pending:
+                self._loop_cond.wait()
+            self._resume_pending = False
 
     def _send_resume(self):
         """
@@ -805,6 +839,7 @@ class GrblController:
         @return:
         """
         with self._loop_cond:
+            self._resume_pending = True
             self._loop_cond.notify()
 
     def _sending(self):
@@ -826,10 +861,11 @@ class GrblController:
                 continue
             if not self._sending_queue:
                 # There is nothing to write/realtime
+                self._signal_buffer(force=True)
                 self.service.laser_status = "idle"
                 self._send_halt()
                 continue
-            buffer = len(self._forward_buffer)
+            buffer = self._forward_bytes
             if buffer:
                 self.service.laser_status = "active"
 
@@ -859,12 +895,12 @@ class GrblController:
 
         @return:
         """
-        q = self._index_of_forward_line
-        if q == -1:
-            raise ValueError("No forward command exists.")
         with self._forward_lock:
-            cmd_issued = self._forward_buffer[: q + 1]
-            self._forward_buffer = self._forward_buffer[q + 1 :]
+            buffer = self._forward_buffer
+            if not buffer or buffer[0][-1:] not in (b"\r", b"\n"):
+                raise ValueError("No forward command exists.")
+            cmd_issued = buffer.popleft()
+            self._forward_bytes -= len(cmd_issued)
         return cmd_issued
 
     def _recving(self):
@@ -888,7 +924,11 @@ class GrblController:
                 except (ConnectionAbortedError, AttributeError):
                     return
                 if not response:
-                    time.sleep(0.01)
+                    # Poll quickly while lines are queued or await their acknowledgement.
+                    if self._forward_buffer or self._sending_queue:
+                        time.sleep(0.001)
+                    else:
+                        time.sleep(0.01)
                     if self.is_shutdown:
                         return
             self.service.signal("grbl;response", response)
@@ -907,7 +947,7 @@ class GrblController:
                     continue
                     # raise ConnectionAbortedError from e
                 self.log(
-                    f"{response} / {len(self._forward_buffer)} -- {cmd_issued}",
+                    f"{response} / {self._forward_bytes} -- {cmd_issued}",
                     type="recv",
                 )
                 self.service.signal(
@@ -7,7 +7,11 @@ Registers relevant commands and options.
 
 from time import sleep
 
-from meerk40t.device.devicechoices import get_effect_choices, get_operation_choices
+from meerk40t.device.devicechoices import (
+    get_effect_choices,
+    get_motion_choices,
+    get_operation_choices,
+)
 from meerk40t.kernel import CommandSyntaxError, Service, signal_listener
 
 from ..core.laserjob import LaserJob
@@ -234,6 +238,7 @@ class GRBLDevice(Service, Status):
             },
         ]
         self.register_choices("bed_dim", choices)
+        self.register_choices("bed_dim", get_motion_choices(self))
 
         self.register_choices("grbl-effects", get_effect_choices(self))
         self.register_choices(
@@ -558,6 +563,54 @@ class GRBLDevice(Service, Status):
                 "section": "_25_" + _("Travel"),
                 "subsection": "_10_",
             },
+            {
+                "attr": "raster_compact",
+                "object": self,
+                "default": False,
+                "type": bool,
+                "label": _("Compact raster gcode"),
+                "tip": _(
+                    "Merges raster steps of equal power into single moves and omits unchanged values.\n"
+                    "This reduces the amount of data that needs to be sent for rasters and images."
+                ),
+                # Hint for translation _("Raster encoding")
+                "section": "_27_Raster encoding",
+            },
+            {
+                "attr": "raster_relative",
+                "object": self,
+                "default": False,
+                "type": bool,
+                "label": _("Relative coordinates"),
+                "tip": _("Use relative coordinates (G91) within rasters."),
+                "conditional": (self, "raster_compact"),
+                "section": "_27_Raster encoding",
+            },
+            {
+                "attr": "raster_precision",
+                "object": self,
+                "default": 3,
+                "type": int,
+                "lower": 0,
+                "upper": 4,
+                "label": _("Decimals"),
+                "tip": _("Number of decimals of the raster coordinates."),
+                "conditional": (self, "raster_compact"),
+                "section": "_27_Raster encoding",
+            },
+            {
+                "attr": "raster_blank_rapid",
+                "object": self,
+                "default": True,
+                "type": bool,
+                "label": _("Skip blank spans"),
+                "tip": _(
+                    "Blank spans within rasters are travelled with G0 rather than G1 S0.\n"
+                    "This requires GRBL laser mode ($32=1) which turns the laser off during G0."
+                ),
+                "conditional": (self, "raster_compact"),
+                "section": "_27_Raster encoding",
+            },
             {
                 "attr": "limit_buffer",
                 "object": self,
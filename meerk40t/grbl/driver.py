@@ -61,6 +61,13 @@ class GRBLDriver(Parameters):
 
         self.on_value = 0
         self.power_dirty = True
+        # Compact raster encoding, see _raster_begin
+        self._raster_run = None
+        self._raster_scale = 1000
+        self._raster_x = None
+        self._raster_y = None
+        self._raster_mode = None
+        self._raster_power = None
         self.speed_dirty = True
         # Zaxis should not be used by default, so we set the dirty flag to False
         self.zaxis_dirty = False
@@ -521,11 +528,16 @@ class GRBLDriver(Parameters):
                 #  Rastercut
                 self.plot_planner.push(q)
                 self.move_mode = 1
+                compact = self.service.raster_compact
+                if compact:
+                    self._raster_begin()
                 for x, y, on in self.plot_planner.gen():
                     while self.hold_work(0):
                         time.sleep(0.05)
                     if on > 1:
                         # Special Command.
+                        if compact:
+                            self._raster_flush()
                         if isinstance(on, float):
                             on = int(on)
                         if on & PLOT_FINISH:  # Plot planner is ending.
@@ -546,7 +558,13 @@ class GRBLDriver(Parameters):
                         ):  # Plot planner requests position change.
                             # self.move_mode = 0
                             self.rapid_mode()
-                            self._move(x, y)
+                            if compact:
+                                self._raster_move(x, y, 0)
+                            else:
+                                self._move(x, y)
+                        continue
+                    if compact:
+                        self._raster_move(x, y, on)
                         continue
                     # if on == 0:
                     #     self.move_mode = 0
@@ -556,6 +574,8 @@ class GRBLDriver(Parameters):
                         self.power_dirty = True
                     self.on_value = on
                     self._move(x, y)
+                if compact:
+                    self._raster_end()
         self.queue.clear()
         self._set_queue_status(0, 0)
 
@@ -855,14 +875,7 @@ class GRBLDriver(Parameters):
         line.append(f"X{x:.3f}")
         line.append(f"Y{y:.3f}")
         if self.zaxis_dirty:
-            self.zaxis_dirty = False
-            if self.zaxis is not None:
-                try:
-                    z = float(Length(self.zaxis) / self.service.view.native_scale_x)
-                    z /= self.unit_scale
-                    line.append(f"Z{z:.3f}")
-                except ValueError:
-                    pass
+            self._append_zaxis(line)
 
         if self.power_dirty:
             if self.power is not None:
@@ -879,6 +892,145 @@ class GRBLDriver(Parameters):
                 (old_current[0], old_current[1], new_current[0], new_current[1]),
             )
 
+    def _append_zaxis(self, line):
+        self.zaxis_dirty = False
+        if self.zaxis is not None:
+            try:
+                z = float(Length(self.zaxis) / self.service.view.native_scale_x)
+                z /= self.unit_scale
+                line.append(f"Z{z:.3f}")
+            except ValueError:
+                pass
+
+    def _raster_begin(self):
+        """
+        Starts the compact encoding of a raster. Consecutive steps with the same power
+        along the same direction are merged into one move, words that did not change are
+        omitted, numbers use raster_precision decimals without trailing zeros and, if set,
+        blank spans are G0 moves and coordinates are relative.
+
+        @return:
+        """
+        self._raster_run = None
+        self._raster_scale = 10 ** max(0, int(self.service.raster_precision))
+        self._raster_x = None
+        self._raster_y = None
+        self._raster_mode = None
+        self._raster_power = None
+
+    def _raster_end(self):
+        self._raster_flush()
+        self._g90_absolute()
+        self._clean_motion()
+        # The modal state is unknown to the regular moves.
+        self.power_dirty = True
+        self.move_mode = 1
+
+    def _raster_number(self, value):
+        """
+        Formats the integer value in units of the raster precision.
+        """
+        if self._raster_scale == 1:
+            return str(value)
+        sign = "-" if value < 0 else ""
+        whole, fraction = divmod(abs(value), self._raster_scale)
+        if not fraction:
+            return f"{sign}{whole}"
+        digits = len(str(self._raster_scale)) - 1
+        fraction = str(fraction).rjust(digits, "0").rstrip("0")
+        if whole:
+            return f"{sign}{whole}.{fraction}"
+        return f"{sign}.{fraction}"
+
+    def _raster_move(self, x, y, on):
+        """
+        Adds a raster step to the pending run. A step continuing the run in the same
+        direction with the same power extends it, any other step emits the run first.
+
+        @param x: native x
+        @param y: native y
+        @param on: on value of the step
+        @return:
+        """
+        if on == 0 and self.service.raster_blank_rapid:
+            power = None
+        else:
+            power = f"{self.power * on:.1f}"
+        run = self._raster_run
+        if run is not None:
+            sx, sy, ex, ey, run_power = run
+            dx0 = ex - sx
+            dy0 = ey - sy
+            dx1 = x - ex
+            dy1 = y - ey
+            if (
+                power == run_power
+                and abs(dx0 * dy1 - dy0 * dx1)
+                <= 1e-9 * (abs(dx0) + abs(dy0)) * (abs(dx1) + abs(dy1))
+                and dx0 * dx1 + dy0 * dy1 >= 0
+            ):
+                run[2] = x
+                run[3] = y
+                return
+            self._raster_flush()
+        self._raster_run = [self.native_x, self.native_y, x, y, power]
+
+    def _raster_flush(self):
+        """
+        Emits the pending run of the compact raster encoding.
+
+        @return:
+        """
+        run = self._raster_run
+        if run is None:
+            return
+        self._raster_run = None
+        x, y, power = run[2], run[3], run[4]
+        scale = self._raster_scale / self.unit_scale
+        qx = round(x * scale)
+        qy = round(y * scale)
+        if qx == self._raster_x and qy == self._raster_y:
+            # No motion after rounding, nothing is burned.
+            return
+        old_current = self.service.current
+        relative = self._raster_x is not None and self.service.raster_relative
+        if relative and self._absolute:
+            self._g91_relative()
+            self._clean_motion()
+        line = []
+        mode = 0 if power is None else 1
+        if mode != self._raster_mode:
+            line.append(f"G{mode}")
+            self._raster_mode = mode
+        if qx != self._raster_x:
+            line.append(
+                f"X{self._raster_number(qx - self._raster_x if relative else qx)}"
+            )
+        if qy != self._raster_y:
+            line.append(
+                f"Y{self._raster_number(qy - self._raster_y if relative else qy)}"
+            )
+        if self.zaxis_dirty:
+            self._append_zaxis(line)
+        if power is not None and (power != self._raster_power or self.power_dirty):
+            line.append(f"S{power[:-2] if power.endswith('.0') else power}")
+            self._raster_power = power
+            self.power_dirty = False
+        if self.speed_dirty:
+            line.append(f"F{self.feed_convert(self.speed):.1f}")
+            self.speed_dirty = False
+        self("".join(line) + self.line_end)
+        self._raster_x = qx
+        self._raster_y = qy
+        self.native_x = x
+        self.native_y = y
+        new_current = self.service.current
+        if self._signal_updates:
+            self.service.signal(
+                "driver;position",
+                (old_current[0], old_current[1], new_current[0], new_current[1]),
+            )
+
     def _clean_motion(self):
         if self.absolute_dirty:
             if self._absolute:
@@ -28,7 +28,7 @@ class SerialConnection:
         if f == -1:
             return None
         response = self.read_buffer[:f]
-        self.read_buffer = self.read_buffer[f + 1 :]
+        del self.read_buffer[: f + 1]
         str_response = str(response, "raw_unicode_escape")
         str_response = str_response.strip()
         return str_response
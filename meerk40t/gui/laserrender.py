@@ -658,20 +658,35 @@ class LaserRender:
                     process_as_image()
                     return
                 p.MoveToPoint(start[0] + x, start[1] + y)
-                todraw = cache
+                # Row spans, rows are y for horizontal rasters and x otherwise.
+                rows, starts, ends, ons = cache
+                horizontal = cut.plot.horizontal
+
+                def span_point(position, row):
+                    if horizontal:
+                        return position + x, row + y
+                    return row + x, position + y
+
                 if residual is None:
                     maxcount = -1
                 else:
-                    maxcount = int(len(todraw) * residual)
+                    maxcount = int(len(rows) * residual)
                 count = 0
-                for px, py, pon in todraw:
-                    if px is None or py is None:
+                last = None
+                for prow, pstart, pend, pon in zip(
+                    rows.tolist(), starts.tolist(), ends.tolist(), ons
+                ):
+                    if prow != prow:
                         # Passthrough
                         continue
+                    if last is not None and pstart != last:
+                        # Travel to the start of the span.
+                        p.MoveToPoint(*span_point(pstart, prow))
                     if pon == 0:
-                        p.MoveToPoint(px + x, py + y)
+                        p.MoveToPoint(*span_point(pend, prow))
                     else:
-                        p.AddLineToPoint(px + x, py + y)
+                        p.AddLineToPoint(*span_point(pend, prow))
+                    last = pend
                     count += 1
                     if 0 < maxcount < count:
                         break
@@ -121,13 +121,11 @@ class RectSelectWidget(Widget):
 
         # We don't want every single element to issue a signal
         with elements.signalfree("emphasized"):
-            for node in elements.elems():
-                try:
-                    bounds = node.bounds
-                except AttributeError:
-                    continue  # This element has no bounds.
-                if bounds is None:
-                    continue
+            # Elements not overlapping the selection rectangle are never covered.
+            for node in elements.elems_in_area(
+                (sel_left, sel_top, sel_right, sel_bottom)
+            ):
+                bounds = node.bounds
                 if hasattr(node, "hidden") and node.hidden:
                     continue
                 if hasattr(node, "can_emphasize") and not node.can_emphasize:
@@ -355,7 +353,10 @@ class RectSelectWidget(Widget):
                 # t1 = perf_counter()
                 other_points = []
                 selected_points = []
-                for e in self.scene.context.elements.elems():
+                # Only elements near the selection can contribute points.
+                for e in self.scene.context.elements.elems_in_area(
+                    (b[0] - gap, b[1] - gap, b[2] + gap, b[3] + gap)
+                ):
                     target = selected_points if e.emphasized else other_points
                     if not hasattr(e, "as_geometry"):
                         continue
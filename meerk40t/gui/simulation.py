@@ -13,6 +13,7 @@ from ..core.cutcode.dwellcut import DwellCut
 from ..core.cutcode.gotocut import GotoCut
 from ..core.cutcode.homecut import HomeCut
 from ..core.cutcode.inputcut import InputCut
+from ..core.cutcode.kinematics import KinematicEstimator
 from ..core.cutcode.linecut import LineCut
 from ..core.cutcode.outputcut import OutputCut
 from ..core.cutcode.plotcut import PlotCut
@@ -886,7 +887,9 @@ class SimulationPanel(wx.Panel, Job):
         self.cutcode = CutCode(self.cutcode.flat())
 
         # Calculate statistics
-        self.statistics = self.cutcode.provide_statistics()
+        self.statistics = self.cutcode.provide_statistics(
+            estimator=KinematicEstimator.from_device(self.context.device)
+        )
         self.max = max(len(self.cutcode), 0) + 1
         self.progress = self.max
 
@@ -1121,7 +1124,9 @@ class SimulationPanel(wx.Panel, Job):
 
     def reload_statistics(self):
         try:
-            self.statistics = self.cutcode.provide_statistics()
+            self.statistics = self.cutcode.provide_statistics(
+                estimator=KinematicEstimator.from_device(self.context.device)
+            )
             self._set_slider_dimensions()
             self.sim_travel.initvars()
             self.update_fields()
@@ -1813,7 +1818,7 @@ class SimulationPanel(wx.Panel, Job):
                     continue
                 if isinstance(cut, RasterCut):
                     try:
-                        cut._plotcache = list(cut.plot.plot())
+                        cut._plotcache = cut.plot.plot_spans()
                     except MemoryError:
                         cut._plotcache = None
                 elif isinstance(cut, PlotCut):
@@ -123,6 +123,7 @@ class PointMoveTool(ToolWidget):
                         if p[3] is node:
                             p[3] = new_node
                     node = new_node
+                geom_t.unshare()
                 geom_t.segments[index_line][index_pos] = pos
                 node.geometry = geom_t
                 node.matrix.reset()
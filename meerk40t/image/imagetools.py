@@ -716,6 +716,11 @@ def plugin(kernel, lifecycle=None):
     _ = kernel.translation
     preproc = RasterImagePreprocessor(kernel)
     kernel.register("load/ImageLoader", ImageLoader)
+    if kernel.lookup("render-op/make_raster") is None:
+        # No gui renderer was registered during preregister, we are headless.
+        from .rasterizer import Rasterizer
+
+        kernel.register("render-op/make_raster", Rasterizer().make_raster)
     choices = [
         {
             "attr": "image_dpi",
@@ -0,0 +1,610 @@
+"""
+Headless vector rasterizer.
+
+Provides a pure NumPy/Pillow implementation of the "render-op/make_raster"
+operation. The wx based LaserRender is only available if the gui plugin is
+loaded, without it raster operations would not be able to convert vector
+elements into images during cut planning.
+
+The rasterizer works directly on the Geomstr data of the nodes. Curves are
+flattened into line edges, strokes are expanded into consistently oriented
+quads (plus round joins and caps) and everything is scan-converted by sampling
+the pixel centers of every row. Fills honor the nonzero and evenodd fillrules.
+
+Large bounds are split into tiles which are processed independently and can be
+rendered in parallel threads, numpy releases the GIL for the heavy operations.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from math import ceil, isnan, pi
+
+import numpy as np
+
+from meerk40t.core.node.node import Fillrule, Linecap
+from meerk40t.svgelements import Matrix
+from meerk40t.tools.geomstr import (
+    TYPE_ARC,
+    TYPE_CUBIC,
+    TYPE_END,
+    TYPE_LINE,
+    TYPE_QUAD,
+)
+
+GEOMETRY_TYPES = (TYPE_LINE, TYPE_QUAD, TYPE_CUBIC, TYPE_ARC)
+
+VECTOR_NODES = (
+    "elem ellipse",
+    "elem path",
+    "elem polyline",
+    "elem rect",
+    "elem line",
+    "effect hatch",
+    "effect wobble",
+    "effect warp",
+)
+
+
+def _affine(points, matrix):
+    """
+    Apply the svgelements matrix to an array of complex points.
+    """
+    if matrix is None:
+        return points
+    x = points.real
+    y = points.imag
+    return (matrix.a * x + matrix.c * y + matrix.e) + 1j * (
+        matrix.b * x + matrix.d * y + matrix.f
+    )
+
+
+def _edge_bounds(points):
+    if len(points) == 0:
+        return 0, 0, -1, -1
+    return (
+        np.min(points.real),
+        np.min(points.imag),
+        np.max(points.real),
+        np.max(points.imag),
+    )
+
+
+def _subdivisions(lengths, tolerance):
+    return np.clip(np.ceil(np.sqrt(lengths / tolerance)), 2, 1024).astype(int)
+
+
+def flatten_geometry(geometry, matrix=None, tolerance=0.25):
+    """
+    Flattens the geometry into line edges.
+
+    @param geometry: Geomstr to flatten
+    @param matrix: optional matrix applied to the geometry before flattening
+    @param tolerance: approximate flattening tolerance (in transformed units)
+    @return: starts, ends of all edges, starts, ends of subpaths and the interior
+        junction points of the original segments.
+    """
+    empty = np.zeros(0, dtype=complex)
+    if geometry is None or geometry.index == 0:
+        return empty, empty, empty, empty, empty
+    segments = geometry.segments[: geometry.index]
+    kinds = segments[:, 2].real.astype(int) & 0xFF
+    geometric = np.isin(kinds, GEOMETRY_TYPES)
+    index = np.flatnonzero(geometric)
+    if len(index) == 0:
+        return empty, empty, empty, empty, empty
+    end_count = np.cumsum(kinds == TYPE_END)[index]
+    segs = segments[index]
+    kinds = kinds[index]
+    start = _affine(segs[:, 0], matrix)
+    c1 = _affine(segs[:, 1], matrix)
+    c2 = _affine(segs[:, 3], matrix)
+    end = _affine(segs[:, 4], matrix)
+
+    # Subpath breaks, disjoint segments or end markers.
+    breaks = np.ones(len(index), dtype=bool)
+    breaks[1:] = (np.abs(start[1:] - end[:-1]) > 1e-8) | (
+        end_count[1:] != end_count[:-1]
+    )
+    last = np.ones(len(index), dtype=bool)
+    last[:-1] = breaks[1:]
+    sub_starts = start[breaks]
+    sub_ends = end[last]
+    junctions = end[~last]
+
+    edge_starts = [start[kinds == TYPE_LINE]]
+    edge_ends = [end[kinds == TYPE_LINE]]
+
+    for kind in (TYPE_QUAD, TYPE_CUBIC):
+        q = kinds == kind
+        if not np.any(q):
+            continue
+        s, a, b, e = start[q], c1[q], c2[q], end[q]
+        if kind == TYPE_QUAD:
+            lengths = np.abs(a - s) + np.abs(e - a)
+        else:
+            lengths = np.abs(a - s) + np.abs(b - a) + np.abs(e - b)
+        steps = _subdivisions(lengths, tolerance)
+        owner = np.repeat(np.arange(len(steps)), steps + 1)
+        offsets = np.cumsum(steps + 1) - (steps + 1)
+        t = (np.arange(len(owner)) - offsets[owner]) / steps[owner]
+        mt = 1 - t
+        if kind == TYPE_QUAD:
+            pts = mt * mt * s[owner] + 2 * mt * t * a[owner] + t * t * e[owner]
+        else:
+            pts = (
+                mt * mt * mt * s[owner]
+                + 3 * mt * mt * t * a[owner]
+                + 3 * mt * t * t * b[owner]
+                + t * t * t * e[owner]
+            )
+        same = owner[1:] == owner[:-1]
+        edge_starts.append(pts[:-1][same])
+        edge_ends.append(pts[1:][same])
+
+    for i in np.flatnonzero(kinds == TYPE_ARC):
+        # Arcs are rare, they use the geomstr positions directly.
+        line = np.array((start[i], c1[i], 0, c2[i], end[i]))
+        chord = abs(c1[i] - start[i]) + abs(end[i] - c1[i])
+        steps = int(_subdivisions(np.array([chord]), tolerance)[0])
+        pts = geometry._arc_position(line, np.linspace(0, 1, steps + 1))
+        edge_starts.append(pts[:-1])
+        edge_ends.append(pts[1:])
+
+    return (
+        np.concatenate(edge_starts),
+        np.concatenate(edge_ends),
+        sub_starts,
+        sub_ends,
+        junctions,
+    )
+
+
+def fill_edges(geometry, matrix=None, tolerance=0.25):
+    """
+    Provides the edges of the implicitly closed geometry, suitable for filling.
+    """
+    starts, ends, sub_starts, sub_ends, _ = flatten_geometry(
+        geometry, matrix=matrix, tolerance=tolerance
+    )
+    return np.concatenate((starts, sub_ends)), np.concatenate((ends, sub_starts))
+
+
+def _discs(centers, radius, tolerance):
+    """
+    Polygonal discs around all centers, oriented like the stroke quads.
+    """
+    if len(centers) == 0 or radius <= 0:
+        empty = np.zeros(0, dtype=complex)
+        return empty, empty
+    sides = int(np.clip(ceil(pi / np.sqrt(2 * tolerance / radius)), 8, 64))
+    ring = radius * np.exp(-1j * np.linspace(0, 2 * pi, sides + 1))
+    pts = centers[:, None] + ring[None, :]
+    return pts[:, :-1].ravel(), pts[:, 1:].ravel()
+
+
+def stroke_edges(
+    geometry, width, matrix=None, linecap=None, tolerance=0.25, minimum=1.0
+):
+    """
+    Provides the edges of the stroke outline of the geometry.
+
+    Every flattened edge is expanded into a quad of the given width. All quads and
+    discs share the same orientation, so the union is correctly rendered with the
+    nonzero rule. Joins are rendered round, caps as requested by linecap.
+
+    @param geometry: Geomstr to stroke
+    @param width: stroke width in transformed units
+    @param matrix: optional matrix applied to the geometry
+    @param linecap: Linecap value, None is treated as round.
+    @param tolerance: flattening tolerance
+    @param minimum: minimum stroke width, hairlines still paint pixels.
+    @return:
+    """
+    starts, ends, sub_starts, sub_ends, junctions = flatten_geometry(
+        geometry, matrix=matrix, tolerance=tolerance
+    )
+    if isnan(width):
+        width = 1.0
+    half = max(width, minimum) / 2.0
+    delta = ends - starts
+    lengths = np.abs(delta)
+    valid = lengths > 0
+    starts, ends, delta, lengths = (
+        starts[valid],
+        ends[valid],
+        delta[valid],
+        lengths[valid],
+    )
+    normal = 1j * half * delta / lengths
+    if linecap == Linecap.CAP_SQUARE:
+        # Extend the first and last edge of every open subpath by half the width.
+        extend = half * delta / lengths
+        open_path = np.abs(sub_starts - sub_ends) > 1e-8
+        first = np.isin(starts, sub_starts[open_path])
+        final = np.isin(ends, sub_ends[open_path])
+        starts = np.where(first, starts - extend, starts)
+        ends = np.where(final, ends + extend, ends)
+    a = starts + normal
+    b = ends + normal
+    c = ends - normal
+    d = starts - normal
+    edge_starts = [a, b, c, d]
+    edge_ends = [b, c, d, a]
+    centers = [junctions]
+    if linecap is None or linecap == Linecap.CAP_ROUND:
+        centers.append(sub_starts)
+        centers.append(sub_ends)
+    disc_starts, disc_ends = _discs(np.concatenate(centers), half, tolerance)
+    edge_starts.append(disc_starts)
+    edge_ends.append(disc_ends)
+    return np.concatenate(edge_starts), np.concatenate(edge_ends)
+
+
+def scanline_mask(starts, ends, x0, y0, width, height, evenodd=False):
+    """
+    Scan-converts the given edges within the tile located at x0, y0 of the given
+    width and height. Pixels are considered inside if their center is inside.
+
+    @param starts: complex array of edge starts
+    @param ends: complex array of edge ends
+    @param x0: tile origin x
+    @param y0: tile origin y
+    @param width: tile width
+    @param height: tile height
+    @param evenodd: use evenodd fillrule rather than nonzero.
+    @return: boolean mask of shape (height, width)
+    """
+    mask = np.zeros((height, width), dtype=bool)
+    if len(starts) == 0:
+        return mask
+    sx = starts.real - x0
+    sy = starts.imag - y0
+    ex = ends.real - x0
+    ey = ends.imag - y0
+    # Edges starting right of the tile cannot change the coverage in the tile.
+    # Dropping them leaves an unbounded span after the last edge which is
+    # clipped to the tile width.
+    near = np.minimum(sx, ex) < width
+    downward = ey > sy
+    top = np.where(downward, sy, ey)
+    bottom = np.where(downward, ey, sy)
+    row_start = np.clip(np.ceil(top - 0.5), 0, height).astype(np.int64)
+    row_end = np.clip(np.ceil(bottom - 0.5), 0, height).astype(np.int64)
+    counts = np.where(near, row_end - row_start, 0)
+    edges = np.flatnonzero(counts > 0)
+    if len(edges) == 0:
+        return mask
+    counts = counts[edges]
+    owner = np.repeat(edges, counts)
+    offsets = np.cumsum(counts) - counts
+    rows = np.arange(len(owner)) - np.repeat(offsets, counts) + row_start[owner]
+    t = (rows + 0.5 - sy[owner]) / (ey[owner] - sy[owner])
+    xs = sx[owner] + t * (ex[owner] - sx[owner])
+    order = np.lexsort((xs, rows))
+    rows = rows[order]
+    xs = xs[order]
+    first = np.ones(len(rows), dtype=bool)
+    first[1:] = rows[1:] != rows[:-1]
+    group = np.cumsum(first) - 1
+    if evenodd:
+        position = np.arange(len(rows)) - np.flatnonzero(first)[group]
+        inside = position % 2 == 0
+    else:
+        winding = np.where(downward[owner[order]], 1, -1)
+        total = np.cumsum(winding)
+        base = (total - winding)[np.flatnonzero(first)][group]
+        inside = (total - base) != 0
+    following = np.full(len(xs), np.inf)
+    same_row = ~first[1:]
+    following[:-1] = np.where(same_row, xs[1:], np.inf)
+    inside &= following > xs
+    span_start = np.clip(np.ceil(xs[inside] - 0.5), 0, width).astype(np.int64)
+    span_end = np.clip(np.ceil(following[inside] - 0.5), 0, width).astype(np.int64)
+    rows = rows[inside]
+    keep = span_end > span_start
+    if not np.any(keep):
+        return mask
+    stride = width + 1
+    rows = rows[keep] * stride
+    size = height * stride
+    diff = np.bincount(rows + span_start[keep], minlength=size) - np.bincount(
+        rows + span_end[keep], minlength=size
+    )
+    coverage = np.cumsum(diff.reshape(height, stride), axis=1)
+    return coverage[:, :width] > 0
+
+
+class Rasterizer:
+    """
+    Numpy/Pillow based renderer for the "render-op/make_raster" operation. This
+    works without any gui toolkit and replaces the LaserRender.make_raster where
+    no gui is loaded.
+    """
+
+    def __init__(self, tile_size=1024, threads=None, tolerance=0.25):
+        self.tile_size = tile_size
+        if threads is None:
+            threads = min(8, os.cpu_count() or 1)
+        self.threads = max(1, threads)
+        self.tolerance = tolerance
+
+    @staticmethod
+    def _rgb(color):
+        if color is None or color.value is None:
+            return None
+        return color.red, color.green, color.blue
+
+    def _paint_operations(self, nodes, matrix, scale):
+        """
+        Converts the nodes into a list of paint operations, in paint order.
+        """
+        operations = []
+        for node in nodes:
+            if node.type == "reference":
+                node = node.node
+            if getattr(node, "hidden", False):
+                continue
+            if hasattr(node, "is_visible") and not node.is_visible:
+                continue
+            if hasattr(node, "output") and not node.output:
+                continue
+            if node.type in VECTOR_NODES:
+                geometry = node.as_geometry()
+                if geometry is None:
+                    continue
+                fill = self._rgb(getattr(node, "fill", None))
+                if fill is not None:
+                    starts, ends = fill_edges(
+                        geometry, matrix=matrix, tolerance=self.tolerance
+                    )
+                    evenodd = (
+                        getattr(node, "fillrule", None) == Fillrule.FILLRULE_EVENODD
+                    )
+                    operations.append(
+                        ("fill", _edge_bounds(starts), starts, ends, evenodd, fill)
+                    )
+                stroke = self._rgb(getattr(node, "stroke", None))
+                if stroke is not None:
+                    width = node.implied_stroke_width * scale
+                    starts, ends = stroke_edges(
+                        geometry,
+                        width,
+                        matrix=matrix,
+                        linecap=getattr(node, "linecap", None),
+                        tolerance=self.tolerance,
+                    )
+                    operations.append(
+                        ("stroke", _edge_bounds(starts), starts, ends, False, stroke)
+                    )
+            elif hasattr(node, "as_image"):
+                try:
+                    image = node.active_image
+                    image_matrix = node.active_matrix
+                except AttributeError:
+                    image = node.as_image()[0]
+                    image_matrix = node.matrix
+                if image is None:
+                    continue
+                image_matrix = image_matrix * matrix
+                corners = _affine(
+                    np.array(
+                        (
+                            0,
+                            image.width,
+                            1j * image.height,
+                            image.width + 1j * image.height,
+                        )
+                    ),
+                    image_matrix,
+                )
+                operations.append(
+                    (
+                        "image",
+                        _edge_bounds(corners),
+                        self._image_luminance(image),
+                        image_matrix,
+                    )
+                )
+        return operations
+
+    @staticmethod
+    def _image_luminance(image):
+        """
+        Images are rendered black with an alpha of the inverted luminance, the
+        same way the LaserRender draws them. Transparent parts are white.
+        """
+        if "transparency" in image.info:
+            image = image.convert("RGBA")
+        if image.mode in ("RGBA", "LA", "PA"):
+            from PIL import Image
+
+            background = Image.new("RGBA", image.size, "white")
+            image = Image.alpha_composite(background, image.convert("RGBA"))
+        if image.mode != "L":
+            image = image.convert("L")
+        return image
+
+    @staticmethod
+    def _paint_image(tile, image, matrix, x0, y0):
+        from PIL import Image
+
+        try:
+            inverse = ~Matrix(matrix)
+        except ZeroDivisionError:
+            return
+        local = Matrix.translate(x0, y0) * inverse
+        height, width = tile.shape[:2]
+        placed = image.transform(
+            (width, height),
+            Image.AFFINE,
+            (local.a, local.c, local.e, local.b, local.d, local.f),
+            resample=Image.BILINEAR,
+            fillcolor=255,
+        )
+        factor = np.asarray(placed, dtype=np.uint16)
+        tile[:] = (tile.astype(np.uint16) * factor[:, :, None] // 255).astype(np.uint8)
+
+    def render_tile(self, operations, x0, y0, width, height):
+        """
+        Renders all paint operations for a single tile.
+
+        @return: uint8 RGB numpy array of shape (height, width, 3)
+        """
+        tile = np.full((height, width, 3), 255, dtype=np.uint8)
+        for operation in operations:
+            kind, bounds = operation[:2]
+            # Only the part of the tile covered by the operation is rendered.
+            left = max(x0, int(np.floor(bounds[0])))
+            top = max(y0, int(np.floor(bounds[1])))
+            right = min(x0 + width, int(np.ceil(bounds[2])) + 1)
+            bottom = min(y0 + height, int(np.ceil(bounds[3])) + 1)
+            if right <= left or bottom <= top:
+                continue
+            region = tile[top - y0 : bottom - y0, left - x0 : right - x0]
+            if kind == "image":
+                self._paint_image(region, operation[2], operation[3], left, top)
+                continue
+            _, _, starts, ends, evenodd, color = operation
+            mask = scanline_mask(
+                starts, ends, left, top, right - left, bottom - top, evenodd
+            )
+            region[mask] = color
+        return tile
+
+    def render(self, operations, width, height):
+        """
+        Renders the paint operations into an RGB numpy array, splitting the area
+        into tiles which are processed in parallel.
+        """
+        canvas = np.empty((height, width, 3), dtype=np.uint8)
+        size = self.tile_size
+        tiles = [
+            (x, y, min(size, width - x), min(size, height - y))
+            for y in range(0, height, size)
+            for x in range(0, width, size)
+        ]
+
+        def process(tile):
+            x, y, w, h = tile
+            canvas[y : y + h, x : x + w] = self.render_tile(operations, x, y, w, h)
+
+        if len(tiles) == 1 or self.threads == 1:
+            for tile in tiles:
+                process(tile)
+        else:
+            with ThreadPoolExecutor(max_workers=self.threads) as executor:
+                list(executor.map(process, tiles))
+        return canvas
+
+    def make_raster(
+        self,
+        nodes,
+        bounds,
+        width=None,
+        height=None,
+        bitmap=False,
+        step_x=1,
+        step_y=1,
+        keep_ratio=False,
+    ):
+        """
+        Make Raster turns an iterable of elements and a bounds into an image of the designated size, taking into account
+        the step size. This follows the same conventions as LaserRender.make_raster but requires only numpy and Pillow.
+
+        Text elements require the gui to be measured and are not rendered.
+
+        @param nodes: elements to render.
+        @param bounds: bounds of those elements for the viewport.
+        @param width: desired width of the resulting raster
+        @param height: desired height of the resulting raster
+        @param bitmap: ignored, there are no bitmaps without gui. An image is always returned.
+        @param step_x: raster step rate, scale rate of the image.
+        @param step_y: raster step rate, scale rate of the image.
+        @param keep_ratio: get a picture with the same height / width
+               ratio as the original
+        @return:
+        """
+        from PIL import Image
+
+        if bounds is None:
+            return None
+        if step_x == 0:
+            step_x = 1
+        if step_y == 0:
+            step_y = 1
+        _nodes = [nodes] if not isinstance(nodes, (tuple, list)) else nodes
+        x_min = float("inf")
+        y_min = float("inf")
+        x_max = -float("inf")
+        y_max = -float("inf")
+        for item in _nodes:
+            bb = getattr(item, "paint_bounds", None)
+            if bb is None:
+                bb = getattr(item, "bounds", None)
+            if bb is None:
+                continue
+            x_min = min(x_min, bb[0])
+            y_min = min(y_min, bb[1])
+            x_max = max(x_max, bb[2])
+            y_max = max(y_max, bb[3])
+        if x_min == float("inf"):
+            x_min, y_min, x_max, y_max = bounds
+        raster_width = max(x_max - x_min, 1)
+        raster_height = max(y_max - y_min, 1)
+        if width is None:
+            width = raster_width / step_x
+        if height is None:
+            height = raster_height / step_y
+        width = max(width, 1)
+        height = max(height, 1)
+        pixel_width = int(ceil(abs(width)))
+        pixel_height = int(ceil(abs(height)))
+
+        try:
+            scale_x = width / raster_width
+        except ZeroDivisionError:
+            scale_x = 1
+        try:
+            scale_y = height / raster_height
+        except ZeroDivisionError:
+            scale_y = 1
+        if keep_ratio:
+            scale_x = min(scale_x, scale_y)
+            scale_y = scale_x
+        matrix = Matrix()
+        matrix.post_translate(-x_min, -y_min)
+        matrix.post_scale(scale_x, scale_y)
+        if scale_y < 0:
+            matrix.pre_translate(0, -raster_height)
+        if scale_x < 0:
+            matrix.pre_translate(-raster_width, 0)
+        scale = np.sqrt(abs(scale_x * scale_y))
+
+        operations = self._paint_operations(_nodes, matrix, scale)
+        canvas = self.render(operations, pixel_width, pixel_height)
+        return Image.fromarray(canvas, "RGB")
+
+
+def rasterize_geometry(geometry, matrix=None, width=None, height=None, evenodd=False):
+    """
+    Convenience function rendering the filled geometry into a "1" mode image.
+
+    Without a matrix the geometry is moved to the origin. A missing width or height
+    is taken from the extent of the placed geometry.
+    """
+    from PIL import Image
+
+    if matrix is None:
+        x0, y0, x1, y1 = geometry.bbox()
+        matrix = Matrix.translate(-x0, -y0)
+        if width is None:
+            width = int(ceil(x1 - x0))
+        if height is None:
+            height = int(ceil(y1 - y0))
+    starts, ends = fill_edges(geometry, matrix=matrix)
+    if width is None:
+        width = int(ceil(np.max(starts.real))) if len(starts) else 0
+    if height is None:
+        height = int(ceil(np.max(starts.imag))) if len(starts) else 0
+    mask = scanline_mask(starts, ends, 0, 0, max(width, 1), max(height, 1), evenodd)
+    return Image.fromarray(~mask)
@@ -1,5 +1,7 @@
 import re
 import threading
+import time
+from array import array
 from collections import deque
 from datetime import datetime
 from typing import Callable, Optional, Union
@@ -65,6 +67,89 @@ def bbcode_to_plain(text):
     return RE_ANSI.sub("", text)
 
 
+class ChannelTrace:
+    """
+    Fixed size ring buffer of channel messages. Every message sent to a traced channel is
+    recorded with its timestamp, the id of its channel and a reference to the message
+    itself. Nothing is formatted while recording, deferred messages are only formatted
+    when the trace is dumped, for example after a failure.
+    """
+
+    def __init__(self, size: int = 10000):
+        self.size = max(1, int(size))
+        self.times = array("d", bytes(8 * self.size))
+        self.ids = array("H", bytes(2 * self.size))
+        self.payloads = [None] * self.size
+        self.names = []
+        self._ids = {}
+        self.count = 0
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    def channel_id(self, name: str) -> int:
+        try:
+            return self._ids[name]
+        except KeyError:
+            index = len(self.names)
+            self.names.append(name)
+            self._ids[name] = index
+            return index
+
+    def record(self, channel_id: int, payload):
+        index = self.count % self.size
+        self.times[index] = time.time()
+        self.ids[index] = channel_id
+        self.payloads[index] = payload
+        self.count += 1
+
+    def clear(self):
+        self.payloads = [None] * self.size
+        self.count = 0
+
+    def entries(self):
+        """
+        Recorded (timestamp, channel name, payload) tuples, oldest first.
+        """
+        count = len(self)
+        first = self.count - count
+        for i in range(first, self.count):
+            index = i % self.size
+            payload = self.payloads[index]
+            if isinstance(payload, DeferredMessage):
+                payload = str(payload)
+            yield self.times[index], self.names[self.ids[index]], payload
+
+    def dump(self):
+        """
+        Recorded messages as timestamped lines, oldest first.
+        """
+        for t, name, payload in self.entries():
+            ts = datetime.fromtimestamp(t).strftime("%H:%M:%S.%f")
+            yield f"[{ts}] {name}: {payload}"
+
+
+class DeferredMessage:
+    """
+    Message that is only formatted when it is read, message % args or message(*args)
+    for a callable message.
+    """
+
+    __slots__ = ("message", "args", "time")
+
+    def __init__(self, message, args):
+        self.message = message
+        self.args = args
+        self.time = time.time()
+
+    def __str__(self):
+        if callable(self.message):
+            return str(self.message(*self.args))
+        if self.args:
+            return self.message % self.args
+        return self.message
+
+
 class Channel:
     """
     Register and configure the Kernel channel that is used to send and view data within the kernel. Channels can send
@@ -94,6 +179,8 @@ class Channel:
             self.buffer = deque()
         self.ansi = ansi
         self.threaded = False
+        self.trace = None
+        self.trace_id = 0
 
     def __repr__(self):
         return f"Channel({repr(self.name)}, buffer_size={str(self.buffer_size)}, line_end={repr(self.line_end)})"
@@ -109,6 +196,64 @@ class Channel:
             while len(self.buffer) > self.buffer_size:
                 self.buffer.popleft()
 
+    def _format(self, message, indent=True, ansi=False, when=None):
+        if self.line_end is not None:
+            message = message + self.line_end
+        if indent:
+            message = "    " + message.replace("\n", "\n    ")
+        if self.timestamp:
+            now = datetime.now() if when is None else datetime.fromtimestamp(when)
+            ts = now.strftime("[%H:%M:%S] ")
+            message = ts + message.replace("\n", f"\n{ts}")
+        if ansi:
+            if self.ansi:
+                # Convert bbcode to ansi
+                message = self.bbcode_to_ansi(message)
+            else:
+                # Convert bbcode to stripped
+                message = self.bbcode_to_plain(message)
+        return message
+
+    def set_trace(self, trace: Optional[ChannelTrace]):
+        """
+        Records every message of this channel into the given trace, None stops tracing.
+        """
+        self.trace = trace
+        if trace is not None:
+            self.trace_id = trace.channel_id(self.name)
+
+    @property
+    def watched(self) -> bool:
+        """
+        Whether anything is watching this channel. Unlike the truth value of the channel
+        this does not count the buffer.
+        """
+        return bool(self.watchers)
+
+    def log(self, message, *args, **kwargs):
+        """
+        Sends a deferred message, message % args or message(*args) if message is callable.
+
+        The message is only formatted if the channel is watched. A traced channel records
+        the unformatted message, a buffered channel keeps it until it is replayed to a new
+        watcher, both format it when it is read.
+        """
+        if self.watchers:
+            if callable(message):
+                message = message(*args)
+            elif args:
+                message = message % args
+            self(message, **kwargs)
+            return
+        if self.trace is not None or self.buffer is not None:
+            deferred = DeferredMessage(message, args)
+            if self.trace is not None:
+                self.trace.record(self.trace_id, deferred)
+            if self.buffer is not None:
+                self.buffer.append(deferred)
+                while len(self.buffer) > self.buffer_size:
+                    self.buffer.popleft()
+
     def __call__(
         self,
         message: Union[str, bytes, bytearray],
@@ -118,6 +263,8 @@ class Channel:
         execute_threaded=True,
         **kwargs,
     ):
+        if self.trace is not None and execute_threaded:
+            self.trace.record(self.trace_id, message)
         if self.threaded and execute_threaded:
             self._threaded_call(message, *args, indent=indent, ansi=ansi, **kwargs)
             return
@@ -126,29 +273,21 @@ class Channel:
             return
 
         original_msg = message
-        if self.line_end is not None:
-            message = message + self.line_end
-        if indent:
-            message = "    " + message.replace("\n", "\n    ")
-        if self.timestamp:
-            ts = datetime.now().strftime("[%H:%M:%S] ")
-            message = ts + message.replace("\n", f"\n{ts}")
-        if ansi:
-            if self.ansi:
-                # Convert bbcode to ansi
-                message = self.bbcode_to_ansi(message)
-            else:
-                # Convert bbcode to stripped
-                message = self.bbcode_to_plain(message)
+        message = self._format(message, indent=indent, ansi=ansi)
 
         console_open_print = False
         # Check if this channel is "open" i.e. being sent to console
         # and if so whether the console is being sent to print
         # because if so then we don't want to print ourselves
-        for w in self.watchers:
-            if isinstance(w, Channel) and w.name == "console" and print in w.watchers:
-                console_open_print = True
-                break
+        if print in self.watchers:
+            for w in self.watchers:
+                if (
+                    isinstance(w, Channel)
+                    and w.name == "console"
+                    and print in w.watchers
+                ):
+                    console_open_print = True
+                    break
         for w in self.watchers:
             # Avoid double printing if this channel is "open" and printed
             # and console is also printed
@@ -180,7 +319,7 @@ class Channel:
         send the data. With this you can have `channels` that do no work unless something in the kernel
         is listening for that data, or the data is being buffered.
         """
-        return bool(self.watchers) or self.buffer_size != 0
+        return bool(self.watchers) or self.buffer_size != 0 or self.trace is not None
 
     def bbcode_to_ansi(self, text):
         return "".join(
@@ -212,6 +351,11 @@ class Channel:
                     monitor_function(g)
         if self.buffer is not None:
             for line in list(self.buffer):
+                if isinstance(line, DeferredMessage):
+                    if self.pure:
+                        line = str(line)
+                    else:
+                        line = self._format(str(line), when=line.time)
                 monitor_function(line)
 
     def unwatch(self, monitor_function: Callable):
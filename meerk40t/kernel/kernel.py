@@ -1,4 +1,5 @@
 import functools
+import heapq
 import inspect
 import os
 import re
@@ -9,10 +10,11 @@ import ast
 import operator
 
 from datetime import datetime
+from itertools import count
 from threading import Thread
 from typing import Any, Callable, Generator, List, Optional, Tuple, Union
 
-from .channel import Channel
+from .channel import Channel, ChannelTrace
 from .context import Context
 from .exceptions import CommandMatchRejected, CommandSyntaxError
 from .functions import (
@@ -26,6 +28,7 @@ from .inhibitor import Inhibitor
 from .jobs import ConsoleFunction, Job
 from .lifecycles import *
 from .module import Module
+from .registry import Registry
 from .service import Service
 from .settings import Settings
 
@@ -34,6 +37,9 @@ KERNEL_VERSION = "0.0.10"
 RE_ACTIVE = re.compile("service/(.*)/active")
 RE_AVAILABLE = re.compile("service/(.*)/available")
 
+# Matchtexts whose find results are kept until the registry changes.
+FOUND_CACHE_SIZE = 512
+
 # Supported operators
 SAFE_OPERATORS = {
     ast.Add: operator.add,
@@ -170,7 +176,12 @@ class Kernel(Settings):
             times=1,
             run_main=True,
         )
-        self._registered = {}
+        self._registered = Registry()
+        # Results of find by matchtext, valid for the current registry version.
+        self._found = {}
+        self._found_version = 0
+        # Console command dispatch tables by input type, rebuilt after command changes.
+        self._command_tables = {}
         self.lookups = {}
         self.lookup_previous = {}
         self._dirty_paths = []
@@ -187,11 +198,18 @@ class Kernel(Settings):
         self.scheduler_handles_main_thread_jobs = True
         self.scheduler_handles_default_thread_jobs = True
 
-        self.state = "init"
-
         # Scheduler
         self.jobs = {}
         self.scheduler_thread = None
+        # Heap of (next_run, sequence, job), only the latest sequence of a job is valid.
+        self._job_queue = []
+        self._job_sequence = {}
+        self._job_counter = count()
+        self._job_condition = threading.Condition()
+        # Job name: [runs, total seconds, longest run]
+        self.job_statistics = {}
+
+        self.state = "init"
 
         # Signal Listener
         self.signal_job = None
@@ -208,6 +226,7 @@ class Kernel(Settings):
 
         # Channels
         self.channels = {}
+        self.channel_trace = None
 
         # Console Commands.
         self._console_buffer = ""
@@ -411,7 +430,7 @@ class Kernel(Settings):
 
         @return: domain, service
         """
-        for r in list(self._registered):
+        for r in self._registered.candidates(RE_ACTIVE.pattern):
             result = RE_ACTIVE.match(r)
             if result:
                 yield result.group(1), self._registered[r]
@@ -422,7 +441,7 @@ class Kernel(Settings):
 
         @return: domain, service
         """
-        for r in list(self._registered):
+        for r in self._registered.candidates(RE_AVAILABLE.pattern):
             result = RE_AVAILABLE.match(r)
             if result:
                 yield result.group(1), self._registered[r]
@@ -1525,18 +1544,42 @@ class Kernel(Settings):
         """
         Find registered path and objects that regex match the given matchtext
 
+        Only paths below the literal prefix of the matchtext are checked and the results
+        are cached until the next register, unregister or service (de)activation.
+
         @param args: parts of matchtext
         @return:
         """
         matchtext = "/".join(args)
-        match = re.compile(matchtext)
-        for domain, service in self.services_active():
-            for r in service._registered:
-                if match.match(r):
-                    yield service._registered[r], r, list(r.split("/"))[-1]
-        for r in self._registered:
-            if match.match(r):
-                yield self._registered[r], r, list(r.split("/"))[-1]
+        try:
+            found = self._found[matchtext]
+        except KeyError:
+            version = self._found_version
+            match = re.compile(matchtext)
+            found = []
+            for domain, service in self.services_active():
+                found.extend(service._registered.find(match))
+            found.extend(self._registered.find(match))
+            if version == self._found_version:
+                if len(self._found) >= FOUND_CACHE_SIZE:
+                    self._found.clear()
+                self._found[matchtext] = found
+        yield from found
+
+    def _registry_changed(self, paths=()):
+        """
+        Invalidates the cached find results, and the console command tables if any
+        of the changed paths is a command.
+
+        @param paths: changed paths
+        @return:
+        """
+        self._found_version += 1
+        self._found = {}
+        for path in paths:
+            if path.startswith("command/"):
+                self._command_tables = {}
+                break
 
     def match(self, matchtext: str, suffix: bool = False) -> Generator[str, None, None]:
         """
@@ -1548,13 +1591,13 @@ class Kernel(Settings):
         """
         match = re.compile(matchtext)
         for domain, service in self.services_active():
-            for r in service._registered:
+            for r in service._registered.candidates(matchtext):
                 if match.match(r):
                     if suffix:
                         yield list(r.split("/"))[-1]
                     else:
                         yield r
-        for r in self._registered:
+        for r in self._registered.candidates(matchtext):
             if match.match(r):
                 if suffix:
                     yield list(r.split("/"))[-1]
@@ -1591,6 +1634,7 @@ class Kernel(Settings):
 
     def set_feature(self, feature):
         self._registered[f"feature/{feature}"] = True
+        self._registry_changed()
 
     def lookup_all(self, *args):
         """
@@ -1677,6 +1721,7 @@ class Kernel(Settings):
         self.channel("lookup")(
             f"Changed all: {str(paths)} ({str(threading.current_thread().name)})"
         )
+        self._registry_changed(paths)
         with self._lookup_lock:
             if not self._dirty_paths:
                 self.schedule(self._clean_lookup)
@@ -1692,6 +1737,7 @@ class Kernel(Settings):
         self.channel("lookup")(
             f"Changed {str(path)} ({str(threading.current_thread().name)})"
         )
+        self._registry_changed((path,))
         with self._lookup_lock:
             if not self._dirty_paths:
                 self.schedule(self._clean_lookup)
@@ -1939,9 +1985,23 @@ class Kernel(Settings):
     def scheduler_default(self, *args):
         self.schedule_run(defaults=True, mains=False)
 
+    @property
+    def state(self):
+        return self._kernel_state
+
+    @state.setter
+    def state(self, value):
+        with self._job_condition:
+            self._kernel_state = value
+            # Wake the scheduler to pause or end.
+            self._job_condition.notify_all()
+
     def schedule_run(self, defaults=True, mains=True):
         """
         Single run of scheduler jobs.
+
+        This polls all jobs, it's used by the gui-thread to run the main jobs. The
+        scheduler thread itself runs the jobs by their next run time, see run().
         @return:
         """
         jobs = self.jobs
@@ -1961,45 +2021,125 @@ class Kernel(Settings):
                     # Do not attempt to run defaults.
                     continue
             if job.scheduled:
-                job._next_run = 0  # Set to zero while running.
-                if job._remaining is not None:
-                    job._remaining = job._remaining - 1
-                    if job._remaining <= 0:
-                        del jobs[job_name]
-                    if job._remaining < 0:
-                        continue
-                try:
-                    if job.args is None:
-                        job.process()
-                    else:
-                        job.process(*job.args)
-                except Exception:
-                    import sys
+                self._execute_job(job)
+
+    def _execute_job(self, job):
+        """
+        Runs a due job, updating its remaining runs, next run time and statistics.
+        """
+        job._next_run = 0  # Set to zero while running.
+        if job._remaining is not None:
+            job._remaining = job._remaining - 1
+            if job._remaining <= 0:
+                with self._job_condition:
+                    if self.jobs.get(job.job_name) is job:
+                        del self.jobs[job.job_name]
+            if job._remaining < 0:
+                return
+        start = time.perf_counter()
+        try:
+            if job.args is None:
+                job.process()
+            else:
+                job.process(*job.args)
+        except Exception:
+            import sys
 
-                    sys.excepthook(*sys.exc_info())
-                job._last_run = time.time()
-                job._next_run += job._last_run + job.interval
+            sys.excepthook(*sys.exc_info())
+        elapsed = time.perf_counter() - start
+        stats = self.job_statistics.get(job.job_name)
+        if stats is None:
+            self.job_statistics[job.job_name] = [1, elapsed, elapsed]
+        else:
+            stats[0] += 1
+            stats[1] += elapsed
+            if elapsed > stats[2]:
+                stats[2] = elapsed
+        job._last_run = time.time()
+        job._next_run += job._last_run + job.interval
+
+    def _queue_job(self, job, next_run):
+        """
+        Places the job into the scheduler queue, invalidating earlier entries of the job.
+        Requires the job condition to be held.
+        """
+        sequence = next(self._job_counter)
+        self._job_sequence[job.job_name] = sequence
+        queue = self._job_queue
+        heapq.heappush(queue, (next_run, sequence, job))
+        if len(queue) > 2 * len(self._job_sequence) + 64:
+            # Drop the entries of unscheduled and rescheduled jobs.
+            queue[:] = [
+                e for e in queue if self._job_sequence.get(e[2].job_name) == e[1]
+            ]
+            heapq.heapify(queue)
+        return sequence
+
+    def _due_jobs(self, now):
+        """
+        Pops all due jobs from the scheduler queue. Requires the job condition to be held.
+
+        @return: list of (sequence, job) of the jobs to run
+        """
+        queue = self._job_queue
+        due = []
+        while queue and queue[0][0] <= now:
+            next_run, sequence, job = heapq.heappop(queue)
+            if (
+                self._job_sequence.get(job.job_name) != sequence
+                or self.jobs.get(job.job_name) is not job
+            ):
+                continue  # Unscheduled or rescheduled.
+            if job.run_main:
+                if not self.scheduler_handles_main_thread_jobs:
+                    # The gui-thread polls these.
+                    del self._job_sequence[job.job_name]
+                    continue
+            elif not self.scheduler_handles_default_thread_jobs:
+                del self._job_sequence[job.job_name]
+                continue
+            if job.conditional is not None and not job.conditional():
+                # Check again next tick.
+                self._queue_job(job, now + self.delay)
+                continue
+            due.append((sequence, job))
+        return due
 
     def run(self, *args) -> None:
         """
         Scheduler main loop.
 
-        Check the Scheduler thread state, and whether it should abort or pause.
-        Check each job, and if that job is scheduled to run. Executes that job.
+        Jobs are kept in a priority queue by their next run time. The scheduler sleeps
+        until the next job is due or until it is woken by a change of the scheduled
+        jobs or the kernel state.
         @return:
         """
+        condition = self._job_condition
         self.state = "active"
-        while self.state != "end":
-            time.sleep(self.delay)
-            while self.state == "pause":
-                # The scheduler is paused.
-                time.sleep(0.1)
-            if self.state == "terminate":
-                break
-            self.schedule_run(
-                self.scheduler_handles_default_thread_jobs,
-                self.scheduler_handles_main_thread_jobs,
-            )
+        while True:
+            with condition:
+                while self.state == "pause":
+                    # The scheduler is paused.
+                    condition.wait()
+                if self.state in ("end", "terminate"):
+                    break
+                due = self._due_jobs(time.time())
+                if not due:
+                    timeout = None
+                    if self._job_queue:
+                        timeout = max(0.0, self._job_queue[0][0] - time.time())
+                    condition.wait(timeout)
+                    continue
+            for sequence, job in due:
+                if self.state in ("end", "terminate"):
+                    break
+                self._execute_job(job)
+                with condition:
+                    if (
+                        self._job_sequence.get(job.job_name) == sequence
+                        and self.jobs.get(job.job_name) is job
+                    ):
+                        self._queue_job(job, job._next_run)
         self.state = "end"
 
     def schedule(self, job: "Job") -> "Job":
@@ -2010,14 +2150,20 @@ class Kernel(Settings):
             pass
         if job.job_name is None:
             job.job_name = f"job_{id(job)}"
-        self.jobs[job.job_name] = job
+        with self._job_condition:
+            self.jobs[job.job_name] = job
+            self._queue_job(job, getattr(job, "_next_run", None) or time.time())
+            self._job_condition.notify_all()
         return job
 
     def unschedule(self, job: "Job") -> "Job":
-        try:
-            del self.jobs[job.job_name]
-        except KeyError:
-            pass  # No such job.
+        with self._job_condition:
+            try:
+                del self.jobs[job.job_name]
+            except KeyError:
+                pass  # No such job.
+            self._job_sequence.pop(job.job_name, None)
+            self._job_condition.notify_all()
         return job
 
     def add_job(
@@ -2371,12 +2517,24 @@ class Kernel(Settings):
         if channel not in self.channels:
             chan = Channel(channel, *args, **kwargs)
             chan._ = self.translation
+            if self.channel_trace is not None:
+                chan.set_trace(self.channel_trace)
             self.channels[channel] = chan
         elif "timestamp" in kwargs and isinstance(kwargs["timestamp"], bool):
             self.channels[channel].timestamp = kwargs["timestamp"]
 
         return self.channels[channel]
 
+    def trace_channels(self, size: Optional[int] = 10000) -> Optional[ChannelTrace]:
+        """
+        Records the messages of all channels into a ring buffer of the given size, which
+        can be dumped after a failure. A size of None stops tracing.
+        """
+        self.channel_trace = ChannelTrace(size) if size else None
+        for chan in self.channels.values():
+            chan.set_trace(self.channel_trace)
+        return self.channel_trace
+
     # ==========
     # CONSOLE PROCESSING
     # ==========
@@ -2422,14 +2580,52 @@ class Kernel(Settings):
 
     def has_command(self, command: str) -> bool:
         command = command.lower()
-        input_type = None  # Initial command context is None
-        # Process command matches.
-        for funct, name, regex in self.find("command", str(input_type), ".*"):
-            # Find all commands with matching input_type.
-            if not funct.regex and regex == command:
-                # Exact match only.
-                return True
-        return False
+        # Exact match only, within the initial command context None.
+        exact, regexes = self._command_table(None)
+        return command in exact
+
+    def _command_table(self, input_type):
+        """
+        Dispatch table of the console commands accepting the given input_type.
+
+        Exact command names are hashed, regex commands are compiled once. Each command
+        keeps its position in the registry, the order in which commands are tried.
+
+        @param input_type: command context
+        @return: exact names to lists of (position, funct),
+            list of (position, regex, funct)
+        """
+        key = str(input_type)
+        try:
+            return self._command_tables[key]
+        except KeyError:
+            pass
+        version = self._found_version
+        exact = {}
+        regexes = []
+        for position, (funct, name, regex) in enumerate(
+            self.find("command", key, ".*")
+        ):
+            if funct.regex:
+                regexes.append((position, re.compile(regex), funct))
+            else:
+                exact.setdefault(regex, []).append((position, funct))
+        table = exact, regexes
+        if version == self._found_version:
+            self._command_tables[key] = table
+        return table
+
+    def _command_candidates(self, input_type, command: str):
+        """
+        Commands matching the command text within the given input_type, in the order
+        they are to be tried.
+        """
+        exact, regexes = self._command_table(input_type)
+        candidates = exact.get(command, [])
+        matched = [(p, funct) for p, match, funct in regexes if match.match(command)]
+        if matched:
+            candidates = sorted(candidates + matched, key=lambda e: e[0])
+        return [funct for position, funct in candidates]
 
     def _console_parse(self, text: str, channel: "Channel"):
         """
@@ -2457,18 +2653,8 @@ class Kernel(Settings):
 
             command = command.lower()
             command_executed = False
-            # Process command matches.
-            for funct, name, regex in self.find("command", str(input_type), ".*"):
-                # Find all commands with matching input_type.
-                if funct.regex:
-                    # This function is a regex match.
-                    match = re.compile(regex)
-                    if not match.match(command):
-                        continue
-                else:
-                    # Exact match only.
-                    if regex != command:
-                        continue
+            # Process command matches with matching input_type, exact and regex.
+            for funct in self._command_candidates(input_type, command):
                 try:
                     data, remainder, input_type = funct(
                         command=command,
@@ -2786,8 +2972,37 @@ class Kernel(Settings):
                 channel(" ".join(parts))
             channel(_("----------"))
 
+        @self.console_option(
+            "stats", "s", action="store_true", help=_("Show run statistics of the jobs")
+        )
+        @self.console_option(
+            "reset", "r", action="store_true", help=_("Reset the run statistics")
+        )
         @self.console_command("schedule", help=_("show scheduled events"))
-        def schedule(channel, _, **kwargs):
+        def schedule(channel, _, stats=False, reset=False, **kwargs):
+            if reset:
+                self.job_statistics.clear()
+                channel(_("Job statistics reset."))
+                return
+            if stats:
+                channel(_("----------"))
+                channel(_("Job statistics:"))
+                for job_name, (runs, total, longest) in sorted(
+                    self.job_statistics.items(), key=lambda e: -e[1][1]
+                ):
+                    channel(
+                        _(
+                            "{name}: {runs} runs, {total:.3f}s total, {average:.2f}ms average, {longest:.2f}ms max"
+                        ).format(
+                            name=job_name,
+                            runs=runs,
+                            total=total,
+                            average=1000 * total / runs,
+                            longest=1000 * longest,
+                        )
+                    )
+                channel(_("----------"))
+                return
             channel(_("----------"))
             channel(_("Scheduled Processes:"))
             for i, job_name in enumerate(self.jobs):
@@ -3468,7 +3683,7 @@ class Kernel(Settings):
 
         @self.console_command(
             "channel",
-            help=_("channel (open|close|save|list|print) <channel_name>"),
+            help=_("channel (open|close|save|list|print|trace) <channel_name>"),
             output_type="channel",
         )
         def channel(channel, _, remainder=None, **kwargs):
@@ -3645,6 +3860,43 @@ class Kernel(Settings):
                 self.channel(cn).watch(_console_file_write)
             return "channel", channel_name
 
+        @self.console_option(
+            "size", "s", type=int, default=10000, help=_("number of messages kept")
+        )
+        @self.console_option(
+            "stop", "x", type=bool, action="store_true", help=_("stop tracing")
+        )
+        @self.console_option(
+            "dump",
+            "d",
+            type=bool,
+            action="store_true",
+            help=_("print the recorded messages"),
+        )
+        @self.console_command(
+            "trace",
+            help=_("record the messages of all channels into a ring buffer"),
+            input_type="channel",
+            output_type="channel",
+        )
+        def channel_trace(channel, _, size=10000, stop=False, dump=False, **kwargs):
+            if dump:
+                if self.channel_trace is None:
+                    channel(_("Channels are not traced."))
+                    return "channel", None
+                for line in list(self.channel_trace.dump()):
+                    channel(line)
+                return "channel", None
+            if stop:
+                self.trace_channels(None)
+                channel(_("Channel tracing stopped."))
+                return "channel", None
+            self.trace_channels(size)
+            channel(
+                _("Tracing all channels, keeping {size} messages.").format(size=size)
+            )
+            return "channel", None
+
         # ==========
         # SETTINGS
         # ==========
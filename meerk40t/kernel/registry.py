@@ -0,0 +1,89 @@
+import re
+
+# Regex characters ending the literal prefix of a matchtext.
+RE_SPECIAL = re.compile(r"[.^$*+?{}\[\]\\|()]")
+
+
+def literal_prefix(matchtext: str) -> str:
+    """
+    Text every path matching the regex matchtext must start with.
+
+    @param matchtext: regex, matched from the start of the path
+    @return: literal prefix, empty if there is none
+    """
+    if "|" in matchtext:
+        # An alternative may start anywhere.
+        return ""
+    special = RE_SPECIAL.search(matchtext)
+    if special is None:
+        return matchtext
+    prefix = matchtext[: special.start()]
+    if special.group() in "?*{":
+        # The last literal character is optional.
+        prefix = prefix[:-1]
+    return prefix
+
+
+class Registry(dict):
+    """
+    Registered paths and objects, indexed by the first segment of the path.
+
+    Regex lookups with a literal first segment only check the paths registered below
+    that segment, in registration order, rather than every registered path.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._segments = {}
+
+    def __setitem__(self, path, obj):
+        if path not in self:
+            segment = path.split("/", 1)[0]
+            try:
+                self._segments[segment][path] = None
+            except KeyError:
+                self._segments[segment] = {path: None}
+        super().__setitem__(path, obj)
+
+    def __delitem__(self, path):
+        super().__delitem__(path)
+        segment = path.split("/", 1)[0]
+        paths = self._segments[segment]
+        del paths[path]
+        if not paths:
+            del self._segments[segment]
+
+    def pop(self, path, *args):
+        if path in self:
+            obj = self[path]
+            del self[path]
+            return obj
+        return super().pop(path, *args)
+
+    def clear(self):
+        super().clear()
+        self._segments.clear()
+
+    def candidates(self, matchtext: str):
+        """
+        Paths which could match the regex matchtext.
+
+        @param matchtext: regex, matched from the start of the path
+        @return: paths, in registration order
+        """
+        prefix = literal_prefix(matchtext)
+        if "/" not in prefix:
+            return list(self)
+        segment = prefix.split("/", 1)[0]
+        return [p for p in self._segments.get(segment, ()) if p.startswith(prefix)]
+
+    def find(self, match):
+        """
+        Registered objects whose path matches the compiled regex.
+
+        @param match: compiled regex
+        @return: (obj, path, suffix) of each match
+        """
+        for path in self.candidates(match.pattern):
+            if match.match(path):
+                yield self[path], path, path.rsplit("/", 1)[-1]
@@ -422,7 +422,7 @@ class LihuiyuController:
             self.realtime_write(bytes_to_write)
             return self
 
-        self.pipe_channel(f"write({str(bytes_to_write)})")
+        self.pipe_channel.log("write(%s)", bytes_to_write)
         with self._queue_lock:
             self._queue += bytes_to_write
         self.start()
@@ -452,7 +452,7 @@ class LihuiyuController:
             if queue_bytes:
                 self.write(queue_bytes)
             return self
-        self.pipe_channel(f"realtime_write({str(bytes_to_write)})")
+        self.pipe_channel.log("realtime_write(%s)", bytes_to_write)
         if b"*" in bytes_to_write:
             self.abort_waiting = True
         with self._preempt_lock:
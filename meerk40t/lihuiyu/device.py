@@ -5,15 +5,21 @@ Registers the Device service for M2 Nano (and family), registering the relevant
 the given device type.
 """
 
+import math
 import platform
 from hashlib import md5
+from io import BytesIO
 
 import meerk40t.constants as mkconst
 from meerk40t.core.laserjob import LaserJob
 from meerk40t.core.spoolers import Spooler
 from meerk40t.core.units import UNITS_PER_MIL, Length
 from meerk40t.core.view import View
-from meerk40t.device.devicechoices import get_effect_choices, get_operation_choices
+from meerk40t.device.devicechoices import (
+    get_effect_choices,
+    get_motion_choices,
+    get_operation_choices,
+)
 from meerk40t.device.mixins import Status
 from meerk40t.kernel import CommandSyntaxError, Service, signal_listener
 
@@ -148,6 +154,7 @@ class LihuiyuDevice(Service, Status):
             },
         ]
         self.register_choices("bed_dim", choices)
+        self.register_choices("bed_dim", get_motion_choices(self))
 
         def get_max_range():
             """
@@ -387,6 +394,28 @@ class LihuiyuDevice(Service, Status):
                 ),
                 "section": "_01_" + _("Plot Planner"),
             },
+            {
+                "attr": "plot_array_mode",
+                "object": self,
+                "default": True,
+                "type": bool,
+                "label": _("Plan in blocks"),
+                "tip": _(
+                    "Plans the steps of each cut in blocks of numpy arrays rather than one step at a time. The steps sent to the laser are the same either way."
+                ),
+                "section": "_01_" + _("Plot Planner"),
+            },
+            {
+                "attr": "encode_ahead",
+                "object": self,
+                "default": False,
+                "type": bool,
+                "label": _("Encode ahead"),
+                "tip": _(
+                    "Encodes the job in blocks that are handed to the controller at once, rather than command by command. This keeps the controller supplied when encoding the job is slow."
+                ),
+                "section": "_00_" + _("General Options"),
+            },
             {
                 "attr": "strict",
                 "object": self,
@@ -901,10 +930,15 @@ class LihuiyuDevice(Service, Status):
                     )
                     f.write(b"\n")
                     f.write(b"%0%0%0%0%\n")
+                    # Encode the whole job in memory, without position updates.
                     driver = LihuiyuDriver(self)
+                    driver.encode_ahead = math.inf
+                    driver._signal_updates = False
+                    encoded = BytesIO()
                     job = LaserJob(filename, list(data.plan), driver=driver)
-                    driver.out_pipe = f
+                    driver.out_pipe = encoded
                     job.execute()
+                    f.write(encoded.getvalue())
 
             except (PermissionError, OSError):
                 channel(_("Could not save: {filename}").format(filename=filename))
@@ -1178,6 +1212,7 @@ class LihuiyuDevice(Service, Status):
     @signal_listener("plot_phase_type")
     @signal_listener("plot_phase_value")
     @signal_listener("supports_pwm")
+    @signal_listener("plot_array_mode")
     def plot_attributes_update(self, origin=None, *args):
         self.driver.plot_attribute_update()
 
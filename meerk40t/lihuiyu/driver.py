@@ -8,6 +8,7 @@ selected output.
 """
 
 import math
+import threading
 import time
 
 from meerk40t.tools.zinglplotter import ZinglPlotter
@@ -96,9 +97,13 @@ distance_lookup = [
 ]
 
 
-def lhymicro_distance(v):
-    if v < 0:
-        raise ValueError("Cannot permit negative values.")
+# Distances with a precomputed encoding.
+DISTANCE_TABLE_SIZE = 4096
+# Bytes encoded ahead of the controller before they are written, in encode ahead mode.
+ENCODE_BLOCK_SIZE = 1024
+
+
+def _encode_distance(v):
     dist = b""
     if v >= 255:
         zs = int(v / 255)
@@ -109,6 +114,18 @@ def lhymicro_distance(v):
     return dist + distance_lookup[v]
 
 
+distance_table = [_encode_distance(v) for v in range(DISTANCE_TABLE_SIZE)]
+
+
+def lhymicro_distance(v):
+    if v < 0:
+        raise ValueError("Cannot permit negative values.")
+    try:
+        return distance_table[v]
+    except (IndexError, TypeError):
+        return _encode_distance(v)
+
+
 class LihuiyuDriver(Parameters):
     """
     LihuiyuDriver provides Lihuiyu specific coding for elements and sends it to the backend
@@ -130,6 +147,10 @@ class LihuiyuDriver(Parameters):
         self._request_horizontal_major = None
 
         self.out_pipe = None
+        # Bytes encoded ahead of the controller, None follows the encode_ahead setting.
+        self.encode_ahead = None
+        self._encoded = None
+        self._encoding_thread = None
 
         self.process_item = None
         self.spooled_item = None
@@ -195,8 +216,21 @@ class LihuiyuDriver(Parameters):
         return f"LihuiyuDriver({self.name})"
 
     def __call__(self, e):
+        if self._encoded is not None and threading.get_ident() == self._encoding_thread:
+            # Encoding ahead, realtime writes from other threads go straight out.
+            self._encoded += e
+            return
         self.out_pipe.write(e)
 
+    def _write_encoded(self):
+        """
+        Writes the bytes encoded ahead to the controller.
+        """
+        if self._encoded:
+            data = self._encoded
+            self._encoded = bytearray()
+            self.out_pipe.write(bytes(data))
+
     @property
     def has_adjustable_maximum_power(self):
         return self.service.supports_pwm
@@ -221,6 +255,7 @@ class LihuiyuDriver(Parameters):
         self.plot_planner.phase_type = self.service.plot_phase_type
         self.plot_planner.phase_value = self.service.plot_phase_value
         self.plot_planner.set_ppi(not self.service.supports_pwm)
+        self.plot_planner.array_mode = self.service.plot_array_mode
 
     def hold_work(self, priority):
         """
@@ -352,6 +387,10 @@ class LihuiyuDriver(Parameters):
         self.plot_planner.clear()
         self.spooled_item = None
         self.temp_holds.clear()
+        encoded = self._encoded
+        if encoded is not None:
+            # Drop the bytes encoded ahead, as the controller drops its buffer.
+            encoded.clear()
 
         self.service.signal("pipe;buffer", 0)
         self(b"~I*\n~")
@@ -987,10 +1026,35 @@ class LihuiyuDriver(Parameters):
         Processes any data in the plot planner. Getting all relevant (x,y,on) plot values and performing the cardinal
         movements. Or updating the laser state based on the settings of the cutcode.
 
+        In encode ahead mode the codes are collected into blocks which are written to the controller at once, holding
+        only between blocks, so the controller is not starved by the time taken encoding each plot.
+
         @return:
         """
         if self.plot_data is None:
             return False
+        block = self.encode_ahead
+        if block is None and self.service.encode_ahead:
+            block = ENCODE_BLOCK_SIZE
+        if block:
+            self._encoded = bytearray()
+            self._encoding_thread = threading.get_ident()
+        try:
+            self._process_plot_data(block)
+        finally:
+            self._write_encoded()
+            self._encoded = None
+        self.plot_data = None
+        self._set_queue_status(0, 0)
+        return False
+
+    def _process_plot_data(self, block):
+        """
+        Performs the plots of the plot data, holding before each plot or, encoding ahead, before each block.
+
+        @param block: bytes encoded ahead before they are written, None to write directly.
+        @return:
+        """
         # We don't know the length of a generator object
         total = 0
         current = 0
@@ -1000,9 +1064,11 @@ class LihuiyuDriver(Parameters):
         for x, y, on in self.plot_data:
             current += 1
             total = current
-            self._set_queue_status(current, total)
-            while self.hold_work(0):
-                time.sleep(0.05)
+            if not self._encoded or len(self._encoded) >= block:
+                self._write_encoded()
+                self._set_queue_status(current, total)
+                while self.hold_work(0):
+                    time.sleep(0.05)
             sx = self.native_x
             sy = self.native_y
             # print("x: %s, y: %s -- c: %s, %s" % (str(x), str(y), str(sx), str(sy)))
@@ -1078,9 +1144,6 @@ class LihuiyuDriver(Parameters):
                 dx = x - self.native_x
                 dy = y - self.native_y
             self._goto_octent(dx, dy, on & 1)
-        self.plot_data = None
-        self._set_queue_status(0, 0)
-        return False
 
     def _set_speed(self, speed=None):
         if self.speed != speed:
@@ -1305,7 +1368,9 @@ class LihuiyuDriver(Parameters):
             return
         dx = int(round(dx))
         dy = int(round(dy))
-        old_current = self.service.current
+        signal_updates = self._signal_updates
+        if signal_updates:
+            old_current = self.service.current
         if self.state == DRIVER_STATE_RAPID:
             self._move_in_rapid_mode(dx, dy, cut)
         elif self.state == DRIVER_STATE_RASTER:
@@ -1327,8 +1392,8 @@ class LihuiyuDriver(Parameters):
         elif self.state == DRIVER_STATE_MODECHANGE:
             self._mode_shift_on_the_fly(dx, dy)
 
-        new_current = self.service.current
-        if self._signal_updates:
+        if signal_updates:
+            new_current = self.service.current
             self.service.signal(
                 "driver;position",
                 (old_current[0], old_current[1], new_current[0], new_current[1]),
@@ -1495,9 +1560,11 @@ class LihuiyuDriver(Parameters):
             self(lhymicro_distance(abs(dy)))
 
     def _goto_octent(self, dx, dy, on):
-        old_current = self.service.current
         if dx == 0 and dy == 0:
             return
+        signal_updates = self._signal_updates
+        if signal_updates:
+            old_current = self.service.current
         if abs(dx) == abs(dy):
             self._x_engaged = True  # Set both on
             self._y_engaged = True
@@ -1528,8 +1595,8 @@ class LihuiyuDriver(Parameters):
         else:
             self._goto_xy(dx, dy, on=on)
 
-        new_current = self.service.current
-        if self._signal_updates:
+        if signal_updates:
+            new_current = self.service.current
             self.service.signal(
                 "driver;position",
                 (old_current[0], old_current[1], new_current[0], new_current[1]),
@@ -7,7 +7,11 @@ Registers relevant commands and options.
 """
 import meerk40t.constants as mkconst
 from meerk40t.core.view import View
-from meerk40t.device.devicechoices import get_effect_choices, get_operation_choices
+from meerk40t.device.devicechoices import (
+    get_effect_choices,
+    get_motion_choices,
+    get_operation_choices,
+)
 from meerk40t.kernel import CommandSyntaxError, Service, signal_listener
 
 from ..core.laserjob import LaserJob
@@ -280,6 +284,7 @@ class MoshiDevice(Service, Status):
             },
         ]
         self.register_choices("bed_dim", choices)
+        self.register_choices("bed_dim", get_motion_choices(self))
 
         choices = [
             {
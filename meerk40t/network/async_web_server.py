@@ -0,0 +1,470 @@
+"""
+Asyncio web server
+
+Serves the state of the kernel as json to any number of concurrent http/1.1 clients.
+Connections are kept alive between requests, long-running requests do not block other
+clients. Monitors can subscribe to /api/events, a server-sent-events stream of the kernel
+signals, rather than polling the json endpoints.
+
+GET  /api               list of endpoints
+GET  /api/spooler       jobs in the spooler of every device
+GET  /api/position      current position of every device
+GET  /api/planner       plans and their stages
+GET  /api/events        server-sent-events stream of kernel signals
+POST /api/console       executes the request body as console commands
+"""
+
+import asyncio
+import json
+import threading
+from functools import partial
+from math import isinf
+from urllib.parse import unquote_plus, urlsplit
+
+from meerk40t.kernel import Module
+
+
+def plugin(kernel, lifecycle=None):
+    if lifecycle == "register":
+        _ = kernel.translation
+        kernel.register("module/AsyncWebServer", AsyncWebServer)
+
+
+# Signals streamed to /api/events subscribers.
+EVENT_SIGNALS = (
+    "spooler;queue",
+    "spooler;completed",
+    "driver;position",
+    "emulator;position",
+    "pipe;running",
+    "pipe;usb_status",
+    "plan",
+    "cutplanning;failed",
+)
+
+# Events buffered per subscriber, the oldest are dropped for slow clients.
+EVENT_QUEUE_SIZE = 256
+# Seconds an idle keep-alive connection is kept open.
+KEEP_ALIVE_TIMEOUT = 15.0
+# Seconds between keep-alive comments on an idle event stream.
+EVENT_HEARTBEAT = 15.0
+MAX_BODY_SIZE = 1 << 20
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+def _json_value(value):
+    """
+    Converts signal payloads into values json can serialize.
+    """
+    if value is None or isinstance(value, (bool, int, str)):
+        return value
+    if isinstance(value, float):
+        return None if value != value or isinf(value) else value
+    if isinstance(value, (list, tuple)):
+        return [_json_value(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _json_value(v) for k, v in value.items()}
+    return str(value)
+
+
+def _job_label(job):
+    label = getattr(job, "label", None)
+    if not label:
+        try:
+            label = job.__name__
+        except AttributeError:
+            label = str(job)
+    return label
+
+
+def _job_info(job):
+    """
+    Json description of a spooler job, properties the job does not have are None.
+    """
+
+    def value(attr):
+        try:
+            v = getattr(job, attr)
+            if callable(v):
+                v = v()
+            return _json_value(v)
+        except Exception:
+            return None
+
+    loops = getattr(job, "loops", None)
+    if isinstance(loops, float) and isinf(loops):
+        loops = "inf"
+    return {
+        "label": _job_label(job),
+        "type": job.__class__.__name__,
+        "status": value("status"),
+        "priority": value("priority"),
+        "steps_done": value("steps_done"),
+        "steps_total": value("steps_total"),
+        "loops_executed": value("loops_executed"),
+        "loops": _json_value(loops),
+        "elapsed": value("elapsed_time"),
+        "estimate": value("estimate_time"),
+    }
+
+
+class HttpError(Exception):
+    def __init__(self, status, message=None):
+        super().__init__(message or REASONS.get(status, ""))
+        self.status = status
+
+
+class AsyncWebServer(Module):
+    """
+    AsyncWebServer runs an asyncio http server in its own thread. Requests are answered from
+    the event loop; kernel signals are handed to the loop and fanned out to every event
+    stream subscriber.
+    """
+
+    def __init__(self, context, name, port=2081, host=""):
+        """
+        Asyncio web server init.
+
+        @param context: Context at which this module is attached.
+        @param name: Name of this module
+        @param port: Port being used for the server, 0 picks a free port.
+        @param host: Interface to listen on, all interfaces by default.
+        """
+        Module.__init__(self, context, name)
+        self.port = port
+        self.host = host
+        self.events_channel = self.context.channel(f"server-web-{port}")
+        self.data_channel = self.context.channel(f"data-web-{port}")
+        self.loop = None
+        self.server = None
+        self.ready = threading.Event()
+        self._stopped = None
+        self._subscribers = set()
+        self._connections = set()
+        self._listeners = {
+            signal: partial(self._on_signal, signal) for signal in EVENT_SIGNALS
+        }
+        self.routes = {
+            ("GET", "/api"): self.get_index,
+            ("GET", "/api/spooler"): self.get_spooler,
+            ("GET", "/api/position"): self.get_position,
+            ("GET", "/api/planner"): self.get_planner,
+            ("POST", "/api/console"): self.post_console,
+        }
+        self.handover = None
+        for result in self.context.root.find("gui/handover"):
+            # Do we have a thread handover routine?
+            if result is not None:
+                self.handover, _path, suffix_path = result
+                break
+        self.context.threaded(
+            self.run_server, thread_name=f"async-web-{port}", daemon=True
+        )
+
+    def module_open(self, *args, **kwargs):
+        kernel = self.context.kernel
+        for signal, listener in self._listeners.items():
+            kernel.listen(signal, listener, self)
+
+    def module_close(self, *args, **kwargs):
+        _ = self.context._
+        self.events_channel(_("Shutting down server."))
+        self.state = "terminate"
+        # Listeners are detached by the kernel when the module closes.
+        loop = self.loop
+        if loop is not None and self._stopped is not None:
+            try:
+                loop.call_soon_threadsafe(self._stopped.set)
+            except RuntimeError:
+                # Loop closed in the meantime.
+                pass
+
+    def stop(self):
+        self.module_close()
+
+    def send(self, command):
+        if self.handover is None:
+            self.context(f"{command}\n")
+        else:
+            self.handover(command)
+
+    # Server
+
+    def run_server(self):
+        """
+        Thread delegate, runs the event loop until the module is closed.
+        """
+        try:
+            asyncio.run(self._serve())
+        finally:
+            self.ready.set()
+
+    async def _serve(self):
+        _ = self.context._
+        self.loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        try:
+            self.server = await asyncio.start_server(
+                self._handle_connection, self.host or None, self.port
+            )
+        except OSError:
+            self.events_channel(_("Could not start listening."))
+            return
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.events_channel(
+            _("Listening {name} on port {port}...").format(
+                name=self.name, port=self.port
+            )
+        )
+        self.ready.set()
+        if self.state == "terminate":
+            self._stopped.set()
+        async with self.server:
+            await self._stopped.wait()
+            # Ends the event streams and idle keep-alive connections.
+            self._publish(None)
+            for writer in list(self._connections):
+                writer.close()
+        self.server = None
+
+    async def _handle_connection(self, reader, writer):
+        _ = self.context._
+        address = writer.get_extra_info("peername")
+        self.events_channel(_("Socket Connected: {address}").format(address=address))
+        self._connections.add(writer)
+        try:
+            while not self._stopped.is_set():
+                try:
+                    request = await asyncio.wait_for(
+                        self._read_request(reader), KEEP_ALIVE_TIMEOUT
+                    )
+                except asyncio.TimeoutError:
+                    break
+                if request is None:
+                    break
+                method, path, query, version, headers, body = request
+                self.data_channel(f"--> {method} {path}")
+                keep_alive = self._keep_alive(version, headers)
+                if method == "GET" and path == "/api/events":
+                    await self._stream_events(writer)
+                    break
+                try:
+                    status, content = await self._dispatch(method, path, query, body)
+                except HttpError as e:
+                    status, content = e.status, {"error": str(e)}
+                except Exception as e:
+                    status, content = 500, {"error": str(e)}
+                await self._respond(writer, status, content, keep_alive)
+                if not keep_alive:
+                    break
+        except HttpError as e:
+            try:
+                await self._respond(writer, e.status, {"error": str(e)}, False)
+            except (ConnectionError, OSError):
+                pass
+        except (ConnectionError, OSError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(writer)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self.events_channel(
+                _("Connection to {address} was closed.").format(address=address)
+            )
+
+    @staticmethod
+    async def _read_request(reader):
+        """
+        Reads one request, None if the client closed the connection.
+        """
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HttpError(400)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _sep, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            raise HttpError(400)
+        if length > MAX_BODY_SIZE:
+            raise HttpError(413)
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        return (
+            method.upper(),
+            url.path.rstrip("/") or "/",
+            url.query,
+            version,
+            headers,
+            body,
+        )
+
+    @staticmethod
+    def _keep_alive(version, headers):
+        connection = headers.get("connection", "").lower()
+        if version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    async def _dispatch(self, method, path, query, body):
+        route = self.routes.get((method, path))
+        if route is None:
+            if any(p == path for m, p in self.routes):
+                raise HttpError(405)
+            raise HttpError(404)
+        # State is gathered in a worker thread, slow requests do not stall the loop.
+        return 200, await self.loop.run_in_executor(None, route, query, body)
+
+    async def _respond(self, writer, status, content, keep_alive):
+        data = json.dumps(content).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        )
+        writer.write(head.encode("latin-1") + data)
+        await writer.drain()
+        self.data_channel(f"<-- {status} {len(data)} bytes")
+
+    # Event stream
+
+    async def _stream_events(self, writer):
+        """
+        Streams kernel signals as server-sent events until the client disconnects.
+        """
+        queue = asyncio.Queue(EVENT_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        try:
+            writer.write(
+                b"HTTP/1.1 200 OK\r\n"
+                b"Content-Type: text/event-stream\r\n"
+                b"Cache-Control: no-cache\r\n"
+                b"Connection: close\r\n"
+                b"\r\n"
+                b": connected\n\n"
+            )
+            await writer.drain()
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), EVENT_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                    await writer.drain()
+                    continue
+                if event is None:
+                    break
+                writer.write(event)
+                await writer.drain()
+        finally:
+            self._subscribers.discard(queue)
+
+    def _on_signal(self, signal, origin, *message):
+        """
+        Kernel signal listener, runs in the scheduler thread.
+        """
+        loop = self.loop
+        if not self._subscribers or loop is None:
+            return
+        data = json.dumps({"path": origin, "args": _json_value(message)})
+        event = f"event: {signal}\ndata: {data}\n\n".encode("utf-8")
+        try:
+            loop.call_soon_threadsafe(self._publish, event)
+        except RuntimeError:
+            # Loop closed in the meantime.
+            pass
+
+    def _publish(self, event):
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    # Endpoints, these run in worker threads.
+
+    def get_index(self, query, body):
+        return {
+            "name": self.context.kernel.name,
+            "version": self.context.kernel.version,
+            "endpoints": sorted(
+                [f"{method} {path}" for method, path in self.routes]
+                + ["GET /api/events"]
+            ),
+        }
+
+    def get_spooler(self, query, body):
+        devices = []
+        for device in self.context.kernel.services("device"):
+            spooler = device.spooler
+            if spooler is None:
+                continue
+            devices.append(
+                {
+                    "device": device.label,
+                    "jobs": [_job_info(job) for job in list(spooler.queue)],
+                }
+            )
+        return devices
+
+    def get_position(self, query, body):
+        devices = []
+        for device in self.context.kernel.services("device"):
+            try:
+                x, y = device.current
+                nx, ny = device.native
+            except (AttributeError, TypeError, ValueError):
+                continue
+            devices.append(
+                {
+                    "device": device.label,
+                    "position": _json_value((x, y)),
+                    "native": _json_value((nx, ny)),
+                }
+            )
+        return devices
+
+    def get_planner(self, query, body):
+        planner = self.context.kernel.planner
+        plans = []
+        for name in list(planner.plan()):
+            states, info = planner.get_plan_stage(name)
+            plans.append(
+                {
+                    "name": name,
+                    "items": len(planner.get_or_make_plan(name).plan),
+                    "stages": info,
+                    "finished": planner.is_finished(name),
+                }
+            )
+        return plans
+
+    def post_console(self, query, body):
+        content = body.decode("utf-8")
+        if content.startswith("cmd="):
+            content = unquote_plus(content[4:])
+        commands = [c.strip() for c in content.replace("\r", "").split("\n")]
+        commands = [c for c in commands if c]
+        for command in commands:
+            self.send(command)
+        return {"commands": commands}
@@ -154,3 +154,45 @@ def plugin(kernel, lifecycle=None):
             except (OSError, ValueError):
                 channel(_("Server failed on port: {port}").format(port=port))
             return
+
+        @kernel.console_option(
+            "port", "p", type=int, default=2081, help=_("port to listen on.")
+        )
+        @kernel.console_option(
+            "silent",
+            "s",
+            type=bool,
+            action="store_true",
+            help=_("do not watch server channels"),
+        )
+        @kernel.console_option(
+            "quit",
+            "q",
+            type=bool,
+            action="store_true",
+            help=_("shutdown current restserver"),
+        )
+        @kernel.console_command(
+            "restserver",
+            help=_("starts a json/event-stream web-server on port 2081 (http)"),
+        )
+        def server_rest(
+            command, channel, _, port=2081, silent=False, quit=False, **kwargs
+        ):
+            root = kernel.root
+            try:
+                server = root.open_as("module/AsyncWebServer", "rest-server", port=port)
+                if quit:
+                    root.close("rest-server")
+                    return
+                channel(
+                    _("{name} {version} rest server on port: {port}").format(
+                        name=kernel.name, version=kernel.version, port=port
+                    )
+                )
+                if not silent:
+                    console = root.channel("console")
+                    server.events_channel.watch(console)
+            except (OSError, ValueError):
+                channel(_("Server failed on port: {port}").format(port=port))
+            return
@@ -531,7 +531,7 @@ class NewlyController:
                         self._goto(x, y)  # remain standard rastermode
                 if dx != 0:
                     # Normal move, extend bytes.
-                    scanline.extend([int(on)] * abs(dx))
+                    scanline.extend([1 if on else 0] * abs(dx))
                 previous_x, previous_y = x, y
         else:
             self.mode = "raster_vertical"
@@ -553,7 +553,7 @@ class NewlyController:
                         self._goto(x, y)  # remain standard rastermode
                 if dy != 0:
                     # Normal move, extend bytes
-                    scanline.extend([int(on)] * abs(dy))
+                    scanline.extend([1 if on else 0] * abs(dy))
                 previous_x, previous_y = x, y
         commit_scanline()
 
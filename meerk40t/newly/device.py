@@ -5,7 +5,11 @@ from meerk40t.core.laserjob import LaserJob
 from meerk40t.core.spoolers import Spooler
 from meerk40t.core.units import Length
 from meerk40t.core.view import View
-from meerk40t.device.devicechoices import get_effect_choices, get_operation_choices
+from meerk40t.device.devicechoices import (
+    get_effect_choices,
+    get_motion_choices,
+    get_operation_choices,
+)
 from meerk40t.device.mixins import Status
 from meerk40t.kernel import CommandSyntaxError, Service, signal_listener
 from meerk40t.newly.driver import NewlyDriver
@@ -336,6 +340,7 @@ class NewlyDevice(Service, Status):
             },
         ]
         self.register_choices("newly", choices)
+        self.register_choices("newly", get_motion_choices(self))
 
         choices = [
             {
@@ -6,6 +6,7 @@ The Ruida Encoder is responsible for turning function calls into binary ruida da
 import threading
 
 from meerk40t.ruida.rdjob import ACK, MEM_CARD_ID, RDJob
+from meerk40t.ruida.udp_connection import MAX_PAYLOAD
 
 
 class RuidaController:
@@ -33,15 +34,18 @@ class RuidaController:
         self._send_thread.start()
 
     def divide_data_into_queue(self):
+        """
+        Divides the job into chunks of whole commands, each fitting a single packet.
+        """
         last = 0
         total = 0
         data = self.job.buffer
         for i, command in enumerate(data):
-            total += len(command)
-            if total > 1000:
+            if total and total + len(command) > MAX_PAYLOAD:
                 self._send_queue.append(self.job.get_contents(last, i))
                 last = i
                 total = 0
+            total += len(command)
         if last != len(data):
             self._send_queue.append(self.job.get_contents(last))
 
@@ -5,7 +5,11 @@ Ruida device interfacing. We do not send or interpret ruida code, but we can emu
 ruida files (*.rd) and turn them likewise into cutcode.
 """
 from meerk40t.core.view import View
-from meerk40t.device.devicechoices import get_effect_choices, get_operation_choices
+from meerk40t.device.devicechoices import (
+    get_effect_choices,
+    get_motion_choices,
+    get_operation_choices,
+)
 from meerk40t.kernel import CommandSyntaxError, Service, signal_listener
 
 from ..core.laserjob import LaserJob
@@ -230,6 +234,7 @@ class RuidaDevice(Service, Status):
             },
         ]
         self.register_choices("bed_dim", choices)
+        self.register_choices("bed_dim", get_motion_choices(self))
         choices = [
             {
                 "attr": "default_power",
@@ -411,9 +416,11 @@ class RuidaDevice(Service, Status):
             elif self.interface == "usb":
                 self.active_interface = self.interface_usb
                 self.driver.controller.write = self.interface_usb.write
-            _swizzle = self.driver.controller.job.swizzle
-            _unswizzle = self.driver.controller.job.unswizzle
-            self.active_interface.set_swizzles(_swizzle, _unswizzle)
+            if hasattr(self.active_interface, "set_swizzles"):
+                # Only the udp connection swizzles the data it sends.
+                _swizzle = self.driver.controller.job.swizzle
+                _unswizzle = self.driver.controller.job.unswizzle
+                self.active_interface.set_swizzles(_swizzle, _unswizzle)
 
         @self.console_command(("estop", "abort"), help=_("Abort Job"))
         def pipe_abort(command, channel, _, data=None, **kwargs):
@@ -1491,7 +1491,7 @@ class RuidaEmulator:
         return "Unknown", 0
 
     def unswizzle(self, data):
-        return bytes([self.lut_unswizzle[b] for b in data])
+        return bytes(data).translate(self.lut_unswizzle)
 
     def swizzle(self, data):
-        return bytes([self.lut_swizzle[b] for b in data])
+        return bytes(data).translate(self.lut_swizzle)
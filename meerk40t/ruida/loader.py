@@ -27,12 +27,10 @@ def command_viewer(data, data_type):
     from meerk40t.ruida.rdjob import RDJob
 
     job = RDJob()
-    job.write_blob(data)
     commands = []
     job.channel = commands.append
     try:
-        while not job.execute(None):
-            pass
+        job.process_blob(data)
     except Exception as e:
         commands.append(f"!! Error !!: {e}")
     return "\n".join(commands)
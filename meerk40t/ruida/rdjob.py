@@ -1,5 +1,9 @@
+import re
 import threading
 import time
+from functools import lru_cache
+
+import numpy as np
 
 from meerk40t.core.cutcode.plotcut import PlotCut
 from meerk40t.core.units import UNITS_PER_uM
@@ -217,10 +221,12 @@ ELEMENT_ARRAY_MIRROR = b"\xF2\x07"  # mirror(1)
 
 MEM_CARD_ID = 0x02FE
 
+
 def encode_switch(state):
     assert state == 0 or state == 1
     return bytes([state])
 
+
 def encode_part(part):
     assert 0 <= part <= 255
     return bytes([part])
@@ -383,19 +389,18 @@ def parse_time(data):
     return decodeu35(data) / 1000.0
 
 
+# A command is an opcode byte (high bit set) followed by its argument bytes (high bit
+# clear). Argument bytes before the first opcode are split off as a chunk of their own.
+_COMMAND = re.compile(rb"[\x80-\xff][\x00-\x7f]*|[\x00-\x7f]+")
+
+
 def parse_commands(data):
     """
     Parses data blob into command chunk sized pieces.
     @param data:
     @return:
     """
-    mark = 0
-    for i, b in enumerate(data):
-        if b >= 0x80 and mark != i:
-            yield data[mark:i]
-            mark = i
-    if mark != len(data):
-        yield data[mark:]
+    yield from _COMMAND.findall(data)
 
 
 def swizzle_byte(b, magic):
@@ -416,21 +421,23 @@ def unswizzle_byte(b, magic):
     return b
 
 
+@lru_cache(maxsize=None)
 def swizzles_lut(magic):
+    """
+    Swizzle and unswizzle tables for the given magic number. The tables are bytes,
+    usable both as lookup tables and as translation tables for bytes.translate().
+    """
     if magic == -1:
-        lut = [s for s in range(256)]
+        lut = bytes(range(256))
         return lut, lut
-    lut_swizzle = [swizzle_byte(s, magic) for s in range(256)]
-    lut_unswizzle = [unswizzle_byte(s, magic) for s in range(256)]
+    lut_swizzle = bytes([swizzle_byte(s, magic) for s in range(256)])
+    lut_unswizzle = bytes([unswizzle_byte(s, magic) for s in range(256)])
     return lut_swizzle, lut_unswizzle
 
 
 def decode_bytes(data, magic=0x88):
     lut_swizzle, lut_unswizzle = swizzles_lut(magic)
-    array = list()
-    for b in data:
-        array.append(lut_unswizzle[b])
-    return bytes(array)
+    return bytes(data).translate(lut_unswizzle)
 
 
 def determine_magic_via_histogram(data):
@@ -439,30 +446,24 @@ def determine_magic_via_histogram(data):
     about 50% of all data. The swizzle algorithm means that the swizzle for 0 is magic + 1, so we find the most
     frequent number and subtract one from that and that is *most* likely the magic number.
 
+    Repeated values count 5 times, the first value of a run counts once.
+
     @param data:
     @return:
     """
-    histogram = [0] * 256
-    prev = -1
-    for d in data:
-        histogram[d] += 5 if prev == d else 1
-        prev = d
-    m = 0
-    magic = None
-    for i in range(len(histogram)):
-        v = histogram[i]
-        if v > m:
-            m = v
-            magic = i - 1
-    return magic
+    if not len(data):
+        return None
+    values = np.frombuffer(bytes(data), dtype=np.uint8)
+    repeated = values[1:][values[1:] == values[:-1]]
+    histogram = np.bincount(values, minlength=256) + 4 * np.bincount(
+        repeated, minlength=256
+    )
+    return int(np.argmax(histogram)) - 1
 
 
 def encode_bytes(data, magic=0x88):
     lut_swizzle, lut_unswizzle = swizzles_lut(magic)
-    array = list()
-    for b in data:
-        array.append(lut_swizzle[b])
-    return bytes(array)
+    return bytes(data).translate(lut_swizzle)
 
 
 def magic_keys():
@@ -472,6 +473,360 @@ def magic_keys():
     return mk
 
 
+# Argument types of the command table, (size, parser).
+# A parser of None reads a single byte.
+BYTE = (1, None)
+ABS = (5, abscoord)
+REL = (2, relcoord)
+POWER = (2, parse_power)
+TIME = (5, parse_time)
+SPEED = (5, parse_speed)
+FREQUENCY = (5, parse_frequency)
+U35 = (5, decodeu35)
+S14 = (2, decode14)
+FILENUMBER = (2, parse_filenumber)
+NAME = (10, bytes)
+# Force Eng Speed and Axis Move Speed are reported in thousands of mm/s.
+SPEED_1000 = (5, lambda data: parse_speed(data) / 1000.0)
+
+
+class RdCommand:
+    """
+    Entry of the command table. Arguments are parsed at fixed offsets after the opcode,
+    the description is only formatted when it is displayed and the action, the name of
+    an RDJob method, applies the command to the job state.
+    """
+
+    __slots__ = ("opcode", "desc", "fields", "action", "bare", "length")
+
+    def __init__(self, opcode, desc="", fields=(), action=None, bare=None, length=True):
+        """
+        @param opcode: opcode bytes
+        @param desc: description format, or callable returning the description.
+        @param fields: argument types
+        @param action: name of the RDJob method called with the parsed arguments.
+        @param bare: description of the command without any arguments, the action is
+            skipped.
+        @param length: True if the fields give the length of the command, False if the
+            length is variable or unknown, or the length itself.
+        """
+        self.opcode = opcode
+        self.desc = desc
+        self.action = action
+        self.bare = bare
+        offsets = []
+        position = len(opcode)
+        for size, parser in fields:
+            offsets.append((position, position + size, parser))
+            position += size
+        self.fields = tuple(offsets)
+        if length is True:
+            length = position
+        self.length = length or None
+
+    def parse(self, array):
+        return tuple(
+            array[start] if parser is None else parser(array[start:end])
+            for start, end, parser in self.fields
+        )
+
+    def describe(self, values):
+        if callable(self.desc):
+            return self.desc(*values)
+        return self.desc.format(*values) if values else self.desc
+
+
+def _describe_set_setting(b0, b1, v0, v1):
+    mem = decode14((b0, b1))
+    return (
+        f"Set {b0:02x} {b1:02x} (mem: {mem:04x})= {v0} (0x{v0:08x}) {v1} (0x{v1:08x})"
+    )
+
+
+RD_COMMANDS = (
+    RdCommand(AXIS_X_MOVE, "Axis X Move {0}", (ABS,), "_axis_x_move"),
+    RdCommand(b"\x80\x08", "Axis Z Move {0}", (ABS,), "_axis_z_move"),
+    RdCommand(MOVE_ABS_XY, "Move Absolute ({0}μm, {1}μm)", (ABS, ABS), "_move_abs_xy"),
+    RdCommand(
+        MOVE_REL_XY,
+        "Move Relative ({0:+}μm, {1:+}μm)",
+        (REL, REL),
+        "_move_rel_xy",
+        bare="Move Relative (no coords)",
+    ),
+    RdCommand(MOVE_REL_X, "Move Horizontal Relative ({0:+}μm)", (REL,), "_move_rel_x"),
+    RdCommand(MOVE_REL_Y, "Move Vertical Relative ({0:+}μm)", (REL,), "_move_rel_y"),
+    RdCommand(b"\xA0\x00", "Axis Y Move {0}", (ABS,)),
+    RdCommand(AXIS_U_MOVE, "Axis U Move {0}", (ABS,)),
+    RdCommand(CUT_ABS_XY, "Cut Absolute ({0}μm, {1}μm)", (ABS, ABS), "_cut_abs_xy"),
+    RdCommand(CUT_REL_XY, "Cut Relative ({0:+}μm, {1:+}μm)", (REL, REL), "_cut_rel_xy"),
+    RdCommand(CUT_REL_X, "Cut Horizontal Relative ({0:+}μm)", (REL,), "_cut_rel_x"),
+    RdCommand(CUT_REL_Y, "Cut Vertical Relative ({0:+}μm)", (REL,), "_cut_rel_y"),
+    RdCommand(IMD_POWER_1, "Imd Power 1 ({0})", (POWER,), bare="Imd Power 1 (0)"),
+    RdCommand(IMD_POWER_2, "Imd Power 2 ({0})", (POWER,)),
+    RdCommand(IMD_POWER_3, "Imd Power 3 ({0})", (POWER,)),
+    RdCommand(IMD_POWER_4, "Imd Power 4 ({0})", (POWER,)),
+    RdCommand(END_POWER_1, "End Power 1 ({0})", (POWER,)),
+    RdCommand(END_POWER_2, "End Power 2 ({0})", (POWER,)),
+    RdCommand(END_POWER_3, "End Power 3 ({0})", (POWER,)),
+    RdCommand(END_POWER_4, "End Power 4 ({0})", (POWER,)),
+    RdCommand(MIN_POWER_1, "Power 1 min={0}", (POWER,), "_min_power_1"),
+    RdCommand(MAX_POWER_1, "Power 1 max={0}", (POWER,), "_max_power_1"),
+    RdCommand(MIN_POWER_3, "Power 3 min={0}", (POWER,)),
+    RdCommand(MAX_POWER_3, "Power 3 max={0}", (POWER,)),
+    RdCommand(MIN_POWER_4, "Power 4 min={0}", (POWER,)),
+    RdCommand(MAX_POWER_4, "Power 4 max={0}", (POWER,)),
+    RdCommand(LASER_INTERVAL, "Laser Interval {0}ms", (TIME,)),
+    RdCommand(ADD_DELAY, "Add Delay {0}ms", (TIME,)),
+    RdCommand(LASER_ON_DELAY, "Laser On Delay {0}ms", (TIME,)),
+    RdCommand(LASER_OFF_DELAY, "Laser Off Delay {0}ms", (TIME,)),
+    RdCommand(LASER_ON_DELAY2, "Laser On2 {0}ms", (TIME,)),
+    RdCommand(LASER_OFF_DELAY2, "Laser Off2 {0}ms", (TIME,)),
+    RdCommand(MIN_POWER_2, "Power 2 min={0}", (POWER,), "_min_power_2"),
+    RdCommand(MAX_POWER_2, "Power 2 max={0}", (POWER,), "_max_power_2"),
+    RdCommand(
+        MIN_POWER_1_PART, "{0}, Power 1 Min=({1})", (BYTE, POWER), "_min_power_1_part"
+    ),
+    RdCommand(
+        MAX_POWER_1_PART, "{0}, Power 1 Max=({1})", (BYTE, POWER), "_max_power_1_part"
+    ),
+    RdCommand(MIN_POWER_3_PART, "{0}, Power 3 Min ({1})", (BYTE, POWER)),
+    RdCommand(MAX_POWER_3_PART, "{0}, Power 3 Max ({1})", (BYTE, POWER)),
+    RdCommand(MIN_POWER_4_PART, "{0}, Power 4 Min ({1})", (BYTE, POWER)),
+    RdCommand(MAX_POWER_4_PART, "{0}, Power 4 Max ({1})", (BYTE, POWER)),
+    RdCommand(MIN_POWER_2_PART, "{0}, Power 2 Min ({1})", (BYTE, POWER)),
+    RdCommand(MAX_POWER_2_PART, "{0}, Power 2 Max ({1})", (BYTE, POWER)),
+    RdCommand(THROUGH_POWER_1, "Through Power 1 ({0})", (POWER,)),
+    RdCommand(THROUGH_POWER_2, "Through Power 2 ({0})", (POWER,)),
+    RdCommand(THROUGH_POWER_3, "Through Power 3 ({0})", (POWER,)),
+    RdCommand(THROUGH_POWER_4, "Through Power 4 ({0})", (POWER,)),
+    RdCommand(
+        FREQUENCY_PART,
+        "{1}, Laser {0}, Frequency ({2})",
+        (BYTE, BYTE, FREQUENCY),
+        "_frequency_part",
+    ),
+    RdCommand(SPEED_LASER_1, "Speed Laser 1 {0}mm/s", (SPEED,), "_speed_laser_1"),
+    RdCommand(SPEED_AXIS, "Axis Speed {0}mm/s", (SPEED,)),
+    RdCommand(
+        SPEED_LASER_1_PART, "{0}, Speed {1}mm/s", (BYTE, SPEED), "_speed_laser_1_part"
+    ),
+    RdCommand(FORCE_ENG_SPEED, "Force Eng Speed {0}mm/s", (SPEED_1000,)),
+    RdCommand(SPEED_AXIS_MOVE, "Axis Move Speed {0}mm/s", (SPEED_1000,)),
+    RdCommand(LAYER_END, "End Layer"),
+    RdCommand(WORK_MODE_1, "Work Mode 1"),
+    RdCommand(WORK_MODE_2, "Work Mode 2"),
+    RdCommand(WORK_MODE_3, "Work Mode 3"),
+    RdCommand(WORK_MODE_4, "Work Mode 4"),
+    RdCommand(WORK_MODE_5, "Work Mode 5"),
+    RdCommand(WORK_MODE_6, "Work Mode 6"),
+    RdCommand(LASER_DEVICE_0, "Layer Device 0"),
+    RdCommand(LASER_DEVICE_1, "Layer Device 1"),
+    RdCommand(AIR_ASSIST_OFF, "Air Assist Off"),
+    RdCommand(AIR_ASSIST_ON, "Air Assist On"),
+    RdCommand(DB_HEAD, "DbHead"),
+    RdCommand(EN_LASER_2_OFFSET_0, "EnLaser2Offset 0"),
+    RdCommand(EN_LASER_2_OFFSET_1, "EnLaser2Offset 1"),
+    RdCommand(LAYER_NUMBER_PART, "{0}, Layer Number", (BYTE,)),
+    RdCommand(EN_LASER_TUBE_START, "EnLaserTube Start", length=3),
+    RdCommand(X_SIGN_MAP, "X Sign Map {0}", (BYTE,)),
+    RdCommand(LAYER_COLOR, "Layer Color {0}", (U35,), "_layer_color"),
+    RdCommand(
+        LAYER_COLOR_PART, "Color Part {0}, {1}", (BYTE, U35), "_layer_color_part"
+    ),
+    RdCommand(EN_EX_IO, "EnExIO Start {0}", (BYTE,)),
+    RdCommand(MAX_LAYER_PART, "{0}, Max Layer", (BYTE,)),
+    RdCommand(U_FILE_ID, "U File ID {0}", (FILENUMBER,)),
+    RdCommand(ZU_MAP, "ZU Map {0}", (BYTE,)),
+    RdCommand(WORK_MODE_PART, "{0}, Work Mode {1}", (BYTE, BYTE)),
+    RdCommand(ACK, "ACK from machine"),
+    RdCommand(ERR, "ERR from machine"),
+    RdCommand(KEEP_ALIVE, "Keep Alive"),
+    RdCommand(b"\xD0", "Set Inhale Zone {0}", (BYTE,), length=False),
+    RdCommand(END_OF_FILE, "End Of File", action="_end_of_file"),
+    RdCommand(START_PROCESS, "Start Process"),
+    RdCommand(REF_POINT_2, "Ref Point Mode 2, Machine Zero/Absolute Position"),
+    RdCommand(REF_POINT_1, "Ref Point Mode 1, Anchor Point"),
+    RdCommand(REF_POINT_0, "Ref Point Mode 0, Current Position"),
+    RdCommand(RAPID_MOVE_X, "Rapid move X ({1}μm)", (BYTE, ABS)),
+    RdCommand(RAPID_MOVE_Y, "Rapid move Y ({1}μm)", (BYTE, ABS)),
+    RdCommand(RAPID_MOVE_Z, "Rapid move Z ({1}μm)", (BYTE, ABS)),
+    RdCommand(RAPID_MOVE_U, "Rapid move U ({1}μm)", (BYTE, ABS)),
+    RdCommand(
+        RAPID_FEED_AXIS_MOVE, "Rapid move Feed ({1}μm)", (BYTE, ABS), length=False
+    ),
+    RdCommand(RAPID_MOVE_XY, "Rapid move XY ({1}μm, {2}μm)", (BYTE, ABS, ABS)),
+    RdCommand(
+        RAPID_MOVE_XYU, "Rapid move XYU ({1}μm, {2}μm, {3}μm)", (BYTE, ABS, ABS, ABS)
+    ),
+    RdCommand(GET_SETTING, "", (S14,)),
+    RdCommand(SET_SETTING, _describe_set_setting, (BYTE, BYTE, U35, U35)),
+    RdCommand(DOCUMENT_FILE_UPLOAD, "Document Page Number {0}", (BYTE,), length=False),
+    RdCommand(DOCUMENT_FILE_END, "Document Data End"),
+    RdCommand(SET_FILE_SUM, "Set File Sum {0}", (U35,)),
+    RdCommand(SET_ABSOLUTE, "Set Absolute"),
+    RdCommand(BLOCK_END, "Block End", action="plot_commit"),
+    # Set filename for job (only realtime, see emulator)
+    RdCommand(SET_FILENAME, "", length=False),
+    RdCommand(PROCESS_TOP_LEFT, "Process TopLeft ({0}μm, {1}μm)", (ABS, ABS)),
+    RdCommand(
+        PROCESS_REPEAT,
+        "Process Repeat ({0}, {1}, {2}, {3}, {4}, {5}, {6})",
+        (S14,) * 7,
+    ),
+    RdCommand(ARRAY_DIRECTION, "Array Direction ({0})", (BYTE,)),
+    RdCommand(FEED_REPEAT, "Feed Repeat ({0}, {1})", (U35, U35)),
+    RdCommand(PROCESS_BOTTOM_RIGHT, "Process BottomRight({0}μm, {1}μm)", (ABS, ABS)),
+    # Same value given to F2 04
+    RdCommand(
+        ARRAY_REPEAT, "Array Repeat ({0}, {1}, {2}, {3}, {4}, {5}, {6})", (S14,) * 7
+    ),
+    RdCommand(FEED_LENGTH, "Feed Length {0}", (U35,)),
+    RdCommand(FEED_INFO, "Feed Info", length=False),
+    RdCommand(ARRAY_EN_MIRROR_CUT, "Array En Mirror Cut {0}", (BYTE,)),
+    RdCommand(b"\xE7\x0C", "Array Mirror Cut Distance {0}", (BYTE,), length=False),
+    RdCommand(ARRAY_MIN_POINT, "Array Min Point ({0}μm, {1}μm)", (ABS, ABS)),
+    RdCommand(ARRAY_MAX_POINT, "Array Max Point ({0}μm, {1}μm)", (ABS, ABS)),
+    RdCommand(ARRAY_ADD, "Array Add ({0}μm, {1}μm)", (ABS, ABS)),
+    RdCommand(ARRAY_MIRROR, "Array Mirror {0}", (BYTE,)),
+    RdCommand(b"\xE7\x32", "Set Tick Count {0}", (U35,), length=False),
+    RdCommand(BLOCK_X_SIZE, "Block X Size {0} {1}", (U35, U35)),
+    RdCommand(ARRAY_EVEN_DISTANCE, "Array Even Distance {0} {1}", (ABS, ABS)),
+    RdCommand(SET_FEED_AUTO_PAUSE, "Set Feed Auto Pause {0}", (BYTE,)),
+    RdCommand(UNION_BLOCK_PROPERTY, "Union Block Property", length=False),
+    RdCommand(b"\xE7\x3B", "Set File Property {0}", (BYTE,), length=False),
+    RdCommand(b"\xE7\x46", "BY Test 0x11227766", length=False),
+    RdCommand(DOCUMENT_MIN_POINT, "Document Min Point({0}μm, {1}μm)", (ABS, ABS)),
+    RdCommand(DOCUMENT_MAX_POINT, "Document Max Point({0}μm, {1}μm)", (ABS, ABS)),
+    RdCommand(PART_MIN_POINT, "{0}, Min Point({1}μm, {2}μm)", (BYTE, ABS, ABS)),
+    RdCommand(PART_MAX_POINT, "{0}, MaxPoint({1}μm, {2}μm)", (BYTE, ABS, ABS)),
+    RdCommand(PEN_OFFSET, "Pen Offset {0}: {1}μm", (BYTE, ABS)),
+    RdCommand(LAYER_OFFSET, "Layer Offset {0}: {1}μm", (BYTE, ABS)),
+    RdCommand(b"\xE7\x57", "PList Feed", length=False),
+    RdCommand(SET_CURRENT_ELEMENT_INDEX, "Set Current Element Index ({0})", (BYTE,)),
+    RdCommand(PART_MIN_POINT_EX, "{0}, MinPointEx({1}μm, {2}μm)", (BYTE, ABS, ABS)),
+    RdCommand(PART_MAX_POINT_EX, "{0}, MaxPointEx({1}μm, {2}μm)", (BYTE, ABS, ABS)),
+    # Realtime command.
+    RdCommand(b"\xE8", "", length=False),
+    RdCommand(ARRAY_START, "Array Start ({0})", (BYTE,)),
+    RdCommand(ARRAY_END, "Array End"),
+    RdCommand(REF_POINT_SET, "Ref Point Set"),
+    RdCommand(ELEMENT_MAX_INDEX, "Element Max Index ({0})", (BYTE,)),
+    RdCommand(ELEMENT_NAME_MAX_INDEX, "Element Name Max Index({0})", (BYTE,)),
+    RdCommand(ENABLE_BLOCK_CUTTING, "Enable Block Cutting ({0})", (BYTE,)),
+    RdCommand(DISPLAY_OFFSET, "Display Offset ({0}μm, {1}μm)", (ABS, ABS)),
+    RdCommand(FEED_AUTO_CALC, "Feed Auto Calc ({0})", (BYTE,)),
+    RdCommand(b"\xF1\x20", "Unknown ({0},{1})", (BYTE, BYTE), length=False),
+    RdCommand(ELEMENT_INDEX, "Element Index ({0})", (BYTE,)),
+    RdCommand(b"\xF2\x01", "Element Name Index ({0})", (BYTE,), length=False),
+    RdCommand(ELEMENT_NAME, "Element Name ({0})", (NAME,)),
+    RdCommand(
+        ELEMENT_ARRAY_MIN_POINT, "Element Array Min Point ({0}μm, {1}μm)", (ABS, ABS)
+    ),
+    RdCommand(
+        ELEMENT_ARRAY_MAX_POINT, "Element Array Max Point ({0}μm, {1}μm)", (ABS, ABS)
+    ),
+    RdCommand(
+        ELEMENT_ARRAY,
+        "Element Array ({0}, {1}, {2}, {3}, {4}, {5}, {6})",
+        (S14,) * 7,
+    ),
+    RdCommand(ELEMENT_ARRAY_ADD, "Element Array Add ({0}μm, {1}μm)", (ABS, ABS)),
+    RdCommand(ELEMENT_ARRAY_MIRROR, "Element Array Mirror ({0})", (BYTE,)),
+)
+
+
+def _build_dispatch(commands):
+    """
+    Builds the dispatch table, 256 entries indexed by the first opcode byte. Commands
+    with sub-commands are dicts indexed by the next byte.
+    """
+    table = [None] * 256
+    for command in commands:
+        opcode = command.opcode
+        if len(opcode) == 1:
+            table[opcode[0]] = command
+            continue
+        level = table[opcode[0]]
+        if level is None:
+            level = table[opcode[0]] = {}
+        for b in opcode[1:-1]:
+            level = level.setdefault(b, {})
+        level[opcode[-1]] = command
+    return table
+
+
+RD_DISPATCH = _build_dispatch(RD_COMMANDS)
+
+
+def rd_command(array):
+    """
+    Looks up the command table entry of an unswizzled command.
+
+    @param array: command bytes
+    @return: RdCommand, None for unknown sub-commands, False for unknown commands.
+    """
+    entry = RD_DISPATCH[array[0]]
+    if entry is None:
+        return False
+    depth = 1
+    while entry.__class__ is dict:
+        entry = entry.get(array[depth])
+        depth += 1
+    return entry
+
+
+class RdDecoder:
+    """
+    Streaming decoder for swizzled ruida data. Data is fed in chunks of any size,
+    complete unswizzled commands are returned as soon as they are known to be complete:
+    when the next opcode arrives or, for commands with a fixed length, when all their
+    arguments did.
+    """
+
+    def __init__(self, magic=0x88):
+        self.magic = magic
+        self.lut_swizzle, self.lut_unswizzle = swizzles_lut(magic)
+        self._pending = b""
+
+    def feed(self, data):
+        """
+        Decodes a chunk of swizzled data.
+
+        @param data: swizzled data
+        @return: list of complete unswizzled commands.
+        """
+        data = bytes(data).translate(self.lut_unswizzle)
+        if self._pending:
+            data = self._pending + data
+        commands = _COMMAND.findall(data)
+        if commands and not self._complete(commands[-1]):
+            self._pending = commands.pop()
+        else:
+            self._pending = b""
+        return commands
+
+    def flush(self):
+        """
+        @return: list of the remaining command, if any.
+        """
+        pending = self._pending
+        self._pending = b""
+        return [pending] if pending else []
+
+    @staticmethod
+    def _complete(command):
+        if command[0] < 0x80:
+            return False
+        try:
+            entry = rd_command(command)
+        except IndexError:
+            return False
+        if not entry or entry.length is None:
+            return False
+        return len(command) >= entry.length
+
+
 class RDJob:
     def __init__(
         self,
@@ -486,6 +841,8 @@ class RDJob:
         self.channel = channel
         self.reply = None
         self.buffer = list()
+        # Index of the next command of the buffer to execute.
+        self._executed = 0
         self.plotcut = None
 
         self.priority = priority
@@ -528,7 +885,7 @@ class RDJob:
         self.lock = threading.Lock()
 
     def __str__(self):
-        return f"{self.__class__.__name__}({len(self.buffer)} lines)"
+        return f"{self.__class__.__name__}({len(self.buffer) - self._executed} lines)"
 
     def __call__(self, *args, output=None):
         e = b"".join(args)
@@ -551,7 +908,9 @@ class RDJob:
                 return "Disabled"
 
     def clear(self):
-        self.buffer.clear()
+        with self.lock:
+            self.buffer.clear()
+            self._executed = 0
 
     def set_magic(self, magic):
         """
@@ -602,14 +961,22 @@ class RDJob:
         if self.time_started is None:
             self.time_started = time.time()
         with self.lock:
-            command = self.buffer.pop(0)
+            command = self.buffer[self._executed]
+            self._executed += 1
+            if self._executed == len(self.buffer):
+                self.buffer.clear()
+                self._executed = 0
+            elif self._executed >= 0x1000 and self._executed * 2 >= len(self.buffer):
+                # Drop executed commands in bulk rather than popping each one.
+                del self.buffer[: self._executed]
+                self._executed = 0
         try:
-            array = list(command)
-            self.process(array, offset=self.offset)
+            self.process(command, offset=self.offset)
             self.offset += len(command)
         except IndexError as e:
+            remaining = self.buffer[self._executed : self._executed + 25]
             raise RuidaCommandError(
-                f"Could not process Ruida buffer, {self.buffer[:25]} with magic: {self.magic:02}"
+                f"Could not process Ruida buffer, {remaining} with magic: {self.magic:02}"
             ) from e
         if not self.buffer:
             # Buffer is empty now. Job is complete
@@ -714,605 +1081,177 @@ class RDJob:
         Parses an individual unswizzled ruida command, updating the emulator state.
 
         These commands can change the position, settings, speed, color, power, create elements.
+        The command is looked up in the command table (RD_COMMANDS), its arguments are
+        parsed at fixed offsets and the description is only formatted for the channel.
         @param array:
         @return:
-
-        TODO: Migrate this to use the Ruida Protocol Analyzer decode state
-        machine (class RdDecoder).
         """
-        desc = ""
-        if array[0] < 0x80:
-            if self.channel:
-                self.channel(f"NOT A COMMAND: {array[0]}")
-            raise RuidaCommandError("Not a command.")
-        elif array[0] == 0x80:
-            value = abscoord(array[2:7])
-            if array[1] == 0x00:
-                desc = f"Axis X Move {value}"
-                self.x += value
-            elif array[1] == 0x08:
-                desc = f"Axis Z Move {value}"
-                self.z += value
-        elif array[0] == 0x88:  # 0b10001000 11 characters.
-            x = abscoord(array[1:6])
-            y = abscoord(array[6:11])
-            self.plot_location(x * self.scale, y * self.scale, 0)
-            desc = f"Move Absolute ({x}μm, {y}μm)"
-        elif array[0] == 0x89:  # 0b10001001 5 characters
-            if len(array) > 1:
-                dx = relcoord(array[1:3])
-                dy = relcoord(array[3:5])
-                self.plot_location(
-                    self.x + dx * self.scale, self.y + dy * self.scale, 0
-                )
-                desc = f"Move Relative ({dx:+}μm, {dy:+}μm)"
-            else:
-                desc = "Move Relative (no coords)"
-        elif array[0] == 0x8A:  # 0b10101010 3 characters
-            dx = relcoord(array[1:3])
-            self.plot_location(self.x + dx * self.scale, self.y, 0)
-            desc = f"Move Horizontal Relative ({dx:+}μm)"
-        elif array[0] == 0x8B:  # 0b10101011 3 characters
-            dy = relcoord(array[1:3])
-            self.plot_location(self.x, self.y + dy * self.scale, 0)
-            desc = f"Move Vertical Relative ({dy:+}μm)"
-        elif array[0] == 0xA0:
-            value = abscoord(array[2:7])
-            if array[1] == 0x00:
-                desc = f"Axis Y Move {value}"
-            elif array[1] == 0x08:
-                desc = f"Axis U Move {value}"
-        elif array[0] == 0xA8:  # 0b10101000 11 characters.
-            x = abscoord(array[1:6])
-            y = abscoord(array[6:11])
-            self.plot_location(x * self.scale, y * self.scale, 1)
-            desc = f"Cut Absolute ({x}μm, {y}μm)"
-        elif array[0] == 0xA9:  # 0b10101001 5 characters
-            dx = relcoord(array[1:3])
-            dy = relcoord(array[3:5])
-            self.plot_location(self.x + dx * self.scale, self.y + dy * self.scale, 1)
-            desc = f"Cut Relative ({dx:+}μm, {dy:+}μm)"
-        elif array[0] == 0xAA:  # 0b10101010 3 characters
-            dx = relcoord(array[1:3])
-            self.plot_location(self.x + dx * self.scale, self.y, 1)
-            desc = f"Cut Horizontal Relative ({dx:+}μm)"
-        elif array[0] == 0xAB:  # 0b10101011 3 characters
-            dy = relcoord(array[1:3])
-            self.plot_location(self.x, self.y + dy * self.scale, 1)
-            desc = f"Cut Vertical Relative ({dy:+}μm)"
-        elif array[0] == 0xC7:
-            try:
-                v0 = parse_power(array[1:3])
-            except IndexError:
-                v0 = 0
-            desc = f"Imd Power 1 ({v0})"
-        elif array[0] == 0xC2:
-            v0 = parse_power(array[1:3])
-            desc = f"Imd Power 3 ({v0})"
-        elif array[0] == 0xC0:
-            v0 = parse_power(array[1:3])
-            desc = f"Imd Power 2 ({v0})"
-        elif array[0] == 0xC3:
-            v0 = parse_power(array[1:3])
-            desc = f"Imd Power 4 ({v0})"
-        elif array[0] == 0xC8:
-            v0 = parse_power(array[1:3])
-            desc = f"End Power 1 ({v0})"
-        elif array[0] == 0xC4:
-            v0 = parse_power(array[1:3])
-            desc = f"End Power 3 ({v0})"
-        elif array[0] == 0xC1:
-            v0 = parse_power(array[1:3])
-            desc = f"End Power 2 ({v0})"
-        elif array[0] == 0xC5:
-            v0 = parse_power(array[1:3])
-            desc = f"End Power 4 ({v0})"
-        elif array[0] == 0xC6:
-            if array[1] == 0x01:
-                power = parse_power(array[2:4])
-                self.power1_min = power
-                power = self.power1_min
-                desc = f"Power 1 min={power}"
-                self.power = power * 10  # 1000 / 100
-            elif array[1] == 0x02:
-                power = parse_power(array[2:4])
-                self.power1_max = power
-                power = self.power1_max
-                desc = f"Power 1 max={power}"
-                self.power = power * 10  # 1000 / 100
-            elif array[1] == 0x05:
-                power = parse_power(array[2:4])
-                desc = f"Power 3 min={power}"
-            elif array[1] == 0x06:
-                power = parse_power(array[2:4])
-                desc = f"Power 3 max={power}"
-            elif array[1] == 0x07:
-                power = parse_power(array[2:4])
-                desc = f"Power 4 min={power}"
-            elif array[1] == 0x08:
-                power = parse_power(array[2:4])
-                desc = f"Power 4 max={power}"
-            elif array[1] == 0x10:
-                interval = parse_time(array[2:7])
-                desc = f"Laser Interval {interval}ms"
-            elif array[1] == 0x11:
-                interval = parse_time(array[2:7])
-                desc = f"Add Delay {interval}ms"
-            elif array[1] == 0x12:
-                interval = parse_time(array[2:7])
-                desc = f"Laser On Delay {interval}ms"
-            elif array[1] == 0x13:
-                interval = parse_time(array[2:7])
-                desc = f"Laser Off Delay {interval}ms"
-            elif array[1] == 0x15:
-                interval = parse_time(array[2:7])
-                desc = f"Laser On2 {interval}ms"
-            elif array[1] == 0x16:
-                interval = parse_time(array[2:7])
-                desc = f"Laser Off2 {interval}ms"
-            elif array[1] == 0x21:
-                power = parse_power(array[2:4])
-                desc = f"Power 2 min={power}"
-                self.power2_min = power
-            elif array[1] == 0x22:
-                power = parse_power(array[2:4])
-                desc = f"Power 2 max={power}"
-                self.power2_max = power
-            elif array[1] == 0x31:
-                part = array[2]
-                self.power1_min = parse_power(array[3:5])
-                desc = f"{part}, Power 1 Min=({self.power1_min})"
-            elif array[1] == 0x32:
-                part = array[2]
-                self.power1_max = parse_power(array[3:5])
-                desc = f"{part}, Power 1 Max=({self.power1_max})"
-            elif array[1] == 0x35:
-                part = array[2]
-                power = parse_power(array[3:5])
-                desc = f"{part}, Power 3 Min ({power})"
-            elif array[1] == 0x36:
-                part = array[2]
-                power = parse_power(array[3:5])
-                desc = f"{part}, Power 3 Max ({power})"
-            elif array[1] == 0x37:
-                part = array[2]
-                power = parse_power(array[3:5])
-                desc = f"{part}, Power 4 Min ({power})"
-            elif array[1] == 0x38:
-                part = array[2]
-                power = parse_power(array[3:5])
-                desc = f"{part}, Power 4 Max ({power})"
-            elif array[1] == 0x41:
-                part = array[2]
-                power = parse_power(array[3:5])
-                desc = f"{part}, Power 2 Min ({power})"
-            elif array[1] == 0x42:
-                part = array[2]
-                power = parse_power(array[3:5])
-                desc = f"{part}, Power 2 Max ({power})"
-            elif array[1] == 0x50:
-                power = parse_power(array[2:4])
-                desc = f"Through Power 1 ({power})"
-            elif array[1] == 0x51:
-                power = parse_power(array[2:4])
-                desc = f"Through Power 2 ({power})"
-            elif array[1] == 0x55:
-                power = parse_power(array[2:4])
-                desc = f"Through Power 3 ({power})"
-            elif array[1] == 0x56:
-                power = parse_power(array[2:4])
-                desc = f"Through Power 4 ({power})"
-            elif array[1] == 0x60:
-                laser = array[2]
-                part = array[3]
-                frequency = parse_frequency(array[4:9])
-                desc = f"{part}, Laser {laser}, Frequency ({frequency})"
-                if frequency != self.frequency:
-                    self.frequency = frequency
-        elif array[0] == 0xC9:
-            if array[1] == 0x02:
-                self.plot_commit()
-                speed = parse_speed(array[2:7])
-                if speed != self.speed:
-                    self.speed = speed
-                desc = f"Speed Laser 1 {speed}mm/s"
-            elif array[1] == 0x03:
-                speed = parse_speed(array[2:7])
-                desc = f"Axis Speed {speed}mm/s"
-            elif array[1] == 0x04:
-                self.plot_commit()
-                part = array[2]
-                speed = parse_speed(array[3:8])
-                if speed != self.speed:
-                    self.speed = speed
-                desc = f"{part}, Speed {speed}mm/s"
-            elif array[1] == 0x05:
-                speed = parse_speed(array[2:7]) / 1000.0
-                desc = f"Force Eng Speed {speed}mm/s"
-            elif array[1] == 0x06:
-                speed = parse_speed(array[2:7]) / 1000.0
-                desc = f"Axis Move Speed {speed}mm/s"
-        elif array[0] == 0xCA:
-            if array[1] == 0x01:
-                if array[2] == 0x00:
-                    desc = "End Layer"
-                elif array[2] == 0x01:
-                    desc = "Work Mode 1"
-                elif array[2] == 0x02:
-                    desc = "Work Mode 2"
-                elif array[2] == 0x03:
-                    desc = "Work Mode 3"
-                elif array[2] == 0x04:
-                    desc = "Work Mode 4"
-                elif array[2] == 0x55:
-                    desc = "Work Mode 5"
-                elif array[2] == 0x05:
-                    desc = "Work Mode 6"
-                elif array[2] == 0x10:
-                    desc = "Layer Device 0"
-                elif array[2] == 0x11:
-                    desc = "Layer Device 1"
-                elif array[2] == 0x12:
-                    desc = "Air Assist Off"
-                elif array[2] == 0x13:
-                    desc = "Air Assist On"
-                elif array[2] == 0x14:
-                    desc = "DbHead"
-                elif array[2] == 0x30:
-                    desc = "EnLaser2Offset 0"
-                elif array[2] == 0x31:
-                    desc = "EnLaser2Offset 1"
-            elif array[1] == 0x02:
-                part = array[2]
-                desc = f"{part}, Layer Number"
-            elif array[1] == 0x03:
-                desc = "EnLaserTube Start"
-            elif array[1] == 0x04:
-                value = array[2]
-                desc = f"X Sign Map {value}"
-            elif array[1] == 0x05:
-                self.plot_commit()
-                c = decodeu35(array[2:7])
-                r = c & 0xFF
-                g = (c >> 8) & 0xFF
-                b = (c >> 16) & 0xFF
-                c = Color(red=r, blue=b, green=g)
-                self.set_color(c.hex)
-                desc = f"Layer Color {str(self.color)}"
-            elif array[1] == 0x06:
-                part = array[2]
-                c = decodeu35(array[3:8])
-                r = c & 0xFF
-                g = (c >> 8) & 0xFF
-                b = (c >> 16) & 0xFF
-                c = Color(red=r, blue=b, green=g)
-                self.set_color(c.hex)
-                desc = f"Color Part {part}, {self.color}"
-            elif array[1] == 0x10:
-                value = array[2]
-                desc = f"EnExIO Start {value}"
-            elif array[1] == 0x22:
-                part = array[2]
-                desc = f"{part}, Max Layer"
-            elif array[1] == 0x30:
-                filenumber = parse_filenumber(array[2:4])
-                desc = f"U File ID {filenumber}"
-            elif array[1] == 0x40:
-                value = array[2]
-                desc = f"ZU Map {value}"
-            elif array[1] == 0x41:
-                part = array[2]
-                mode = array[3]
-                desc = f"{part}, Work Mode {mode}"
-        elif array[0] == 0xCC:
-            desc = "ACK from machine"
-        elif array[0] == 0xCD:
-            desc = "ERR from machine"
-        elif array[0] == 0xCE:
-            desc = "Keep Alive"
-        elif array[0] == 0xD0:
-            zone = array[1]
-            desc = f"Set Inhale Zone {zone}"
-        elif array[0] == 0xD7:
-            self.plot_commit()
-            try:
-                self._driver.plot_start()
-            except AttributeError:
-                pass
-            desc = "End Of File"
-        elif array[0] == 0xD8:
-            if array[1] == 0x00:
-                desc = "Start Process"
-            elif array[1] == 0x10:
-                desc = "Ref Point Mode 2, Machine Zero/Absolute Position"
-            elif array[1] == 0x11:
-                desc = "Ref Point Mode 1, Anchor Point"
-            elif array[1] == 0x12:
-                desc = "Ref Point Mode 0, Current Position"
-        elif array[0] == 0xD9:
-            if array[1] == 0x00:
-                opts = array[2]
-                value = abscoord(array[3:8])
-                desc = f"Rapid move X ({value}μm)"
-            elif array[1] == 0x01:
-                opts = array[2]
-                value = abscoord(array[3:8])
-                desc = f"Rapid move Y ({value}μm)"
-            elif array[1] == 0x02:
-                opts = array[2]
-                value = abscoord(array[3:8])
-                desc = f"Rapid move Z ({value}μm)"
-            elif array[1] == 0x03:
-                opts = array[2]
-                value = abscoord(array[3:8])
-                desc = f"Rapid move U ({value}μm)"
-            elif array[1] == 0x0F:
-                opts = array[2]
-                value = abscoord(array[3:8])
-                desc = f"Rapid move Feed ({value}μm)"
-            elif array[1] == 0x10:
-                opts = array[2]
-                x = abscoord(array[3:8])
-                y = abscoord(array[8:13])
-                desc = f"Rapid move XY ({x}μm, {y}μm)"
-            elif array[1] == 0x30:
-                opts = array[2]
-                x = abscoord(array[3:7])
-                y = abscoord(array[8:13])
-                u = abscoord(array[13:18])
-                desc = f"Rapid move XYU ({x}μm, {y}μm, {u}μm)"
-        elif array[0] == 0xDA:
-            mem = parse_mem(array[2:4])
-            if array[1] == 0x01:
-                value0 = array[4:9]
-                value1 = array[9:14]
-                v0 = decodeu35(value0)
-                v1 = decodeu35(value1)
-                desc = f"Set {array[2]:02x} {array[3]:02x} (mem: {mem:04x})= {v0} (0x{v0:08x}) {v1} (0x{v1:08x})"
-        elif array[0] == 0xE5:  # 0xE502
-            if array[1] == 0x00:
-                # RDWorks File Upload
-                filenumber = array[2]
-                desc = f"Document Page Number {filenumber}"
-                # TODO: Requires Response.
-            if array[1] == 0x02:
-                # len 3
-                desc = "Document Data End"
-            elif array[1] == 0x05:
-                _sum = decodeu35(array[2:7])
-                desc = f"Set File Sum {_sum}"
-
-        elif array[0] == 0xE6:
-            if array[1] == 0x01:
-                desc = "Set Absolute"
-                # Only seen in Absolute Coords. MachineZero is Ref2 but does not Set Absolute.
-        elif array[0] == 0xE7:
-            if array[1] == 0x00:
-                self.plot_commit()
-                desc = "Block End"
-            elif array[1] == 0x01:
-                pass  # Set filename for job (only realtime, see emulator)
-            elif array[1] == 0x03:
-                c_x = abscoord(array[2:7])
-                c_y = abscoord(array[7:12])
-                desc = f"Process TopLeft ({c_x}μm, {c_y}μm)"
-            elif array[1] == 0x04:
-                v0 = decode14(array[2:4])
-                v1 = decode14(array[4:6])
-                v2 = decode14(array[6:8])
-                v3 = decode14(array[8:10])
-                v4 = decode14(array[10:12])
-                v5 = decode14(array[12:14])
-                v6 = decode14(array[14:16])
-                desc = f"Process Repeat ({v0}, {v1}, {v2}, {v3}, {v4}, {v5}, {v6})"
-            elif array[1] == 0x05:
-                direction = array[2]
-                desc = f"Array Direction ({direction})"
-            elif array[1] == 0x06:
-                v1 = decodeu35(array[2:7])
-                v2 = decodeu35(array[7:12])
-                desc = f"Feed Repeat ({v1}, {v2})"
-            elif array[1] == 0x07:
-                c_x = abscoord(array[2:7])
-                c_y = abscoord(array[7:12])
-                desc = f"Process BottomRight({c_x}μm, {c_y}μm)"
-            elif array[1] == 0x08:  # Same value given to F2 04
-                v0 = decode14(array[2:4])
-                v1 = decode14(array[4:6])
-                v2 = decode14(array[6:8])
-                v3 = decode14(array[8:10])
-                v4 = decode14(array[10:12])
-                v5 = decode14(array[12:14])
-                v6 = decode14(array[14:16])
-                desc = f"Array Repeat ({v0}, {v1}, {v2}, {v3}, {v4}, {v5}, {v6})"
-            elif array[1] == 0x09:
-                v1 = decodeu35(array[2:7])
-                desc = f"Feed Length {v1}"
-            elif array[1] == 0x0A:
-                desc = f"Feed Info"
-            elif array[1] == 0x0B:
-                v1 = array[2]
-                desc = f"Array En Mirror Cut {v1}"
-            elif array[1] == 0x0C:
-                v1 = array[2]
-                desc = f"Array Mirror Cut Distance {v1}"
-            elif array[1] == 0x0C:
-                v1 = array[2]
-                desc = f"Set File Head Distance {v1}"
-            elif array[1] == 0x13:
-                c_x = abscoord(array[2:7])
-                c_y = abscoord(array[7:12])
-                desc = f"Array Min Point ({c_x}μm, {c_y}μm)"
-            elif array[1] == 0x17:
-                c_x = abscoord(array[2:7])
-                c_y = abscoord(array[7:12])
-                desc = f"Array Max Point ({c_x}μm, {c_y}μm)"
-            elif array[1] == 0x23:
-                c_x = abscoord(array[2:7])
-                c_y = abscoord(array[7:12])
-                desc = f"Array Add ({c_x}μm, {c_y}μm)"
-            elif array[1] == 0x24:
-                v1 = array[2]
-                desc = f"Array Mirror {v1}"
-            elif array[1] == 0x32:
-                v1 = decodeu35(array[2:7])
-                desc = f"Set Tick Count {v1}"
-            elif array[1] == 0x35:
-                v1 = decodeu35(array[2:7])
-                v2 = decodeu35(array[7:12])
-                desc = f"Block X Size {v1} {v2}"
-            elif array[1] == 0x32:
-                desc = f"Set File Empty"
-            elif array[1] == 0x37:
-                v1 = abscoord(array[2:7])
-                v2 = abscoord(array[7:12])
-                desc = f"Array Even Distance {v1} {v2}"
-            elif array[1] == 0x38:
-                v1 = array[2]
-                desc = f"Set Feed Auto Pause {v1}"
-            elif array[1] == 0x3A:
-                desc = f"Union Block Property"
-            elif array[1] == 0x3B:
-                v1 = array[2]
-                desc = f"Set File Property {v1}"
-            elif array[1] == 0x46:
-                desc = "BY Test 0x11227766"
-            elif array[1] == 0x50:
-                c_x = abscoord(array[1:6])
-                c_y = abscoord(array[6:11])
-                desc = f"Document Min Point({c_x}μm, {c_y}μm)"
-            elif array[1] == 0x51:
-                c_x = abscoord(array[2:7])
-                c_y = abscoord(array[7:12])
-                desc = f"Document Max Point({c_x}μm, {c_y}μm)"
-            elif array[1] == 0x52:
-                part = array[2]
-                c_x = abscoord(array[3:8])
-                c_y = abscoord(array[8:13])
-                desc = f"{part}, Min Point({c_x}μm, {c_y}μm)"
-            elif array[1] == 0x53:
-                part = array[2]
-                c_x = abscoord(array[3:8])
-                c_y = abscoord(array[8:13])
-                desc = f"{part}, MaxPoint({c_x}μm, {c_y}μm)"
-            elif array[1] == 0x54:
-                axis = array[2]
-                c_x = abscoord(array[3:8])
-                desc = f"Pen Offset {axis}: {c_x}μm"
-            elif array[1] == 0x55:
-                axis = array[2]
-                c_x = abscoord(array[3:8])
-                desc = f"Layer Offset {axis}: {c_x}μm"
-            elif array[1] == 0x57:
-                desc = f"PList Feed"
-            elif array[1] == 0x60:
-                desc = f"Set Current Element Index ({array[2]})"
-            elif array[1] == 0x61:
-                part = array[2]
-                c_x = abscoord(array[3:8])
-                c_y = abscoord(array[8:13])
-                desc = f"{part}, MinPointEx({c_x}μm, {c_y}μm)"
-            elif array[1] == 0x62:
-                part = array[2]
-                c_x = abscoord(array[3:8])
-                c_y = abscoord(array[8:13])
-                desc = f"{part}, MaxPointEx({c_x}μm, {c_y}μm)"
-        elif array[0] == 0xE8:
-            # Realtime command.
-            pass
-        elif array[0] == 0xEA:
-            index = array[1]
-            desc = f"Array Start ({index})"
-        elif array[0] == 0xEB:
-            desc = "Array End"
-        elif array[0] == 0xF0:
-            desc = "Ref Point Set"
-        elif array[0] == 0xF1:
-            if array[1] == 0x00:
-                index = array[2]
-                desc = f"Element Max Index ({index})"
-            elif array[1] == 0x01:
-                index = array[2]
-                desc = f"Element Name Max Index({index})"
-            elif array[1] == 0x02:
-                enable = array[2]
-                desc = f"Enable Block Cutting ({enable})"
-            elif array[1] == 0x03:
-                c_x = abscoord(array[2:7])
-                c_y = abscoord(array[7:12])
-                desc = f"Display Offset ({c_x}μm, {c_y}μm)"
-            elif array[1] == 0x04:
-                enable = array[2]
-                desc = f"Feed Auto Calc ({enable})"
-            elif array[1] == 0x20:
-                desc = f"Unknown ({array[2]},{array[3]})"
-        elif array[0] == 0xF2:
-            if array[1] == 0x00:
-                index = array[2]
-                desc = f"Element Index ({index})"
-            if array[1] == 0x01:
-                index = array[2]
-                desc = f"Element Name Index ({index})"
-            if array[1] == 0x02:
-                name = bytes(array[2:12])
-                desc = f"Element Name ({str(name)})"
-            if array[1] == 0x03:
-                c_x = abscoord(array[2:7])
-                c_y = abscoord(array[7:12])
-                desc = f"Element Array Min Point ({c_x}μm, {c_y}μm)"
-            if array[1] == 0x04:
-                c_x = abscoord(array[2:7])
-                c_y = abscoord(array[7:12])
-                desc = f"Element Array Max Point ({c_x}μm, {c_y}μm)"
-            if array[1] == 0x05:
-                v0 = decode14(array[2:4])
-                v1 = decode14(array[4:6])
-                v2 = decode14(array[6:8])
-                v3 = decode14(array[8:10])
-                v4 = decode14(array[10:12])
-                v5 = decode14(array[12:14])
-                v6 = decode14(array[14:16])
-                desc = f"Element Array ({v0}, {v1}, {v2}, {v3}, {v4}, {v5}, {v6})"
-            if array[1] == 0x06:
-                c_x = abscoord(array[2:7])
-                c_y = abscoord(array[7:12])
-                desc = f"Element Array Add ({c_x}μm, {c_y}μm)"
-            if array[1] == 0x07:
-                index = array[2]
-                desc = f"Element Array Mirror ({index})"
-        else:
+        command = rd_command(array)
+        if command is False:
+            if array[0] < 0x80:
+                if self.channel:
+                    self.channel(f"NOT A COMMAND: {array[0]}")
+                raise RuidaCommandError("Not a command.")
             desc = "Unknown Command!"
+        elif command is None:
+            desc = ""
+        elif command.bare is not None and len(array) == len(command.opcode):
+            desc = command.bare
+        elif command.action is not None:
+            values = command.parse(array)
+            values = getattr(self, command.action)(*values) or values
+            desc = command.describe(values) if self.channel else ""
+        elif self.channel:
+            desc = command.describe(command.parse(array))
+        else:
+            return
         if self.channel:
             prefix = f"{offset:06x}" if offset is not None else ""
             self.channel(f"{prefix}-**-> {str(bytes(array).hex())}\t({desc})")
 
+    def process_blob(self, data, magic=None, chunk_size=0x10000):
+        """
+        Decodes swizzled data in chunks and processes the commands as they are decoded,
+        without buffering them in the job.
+
+        @param data: swizzled ruida data, for example an .rd file.
+        @param magic: magic number for unswizzling, determined from the data if None.
+        @param chunk_size: size of the decoded chunks.
+        @return:
+        """
+        if magic is None:
+            magic = determine_magic_via_histogram(data)
+        self.set_magic(magic)
+        decoder = RdDecoder(self.magic)
+
+        def decoded():
+            for i in range(0, len(data), chunk_size):
+                yield from decoder.feed(data[i : i + chunk_size])
+            yield from decoder.flush()
+
+        offset = self.offset
+        for command in decoded():
+            try:
+                self.process(command, offset=offset)
+            except IndexError as e:
+                raise RuidaCommandError(
+                    f"Could not process Ruida command, {command} with magic: {self.magic:02}"
+                ) from e
+            offset += len(command)
+        self.offset = offset
+
+    #######################
+    # Command Actions
+    #######################
+
+    def _axis_x_move(self, value):
+        self.x += value
+
+    def _axis_z_move(self, value):
+        self.z += value
+
+    def _move_abs_xy(self, x, y):
+        self.plot_location(x * self.scale, y * self.scale, 0)
+
+    def _move_rel_xy(self, dx, dy):
+        self.plot_location(self.x + dx * self.scale, self.y + dy * self.scale, 0)
+
+    def _move_rel_x(self, dx):
+        self.plot_location(self.x + dx * self.scale, self.y, 0)
+
+    def _move_rel_y(self, dy):
+        self.plot_location(self.x, self.y + dy * self.scale, 0)
+
+    def _cut_abs_xy(self, x, y):
+        self.plot_location(x * self.scale, y * self.scale, 1)
+
+    def _cut_rel_xy(self, dx, dy):
+        self.plot_location(self.x + dx * self.scale, self.y + dy * self.scale, 1)
+
+    def _cut_rel_x(self, dx):
+        self.plot_location(self.x + dx * self.scale, self.y, 1)
+
+    def _cut_rel_y(self, dy):
+        self.plot_location(self.x, self.y + dy * self.scale, 1)
+
+    def _min_power_1(self, power):
+        self.power1_min = power
+        self.power = power * 10  # 1000 / 100
+
+    def _max_power_1(self, power):
+        self.power1_max = power
+        self.power = power * 10  # 1000 / 100
+
+    def _min_power_2(self, power):
+        self.power2_min = power
+
+    def _max_power_2(self, power):
+        self.power2_max = power
+
+    def _min_power_1_part(self, part, power):
+        self.power1_min = power
+
+    def _max_power_1_part(self, part, power):
+        self.power1_max = power
+
+    def _frequency_part(self, laser, part, frequency):
+        self.frequency = frequency
+
+    def _speed_laser_1(self, speed):
+        self.plot_commit()
+        self.speed = speed
+
+    def _speed_laser_1_part(self, part, speed):
+        self.plot_commit()
+        self.speed = speed
+
+    def _decode_color(self, c):
+        r = c & 0xFF
+        g = (c >> 8) & 0xFF
+        b = (c >> 16) & 0xFF
+        self.plot_commit()
+        self.set_color(Color(red=r, blue=b, green=g).hex)
+
+    def _layer_color(self, c):
+        self._decode_color(c)
+        return (self.color,)
+
+    def _layer_color_part(self, part, c):
+        self._decode_color(c)
+        return part, self.color
+
+    def _end_of_file(self):
+        self.plot_commit()
+        try:
+            self._driver.plot_start()
+        except AttributeError:
+            pass
+
     def decode_reply(self, reply):
-        '''Decode a reply which received in response to a command.
+        """Decode a reply which received in response to a command.
 
         TODO: Migrate this to use the Ruida Protocol Analyzer decode state
         machine (class RdDecoder).
         https://github.com/StevenIsaacs/ruida-protocol-analyzer/tree/main
-        '''
+        """
         if reply[0] == 0xDA:
-            if reply[1] == 0x01: # Response to command 0xDA 0x00.
+            if reply[1] == 0x01:  # Response to command 0xDA 0x00.
                 if reply[2] == 0x05:
-                    if reply[3] == 0x7E: # CARD ID
-                        _cid_lut = {
-                            0x65106510: 'RDC64425'
-                        }
+                    if reply[3] == 0x7E:  # CARD ID
+                        _cid_lut = {0x65106510: "RDC64425"}
                         _cid = decode35(reply[4:9])
                         if _cid in _cid_lut:
                             _card = _cid_lut[_cid]
                         else:
                             _card = "Unknown card."
-                        return f'CardID: {_cid:08X}: {_card}'
+                        return f"CardID: {_cid:08X}: {_card}"
         return None
 
     def unswizzle(self, data):
-        return bytes([self.lut_unswizzle[b] for b in data])
+        return bytes(data).translate(self.lut_unswizzle)
 
     def swizzle(self, data):
-        return bytes([self.lut_swizzle[b] for b in data])
+        return bytes(data).translate(self.lut_swizzle)
 
     def _calculate_layer_bounds(self, layer):
         max_x = float("-inf")
@@ -1468,7 +1407,7 @@ class RDJob:
         self.array_end()
         self.block_end()
         # self.encoder.set_setting(0x320, 142, 142)
-        self.set_file_sum(self.file_sum() + 0xD7) # Account for the EOF.
+        self.set_file_sum(self.file_sum() + 0xD7)  # Account for the EOF.
         self.end_of_file()
 
     def jump(self, x, y, dx, dy):
@@ -1730,7 +1669,7 @@ class RDJob:
         self(LAYER_NUMBER_PART, encode_part(part), output=output)
 
     def en_laser_tube_start(self, switch, output=None):
-        self(EN_LASER_TUBE_START, encode_switch(switch),output=output)
+        self(EN_LASER_TUBE_START, encode_switch(switch), output=output)
 
     def x_sign_map(self, value, output=None):
         self(X_SIGN_MAP, encode_index(value), output=output)
@@ -1,12 +1,63 @@
 """
 UDP Connection handles Ruida UDP data sending and receiving and the Ruida protocols therein.
+
+Every datagram sent to the controller is a 16 bit checksum followed by swizzled command
+data and is answered with an ACK, or a NAK if the checksum failed. The controller does not
+use sequence numbers, so only one packet is in flight at any time and a packet is only
+sent again after a NAK: without an ACK it is unknown whether the controller ran it.
+Throughput comes from packing queued messages into datagrams up to the maximum size the
+controller accepts and swizzling in the writing thread while the previous packet is in
+flight. The wait for an ACK is derived from the measured round trip time rather than fixed.
 """
 
-import socket
 import queue
+import socket
 import struct
+import time
+
+from meerk40t.ruida.rdjob import ACK, parse_commands
+
+# Largest payload of a datagram, the controller reads 1472 bytes including the checksum.
+MAX_PAYLOAD = 1470
+# Bounds and starting value of the adaptive ACK timeout, in seconds.
+MIN_TIMEOUT = 0.25
+MAX_TIMEOUT = 2.0
+INITIAL_TIMEOUT = 0.25
+# Sends of one packet answered by a NAK before the packet is given up.
+MAX_ATTEMPTS = 8
+# Timeouts waiting for one ACK before the controller is considered lost.
+MAX_WAITS = 4
+# Minimum wait for reply data, the controller may need time to produce it.
+REPLY_TIMEOUT = 1.0
+
+
+class RoundTripTimer:
+    """
+    ACK timeout from measured round trip times, smoothed mean plus four deviations as in
+    TCP (RFC 6298). Every timeout doubles the wait until the next successful measurement.
+    """
+
+    def __init__(
+        self, timeout=INITIAL_TIMEOUT, minimum=MIN_TIMEOUT, maximum=MAX_TIMEOUT
+    ):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.timeout = timeout
+        self.srtt = None
+        self.rttvar = None
+
+    def sample(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - rtt)
+            self.srtt = 0.875 * self.srtt + 0.125 * rtt
+        self.timeout = min(max(self.srtt + 4 * self.rttvar, self.minimum), self.maximum)
+
+    def backoff(self):
+        self.timeout = min(self.timeout * 2, self.maximum)
 
-from meerk40t.ruida.rdjob import ACK, ERR
 
 class UDPConnection:
     def __init__(self, service):
@@ -24,8 +75,16 @@ class UDPConnection:
         self.socket = None
         self.swizzle = None
         self.unswizzle = None
-        self.send_q = queue.Queue(2 ** 18) # Power of 2 for efficiency.
+        self.send_q = queue.Queue(2**18)  # Power of 2 for efficiency.
         self._to = 0.25
+        self._held = None
+        self.timer = RoundTripTimer()
+        # Internal stats to aid failure diagnosis.
+        self.sends = 0
+        self.acks = 0
+        self.naks = 0
+        self.timeouts = 0
+        self.replies = 0
 
     # Should verify type is a callable method.
     def set_swizzles(self, swizzle, unswizzle):
@@ -39,8 +98,6 @@ class UDPConnection:
         if self.connected:
             return
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        # TODO: Want non-blocking. Handling send/rcv using states and blocking
-        # on the send queue.
         self.socket.settimeout(self._to)
         self.socket.bind(("", self.listen_port))
 
@@ -59,6 +116,7 @@ class UDPConnection:
         self.socket = None
         self.service.signal("pipe;usb_status", "disconnected")
         self.events("Disconnected")
+        self.events(self.statistics())
 
     @property
     def is_connecting(self):
@@ -71,31 +129,161 @@ class UDPConnection:
     def abort_connect(self):
         pass
 
+    def statistics(self):
+        srtt = self.timer.srtt
+        rtt = "--" if srtt is None else f"{srtt * 1000:.2f}ms"
+        return (
+            f"sends: {self.sends}, acks: {self.acks}, naks: {self.naks}, "
+            f"timeouts: {self.timeouts}, replies: {self.replies}, "
+            f"rtt: {rtt}, timeout: {self.timer.timeout * 1000:.0f}ms"
+        )
+
     def write(self, data):
-        '''Provide double buffered data transmission.
+        """Provide double buffered data transmission.
+
+        The data is swizzled here, in the calling thread, while the handshaker is
+        busy with earlier packets. Data longer than a datagram is split between
+        commands.
 
         This blocks for a short time when the queue is full and retries a number
         of times for a total of approximately 4 seconds before giving up.
-
-        TODO: What does the calling method do in the case of timeout? How to
-        inform the calling method a timeout occurred?
-        '''
+        """
         self.open()
-        # Blocks when queue is full.
-        _tries = 12 # Approximately 4 seconds.
-        while _tries:
+        for message in self._split(data):
+            # Check for only KNOWN command expecting a reply.
+            # 0x01 is a memory set -- no reply.
+            reply = len(message) > 1 and message[0] == 0xDA and message[1] != 0x01
+            item = (self.swizzle(message), reply)
+            # Blocks when queue is full.
+            _tries = 12  # Approximately 4 seconds.
+            while _tries:
+                try:
+                    self.send_q.put(item, timeout=self._to)
+                    break
+                except queue.Full:
+                    _tries -= 1
+                    if _tries == 0:
+                        self.service.signal("warning", "Ruida", "Send queue FULL")
+                    continue
+        self.send(data)  # TODO: Where this goes is not known at this time.
+
+    @staticmethod
+    def _split(data):
+        if len(data) <= MAX_PAYLOAD:
+            yield data
+            return
+        message = bytearray()
+        for command in parse_commands(data):
+            if message and len(message) + len(command) > MAX_PAYLOAD:
+                yield bytes(message)
+                message.clear()
+            message += command
+        if message:
+            yield bytes(message)
+
+    def _next_packet(self):
+        """Takes the next packet from the send queue.
+
+        Queued messages are packed into one packet up to the maximum payload, a
+        message expecting a reply is always sent alone.
+
+        @raises queue.Empty: nothing was queued within the idle timeout.
+        """
+        if self._held is not None:
+            payload, reply = self._held
+            self._held = None
+        else:
+            # Don't block forever because some earlier versions of Python and
+            # on Windows (yuck) will not respond to a keyboard interrupt.
+            payload, reply = self.send_q.get(timeout=self._to)
+        if reply:
+            return payload, True
+        packet = bytearray(payload)
+        while True:
             try:
-                self.send_q.put(data, timeout=self._to)
+                item = self.send_q.get_nowait()
+            except queue.Empty:
                 break
-            except queue.Full:
-                _tries -= 1
-                if _tries == 0:
-                    self.service.signal("warning", "Ruida", "Send queue FULL")
+            if item[1] or len(packet) + len(item[0]) > MAX_PAYLOAD:
+                self._held = item
+                break
+            packet += item[0]
+        return bytes(packet), False
+
+    def _receive(self, sock, timeout):
+        """Waits for a datagram, returns it unswizzled or None on timeout."""
+        sock.settimeout(max(timeout, 0.0001))
+        try:
+            _data, _address = sock.recvfrom(1024)
+        except socket.timeout:
+            return None
+        if _address is not None:
+            # TODO: Need to understand how the address can be used
+            # further connection sanity checking.
+            self.recv_address = _address
+        return self.unswizzle(_data)
+
+    def _transmit(self, sock, payload):
+        """Sends a packet until it is acknowledged.
+
+        A NAK means the checksum failed and the controller discarded the packet,
+        it is sent again. A timeout never causes a resend, the packet carries no
+        sequence number and the controller may have run it with only the ACK
+        being slow or lost, a resend would run it twice. The wait is extended
+        instead, backing off until the controller is considered lost.
+
+        @return: whether the packet was acknowledged.
+        """
+        packet = struct.pack(">H", sum(payload) & 0xFFFF) + payload
+        address = (self.service.address, self.send_port)
+        for _attempt in range(MAX_ATTEMPTS):
+            sock.sendto(packet, address)
+            self.sends += 1
+            sent = time.perf_counter()
+            response = self._await_ack(sock)
+            if response is None:
+                return False
+            if response == ACK:
+                self.acks += 1
+                self.timer.sample(time.perf_counter() - sent)
+                return True
+            self.naks += 1
+        return False
+
+    def _await_ack(self, sock):
+        """Waits for the ACK or NAK of the packet sent last.
+
+        @return: the response or None if the controller did not answer.
+        """
+        waits = 0
+        deadline = time.perf_counter() + self.timer.timeout
+        while True:
+            response = self._receive(sock, deadline - time.perf_counter())
+            if response is None:
+                self.timeouts += 1
+                waits += 1
+                if waits >= MAX_WAITS:
+                    return None
+                self.timer.backoff()
+                deadline = time.perf_counter() + self.timer.timeout
                 continue
-        self.send(data) # TODO: Where this goes is not known at this time.
+            if len(response) == 1:
+                return response
+            # Reply data in response to an earlier command.
+            self.events("Reply data when expecting ACK.")
+            self.replies += 1
+            self.recv(response)
+
+    def _await_reply(self, sock):
+        response = self._receive(sock, max(4 * self.timer.timeout, REPLY_TIMEOUT))
+        if response is None:
+            self.events("Time out when expecting data.")
+            return
+        self.replies += 1
+        self.recv(response)  # Forward to client.
 
     def _ruida_handshaker(self):
-        '''This is a thread which handles the SEND - ACK - REPLY handshake.
+        """This is a thread which handles the SEND - ACK - REPLY handshake.
 
         The purpose is to guarantee message sync and graceful failure handling.
         Sync is required because UDP is a fire and forget protocol and does
@@ -106,116 +294,38 @@ class UDPConnection:
         In most cases the response is a simple ACK but with some commands the
         controller follows the ACK with data.
 
-        Because it is necessary to know when reply data is expected, swizzling
-        occurs in this thread.
-
-        This is a brute force state machine containing 3 states:
-            IDLE            Waiting for data to be sent.
-            ACK_PENDING     Data has been sent and need an acknowledge.
+        The thread runs until the socket it was started for is closed:
+            IDLE            Waiting for data to be sent, packing queued data.
+            ACK_PENDING     A packet has been sent and needs an acknowledge.
             REPLY_PENDING   A command was sent which requires a reply from the
                             controller.
 
         Some internal stats are maintained to aid failure diagnosis.
-            sends   Number of messages sent.
-            acks    Number of ACKs received in reply
-            naks    The number of NAKs triggering a resend of a message.
-            replies The number of reply data packets received.
-        '''
-        self.sends = 0
-        self.acks = 0
-        self.naks = 0
-        self.replies = 0
-        _ack_pending = False
-        _reply_pending = False
+            sends       Number of packets sent, including resends.
+            acks        Number of ACKs received in reply.
+            naks        The number of NAKs triggering a resend of a packet.
+            timeouts    The number of timeouts waiting for an ACK.
+            replies     The number of reply data packets received.
+        """
+        sock = self.socket
         try:
-            while True: # Run forever -- until shutdown externally.
-                # Be sure to allow context switching so the GUI remains
-                # responsive.
-
-                # IDLE
-                while True: # Block here for IDLE state.
-                    try: # NOTE: The queue will be empty if not connected.
-                        # Don't block forever because some earlier versions
-                        # of Python and on Windows (yuck) will not respond to
-                        # a keyboard interrupt.
-                        _message = self.send_q.get(timeout=self._to)
-                        break
-                    except queue.Empty:
-                        # TODO: Could add a keep-alive here.
-                        continue
-                    # TODO: Could add a sanity check on connect state.
-
-                # Transition
-                # Check for only KNOWN command expecting a reply.
-                if (_message[0] == 0xDA and
-                    _message[1] != 0x01): # 0x01 is a memory set -- no reply.
-                    _reply_pending = True
-                    self.events('Expecting reply data.')
-                _data = self.swizzle(_message)
-                _data = struct.pack(">H", sum(_data) & 0xFFFF) + _data
-                self.socket.sendto(_data,
-                                   (self.service.address, self.send_port))
-                _ack_pending = True
-
-                # ACK_PENDING
-                _tries = 4
-                while _ack_pending:
-                    try:
-                        _data, _address = self.socket.recvfrom(1024)
-                    except (socket.timeout, AttributeError):
-                        # Handle a receive timeout. This may be the result of a
-                        # loss of sync or the controller is no longer responding.
-                        # Assume loss of comms and require a restart of the
-                        # thread.
-                        _tries -= 1
-                        if _tries:
-                            continue
-                        else:
-                            # Comms failure.
-                            self.service.signal("pipe;usb_status", "error")
-                            self.events(f'Timeout on message: {self.sends}')
-                            self.close()
-                            # A return terminates the thread and needs to be
-                            # restarted with an open.
-                            return
-                    if _address is not None:
-                        # TODO: Need to understand how the address can be used
-                        # further connection sanity checking.
-                        self.recv_address = _address
-                    _ack = self.unswizzle(_data)
-                    if len(_ack) == 1:
-                        if _ack == ACK:
-                            # Signal that the next message can be sent.
-                            _ack_pending = False
-                            self.acks += 1
-                        # TODO: Add resend of _message if not ACK.
-                    else:
-                        self.events('Reply data when expecting ACK.')
-                        # Reply data in response to a command. Forward to be
-                        # processed.
-                        self.replies += 1
-                        _reply_pending = False
-                        # TODO: May need a way to restore sync.
-                        self.recv(_reply) # Just in case
-
-                # REPLY_PENDING
-                _tries = 4
-                while _reply_pending:
-                    try:
-                        _data, _address = self.socket.recvfrom(1024)
-                        self.recv_address = _address
-                        # TODO: Add address sanity check?
-                        _reply_pending = False
-                        self.replies += 1
-                        _reply = self.unswizzle(_data)
-                        self.recv(_reply) # Forward to client.
-                    except socket.error as e:
-                        if e.errno in [socket.EWOULDBLOCK, socket.EAGAIN]:
-                            _tries -= 1
-                        if _tries:
-                            continue
-                        else:
-                            self.events('Time out when expecting data.')
-                            break
+            while self.socket is sock and not self.is_shutdown:
+                try:
+                    _payload, _reply_pending = self._next_packet()
+                except queue.Empty:
+                    # TODO: Could add a keep-alive here.
+                    continue
+                if _reply_pending:
+                    self.events("Expecting reply data.")
+                if not self._transmit(sock, _payload):
+                    # Comms failure.
+                    self.service.signal("pipe;usb_status", "error")
+                    self.events(f"Timeout on message: {self.sends}")
+                    self.close()
+                    # A return terminates the thread and needs to be
+                    # restarted with an open.
+                    return
+                if _reply_pending:
+                    self._await_reply(sock)
         except OSError:
             pass
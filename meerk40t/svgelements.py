@@ -8999,6 +8999,7 @@ class SVG(Group):
         context=None,
         parse_display_none=False,
         on_error="ignore",
+        parse_path_data=True,
     ):
         """
         Parses the SVG file. All attributes are things which the SVG document itself could not be aware of, such as
@@ -9014,6 +9015,7 @@ class SVG(Group):
         :param context: Any existing document context.
         :param parse_display_none: Parse display_none values anyway.
         :param on_error: Error mode, "ignore", "raise", "stop"
+        :param parse_path_data: Parse path data into segments, else paths keep their path data unparsed.
         :return:
         """
         use = 0
@@ -9233,7 +9235,8 @@ class SVG(Group):
                         if SVG_TAG_PATH == tag:
                             # Delayed path parsing, for partial paths.
                             s = Path(values, pathd_loaded=True)
-                            s.parse(values.get(SVG_ATTR_DATA, ""))
+                            if parse_path_data:
+                                s.parse(values.get(SVG_ATTR_DATA, ""))
                         elif SVG_TAG_CIRCLE == tag:
                             s = Circle(values)
                         elif SVG_TAG_ELLIPSE == tag:
@@ -93,7 +93,9 @@ from meerk40t.svgelements import (
     Matrix,
     Move,
     Path,
+    Point,
     QuadraticBezier,
+    SVGLexicalParser,
 )
 from meerk40t.tools.pmatrix import PMatrix
 from meerk40t.tools.zinglplotter import ZinglPlotter
@@ -3022,8 +3024,14 @@ class Geomstr:
                 self._settings.update(segments._settings)
                 self.index = segments.index
                 self.capacity = segments.capacity
-                self.segments = np.copy(segments.segments)
+                self.segments = segments._share()
                 self.no_stitch = segments.no_stitch  # Preserve no_stitch flag
+            elif isinstance(segments, CompactGeomstr):
+                self._settings.update(segments._settings)
+                self.segments = segments._rows()
+                self.index = len(self.segments)
+                self.capacity = self.index
+                self.no_stitch = segments.no_stitch
             else:
                 # Given raw segments, index is equal to count
                 self.index = len(segments)
@@ -3058,9 +3066,42 @@ class Geomstr:
         geomstr = Geomstr()
         geomstr.index = self.index
         geomstr.capacity = self.capacity
-        geomstr.segments = np.copy(self.segments)
+        geomstr.segments = self._share()
         return geomstr
 
+    def as_compact(self, precise=False):
+        """
+        Compact copy of this geomstr, see CompactGeomstr.
+
+        @param precise: always store points as complex128.
+        @return: CompactGeomstr
+        """
+        return CompactGeomstr(self, precise=precise)
+
+    def _share(self):
+        """
+        Segments to be shared with a copy of this geomstr.
+
+        Shared segments are flagged read-only, the first edit of either geomstr copies
+        them. Copying a geomstr is therefore cheap and only an actual edit allocates.
+
+        @return: segments array
+        """
+        self.segments.flags.writeable = False
+        return self.segments
+
+    def unshare(self):
+        """
+        Copies the segments if they are shared with another geomstr, making them writable.
+
+        The editing methods of geomstr call this themselves. Code writing to .segments
+        directly must call it before writing.
+
+        @return:
+        """
+        if not self.segments.flags.writeable:
+            self.segments = self.segments.copy()
+
     def __len__(self):
         """
         @return: length of the geomstr (note not the capacity).
@@ -3179,6 +3220,21 @@ class Geomstr:
                     turn = math.tau / n
         return g
 
+    @classmethod
+    def svg_path_data(cls, path_d, arc_error=None):
+        """
+        Tokenizes svg path data straight into geomstr, without building svgelements path segments. The result is
+        the same as Geomstr.svg(Path(path_d)), malformed path data ends the geometry at the error as svg parsing
+        does.
+
+        @param path_d: svg path data, the d attribute of a path.
+        @param arc_error: if given, arcs are approximated with cubics as Path.approximate_arcs_with_cubics(arc_error).
+        @return:
+        """
+        builder = PathDataBuilder(arc_error=arc_error)
+        builder.parse(path_d)
+        return builder.geometry()
+
     @classmethod
     def svg(cls, path_d):
         # Handle string input and basic validation
@@ -4013,6 +4069,7 @@ class Geomstr:
         ]
 
     def flag_settings(self, flag=None, start=0, end=None):
+        self.unshare()
         if end is None:
             end = self.index
         for i in range(start, end):
@@ -4306,6 +4363,7 @@ class Geomstr:
 
     def _ensure_capacity(self, capacity):
         if self.capacity >= capacity:
+            self.unshare()
             return
         # Grow capacity exponentially, but cap at 10 million segments to prevent memory errors
         MAX_CAPACITY = 10_000_000
@@ -4829,6 +4887,7 @@ class Geomstr:
 
         @return: None
         """
+        self.unshare()
         self.segments[: self.index] = np.flip(self.segments[: self.index], (0, 1))
 
     @staticmethod
@@ -4841,6 +4900,7 @@ class Geomstr:
             if flags & 0b10:
                 # Flip y (top-to-bottom)
                 r.transform(Matrix.scale(1, -1))
+            r.unshare()
             geoms = r.segments
             infos = np.real(geoms[:, 2]).astype(int)
             q = np.where(infos == TYPE_LINE)
@@ -4905,6 +4965,7 @@ class Geomstr:
 
         @return:
         """
+        self.unshare()
         for i in range(self.index - 1, 0, -1):
             previous = self.segments[i - 1]
             current = self.segments[i]
@@ -4927,6 +4988,7 @@ class Geomstr:
 
         @return:
         """
+        self.unshare()
         for i in range(self.index - 1, 0, -1):
             previous = self.segments[i - 1]
             current = self.segments[i]
@@ -6808,6 +6870,7 @@ class Geomstr:
         @param e: index, line values
         @return:
         """
+        self.unshare()
         if e is not None:
             geoms = self.segments[e]
 
@@ -6860,6 +6923,7 @@ class Geomstr:
         @return:
         """
         if e is None:
+            self.unshare()
             i0 = 0
             i1 = self.index
             e = self.segments[i0:i1]
@@ -6895,6 +6959,7 @@ class Geomstr:
         @param e: index, line values
         @return:
         """
+        self.unshare()
         if e is None:
             segments = self.segments
             index = self.index
@@ -6923,6 +6988,7 @@ class Geomstr:
         @param e: index, line values
         @return:
         """
+        self.unshare()
         if e is None:
             segments = self.segments
             index = self.index
@@ -8644,6 +8710,7 @@ class Geomstr:
 
         @return:
         """
+        self.unshare()
         infos = self.segments[: self.index, 2]
         q = np.where(np.real(infos).astype(int) & 0b1001)[0]
         for mid in range(len(q)):
@@ -8692,6 +8759,7 @@ class Geomstr:
         @param auto_stop_threshold percentage value of needed gain in every pass
         @return:
         """
+        self.unshare()
         self._trim()
         segments = self.segments
         max_index = self.index
@@ -9000,3 +9068,511 @@ class Geomstr:
                 newgeom.close()
             final.append(newgeom)
         return final
+
+
+# Largest error of points stored as float32 in compact geomstr, in units.
+FLOAT32_TOLERANCE = 0.5
+FLOAT32_LIMIT = FLOAT32_TOLERANCE * (1 << 23)
+
+
+class CompactGeomstr:
+    """
+    Compact storage of geomstr segments.
+
+    Geomstr stores five complex128 values, 80 bytes, for every segment. For most segments,
+    lines, the control values are unused. CompactGeomstr stores the start and end points,
+    the segment type and the settings in separate typed arrays, and the control values
+    only for segments that use them. Points are stored as complex64 when every coordinate
+    is within FLOAT32_LIMIT, keeping them within FLOAT32_TOLERANCE, so that a line takes
+    24 bytes.
+
+    Geomstr(compact) and compact.as_geomstr() convert back. bbox(), length(), as_points(),
+    transform() and translate() work on the compact arrays directly.
+    """
+
+    def __init__(self, geomstr=None, precise=False):
+        """
+        @param geomstr: geomstr to store.
+        @param precise: always store points as complex128.
+        """
+        if geomstr is None:
+            geomstr = Geomstr()
+        segments = geomstr.segments[: geomstr.index]
+        self.index = geomstr.index
+        self.no_stitch = geomstr.no_stitch
+        self._settings = dict(geomstr._settings)
+        infos = segments[:, 2]
+        self.types = infos.real.astype(np.int32)
+        settings = infos.imag
+        if np.array_equal(settings, settings.astype(np.int32)):
+            settings = settings.astype(np.int32)
+        self.settings = settings
+        control1 = segments[:, 1]
+        control2 = segments[:, 3]
+        # Controls of curves are kept whatever their value, a control at the origin is
+        # still a point. Other segments keep them only if they hold data.
+        unused = self._unused_controls(self.types)
+        used = ((self.types & 0b0110) != 0) | ~(
+            self._same(control1, unused) & self._same(control2, unused)
+        )
+        self.control_index = np.flatnonzero(used).astype(np.int32)
+        if precise:
+            dtype = complex
+        else:
+            dtype = self._dtype(
+                segments[:, 0], segments[:, 4], control1[used], control2[used]
+            )
+        self.starts = segments[:, 0].astype(dtype)
+        self.ends = segments[:, 4].astype(dtype)
+        self.control1 = control1[used].astype(dtype)
+        self.control2 = control2[used].astype(dtype)
+
+    def __len__(self):
+        return self.index
+
+    def __str__(self):
+        return f"CompactGeomstr({self.index} segments, {self.starts.dtype})"
+
+    @staticmethod
+    def _unused_controls(types):
+        """
+        Control values of segments not using them, 0 except for ends.
+        """
+        return np.where((types & 0xFF) == TYPE_END, np.nan, 0).astype(complex)
+
+    @staticmethod
+    def _same(a, b):
+        return (a == b) | (np.isnan(a) & np.isnan(b))
+
+    @staticmethod
+    def _dtype(*arrays):
+        for a in arrays:
+            finite = a[np.isfinite(a)]
+            if len(finite) and (
+                np.max(np.abs(finite.real)) > FLOAT32_LIMIT
+                or np.max(np.abs(finite.imag)) > FLOAT32_LIMIT
+            ):
+                return complex
+        return np.complex64
+
+    @property
+    def nbytes(self):
+        return (
+            self.starts.nbytes
+            + self.ends.nbytes
+            + self.types.nbytes
+            + self.settings.nbytes
+            + self.control_index.nbytes
+            + self.control1.nbytes
+            + self.control2.nbytes
+        )
+
+    def _rows(self, rows=None):
+        """
+        Geomstr segments of the given rows, all rows if None.
+        """
+        if rows is None:
+            rows = np.arange(self.index)
+        segments = np.empty((len(rows), 5), dtype=complex)
+        types = self.types[rows]
+        segments[:, 0] = self.starts[rows]
+        segments[:, 2] = types + 1j * self.settings[rows]
+        segments[:, 4] = self.ends[rows]
+        unused = self._unused_controls(types)
+        segments[:, 1] = unused
+        segments[:, 3] = unused
+        pos = np.searchsorted(self.control_index, rows)
+        pos = np.minimum(pos, max(len(self.control_index) - 1, 0))
+        if len(self.control_index):
+            found = self.control_index[pos] == rows
+            segments[found, 1] = self.control1[pos[found]]
+            segments[found, 3] = self.control2[pos[found]]
+        return segments
+
+    def as_geomstr(self):
+        geomstr = Geomstr(self._rows())
+        geomstr._settings.update(self._settings)
+        geomstr.no_stitch = self.no_stitch
+        return geomstr
+
+    def _geometry_rows(self):
+        return ~np.isin(self.types & 0xFF, NON_GEOMETRY_TYPES)
+
+    def _curve_rows(self):
+        kinds = self.types & 0xFF
+        return np.flatnonzero(
+            (kinds == TYPE_QUAD) | (kinds == TYPE_CUBIC) | (kinds == TYPE_ARC)
+        )
+
+    def bbox(self):
+        # As in Geomstr, only lines and curves have bounds.
+        lines = (self.types & 0xFF) == TYPE_LINE
+        points = np.concatenate((self.starts[lines], self.ends[lines]))
+        points = points[~np.isnan(points)]
+        curves = self._curve_rows()
+        if len(curves):
+            x0, y0, x1, y1 = Geomstr(self._rows(curves)).bbox()
+            points = np.append(points, (complex(x0, y0), complex(x1, y1)))
+        if len(points) == 0:
+            return np.nan, np.nan, np.nan, np.nan
+        return (
+            float(np.min(points.real)),
+            float(np.min(points.imag)),
+            float(np.max(points.real)),
+            float(np.max(points.imag)),
+        )
+
+    def length(self):
+        kinds = self.types & 0xFF
+        lines = kinds == TYPE_LINE
+        starts = self.starts[lines].astype(complex)
+        total = float(np.sum(np.abs(self.ends[lines].astype(complex) - starts)))
+        curves = self._curve_rows()
+        if len(curves):
+            total += Geomstr(self._rows(curves)).length()
+        return total
+
+    def as_points(self):
+        geometry = np.flatnonzero(self._geometry_rows())
+        if len(geometry) == 0:
+            return
+        yield complex(self.starts[geometry[0]])
+        yield from self.ends[geometry].astype(complex)
+
+    def _store(self, starts, ends, control1, control2):
+        dtype = self.starts.dtype
+        if dtype == np.complex64:
+            dtype = self._dtype(starts, ends, control1, control2)
+        self.starts = starts.astype(dtype)
+        self.ends = ends.astype(dtype)
+        self.control1 = control1.astype(dtype)
+        self.control2 = control2.astype(dtype)
+
+    def _controls_are_points(self):
+        return (self.types[self.control_index] & 0b0110) != 0
+
+    def transform(self, mx):
+        """
+        Affine Transformation by an arbitrary matrix.
+
+        @param mx: Matrix to transform by
+        @return:
+        """
+
+        def affine(p):
+            p = p.astype(complex)
+            return (p.real * mx.a + p.imag * mx.c + mx.e) + (
+                p.real * mx.b + p.imag * mx.d + mx.f
+            ) * 1j
+
+        q = self._controls_are_points()
+        control1 = self.control1.astype(complex)
+        control2 = self.control2.astype(complex)
+        control1[q] = affine(control1[q])
+        control2[q] = affine(control2[q])
+        self._store(affine(self.starts), affine(self.ends), control1, control2)
+
+    def translate(self, dx, dy):
+        offset = complex(dx, dy)
+        q = self._controls_are_points()
+        control1 = self.control1.astype(complex)
+        control2 = self.control2.astype(complex)
+        control1[q] += offset
+        control2[q] += offset
+        self._store(
+            self.starts.astype(complex) + offset,
+            self.ends.astype(complex) + offset,
+            control1,
+            control2,
+        )
+
+
+# Path data split at commands, and the numbers and separators between them.
+PATH_DATA_COMMAND = re.compile(r"([MmZzLlHhVvCcSsQqTt])")
+PATH_DATA_NUMBER = re.compile(r"[-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?")
+PATH_DATA_SEPARATORS = " ,\t\n\x0c\r"
+# Numbers taken by each command without arcs.
+PATH_DATA_ARGUMENTS = {
+    "M": 2,
+    "Z": 0,
+    "L": 2,
+    "H": 1,
+    "V": 1,
+    "C": 6,
+    "S": 4,
+    "Q": 4,
+    "T": 2,
+}
+
+
+class PathDataBuilder:
+    """
+    Builds geomstr segments from svg path data, following the semantics of svgelements Path for relative, smooth
+    and close commands. Segments are collected as rows and turned into a geomstr array once, a move to the end of
+    the previous segment is a subpath break as in Geomstr.svg().
+
+    Well-formed path data without arcs is tokenized with a single regex pass. Anything else, arcs, inline closes or
+    malformed data, goes through the svgelements tokenizer which calls the same path commands as it would on Path.
+    """
+
+    def __init__(self, arc_error=None):
+        self.arc_error = arc_error
+        self.rows = []
+        self.current = None
+        self.z = None
+        self.first_end = None
+        self.last_end = None
+        self.smooth = None
+
+    @property
+    def current_point(self):
+        if self.current is None:
+            return None
+        return Point(self.current.real, self.current.imag)
+
+    def parse(self, path_d):
+        if self._parse_fast(path_d):
+            return
+        try:
+            SVGLexicalParser().parse(self, path_d)
+        except ValueError:
+            pass
+
+    def geometry(self):
+        geometry = Geomstr()
+        if self.rows:
+            geometry.segments = np.array(self.rows, dtype=complex)
+            geometry.index = len(self.rows)
+            geometry.capacity = geometry.index
+        return geometry
+
+    def _parse_fast(self, path_d):
+        """
+        Parses path data without arcs.
+
+        @return: False, without any change, if the path data needs the svgelements tokenizer.
+        """
+        parts = PATH_DATA_COMMAND.split(path_d)
+        if parts[0].strip(PATH_DATA_SEPARATORS):
+            return False
+        commands = []
+        for i in range(1, len(parts), 2):
+            text = parts[i + 1]
+            if PATH_DATA_NUMBER.sub("", text).strip(PATH_DATA_SEPARATORS):
+                return False
+            commands.append(
+                (parts[i], list(map(float, PATH_DATA_NUMBER.findall(text))))
+            )
+        for command, args in commands:
+            size = PATH_DATA_ARGUMENTS[command.upper()]
+            if size == 0:
+                if args:
+                    return False
+            elif not args or len(args) % size:
+                return False
+        for command, args in commands:
+            relative = command.islower()
+            command = command.upper()
+            if command == "Z":
+                self._close()
+                continue
+            count = len(args)
+            for i in range(0, count, PATH_DATA_ARGUMENTS[command]):
+                current = self.current
+                if command == "H":
+                    x = args[i] + current.real if relative else args[i]
+                    self._line(complex(x, current.imag))
+                    continue
+                if command == "V":
+                    y = args[i] + current.imag if relative else args[i]
+                    self._line(complex(current.real, y))
+                    continue
+                if relative and current is not None:
+                    x0 = current.real
+                    y0 = current.imag
+                else:
+                    x0 = y0 = 0.0
+                end = complex(args[i] + x0, args[i + 1] + y0)
+                if command == "L":
+                    self._line(end)
+                elif command == "M":
+                    if i == 0:
+                        self._move(end)
+                    else:
+                        self._line(end)
+                elif command == "C":
+                    self._cubic(
+                        end,
+                        complex(args[i + 2] + x0, args[i + 3] + y0),
+                        complex(args[i + 4] + x0, args[i + 5] + y0),
+                    )
+                elif command == "S":
+                    self._cubic(
+                        self._reflected(),
+                        end,
+                        complex(args[i + 2] + x0, args[i + 3] + y0),
+                    )
+                elif command == "Q":
+                    self._quad(end, complex(args[i + 2] + x0, args[i + 3] + y0))
+                else:
+                    self._quad(self._reflected(), end)
+        return True
+
+    def _point(self, p):
+        if p in ("z", "Z"):
+            if self.z is not None:
+                return self.z
+            return self.first_end
+        return complex(p[0], p[1])
+
+    def _segment(self, end, row=None, smooth=None):
+        """
+        Moves to end, adding the row if there was a start point.
+        """
+        if row is not None and self.current is not None and end is not None:
+            self.rows.append(row)
+        if self.first_end is None:
+            self.first_end = end
+        self.current = end
+        self.last_end = end
+        self.smooth = smooth
+
+    def _reflected(self):
+        if self.smooth is None:
+            return self.current
+        return self.current + (self.current - self.smooth)
+
+    def _move(self, end):
+        if self.last_end is not None and self.last_end == end:
+            # This is a deliberate subpath break
+            if not self.rows or self.rows[-1][2].real != TYPE_END:
+                self.rows.append((np.nan, np.nan, complex(TYPE_END, 0), np.nan, np.nan))
+        self._segment(end)
+        self.z = end
+
+    def _line(self, end):
+        self._segment(end, (self.current, 0, complex(TYPE_LINE, 0), 0, end))
+
+    def _quad(self, control, end):
+        self._segment(
+            end,
+            (self.current, control, complex(TYPE_QUAD, 0), control, end),
+            smooth=control,
+        )
+
+    def _cubic(self, control1, control2, end):
+        self._segment(
+            end,
+            (self.current, control1, complex(TYPE_CUBIC, 0), control2, end),
+            smooth=control2,
+        )
+
+    def _close(self):
+        self._line(self._point("z"))
+
+    # svgelements path parser commands.
+
+    def start(self):
+        pass
+
+    def end(self):
+        pass
+
+    def move(self, *points, relative=False, **kwargs):
+        self._move(self._point(points[0]))
+        if len(points) > 1:
+            self.line(*points[1:], relative=relative)
+
+    def line(self, *points, relative=False, **kwargs):
+        for p in points:
+            self._line(self._point(p))
+
+    def horizontal(self, *x_points, relative=False, **kwargs):
+        for x in x_points:
+            if x is None or self.current is None:
+                raise ValueError
+            if relative:
+                x += self.current.real
+            self._line(complex(x, self.current.imag))
+
+    def vertical(self, *y_points, relative=False, **kwargs):
+        for y in y_points:
+            if y is None or self.current is None:
+                raise ValueError
+            if relative:
+                y += self.current.imag
+            self._line(complex(self.current.real, y))
+
+    def smooth_quad(self, *points, relative=False, **kwargs):
+        for p in points:
+            self._quad(self._reflected(), self._point(p))
+
+    def quad(self, *points, relative=False, **kwargs):
+        for index in range(0, len(points), 2):
+            control = self._point(points[index])
+            if points[index] in ("z", "Z"):
+                self._quad(control, control)
+                return
+            self._quad(control, self._point(points[index + 1]))
+
+    def smooth_cubic(self, *points, relative=False, **kwargs):
+        for index in range(0, len(points), 2):
+            control1 = self._reflected()
+            control2 = self._point(points[index])
+            if points[index] in ("z", "Z"):
+                self._cubic(control1, control2, control2)
+                return
+            self._cubic(control1, control2, self._point(points[index + 1]))
+
+    def cubic(self, *points, relative=False, **kwargs):
+        for index in range(0, len(points), 3):
+            control1 = self._point(points[index])
+            if points[index] in ("z", "Z"):
+                self._cubic(control1, control1, control1)
+                return
+            control2 = self._point(points[index + 1])
+            if points[index + 1] in ("z", "Z"):
+                self._cubic(control1, control2, control2)
+                return
+            self._cubic(control1, control2, self._point(points[index + 2]))
+
+    def arc(self, *arc_args, relative=False, **kwargs):
+        for index in range(0, len(arc_args), 6):
+            rx, ry, rotation, large_arc, sweep = arc_args[index : index + 5]
+            end = self._point(arc_args[index + 5])
+            if self.current is None:
+                self._segment(end)
+                continue
+            seg = Arc(
+                Point(self.current.real, self.current.imag),
+                abs(rx),
+                abs(ry),
+                rotation,
+                large_arc,
+                sweep,
+                Point(end.real, end.imag),
+            )
+            if self.arc_error is None:
+                # As Geomstr.svg() does.
+                if seg.is_circular():
+                    mid = complex(seg.point(0.5))
+                    self._segment(
+                        end, (self.current, mid, complex(TYPE_ARC, 0), mid, end)
+                    )
+                    continue
+                for q in seg.as_quad_curves(4):
+                    self._quad(complex(q.control), complex(q.end))
+                self._segment(end)
+                continue
+            # As Path.approximate_arcs_with_cubics() does.
+            arc_required = int(math.ceil(abs(seg.sweep) / (math.tau * self.arc_error)))
+            last_end = self.last_end
+            for c in seg.as_cubic_curves(arc_required):
+                self._cubic(complex(c.control1), complex(c.control2), complex(c.end))
+            self._segment(end)
+            if arc_required == 0:
+                # The arc was removed.
+                self.last_end = last_end
+
+    def closed(self, relative=False):
+        self._close()
@@ -41,7 +41,9 @@ Recent enhancements include:
 - Optimized diagonal algorithms using x+y=constant and x-y=constant equations
 """
 
-from math import isinf, sqrt
+from array import array
+from itertools import chain
+from math import isinf, nan, sqrt
 from time import perf_counter, sleep
 
 import numpy as np
@@ -75,6 +77,212 @@ METHODS = {
 BLANK = 255
 
 
+class RasterStream:
+    """
+    Compact record of a raster plot as row spans. Every span runs on its row from start to
+    end along the major axis of the plot, rows are y and spans x for horizontal plots, with
+    the on value of the run. A span not starting at the end of the previous span begins with
+    a travel to its start, so a run and the travel leading to it are a single span.
+
+    Rows and positions are stored as float32, pixel positions are whole or half pixels, in
+    typed arrays. On values are stored as index into the palette of the distinct on values,
+    the powers of an image are few. This takes 13 bytes per span rather than a tuple for
+    each plotted value. Passthrough values (x or y of None) have a nan row, on values which
+    can't be looked up in a palette are kept in a list.
+    """
+
+    __slots__ = (
+        "horizontal",
+        "row",
+        "start",
+        "end",
+        "on",
+        "palette",
+        "complete",
+        "_index",
+        "_last",
+        "_travel",
+    )
+
+    def __init__(self, data=None, horizontal=True):
+        self.horizontal = horizontal
+        self.row = array("f")
+        self.start = array("f")
+        self.end = array("f")
+        self.on = array("B")
+        self.palette = []
+        self.complete = False
+        # Palette index of the on values, by type since 0 and 0.0 are equal keys.
+        self._index = {}
+        # End of the last span which was not a passthrough.
+        self._last = None
+        # Whether the last span is a plain travel a following run may start with.
+        self._travel = False
+        if data is not None:
+            self.extend(data)
+            self.complete = True
+
+    def __len__(self):
+        return len(self.row)
+
+    def __iter__(self):
+        """
+        Yields the recorded plot values.
+        """
+        horizontal = self.horizontal
+        last = None
+        for row, start, end, on in zip(
+            self.row, self.start, self.end, self.on_values()
+        ):
+            if row != row:
+                yield None, None, on
+                continue
+            if last is not None and start != last:
+                yield (start, row, 0) if horizontal else (row, start, 0)
+            yield (end, row, on) if horizontal else (row, end, on)
+            last = end
+
+    @property
+    def numeric(self):
+        """
+        Whether all on values are numbers.
+        """
+        return self.palette is not None and all(
+            isinstance(on, (int, float)) for on in self.palette
+        )
+
+    @property
+    def integral(self):
+        """
+        Whether all on values are integers.
+        """
+        return self.palette is not None and all(
+            isinstance(on, int) for on in self.palette
+        )
+
+    @property
+    def nbytes(self):
+        return (
+            self.row.itemsize * len(self.row)
+            + self.start.itemsize * len(self.start)
+            + self.end.itemsize * len(self.end)
+            + (8 if self.palette is None else self.on.itemsize) * len(self.on)
+        )
+
+    def _append_on(self, on, replace=False):
+        if self.palette is not None:
+            try:
+                key = (on.__class__, on)
+                index = self._index.get(key)
+                if index is None:
+                    index = self._index[key] = len(self.palette)
+                    self.palette.append(on)
+                    if index == 256:
+                        self.on = array("I", self.on)
+            except TypeError:
+                # Unhashable on values are kept as they are.
+                self.on = self.on_values()
+                self.palette = None
+                self._index = None
+            else:
+                on = index
+        if replace:
+            self.on[-1] = on
+        else:
+            self.on.append(on)
+
+    def append(self, x, y, on):
+        if x is None or y is None:
+            # Passthrough
+            self.row.append(nan)
+            self.start.append(nan)
+            self.end.append(nan)
+            self._append_on(on)
+            self._travel = False
+            return
+        row, position = (y, x) if self.horizontal else (x, y)
+        if self._travel and self.row[-1] == row:
+            # The last span was the travel to the start of this one.
+            self.start[-1] = self.end[-1]
+            self.end[-1] = position
+            self._append_on(on, replace=True)
+            self._travel = False
+        else:
+            self.row.append(row)
+            self.start.append(position if self._last is None else self._last)
+            self.end.append(position)
+            self._append_on(on)
+            self._travel = (
+                on == 0 and isinstance(on, int) and self.start[-1] != self.end[-1]
+            )
+        self._last = self.end[-1]
+
+    def extend(self, data):
+        for x, y, on in data:
+            self.append(x, y, on)
+
+    def record(self, data):
+        """
+        Yields the given values while recording them.
+        """
+        append = self.append
+        for value in data:
+            append(*value)
+            yield value
+
+    def arrays(self):
+        """
+        Numpy arrays of the recorded row, start, end and on values. On values which are not
+        numbers are returned as object array.
+        """
+        if self.numeric:
+            on = np.array(self.palette, dtype=np.float64)[
+                np.array(self.on, dtype=np.intp)
+            ]
+        else:
+            on = np.empty(len(self.on), dtype=object)
+            for i, value in enumerate(self.on_values()):
+                on[i] = value
+        return (
+            np.frombuffer(self.row, dtype=np.float32),
+            np.frombuffer(self.start, dtype=np.float32),
+            np.frombuffer(self.end, dtype=np.float32),
+            on,
+        )
+
+    def points(self):
+        """
+        Numpy arrays of the x, y and on values of the recorded plot, only for numeric plots
+        without passthrough values.
+        """
+        row, start, end, on = self.arrays()
+        count = len(row)
+        previous = np.empty(count, dtype=np.float32)
+        previous[:1] = start[:1]
+        previous[1:] = end[:-1]
+        travel = start != previous
+        index = np.arange(count) + np.cumsum(travel)
+        total = count + int(np.count_nonzero(travel))
+        major = np.empty(total)
+        minor = np.empty(total)
+        values = np.zeros(total)
+        major[index] = end
+        minor[index] = row
+        values[index] = on
+        index = index[travel] - 1
+        major[index] = start[travel]
+        minor[index] = row[travel]
+        if self.horizontal:
+            return major, minor, values
+        return minor, major, values
+
+    def on_values(self):
+        if self.palette is None:
+            return self.on
+        palette = self.palette
+        return [palette[index] for index in self.on]
+
+
 class RasterPlotter:
     """
     A comprehensive raster plotting system for laser cutting/engraving applications.
@@ -166,6 +374,8 @@ class RasterPlotter:
         self.height = height
         self.direction = direction
         self._cache = None
+        # Paused traversal of a plot which is recorded in part.
+        self._pixels = None
         parameters = {
             # Provide an override for the minimumx / minimumy / horizontal / bidirectional
             RASTER_T2B: (None, True, True, None),  # top to bottom
@@ -223,6 +433,7 @@ class RasterPlotter:
 
     def reset(self):
         self._cache = None
+        self._pixels = None
 
     def px(self, x, y):
         """
@@ -555,21 +766,185 @@ class RasterPlotter:
     def plot(self):
         """
         Plot the values yielded by following the given raster plotter in the traversal defined.
+
+        The first plot streams the traversal and records it as row spans in a compact
+        RasterStream, later plots replay that record. The traversal consumes the data, so it
+        is only done once. Should a plot be stopped early the traversal is paused, the next
+        plot replays the recorded part and continues it.
+        """
+        while self._locked:
+            sleep(0.1)
+        self._locked = True
+        try:
+            self._distance_travel = 0
+            self._distance_burn = 0
+            if self.initial_x is None:
+                # There is no image.
+                return
+            if self._cache is None and self.debug_level > 0:
+                self._cache = RasterStream(self._debug_plot(), self.horizontal)
+            if self._cache is None or not self._cache.complete:
+                yield from self._plot_stream()
+            else:
+                yield from self._plot_replay(self._cache)
+        finally:
+            self._locked = False
+
+    def plot_spans(self):
         """
+        Plotted row spans as numpy arrays row, start, end and on in scene coordinates. Rows
+        are y and positions x for horizontal plots, x and y respectively otherwise. A span
+        whose start isn't the end of the previous span begins with a travel to its start.
+        Passthrough values have nan rows. The burn and travel distances are summed up, no
+        per value tuples are created.
+
+        @return: row, start, end, on arrays
+        """
+        if self.initial_x is None:
+            empty = np.zeros(0)
+            return empty, empty, empty, empty
         while self._locked:
             sleep(0.1)
         self._locked = True
+        try:
+            stream = self._stream()
+            if not stream.complete:
+                stream.extend(self._pixels)
+                stream.complete = True
+                self._pixels = None
+            self._distance_travel = 0
+            self._distance_burn = 0
+            if self._replay_arrays(stream) is None:
+                for _ in self._plot_values(stream):
+                    pass
+        finally:
+            self._locked = False
+        row, start, end, on = stream.arrays()
+        if self.horizontal:
+            row = self.offset_y + self.step_y * row.astype(float)
+            start = self.offset_x + self.step_x * start.astype(float)
+            end = self.offset_x + self.step_x * end.astype(float)
+        else:
+            row = self.offset_x + self.step_x * row.astype(float)
+            start = self.offset_y + start.astype(float) * self.step_y
+            end = self.offset_y + end.astype(float) * self.step_y
+        if self.use_integers:
+            row = np.rint(row)
+            start = np.rint(start)
+            end = np.rint(end)
+        return row, start, end, on
+
+    def _stream(self):
+        """
+        The record of the plot, starting the traversal if there is none yet.
+        """
+        if self._cache is None:
+            self._cache = RasterStream(horizontal=self.horizontal)
+            self._pixels = self._plot_pixels()
+        return self._cache
+
+    def _plot_stream(self):
+        """
+        Yields the plot while recording it. A plot recorded in part is replayed first.
+        """
+        stream = self._stream()
+        recorded = len(stream)
+        data = stream.record(self._pixels)
+        if recorded:
+            data = chain(stream, data)
+        yield from self._plot_values(data)
+        stream.complete = True
+        self._pixels = None
+
+    def _plot_values(self, data):
+        """
+        Converts the plotted pixel positions into scene coordinates, summing up the distances.
+        """
         offset_x = self.offset_x
         offset_y = self.offset_y
         step_x = self.step_x
         step_y = self.step_y
-        self._distance_travel = 0
-        self._distance_burn = 0
+        use_integers = self.use_integers
+        last_x = offset_x
+        last_y = offset_y
+        for x, y, on in data:
+            if x is None or y is None:
+                # Passthrough
+                yield x, y, on
+                continue
+            fx = offset_x + step_x * x
+            fy = offset_y + y * step_y
+            nx = int(round(fx)) if use_integers else round(fx)
+            ny = int(round(fy)) if use_integers else round(fy)
+            distance = sqrt(
+                (nx - last_x) * (nx - last_x) + (ny - last_y) * (ny - last_y)
+            )
+            if on == 0:
+                self._distance_travel += distance
+            else:
+                self._distance_burn += distance
+            if use_integers:
+                yield nx, ny, on
+            else:
+                yield fx, fy, on
+            last_x = nx
+            last_y = ny
 
-        if self.initial_x is None:
-            # There is no image.
+    def _replay_arrays(self, stream):
+        """
+        Scene coordinates and on values of a recorded plot as arrays, summing up the
+        distances. Passthrough values and pixel objects need the per value conversion, for
+        those None is returned.
+        """
+        if not stream.numeric or np.isnan(np.frombuffer(stream.row, np.float32)).any():
+            return None
+        fx, fy, on = stream.points()
+        # Calculated in place to keep the number of temporary arrays low.
+        fx *= self.step_x
+        fx += self.offset_x
+        fy *= self.step_y
+        fy += self.offset_y
+        nx = np.rint(fx)
+        ny = np.rint(fy)
+        if len(nx):
+            dx = np.diff(nx, prepend=self.offset_x)
+            dy = np.diff(ny, prepend=self.offset_y)
+            dx *= dx
+            dy *= dy
+            dx += dy
+            distance = np.sqrt(dx, out=dx)
+            del dy
+            burning = on != 0
+            # cumsum adds in sequence, the same as the summation of _plot_values.
+            burn = np.where(burning, distance, 0)
+            self._distance_burn = float(np.cumsum(burn, out=burn)[-1])
+            distance[burning] = 0
+            self._distance_travel = float(np.cumsum(distance, out=distance)[-1])
+        return fx, fy, nx, ny, on
+
+    def _plot_replay(self, stream):
+        """
+        Replays a recorded plot. Coordinates and distances are calculated on the arrays.
+        """
+        values = self._replay_arrays(stream)
+        if values is None:
+            yield from self._plot_values(stream)
             return
-        # Debug code....
+        fx, fy, nx, ny, on = values
+        ons = on.astype(np.int64).tolist() if stream.integral else on.tolist()
+        if self.use_integers:
+            yield from zip(
+                nx.astype(np.int64).tolist(), ny.astype(np.int64).tolist(), ons
+            )
+        else:
+            yield from zip(fx.tolist(), fy.tolist(), ons)
+
+    def _debug_plot(self):
+        """
+        Plots the data into a list and writes it into a debug file.
+        """
+        step_x = self.step_x
+        step_y = self.step_y
         testmethods = (
             "Test: Horizontal Rectangle",
             "Test: Vertical Rectangle",
@@ -577,153 +952,90 @@ class RasterPlotter:
             "Test: Vertical Snake",
             "Test: Spiral",
         )
-        if self._cache is None:
-            if self.debug_level > 0:
-                try:
-                    if self.direction >= 0:
-                        m = METHODS.get(self.direction, "Unknown")
-                    else:
-                        m = testmethods[abs(self.direction) - 1]
-                    s_meth = f"Method: {m} ({self.direction})"
-                except IndexError:
-                    s_meth = f"Method: Unknown {self.direction}"
-                print(s_meth)
-                data = list(self._plot_pixels())
-                from platform import system
-
-                defaultdir = "c:\\temp\\" if system() == "Windows" else ""
-                has_duplicates = 0
-                tstamp = int(perf_counter() * 100)
-                with open(f"{defaultdir}plot_{tstamp}.txt", mode="w") as f:
-                    f.write(
-                        f"0.9.7\n{s_meth}\n{'Bidirectional' if self.bidirectional else 'Unidirectional'} {'horizontal' if self.horizontal else 'vertical'} plot starting at {'top' if self.start_minimum_y else 'bottom'}-{'left' if self.start_minimum_x else 'right'}\n"
-                    )
-                    f.write(
-                        f"Overscan: {self.overscan:.2f}, Stepx={step_x:.2f}, Stepy={step_y:.2f}\n"
-                    )
-                    f.write(f"Image dimensions: {self.width}x{self.height}\n")
-                    f.write(f"Startpoint: {self.initial_x}, {self.initial_y}\n")
-                    f.write(f"Overlapping pixels to any side: {self.overlap}\n")
-                    if self.special:
-                        f.write("Special instructions:\n")
-                        for key, value in self.special.items():
-                            f.write(f"  {key} = {value}\n")
-                    f.write(
-                        "----------------------------------------------------------------------\n"
-                    )
-                    test_dict = {}
-                    lastx = self.initial_x
-                    lasty = self.initial_y
-                    failed = False
-                    for lineno, (x, y, on) in enumerate(data, start=1):
-                        if lastx is not None:
-                            dx = x - lastx
-                            dy = y - lasty
-                            if dx != 0 and dy != 0:  # and abs(dx) != abs(dy):
-                                f.write(
-                                    f"You f**ed up! No zigzag movement from line {lineno - 1} to {lineno}: {lastx}, {lasty} -> {x}, {y}\n"
-                                )
-                                print(
-                                    f"You f**ed up! No zigzag movement from line {lineno - 1} to {lineno}: {lastx}, {lasty} -> {x}, {y}"
-                                )
-                                failed = True
-                        lastx = x
-                        lasty = y
-                    if not failed:
-                        f.write("Good news, no zig-zag movements identified!\n")
-                    f.write(
-                        "----------------------------------------------------------------------\n"
-                    )
-                    for lineno, (x, y, on) in enumerate(data, start=1):
-                        if x is None or y is None:
-                            continue
-                        key = f"{x} - {y}"
-                        if key in test_dict:
-                            f.write(
-                                f"Duplicate coordinates in list at ({x}, {y})! 1st: #{test_dict[key][0]}, on={test_dict[key][1]}, 2nd: #{lineno}, on={on}\n"
-                            )
-                            has_duplicates += 1
-                        else:
-                            test_dict[key] = (lineno, on)
-                    if has_duplicates:
+        try:
+            if self.direction >= 0:
+                m = METHODS.get(self.direction, "Unknown")
+            else:
+                m = testmethods[abs(self.direction) - 1]
+            s_meth = f"Method: {m} ({self.direction})"
+        except IndexError:
+            s_meth = f"Method: Unknown {self.direction}"
+        print(s_meth)
+        data = list(self._plot_pixels())
+        from platform import system
+
+        defaultdir = "c:\\temp\\" if system() == "Windows" else ""
+        has_duplicates = 0
+        tstamp = int(perf_counter() * 100)
+        with open(f"{defaultdir}plot_{tstamp}.txt", mode="w") as f:
+            f.write(
+                f"0.9.7\n{s_meth}\n{'Bidirectional' if self.bidirectional else 'Unidirectional'} {'horizontal' if self.horizontal else 'vertical'} plot starting at {'top' if self.start_minimum_y else 'bottom'}-{'left' if self.start_minimum_x else 'right'}\n"
+            )
+            f.write(
+                f"Overscan: {self.overscan:.2f}, Stepx={step_x:.2f}, Stepy={step_y:.2f}\n"
+            )
+            f.write(f"Image dimensions: {self.width}x{self.height}\n")
+            f.write(f"Startpoint: {self.initial_x}, {self.initial_y}\n")
+            f.write(f"Overlapping pixels to any side: {self.overlap}\n")
+            if self.special:
+                f.write("Special instructions:\n")
+                for key, value in self.special.items():
+                    f.write(f"  {key} = {value}\n")
+            f.write(
+                "----------------------------------------------------------------------\n"
+            )
+            test_dict = {}
+            lastx = self.initial_x
+            lasty = self.initial_y
+            failed = False
+            for lineno, (x, y, on) in enumerate(data, start=1):
+                if lastx is not None:
+                    dx = x - lastx
+                    dy = y - lasty
+                    if dx != 0 and dy != 0:  # and abs(dx) != abs(dy):
                         f.write(
-                            "----------------------------------------------------------------------\n"
-                        )
-                    for lineno, (x, y, on) in enumerate(data, start=1):
-                        f.write(f"{lineno}: {x}, {y}, {on}\n")
-                    if has_duplicates:
-                        print(
-                            f"Attention: the generated plot has {has_duplicates} duplicate coordinate values!"
-                        )
-                        print(
-                            f"{'Bidirectional' if self.bidirectional else 'Unidirectional'} {'horizontal' if self.horizontal else 'vertical'} plot starting at {'top' if self.start_minimum_y else 'bottom'}-{'left' if self.start_minimum_x else 'right'}"
+                            f"You f**ed up! No zigzag movement from line {lineno - 1} to {lineno}: {lastx}, {lasty} -> {x}, {y}\n"
                         )
                         print(
-                            f"Overscan: {self.overscan:.2f}, Stepx={step_x:.2f}, Stepy={step_y:.2f}"
+                            f"You f**ed up! No zigzag movement from line {lineno - 1} to {lineno}: {lastx}, {lasty} -> {x}, {y}"
                         )
-                        print(f"Image dimensions: {self.width}x{self.height}")
-            else:
-                data = list(self._plot_pixels())
-            self._cache = data
-        else:
-            data = self._cache
-        last_x = offset_x
-        last_y = offset_y
-        if self.use_integers:
-            for x, y, on in data:
+                        failed = True
+                lastx = x
+                lasty = y
+            if not failed:
+                f.write("Good news, no zig-zag movements identified!\n")
+            f.write(
+                "----------------------------------------------------------------------\n"
+            )
+            for lineno, (x, y, on) in enumerate(data, start=1):
                 if x is None or y is None:
-                    # Passthrough
-                    yield x, y, on
-                else:
-                    nx = int(round(offset_x + step_x * x))
-                    ny = int(round(offset_y + y * step_y))
-                    self._distance_burn += (
-                        0
-                        if on == 0
-                        else sqrt(
-                            (nx - last_x) * (nx - last_x)
-                            + (ny - last_y) * (ny - last_y)
-                        )
-                    )
-                    self._distance_travel += (
-                        0
-                        if on != 0
-                        else sqrt(
-                            (nx - last_x) * (nx - last_x)
-                            + (ny - last_y) * (ny - last_y)
-                        )
+                    continue
+                key = f"{x} - {y}"
+                if key in test_dict:
+                    f.write(
+                        f"Duplicate coordinates in list at ({x}, {y})! 1st: #{test_dict[key][0]}, on={test_dict[key][1]}, 2nd: #{lineno}, on={on}\n"
                     )
-                    yield nx, ny, on
-                    last_x = nx
-                    last_y = ny
-        else:
-            for x, y, on in data:
-                if x is None or y is None:
-                    # Passthrough
-                    yield x, y, on
+                    has_duplicates += 1
                 else:
-                    nx = round(offset_x + step_x * x)
-                    ny = round(offset_y + y * step_y)
-                    self._distance_burn += (
-                        0
-                        if on == 0
-                        else sqrt(
-                            (nx - last_x) * (nx - last_x)
-                            + (ny - last_y) * (ny - last_y)
-                        )
-                    )
-                    self._distance_travel += (
-                        0
-                        if on != 0
-                        else sqrt(
-                            (nx - last_x) * (nx - last_x)
-                            + (ny - last_y) * (ny - last_y)
-                        )
-                    )
-                    yield offset_x + step_x * x, offset_y + y * step_y, on
-                    last_x = nx
-                    last_y = ny
-        self._locked = False
+                    test_dict[key] = (lineno, on)
+            if has_duplicates:
+                f.write(
+                    "----------------------------------------------------------------------\n"
+                )
+            for lineno, (x, y, on) in enumerate(data, start=1):
+                f.write(f"{lineno}: {x}, {y}, {on}\n")
+            if has_duplicates:
+                print(
+                    f"Attention: the generated plot has {has_duplicates} duplicate coordinate values!"
+                )
+                print(
+                    f"{'Bidirectional' if self.bidirectional else 'Unidirectional'} {'horizontal' if self.horizontal else 'vertical'} plot starting at {'top' if self.start_minimum_y else 'bottom'}-{'left' if self.start_minimum_x else 'right'}"
+                )
+                print(
+                    f"Overscan: {self.overscan:.2f}, Stepx={step_x:.2f}, Stepy={step_y:.2f}"
+                )
+                print(f"Image dimensions: {self.width}x{self.height}")
+        return data
 
     def _plot_pixels(self):
         legacy = self.special.get("legacy", False)
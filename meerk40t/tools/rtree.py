@@ -0,0 +1,386 @@
+"""
+R-tree
+
+Dynamic spatial index over axis aligned bounding boxes. Entries are stored with a
+hashable key and their bounds (xmin, ymin, xmax, ymax). The tree can be bulk loaded
+(sort-tile-recursive) and is then maintained incrementally by insert, remove and
+update. Removal does not shrink the bounds of the tree nodes, these stay valid
+supersets; the tree is rebuilt once enough entries were removed.
+
+Queries: all entries containing a point, all entries overlapping (or contained by)
+a rectangle, and the entries nearest to a point.
+"""
+
+import heapq
+from math import ceil, inf, isfinite, sqrt
+
+
+class _RNode:
+    __slots__ = ("bounds", "children", "leaf", "parent")
+
+    def __init__(self, leaf, parent=None):
+        self.bounds = [inf, inf, -inf, -inf]
+        # Leaf nodes hold entries (x0, y0, x1, y1, key), other nodes hold _RNode.
+        self.children = []
+        self.leaf = leaf
+        self.parent = parent
+
+    def extend(self, x0, y0, x1, y1):
+        b = self.bounds
+        if x0 < b[0]:
+            b[0] = x0
+        if y0 < b[1]:
+            b[1] = y0
+        if x1 > b[2]:
+            b[2] = x1
+        if y1 > b[3]:
+            b[3] = y1
+
+    def recalculate(self):
+        b = [inf, inf, -inf, -inf]
+        if self.leaf:
+            for e in self.children:
+                if e[0] < b[0]:
+                    b[0] = e[0]
+                if e[1] < b[1]:
+                    b[1] = e[1]
+                if e[2] > b[2]:
+                    b[2] = e[2]
+                if e[3] > b[3]:
+                    b[3] = e[3]
+        else:
+            for c in self.children:
+                cb = c.bounds
+                if cb[0] < b[0]:
+                    b[0] = cb[0]
+                if cb[1] < b[1]:
+                    b[1] = cb[1]
+                if cb[2] > b[2]:
+                    b[2] = cb[2]
+                if cb[3] > b[3]:
+                    b[3] = cb[3]
+        self.bounds = b
+
+
+def _box_distance(b, x, y):
+    dx = b[0] - x if x < b[0] else x - b[2] if x > b[2] else 0.0
+    dy = b[1] - y if y < b[1] else y - b[3] if y > b[3] else 0.0
+    return sqrt(dx * dx + dy * dy)
+
+
+def valid_bounds(bounds):
+    """
+    Bounds that can be stored within the tree: four finite values, not inverted.
+    """
+    if bounds is None:
+        return False
+    try:
+        x0, y0, x1, y1 = bounds
+        return (
+            isfinite(x0)
+            and isfinite(y0)
+            and isfinite(x1)
+            and isfinite(y1)
+            and x0 <= x1
+            and y0 <= y1
+        )
+    except (TypeError, ValueError):
+        return False
+
+
+class RTree:
+    def __init__(self, items=None, max_entries=16):
+        self.max_entries = max(4, max_entries)
+        self._entries = {}
+        self._removed = 0
+        self._root = _RNode(leaf=True)
+        if items is not None:
+            self.load(items)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def bounds(self, key=None):
+        """
+        Bounds of the given key, or of the whole tree if no key is given.
+        """
+        if key is None:
+            return tuple(self._root.bounds) if self._entries else None
+        entry = self._entries.get(key)
+        return None if entry is None else entry[0][:4]
+
+    def clear(self):
+        self._entries.clear()
+        self._removed = 0
+        self._root = _RNode(leaf=True)
+
+    def load(self, items):
+        """
+        Bulk loads (key, bounds) items replacing the current content.
+        """
+        self.clear()
+        entries = []
+        for key, bounds in items:
+            if not valid_bounds(bounds):
+                continue
+            if key in self._entries:
+                continue
+            x0, y0, x1, y1 = bounds
+            entry = (x0, y0, x1, y1, key)
+            entries.append(entry)
+            self._entries[key] = (entry, None)
+        self._root = self._pack(entries)
+
+    def _pack(self, entries):
+        """
+        Sort-tile-recursive packing of the entries.
+        """
+        nodes = []
+        for group in self._tiles(entries, lambda e: e[0] + e[2], lambda e: e[1] + e[3]):
+            leaf = _RNode(leaf=True)
+            leaf.children = group
+            leaf.recalculate()
+            for e in group:
+                self._entries[e[4]] = (e, leaf)
+            nodes.append(leaf)
+        while len(nodes) > 1:
+            parents = []
+            for group in self._tiles(
+                nodes,
+                lambda n: n.bounds[0] + n.bounds[2],
+                lambda n: n.bounds[1] + n.bounds[3],
+            ):
+                parent = _RNode(leaf=False)
+                parent.children = group
+                for n in group:
+                    n.parent = parent
+                parent.recalculate()
+                parents.append(parent)
+            nodes = parents
+        if not nodes:
+            return _RNode(leaf=True)
+        return nodes[0]
+
+    def _tiles(self, items, key_x, key_y):
+        m = self.max_entries
+        count = len(items)
+        if count == 0:
+            return
+        pages = ceil(count / m)
+        slices = ceil(sqrt(pages))
+        per_slice = slices * m
+        items = sorted(items, key=key_x)
+        for i in range(0, count, per_slice):
+            column = sorted(items[i : i + per_slice], key=key_y)
+            for j in range(0, len(column), m):
+                yield column[j : j + m]
+
+    def insert(self, key, bounds):
+        """
+        Inserts or updates the key with the given bounds. Invalid bounds remove the key.
+        """
+        if key in self._entries:
+            self.remove(key)
+        if not valid_bounds(bounds):
+            return
+        x0, y0, x1, y1 = bounds
+        entry = (x0, y0, x1, y1, key)
+        node = self._root
+        while not node.leaf:
+            node.extend(x0, y0, x1, y1)
+            node = self._choose(node.children, x0, y0, x1, y1)
+        node.extend(x0, y0, x1, y1)
+        node.children.append(entry)
+        self._entries[key] = (entry, node)
+        if len(node.children) > self.max_entries:
+            self._split(node)
+
+    update = insert
+
+    @staticmethod
+    def _choose(children, x0, y0, x1, y1):
+        best = None
+        best_growth = inf
+        best_area = inf
+        for c in children:
+            b = c.bounds
+            area = (b[2] - b[0]) * (b[3] - b[1])
+            growth = (max(b[2], x1) - min(b[0], x0)) * (
+                max(b[3], y1) - min(b[1], y0)
+            ) - area
+            if growth < best_growth or (growth == best_growth and area < best_area):
+                best = c
+                best_growth = growth
+                best_area = area
+        return best
+
+    def _split(self, node):
+        children = node.children
+        b = node.bounds
+        if b[2] - b[0] >= b[3] - b[1]:
+            if node.leaf:
+                children.sort(key=lambda e: e[0] + e[2])
+            else:
+                children.sort(key=lambda n: n.bounds[0] + n.bounds[2])
+        else:
+            if node.leaf:
+                children.sort(key=lambda e: e[1] + e[3])
+            else:
+                children.sort(key=lambda n: n.bounds[1] + n.bounds[3])
+        half = len(children) // 2
+        sibling = _RNode(leaf=node.leaf)
+        sibling.children = children[half:]
+        node.children = children[:half]
+        for n in (node, sibling):
+            if n.leaf:
+                for e in n.children:
+                    self._entries[e[4]] = (e, n)
+            else:
+                for c in n.children:
+                    c.parent = n
+            n.recalculate()
+        parent = node.parent
+        if parent is None:
+            root = _RNode(leaf=False)
+            root.children = [node, sibling]
+            node.parent = root
+            sibling.parent = root
+            root.recalculate()
+            self._root = root
+            return
+        sibling.parent = parent
+        parent.children.append(sibling)
+        if len(parent.children) > self.max_entries:
+            self._split(parent)
+
+    def remove(self, key):
+        """
+        Removes the key from the tree. Returns whether the key was present.
+        """
+        item = self._entries.pop(key, None)
+        if item is None:
+            return False
+        entry, leaf = item
+        leaf.children.remove(entry)
+        if not leaf.children:
+            # Unlink empty nodes.
+            node = leaf
+            while node.parent is not None and not node.children:
+                node.parent.children.remove(node)
+                node = node.parent
+        self._removed += 1
+        if not self._entries:
+            self.clear()
+        elif self._removed > 64 and self._removed > len(self._entries):
+            # The bounds of the remaining nodes are loose, repack.
+            self.load([(e[0][4], e[0][:4]) for e in self._entries.values()])
+        return True
+
+    def query_point(self, x, y):
+        """
+        Yields all keys whose bounds contain the point.
+        """
+        if not self._entries:
+            return
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            b = node.bounds
+            if x < b[0] or x > b[2] or y < b[1] or y > b[3]:
+                continue
+            if node.leaf:
+                for e in node.children:
+                    if e[0] <= x <= e[2] and e[1] <= y <= e[3]:
+                        yield e[4]
+            else:
+                stack.extend(node.children)
+
+    def query_rect(self, bounds, contained=False):
+        """
+        Yields all keys whose bounds overlap the given bounds. If contained is set
+        only those that are fully inside the bounds.
+        """
+        if not self._entries:
+            return
+        x0, y0, x1, y1 = bounds
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            b = node.bounds
+            if x1 < b[0] or x0 > b[2] or y1 < b[1] or y0 > b[3]:
+                continue
+            if node.leaf:
+                for e in node.children:
+                    if contained:
+                        if x0 <= e[0] and e[2] <= x1 and y0 <= e[1] and e[3] <= y1:
+                            yield e[4]
+                    elif e[0] <= x1 and e[2] >= x0 and e[1] <= y1 and e[3] >= y0:
+                        yield e[4]
+            else:
+                stack.extend(node.children)
+
+    def nearest(self, x, y, count=1, max_distance=inf):
+        """
+        Yields up to count (distance, key) tuples, nearest first. The distance is
+        the distance of the point to the bounds, 0 for bounds containing the point.
+        """
+        if not self._entries or count <= 0:
+            return
+        heap = [(_box_distance(self._root.bounds, x, y), 0, self._root)]
+        tie = 1
+        while heap:
+            distance, _, item = heapq.heappop(heap)
+            if distance > max_distance:
+                return
+            if isinstance(item, _RNode):
+                for c in item.children:
+                    if item.leaf:
+                        heapq.heappush(heap, (_box_distance(c, x, y), tie, c))
+                    else:
+                        heapq.heappush(heap, (_box_distance(c.bounds, x, y), tie, c))
+                    tie += 1
+            else:
+                yield distance, item[4]
+                count -= 1
+                if count <= 0:
+                    return
+
+    def validate(self):
+        """
+        Checks the consistency of the tree, used for testing.
+        """
+        seen = set()
+
+        def check(node, depth):
+            b = node.bounds
+            if node.leaf:
+                for e in node.children:
+                    assert (
+                        b[0] <= e[0] and b[1] <= e[1] and e[2] <= b[2] and e[3] <= b[3]
+                    )
+                    assert self._entries[e[4]] == (e, node)
+                    seen.add(e[4])
+                return depth
+            depths = set()
+            for c in node.children:
+                assert c.parent is node
+                cb = c.bounds
+                if c.children:
+                    assert (
+                        b[0] <= cb[0]
+                        and b[1] <= cb[1]
+                        and cb[2] <= b[2]
+                        and cb[3] <= b[3]
+                    )
+                depths.add(check(c, depth + 1))
+            assert len(depths) <= 1
+            return depths.pop() if depths else depth
+
+        check(self._root, 0)
+        assert seen == set(self._entries)
@@ -1,6 +1,9 @@
 import struct
+from functools import lru_cache
 from io import BytesIO
 
+from meerk40t.tools.geomstr import TYPE_QUAD, Geomstr
+
 ON_CURVE_POINT = 1
 ARG_1_AND_2_ARE_WORDS = 1 << 0
 ARGS_ARE_XY_VALUES = 1 << 1
@@ -105,7 +108,6 @@ class TrueTypeFont:
             error_msg = f"TTF init for {filename} crashed: {e}"
             self._logger(error_msg)
             raise TTFParsingError(error_msg) from e
-        self.glyph_data = list(self.parse_glyf())
         self._line_information = []
 
     def _logger(self, message):
@@ -121,6 +123,65 @@ class TrueTypeFont:
     def glyphs(self):
         return list(self._character_map.keys())
 
+    @property
+    def glyph_count(self):
+        return max(len(self._glyph_offsets) - 1, 0)
+
+    @property
+    def glyph_data(self):
+        """
+        Contours of all glyphs. Glyphs are otherwise decoded on demand, this decodes
+        every glyph.
+        """
+        return list(self.parse_glyf())
+
+    @lru_cache(maxsize=2048)
+    def glyph_geometry(self, index):
+        """
+        Outline of the glyph at index in font units, decoded from glyf on first use.
+
+        The outline is cached and shared by every render of the glyph in every node, it
+        must not be modified. Each contour is a closed subpath of lines and quads,
+        preceded by an end.
+
+        @param index: glyph index
+        @return: Geomstr outline
+        """
+        outline = Geomstr()
+        outline.end()
+        try:
+            contours = list(self._parse_glyph_index(index))
+        except (TTFParsingError, struct.error) as e:
+            self._logger(f"Glyph {index} could not be parsed: {e}")
+            return outline
+        for contour in contours:
+            if len(contour) == 0:
+                continue
+            curr = contour[-1]
+            next = contour[0]
+            if curr[2] & ON_CURVE_POINT:
+                start = complex(curr[0], curr[1])
+            elif next[2] & ON_CURVE_POINT:
+                start = complex(next[0], next[1])
+            else:
+                start = complex((curr[0] + next[0]) / 2, (curr[1] + next[1]) / 2)
+            outline.end()
+            for i in range(len(contour)):
+                curr = next
+                next = contour[(i + 1) % len(contour)]
+                if curr[2] & ON_CURVE_POINT:
+                    end = complex(curr[0], curr[1])
+                    outline.line(start, end)
+                else:
+                    if next[2] & ON_CURVE_POINT:
+                        end = complex(next[0], next[1])
+                    else:
+                        end = complex((curr[0] + next[0]) / 2, (curr[1] + next[1]) / 2)
+                    outline.quad(start, complex(curr[0], curr[1]), end)
+                start = end
+            outline.close()
+        return outline
+
     @staticmethod
     def query_name(filename):
         def get_string(f, off, length):
@@ -227,7 +288,7 @@ class TrueTypeFont:
                     index = self.lookup_glyph_with_variation(
                         base_char_code, variation_selector
                     )
-                    if index >= len(self.glyph_data):
+                    if index >= self.glyph_count:
                         continue
                     if index >= len(self.horizontal_metrics):
                         # print (f"Horizontal metrics has {len(self.horizontal_metrics)} elements, requested index {index}")
@@ -239,55 +300,10 @@ class TrueTypeFont:
                         else:
                             advance_x = hm * h_spacing
                     advance_y = 0
-                    glyph = self.glyph_data[index]
                     if self.active:
-                        path.new_path()
-                    for contour in glyph:
-                        if len(contour) == 0:
-                            continue
-                        contour = list(contour)
-                        curr = contour[-1]
-                        next = contour[0]
-                        if curr[2] & ON_CURVE_POINT:
-                            start_x = (offset_x + curr[0]) * scale
-                            start_y = (offset_y + curr[1]) * scale
-                        elif next[2] & ON_CURVE_POINT:
-                            start_x = (offset_x + next[0]) * scale
-                            start_y = (offset_y + next[1]) * scale
-                        else:
-                            start_x = (offset_x + (curr[0] + next[0]) / 2) * scale
-                            start_y = (offset_y + (curr[1] + next[1]) / 2) * scale
-                        if self.active:
-                            path.move(start_x, start_y)
-                        for i in range(len(contour)):
-                            curr = next
-                            next = contour[(i + 1) % len(contour)]
-                            if curr[2] & ON_CURVE_POINT:
-                                if self.active:
-                                    path.line(
-                                        None,
-                                        None,
-                                        (offset_x + curr[0]) * scale,
-                                        (offset_y + curr[1]) * scale,
-                                    )
-                            else:
-                                next2 = next
-                                if not next[2] & ON_CURVE_POINT:
-                                    next2 = (
-                                        (curr[0] + next[0]) / 2,
-                                        (curr[1] + next[1]) / 2,
-                                    )
-                                if self.active:
-                                    path.quad(
-                                        None,
-                                        None,
-                                        (offset_x + curr[0]) * scale,
-                                        (offset_y + curr[1]) * scale,
-                                        (offset_x + next2[0]) * scale,
-                                        (offset_y + next2[1]) * scale,
-                                    )
-                        if self.active:
-                            path.close()
+                        self._render_glyph(
+                            path, self.glyph_geometry(index), offset_x, offset_y, scale
+                        )
                     offset_x += advance_x
                     offset_y += advance_y
                     if self.active:
@@ -326,6 +342,33 @@ class TrueTypeFont:
         self.active = True
         line_lengths = _do_render(vtext, offsets)
 
+    @staticmethod
+    def _render_glyph(path, outline, offset_x, offset_y, scale):
+        """
+        Places a cached glyph outline on the path at the offset (font units) and scale.
+
+        Paths with a glyph() method take the outline as a whole, the outline is replayed
+        as path commands for any other path.
+        """
+        if hasattr(path, "glyph"):
+            path.glyph(outline, offset_x, offset_y, scale)
+            return
+        offset = complex(offset_x, offset_y)
+        path.new_path()
+        for contour in outline.as_subpaths():
+            start = (contour.segments[0][0] + offset) * scale
+            path.move(start.real, start.imag)
+            for segment in contour.segments[: contour.index]:
+                end = (segment[4] + offset) * scale
+                if outline._segtype(segment) == TYPE_QUAD:
+                    control = (segment[1] + offset) * scale
+                    path.quad(
+                        None, None, control.real, control.imag, end.real, end.imag
+                    )
+                else:
+                    path.line(None, None, end.real, end.imag)
+            path.close()
+
     def parse_ttf(self, font_path, require_checksum=True):
         with open(font_path, "rb") as f:
             try:
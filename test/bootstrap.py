@@ -80,6 +80,17 @@ def bootstrap(profile="MeerK40t_TEST", ignore_settings=True, plugins=None):
     return kernel
 
 
+def flush_signals(kernel):
+    """
+    Processes the queued signals, and any signals their listeners send, before returning.
+    """
+    while True:
+        with kernel._process_lock:
+            if not kernel._message_queue:
+                return
+        kernel.process_queue()
+
+
 def destroy(kernel):
     for i in range(50):
         kernel.console(f"service device destroy {i}\n")
@@ -1,12 +1,16 @@
 import random
+import time
 import unittest
+from test import bootstrap
 
 from PIL import Image, ImageDraw
 
 from meerk40t.core.cutcode.cutcode import CutCode
+from meerk40t.core.cutcode.kinematics import KinematicEstimator, move_time
 from meerk40t.core.cutcode.linecut import LineCut
 from meerk40t.core.cutcode.quadcut import QuadCut
 from meerk40t.core.cutcode.rastercut import RasterCut
+from meerk40t.core.laserjob import LaserJob
 from meerk40t.core.node.elem_image import ImageNode
 from meerk40t.core.node.elem_path import PathNode
 from meerk40t.core.node.op_cut import CutOpNode
@@ -408,3 +412,108 @@ class TestCutcode(unittest.TestCase):
                 self.assertNotEqual(y_dir, ry_dir)
             else:
                 self.assertNotEqual(x_dir, rx_dir)
+
+
+def polyline_cutcode(points, speed=10.0, rapid_speed=100.0):
+    settings = {
+        "native_mm": 1.0,
+        "native_speed": speed,
+        "native_rapid_speed": rapid_speed,
+    }
+    cutcode = CutCode()
+    for p0, p1 in zip(points, points[1:]):
+        cutcode.append(LineCut(Point(*p0), Point(*p1), settings=settings))
+    return cutcode
+
+
+class TestKinematicEstimator(unittest.TestCase):
+    def test_move_time(self):
+        # Accelerates over 5 units, cruises 90 and decelerates over 5.
+        self.assertAlmostEqual(float(move_time(100, 10, 10)), 11.0)
+        # Too short to reach the speed, peaks at sqrt(40).
+        self.assertAlmostEqual(float(move_time(4, 10, 10)), 2 * 40**0.5 / 10)
+        # Entering at full speed removes the acceleration ramp.
+        self.assertAlmostEqual(float(move_time(100, 10, 10, v_in=10)), 10.5)
+        # No acceleration, constant speed. No speed, no time.
+        self.assertAlmostEqual(float(move_time(100, 10, 0)), 10.0)
+        self.assertEqual(float(move_time(100, 0, 10)), 0.0)
+
+    def test_estimate_corners(self):
+        estimator = KinematicEstimator(acceleration=10, corner_speed=2)
+        straight = polyline_cutcode([(0, 0), (50, 0), (100, 0)])
+        corners = polyline_cutcode([(0, 0), (50, 0), (50, 50)])
+        reversal = polyline_cutcode([(0, 0), (50, 0), (0, 0)])
+        t_straight = estimator.estimate(straight)
+        t_corners = estimator.estimate(corners)
+        t_reversal = estimator.estimate(reversal)
+        self.assertAlmostEqual(t_straight, 11.0)
+        self.assertLess(t_straight, t_corners)
+        self.assertLess(t_corners, t_reversal)
+        self.assertAlmostEqual(t_reversal, 2 * float(move_time(50, 10, 10)))
+        no_acceleration = KinematicEstimator(acceleration=0)
+        self.assertAlmostEqual(no_acceleration.estimate(corners), 10.0)
+
+    def test_statistics(self):
+        estimator = KinematicEstimator(acceleration=10, corner_speed=2)
+        cutcode = polyline_cutcode([(0, 0), (50, 0), (50, 50)])
+        cutcode.extend(polyline_cutcode([(150, 50), (150, 0)]))
+        stats = cutcode.provide_statistics(estimator=estimator)
+        self.assertEqual(len(stats), 3)
+        self.assertEqual(stats[-1]["total_distance_travel"], 100)
+        self.assertEqual(stats[-1]["total_distance_cut"], 150)
+        self.assertAlmostEqual(
+            stats[2]["time_at_end_of_travel"] - stats[2]["time_at_start"],
+            float(move_time(100, 100, 10)),
+        )
+        self.assertAlmostEqual(
+            stats[-1]["time_at_end_of_burn"], estimator.estimate(cutcode)
+        )
+        self.assertAlmostEqual(
+            cutcode.duration_cut(estimator=estimator)
+            + cutcode.duration_travel(estimator=estimator),
+            estimator.estimate(cutcode),
+        )
+        empty = CutCode().provide_statistics()
+        self.assertEqual(empty[0]["time_at_end_of_burn"], 0)
+
+    def test_estimate_raster(self):
+        image = Image.new("L", (50, 20), "black")
+        settings = {"native_mm": 1.0, "native_speed": 100, "native_rapid_speed": 100}
+        raster = RasterCut(image, 0, 0, 1, 1, settings=settings)
+        cutcode = CutCode([raster])
+        slow = KinematicEstimator(acceleration=100, raster_turnaround=0.5)
+        turning = KinematicEstimator(acceleration=100, raster_turnaround=0)
+        fast = KinematicEstimator(acceleration=0, raster_turnaround=0)
+        # Every scanline pays the turnaround.
+        self.assertAlmostEqual(
+            slow.estimate(cutcode) - turning.estimate(cutcode), 20 * 0.5
+        )
+        self.assertGreater(slow.estimate(cutcode), fast.estimate(cutcode))
+
+    def test_laserjob_estimate(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i grbl 0\n")
+            device = kernel.device
+            device.motion_acceleration = 10
+            device.motion_corner_speed = 2
+            cutcode = polyline_cutcode([(0, 0), (50, 0), (50, 50)])
+            job = LaserJob("estimate", [cutcode, cutcode], driver=device.driver)
+            expected = KinematicEstimator(acceleration=10, corner_speed=2).estimate(
+                cutcode
+            )
+            self.assertAlmostEqual(job.estimate_time(), 2 * expected)
+        finally:
+            kernel()
+
+    def test_statistics_benchmark(self):
+        random.seed(5)
+        points = [
+            (random.randint(0, 5000), random.randint(0, 5000)) for i in range(20001)
+        ]
+        cutcode = polyline_cutcode(points)
+        t = time.time()
+        stats = cutcode.provide_statistics()
+        t1 = time.time() - t
+        self.assertEqual(len(stats), 20000)
+        print(f"statistics of 20000 cuts took {t1:.3f}s")
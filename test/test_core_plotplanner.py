@@ -1,4 +1,5 @@
 import random
+import time
 import unittest
 
 from PIL import Image, ImageDraw
@@ -395,3 +396,102 @@ class TestPlotplanner(unittest.TestCase):
                     setting_changed = True
                 else:
                     setting_changed = False
+
+    def walk_raster_plan(self, settings, array_mode, seed=0, phase_type=0):
+        """
+        Plan of a circle and a raster of a ring, followed by random lines.
+        """
+        random.seed(seed)
+        rasterop = RasterOpNode()
+        image = Image.new("RGBA", (256, 256))
+        draw = ImageDraw.Draw(image)
+        draw.ellipse((0, 0, 255, 255), "black")
+        draw.ellipse((64, 64, 191, 191), "white")
+        image = image.convert("L")
+        inode = ImageNode(image=image, dpi=1000.0, matrix=Matrix())
+        inode.step_x = 1
+        inode.step_y = 1
+        inode.process_image()
+        rasterop.add_node(inode)
+        rasterop.raster_step_x = 1
+        rasterop.raster_step_y = 1
+
+        vectorop = EngraveOpNode()
+        vectorop.add_node(
+            PathNode(path=Path(Circle(cx=127, cy=127, r=128)), fill="black")
+        )
+        cutcode = CutCode()
+        cutcode.extend(vectorop.as_cutobjects())
+        cutcode.extend(rasterop.as_cutobjects())
+        for i in range(20):
+            cutcode.append(
+                LineCut(
+                    Point(random.randint(0, 500), random.randint(0, 500)),
+                    Point(random.randint(0, 500), random.randint(0, 500)),
+                )
+            )
+        plan = PlotPlanner(settings, array_mode=array_mode)
+        plan.phase_type = phase_type
+        plan.phase_value = 137
+        for c in cutcode.flat():
+            c.settings = settings
+            plan.push(c)
+        return plan
+
+    def test_plotplanner_array_mode(self):
+        """
+        Array mode gives the plots of processing the steps one at a time.
+        """
+        for settings in (
+            {"power": 1000},
+            {"power": 333},
+            {"power": 333.3},
+            {"power": 500, "shift_enabled": True},
+            {"power": 700, "dot_length_custom": True, "dot_length": 3},
+        ):
+            for phase_type in range(4):
+                plan = self.walk_raster_plan(settings, False, phase_type=phase_type)
+                random.seed(1)
+                expected = list(plan.gen())
+                plan = self.walk_raster_plan(settings, True, phase_type=phase_type)
+                random.seed(1)
+                self.assertEqual(list(plan.gen()), expected)
+
+    def test_plotplanner_array_mode_uniform(self):
+        """
+        Array mode raises for non-uniform moves, or steps them from the last position.
+        """
+        settings = {"power": 600}
+        random.seed(2)
+        events = [(0, 0, 1)]
+        events.extend(
+            (random.randint(0, 40), random.randint(0, 40), random.choice((0, 1, 0.5)))
+            for i in range(300)
+        )
+        for require_uniform_movement in (True, False):
+            results = []
+            for array_mode in (False, True):
+                plan = PlotPlanner(
+                    settings,
+                    array_mode=array_mode,
+                    require_uniform_movement=require_uniform_movement,
+                )
+                cut = LineCut(Point(0, 0), Point(40, 40), settings=settings)
+                cut.generator = lambda: iter(events)
+                plan.push(cut)
+                try:
+                    results.append(list(plan.gen()))
+                except ValueError as e:
+                    results.append(str(e))
+            self.assertEqual(results[0], results[1])
+            self.assertEqual(isinstance(results[0], str), require_uniform_movement)
+
+    def test_plotplanner_array_benchmark(self):
+        for array_mode in (False, True):
+            plan = self.walk_raster_plan({"power": 500}, array_mode)
+            t = time.time()
+            count = sum(1 for _ in plan.gen())
+            print(
+                f"PlotPlanner {'array' if array_mode else 'tuple'} mode: "
+                f"{count} plots in {time.time() - t:.3f}s"
+            )
@@ -0,0 +1,263 @@
+import time
+import unittest
+from test import bootstrap
+from unittest.mock import patch
+
+from meerk40t.core.undos import Undo
+from meerk40t.svgelements import Color, Matrix
+from meerk40t.tools.geomstr import Geomstr
+
+
+def leaf_records(state):
+    records = {}
+    stack = list(state)
+    while stack:
+        record = stack.pop()
+        if not record.children:
+            records[record.key] = record
+        stack.extend(record.children)
+    return records
+
+
+class TestUndo(unittest.TestCase):
+    def test_undo_redo(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            elements = kernel.elements
+            undo = elements.undo
+            node = elements.elem_branch.add(
+                type="elem rect", x=0, y=0, width=1000, height=1000, label="Rect"
+            )
+            with elements.undoscope("Move"):
+                node.matrix.post_translate(500, 500)
+                node.modified()
+            with elements.undoscope("Rename"):
+                node.label = "Moved"
+                node.altered()
+            self.assertEqual(undo.undo_string(), "Rename")
+            self.assertTrue(undo.undo())
+            restored = list(elements.elems())
+            self.assertEqual(len(restored), 1)
+            self.assertIsNot(restored[0], node)
+            self.assertEqual(restored[0].matrix, Matrix.translate(500, 500))
+            self.assertEqual(restored[0].label, "Rect")
+            self.assertTrue(undo.undo())
+            self.assertEqual(list(elements.elems())[0].matrix, Matrix())
+            self.assertTrue(undo.redo())
+            self.assertEqual(
+                list(elements.elems())[0].matrix, Matrix.translate(500, 500)
+            )
+            self.assertTrue(undo.redo())
+            self.assertEqual(list(elements.elems())[0].label, "Moved")
+        finally:
+            kernel()
+
+    def test_undo_references(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            elements = kernel.elements
+            undo = elements.undo
+            op = elements.op_branch.add(type="op cut")
+            node = elements.elem_branch.add(
+                type="elem rect", x=0, y=0, width=1000, height=1000
+            )
+            op.add_reference(node)
+            with elements.undoscope("Delete"):
+                node.remove_node()
+            self.assertEqual(len(list(elements.elems())), 0)
+            self.assertTrue(undo.has_undo())
+            self.assertTrue(undo.undo())
+            restored = list(elements.elems())[0]
+            op = list(elements.ops())[-1]
+            self.assertIs(op.children[0].node, restored)
+            self.assertIn(op.children[0], restored._references)
+            elements._tree._validate_tree()
+        finally:
+            kernel()
+
+    def test_undo_shares_unchanged(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            elements = kernel.elements
+            undo = elements.undo
+            nodes = [
+                elements.elem_branch.add(
+                    type="elem path",
+                    geometry=Geomstr.rect(i * 100, 0, 50, 50),
+                    stroke=Color("black"),
+                )
+                for i in range(10)
+            ]
+            undo.mark("first")
+            nodes[3].matrix.post_scale(2)
+            nodes[3].modified()
+            undo.mark("second")
+            first = leaf_records(undo._undo_stack[-2].state)
+            second = leaf_records(undo._undo_stack[-1].state)
+            self.assertEqual(first.keys(), second.keys())
+            changed = [key for key in first if first[key] is not second[key]]
+            self.assertEqual(len(changed), 1)
+            self.assertEqual(second[changed[0]].node.matrix, Matrix.scale(2))
+        finally:
+            kernel()
+
+    def test_undo_memory_limit(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            elements = kernel.elements
+            undo = Undo(elements, elements._tree, levels=100)
+            node = elements.elem_branch.add(
+                type="elem path",
+                geometry=Geomstr.lines(*[complex(i, i % 7) for i in range(2000)]),
+                stroke=Color("black"),
+            )
+            for i in range(10):
+                node.geometry = Geomstr.lines(*[complex(i, j) for j in range(2000)])
+                node.altered()
+                undo.mark(f"step {i}")
+            self.assertEqual(len(undo._undo_stack), 11)
+            memory = undo.memory
+            undo.max_bytes = memory // 2
+            node.geometry = Geomstr.lines(0j, 100j)
+            node.altered()
+            undo.mark("limit")
+            self.assertLess(len(undo._undo_stack), 11)
+            self.assertLessEqual(undo.memory, memory // 2)
+        finally:
+            undo.release()
+            kernel()
+
+    def test_undo_versions(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            elements = kernel.elements
+            undo = elements.undo
+            node = elements.elem_branch.add(
+                type="elem rect", x=0, y=0, width=1000, height=1000, label="Rect"
+            )
+            undo.mark("first")
+            undo.mark("unchanged")
+            self.assertEqual(undo._snapshots.copied, 0)
+            node.label = "Renamed"
+            node.updated()
+            undo.mark("second")
+            self.assertEqual(undo._snapshots.copied, 1)
+            node.id = "renamed"
+            undo.mark("third")
+            self.assertEqual(undo._snapshots.copied, 1)
+            first = leaf_records(undo._undo_stack[-4].state)
+            second = leaf_records(undo._undo_stack[-2].state)
+            changed = [key for key in first if first[key] is not second[key]]
+            self.assertEqual(len(changed), 1)
+            self.assertEqual(first[changed[0]].node.label, "Rect")
+            self.assertEqual(second[changed[0]].node.label, "Renamed")
+        finally:
+            kernel()
+
+    def test_undo_in_place_edit(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            elements = kernel.elements
+            undo = elements.undo
+            node = elements.elem_branch.add(
+                type="elem path",
+                geometry=Geomstr.rect(0, 0, 1000, 1000),
+                stroke=Color("black"),
+            )
+            undo.mark("first")
+            node.geometry.unshare()
+            node.geometry.segments[0][0] = complex(500, 500)
+            node.altered()
+            undo.mark("geometry")
+            node.stroke.value = Color("red").value
+            node.updated()
+            undo.mark("stroke")
+            states = [leaf_records(s.state) for s in undo._undo_stack[-3:]]
+            (key,) = [k for k in states[0] if states[0][k].node.type == "elem path"]
+            first, geometry, stroke = [state[key].node for state in states]
+            self.assertEqual(first.geometry.segments[0][0], 0j)
+            self.assertEqual(geometry.geometry.segments[0][0], complex(500, 500))
+            self.assertEqual(first.stroke, Color("black"))
+            self.assertEqual(geometry.stroke, Color("black"))
+            self.assertEqual(stroke.stroke, Color("red"))
+            undo.undo()
+            restored = list(elements.elems())[0]
+            self.assertEqual(restored.geometry.segments[0][0], complex(500, 500))
+            self.assertEqual(restored.stroke, Color("black"))
+        finally:
+            kernel()
+
+    def test_undo_release(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            elements = kernel.elements
+            undo = Undo(elements, elements._tree)
+            self.assertIn(undo._snapshots, elements._tree.listeners)
+            undo.release()
+            self.assertNotIn(undo._snapshots, elements._tree.listeners)
+            self.assertEqual(undo.memory, 0)
+        finally:
+            kernel()
+
+    def test_undo_shares_images(self):
+        from PIL import Image
+
+        kernel = bootstrap.bootstrap()
+        try:
+            elements = kernel.elements
+            undo = elements.undo
+            node = elements.elem_branch.add(
+                type="elem image", image=Image.new("RGBA", (64, 64), "black"), dpi=500
+            )
+            node.update(None)
+            self.assertIsNotNone(node._processed_image)
+            # Neither taking nor restoring a snapshot may duplicate the images.
+            with patch.object(Image.Image, "__copy__", side_effect=AssertionError):
+                undo.mark("image")
+            state = undo._undo_stack[-1].state
+            (record,) = [
+                r for r in leaf_records(state).values() if r.node.type == "elem image"
+            ]
+            self.assertIs(record.node.image, node.image)
+            self.assertIs(record.node._processed_image, node._processed_image)
+            self.assertEqual(record.node._processed_matrix, node._processed_matrix)
+            with patch.object(Image.Image, "__copy__", side_effect=AssertionError):
+                undo._snapshots.restore(state)
+            restored = list(elements.elems())[0]
+            self.assertIsNot(restored, node)
+            self.assertIs(restored.image, node.image)
+            self.assertIs(restored._processed_image, node._processed_image)
+        finally:
+            kernel()
+
+    def test_undo_benchmark(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            elements = kernel.elements
+            undo = elements.undo
+            nodes = [
+                elements.elem_branch.add(
+                    type="elem path",
+                    geometry=Geomstr.rect(i, i, 100, 100),
+                    stroke=Color("black"),
+                )
+                for i in range(5000)
+            ]
+            t = time.time()
+            undo.mark("created")
+            t0 = time.time() - t
+            t = time.time()
+            for i in range(10):
+                nodes[i].matrix.post_translate(10, 10)
+                nodes[i].modified()
+                undo.mark(f"move {i}")
+                self.assertEqual(undo._snapshots.copied, 1)
+            t1 = (time.time() - t) / 10
+            # A mark only copies the changed node, not the whole tree.
+            self.assertLess(t1, t0 / 5)
+            t = time.time()
+            undo.undo()
+            t2 = time.time() - t
+            self.assertLess(t2, 10)
+        finally:
+            kernel()
@@ -30,6 +30,7 @@ hierarchical optimization logic.
 
 import os
 import sys
+import time
 import unittest
 from unittest.mock import MagicMock
 
@@ -39,8 +40,14 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 from meerk40t.core.cutcode.cutcode import CutCode
 from meerk40t.core.cutcode.cutgroup import CutGroup
 from meerk40t.core.cutcode.linecut import LineCut
-from meerk40t.core.cutplan import inner_first_ident, short_travel_cutcode
-from meerk40t.svgelements import Point
+from meerk40t.core.cutplan import (
+    inner_first_ident,
+    inside_candidates,
+    is_inside,
+    short_travel_cutcode,
+)
+from meerk40t.core.node.nutils import path_to_cutobjects
+from meerk40t.svgelements import Circle, Path, Point
 
 
 class MockContext:
@@ -415,6 +422,99 @@ class TestCutplanOptimization(unittest.TestCase):
         self.assertEqual(len(list(identified_strict.flat())), original_count)
         self.assertEqual(len(list(identified_loose.flat())), original_count)
 
+    def create_sheet_scenario(self, count):
+        """
+        Create a sheet of pieces, each a square with two holes and an open cut, with
+        every third piece overlapping the next one.
+        """
+        cutcode = CutCode()
+        side = int(count**0.5) + 1
+        for i in range(count):
+            x = (i % side) * 60
+            y = (i // side) * 60
+            d = f"M{x},{y} h50 v50 h-50 z M{x + 5},{y + 5} h15 v15 h-15 z"
+            circle = Path(Circle(x + 35, y + 35, 10))
+            circle.approximate_arcs_with_cubics()
+            d += f" {circle.d()} M{x + 5},{y + 30} L{x + 20},{y + 45}"
+            if i % 3 == 0:
+                d += f" M{x + 40},{y + 2} h30 v10 h-30 z"
+            cutcode.extend(path_to_cutobjects(Path(d), settings={}, closed_distance=1))
+        return cutcode
+
+    def reference_inner_first(self, cutcode, tolerance=0):
+        """Containment relations by testing every group against every closed group."""
+        groups = list(cutcode)
+        closed_groups = [g for g in groups if g.closed]
+        contains = {id(g): [] for g in groups}
+        inside = {id(g): [] for g in groups}
+        for outer in closed_groups:
+            for inner in groups:
+                if outer is inner or outer in contains[id(inner)]:
+                    continue
+                if is_inside(inner, outer, tolerance):
+                    contains[id(outer)].append(inner)
+                    inside[id(inner)].append(outer)
+        return [(contains[id(g)], inside[id(g)]) for g in groups]
+
+    def test_inside_candidates(self):
+        """Test that only groups overlapping the bounds of an outer are candidates."""
+        groups = list(self.create_sheet_scenario(2))
+        # Piece one: outer, hole, circle, line, overlapping rect. Piece two: the same
+        # without the rect.
+        self.assertEqual(len(groups), 9)
+        outers = [g for g in groups if g.closed]
+        pairs = inside_candidates(groups, outers)
+        self.assertEqual([outer for outer, inners in pairs], outers)
+        self.assertEqual(pairs[0][1], groups[:5])
+        self.assertEqual(pairs[1][1], groups[:2])
+        # The overlapping rect reaches into the outer and the hole of piece two.
+        self.assertEqual(pairs[3][1], [groups[0], *groups[4:7]])
+        self.assertEqual(pairs[4][1], groups[4:])
+        self.assertEqual(pairs[6][1], [groups[5], groups[7]])
+
+        # Bounds within the tolerance are candidates.
+        self.assertEqual(inside_candidates(groups[5:], groups[1:2])[0][1], [])
+        self.assertEqual(
+            inside_candidates(groups[5:], groups[1:2], tolerance=100)[0][1],
+            groups[5:],
+        )
+
+    def test_inner_first_matches_all_pairs(self):
+        """Test that pruned containment gives the relations of testing all pairs."""
+        for tolerance in (0, 3):
+            reference = self.create_sheet_scenario(20)
+            groups = list(reference)
+            expected = [
+                ([groups.index(c) for c in contains], [groups.index(c) for c in inside])
+                for contains, inside in self.reference_inner_first(reference, tolerance)
+            ]
+            cutcode = self.create_sheet_scenario(20)
+            inner_first_ident(cutcode, tolerance=tolerance)
+            groups = list(cutcode)
+            found = [
+                (
+                    [groups.index(c) for c in g.contains or []],
+                    [groups.index(c) for c in g.inside or []],
+                )
+                for g in groups
+            ]
+            self.assertEqual(found, expected)
+            # Every piece contains its two holes and the open cut.
+            self.assertGreaterEqual(sum(len(contains) for contains, _ in found), 60)
+
+    def test_inner_first_benchmark(self):
+        t = time.time()
+        self.reference_inner_first(self.create_sheet_scenario(150))
+        all_pairs = time.time() - t
+        cutcode = self.create_sheet_scenario(150)
+        t = time.time()
+        inner_first_ident(cutcode)
+        pruned = time.time() - t
+        print(
+            f"Inner first on {len(cutcode)} groups: all pairs {all_pairs:.3f}s, "
+            f"pruned {pruned:.3f}s"
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
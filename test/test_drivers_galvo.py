@@ -1,4 +1,8 @@
 import os
+import random
+import struct
+import threading
+import time
 import unittest
 from test import bootstrap
 
@@ -40,7 +44,22 @@ listDelayTime        001e 0000 0000 0000 0000
 listEndOfList        0000 0000 0000 0000 0000
 """
 
-lmc_blank = ""
+
+def lmc_marks(data):
+    """
+    Marked lines of a job listing, as (x0, y0, x1, y1) in galvo units.
+    """
+    marks = []
+    x = y = None
+    for line in data.splitlines():
+        words = line.split()
+        if words[0] not in ("listJumpTo", "listMarkTo"):
+            continue
+        next_x, next_y = int(words[1], 16), int(words[2], 16)
+        if words[0] == "listMarkTo":
+            marks.append((x, y, next_x, next_y))
+        x, y = next_x, next_y
+    return marks
 
 
 class TestDriverGRBL(unittest.TestCase):
@@ -113,7 +132,9 @@ class TestDriverGRBL(unittest.TestCase):
 
     def test_driver_basic_rect_raster(self):
         """
-        Attempts a raster operation however wxPython isn't available so nothing is produced.
+        Performs a raster operation, without wxPython the headless rasterizer renders the rect.
+
+        The marks cover the rect of lmc_rect, grown by its stroke, in 204 columns.
 
         @return:
         """
@@ -131,7 +152,15 @@ class TestDriverGRBL(unittest.TestCase):
             kernel()
         with open(file1) as f:
             data = f.read()
-        self.assertEqual(data, lmc_blank)
+        marks = lmc_marks(data)
+        xs = [v for mark in marks for v in (mark[0], mark[2])]
+        ys = [v for mark in marks for v in (mark[1], mark[3])]
+        self.assertTrue(all(mark[0] == mark[2] for mark in marks))
+        self.assertEqual(len(set(xs)), 204)
+        self.assertAlmostEqual(min(xs), 0xBA2E, delta=200)
+        self.assertAlmostEqual(max(xs), 0xD174, delta=200)
+        self.assertAlmostEqual(min(ys), 0x2E8B, delta=200)
+        self.assertAlmostEqual(max(ys), 0x45D1, delta=200)
 
 
 class TestDriverGalvoRotary(unittest.TestCase):
@@ -165,3 +194,255 @@ class TestDriverGalvoRotary(unittest.TestCase):
             data = f.read()
         self.assertNotEqual(lmc_rect, data)
         self.assertEqual(lmc_rect_rotary, data)
+
+
+class GalvoMockTestCase(unittest.TestCase):
+    """
+    Balor device on the mock connection, recording the list packets sent.
+    """
+
+    def setUp(self):
+        self.kernel = bootstrap.bootstrap()
+        self.kernel.console("service device start -i balor 0\n")
+        self.device = self.kernel.device
+        self.device.mock = True
+        self.driver = self.device.driver
+        self.controller = self.driver.connection
+        self.packets = []
+        send = self.controller.send
+
+        def record(data, read=True):
+            if len(data) == 0xC00:
+                self.packets.append(bytes(data))
+            return send(data, read)
+
+        self.controller.send = record
+
+    def tearDown(self):
+        self.kernel()
+
+    def run_job(self, cuts):
+        self.packets = []
+        for cut in cuts:
+            self.driver.plot(cut)
+        self.driver.plot_start()
+        return self.packets
+
+    @staticmethod
+    def line_cuts(count, settings):
+        from meerk40t.core.cutcode.linecut import LineCut
+
+        return [
+            LineCut((1000 + i, 1000), (2000, 3000 + i), settings=settings)
+            for i in range(count)
+        ]
+
+
+class TestDriverGalvoListReplay(GalvoMockTestCase):
+    def test_list_program_packets(self):
+        from meerk40t.balormk.controller import ListProgram, listChangeMarkCount
+
+        commands = [(0x8005, i, i, 0, 10, 0) for i in range(300)]
+        commands.append((listChangeMarkCount, 1, 0, 0, 0, 0))
+        program = ListProgram(commands)
+        packets = list(program.packets(mark_count=7))
+        self.assertEqual(len(packets), 2)
+        self.assertEqual([used for packet, used in packets], [0xC00, 45 * 12])
+        last, used = packets[1]
+        self.assertEqual(len(last), 0xC00)
+        self.assertEqual(last[used - 12 : used - 8], bytes([0x23, 0x80, 7, 0]))
+        # Unused commands are end of list padding.
+        self.assertEqual(last[used : used + 2], bytes([0x02, 0x80]))
+        self.assertEqual(program.commands["v1"][-1], 1)
+
+    def test_replay_repeated_job(self):
+        cuts = self.line_cuts(300, {"speed": 100, "power": 500})
+        runs = [self.run_job(cuts) for i in range(4)]
+        # The first job starts elsewhere, the later jobs start from the end position.
+        program = self.driver._program[2]
+        self.assertEqual(program.marks, 3)
+        self.assertEqual(len(runs[1]), 3)
+        self.assertEqual(runs[1], runs[2])
+        self.assertEqual(runs[2], runs[3])
+        self.assertEqual(self.controller.get_last_xy(), program.end_position)
+
+    def test_replay_invalidated(self):
+        settings = {"speed": 100, "power": 500}
+        cuts = self.line_cuts(10, settings)
+        for i in range(3):
+            self.run_job(cuts)
+        program = self.driver._program[2]
+        self.assertEqual(program.marks, 2)
+        settings["power"] = 300
+        self.run_job(cuts)
+        self.assertIsNot(self.driver._program[2], program)
+        program = self.driver._program[2]
+        self.device.delay_end = 500.0
+        self.run_job(cuts)
+        self.assertIsNot(self.driver._program[2], program)
+        self.device.list_replay = False
+        self.run_job(cuts)
+        self.assertIsNone(self.driver._program)
+
+    def test_replay_mark_count(self):
+        from meerk40t.balormk.controller import listChangeMarkCount
+
+        self.device.list_mark_count = True
+        cuts = self.line_cuts(10, {"speed": 100, "power": 500})
+        counts = []
+        for i in range(4):
+            data = b"".join(self.run_job(cuts))
+            for j in range(0, len(data), 12):
+                if int.from_bytes(data[j : j + 2], "little") == listChangeMarkCount:
+                    counts.append(int.from_bytes(data[j + 2 : j + 4], "little"))
+        self.assertEqual(counts, [1, 1, 2, 3])
+
+    def test_replay_refused(self):
+        cuts = self.line_cuts(10, {"speed": 100, "power": 500})
+        for i in range(2):
+            self.run_job(cuts)
+        program = self.driver._program[2]
+        expected = self.run_job(cuts)
+
+        self.controller.list_replay = lambda *args, **kwargs: False
+        self.run_job(cuts)
+        # A refused replay compiles and records the job again.
+        self.assertIsNot(self.driver._program[2], program)
+        self.assertEqual(self.driver._program[2].marks, 1)
+        del self.controller.list_replay
+        self.assertEqual(self.run_job(cuts), expected)
+
+    def test_replay_paused(self):
+        cuts = self.line_cuts(10, {"speed": 100, "power": 500})
+        expected = [self.run_job(cuts) for i in range(3)][-1]
+
+        def resume():
+            self.driver.paused = False
+
+        self.driver.paused = True
+        timer = threading.Timer(0.3, resume)
+        timer.start()
+        t = time.time()
+        self.assertEqual(self.run_job(cuts), expected)
+        self.assertGreaterEqual(time.time() - t, 0.25)
+        timer.join()
+
+    def test_replay_benchmark(self):
+        cuts = self.line_cuts(5000, {"speed": 100, "power": 500})
+        self.run_job(cuts)
+        t = time.time()
+        self.run_job(cuts)
+        t0 = time.time() - t
+        t = time.time()
+        self.run_job(cuts)
+        t1 = time.time() - t
+        print(f"job of 5000 lines streamed in {t0:.3f}s, replayed in {t1:.3f}s")
+
+
+class TestGalvoListCompiler(GalvoMockTestCase):
+    def commands(self, packets):
+        data = b"".join(packets)
+        return [
+            struct.unpack("<6H", data[i : i + 12])
+            for i in range(0, len(data), 12)
+            if data[i : i + 2] != b"\x02\x80"
+        ]
+
+    def run_geometry(self, geom, compiled=True):
+        self.packets = []
+        self.controller._last_x = self.controller._last_y = 0x8000
+        if not compiled:
+            self.driver._compiles = lambda con: False
+        try:
+            self.driver.geometry(geom)
+        finally:
+            if not compiled:
+                del self.driver._compiles
+        return self.commands(self.packets)
+
+    @staticmethod
+    def random_geometry(count, seed=1):
+        from meerk40t.tools.geomstr import Geomstr
+
+        random.seed(seed)
+
+        def point():
+            # Partly outside the galvo field.
+            return complex(random.uniform(30000, 30600), random.uniform(65000, 65700))
+
+        g = Geomstr()
+        end = point()
+        for i in range(count):
+            start = end if random.random() < 0.7 else point()
+            end = point()
+            settings = (i // 50) % 2
+            k = random.random()
+            if k < 0.4:
+                g.line(start, end, settings=settings)
+            elif k < 0.6:
+                g.quad(start, point(), end, settings=settings)
+            elif k < 0.8:
+                g.cubic(start, point(), point(), end, settings=settings)
+            elif k < 0.9:
+                g.arc(start, point(), end, settings=settings)
+            else:
+                g.end()
+        g._settings = {
+            0: {"speed": 100, "power": 500},
+            1: {"speed": 300, "power": 200, "frequency": 40},
+        }
+        return g
+
+    def test_compile_segments(self):
+        from meerk40t.balormk.controller import listJumpTo, listMarkTo
+        from meerk40t.balormk.listcompiler import compile_segments
+        from meerk40t.tools.geomstr import Geomstr
+
+        g = Geomstr()
+        g.line(complex(100, 100), complex(200.5, 100))
+        g.line(complex(200, 100), complex(70000, 100))
+        g.quad(complex(300, 300), complex(400, 500), complex(500, 300))
+        commands = compile_segments(g.segments[: g.index], 5, (100, 100))
+        # No jump to the current position, the line out of range is dropped.
+        self.assertEqual(commands["command"][0], listMarkTo)
+        self.assertEqual(tuple(commands[0])[1:], (200, 100, 0, 100, 0))
+        self.assertEqual(commands["command"][1], listJumpTo)
+        self.assertEqual((commands["v1"][1], commands["v2"][1]), (300, 300))
+        points = list(g.as_equal_interpolated_points(distance=5))
+        quad = points[points.index(complex(300, 300)) + 1 :]
+        self.assertEqual(len(commands) - 2, len(quad))
+        self.assertEqual(list(commands["v1"][2:]), [int(p.real) for p in quad])
+        self.assertEqual(list(commands["v2"][2:]), [int(p.imag) for p in quad])
+
+    def test_compiled_geometry(self):
+        g = self.random_geometry(300)
+        self.device.list_replay = False
+        compiled = self.run_geometry(g)
+        direct = self.run_geometry(g, compiled=False)
+        moves = (0x8001, 0x8005)
+        self.assertEqual(
+            [c for c in compiled if c[0] in moves],
+            [c for c in direct if c[0] in moves],
+        )
+        # Settings are set once per run of segments rather than per segment.
+        self.assertLessEqual(len(compiled), len(direct))
+
+    def test_compiled_geometry_benchmark(self):
+        from meerk40t.balormk.listcompiler import compile_segments
+
+        g = self.random_geometry(2000, seed=2)
+        self.device.list_replay = False
+        self.controller.DEBUG = False
+        t = time.time()
+        compiled = self.run_geometry(g)
+        t0 = time.time() - t
+        t = time.time()
+        self.run_geometry(g, compiled=False)
+        t1 = time.time() - t
+        t = time.time()
+        compile_segments(g.segments[: g.index], self.device.interp, (0x8000, 0x8000))
+        t2 = time.time() - t
+        print(
+            f"geometry of 2000 segments ({len(compiled)} commands) sent to the mock in {t0:.3f}s "
+            f"compiled, {t1:.3f}s per point, compiling alone took {t2:.3f}s"
+        )
@@ -1,7 +1,15 @@
 import os
+import time
 import unittest
 from test import bootstrap
 
+from PIL import Image
+
+from meerk40t.core.cutcode.rastercut import RasterCut
+from meerk40t.core.units import UNITS_PER_MIL
+from meerk40t.grbl.gcodejob import GcodeJob
+from meerk40t.svgelements import Matrix
+
 gcode_rect = """G90
 G94
 G21
@@ -28,8 +36,6 @@ G1 S0
 M5
 """
 
-gcode_blank = ""
-
 
 class TestDriverGRBL(unittest.TestCase):
     def test_reload_devices_grbl(self):
@@ -100,7 +106,9 @@ class TestDriverGRBL(unittest.TestCase):
 
     def test_driver_basic_rect_raster(self):
         """
-        Attempts a raster operation however wxPython isn't available so nothing is produced.
+        Performs a raster operation, without wxPython the headless rasterizer renders the rect.
+
+        The burned mils cover the 1cm rect at 2cm, grown by its stroke, in 204 rows.
 
         @return:
         """
@@ -118,7 +126,14 @@ class TestDriverGRBL(unittest.TestCase):
             kernel()
         with open(file1) as f:
             data = f.read()
-        self.assertEqual(data, gcode_blank)
+        burn = burn_of(data)
+        xs = [x for x, y in burn]
+        ys = [y for x, y in burn]
+        self.assertEqual(len(set(ys)), 204)
+        self.assertAlmostEqual(min(xs), 787, delta=15)
+        self.assertAlmostEqual(max(xs), 1181, delta=15)
+        self.assertAlmostEqual(max(ys) - min(ys), 394, delta=20)
+        self.assertEqual(len(set(burn.values())), 1)
 
 
 class TestDriverGRBLRotary(unittest.TestCase):
@@ -139,7 +154,8 @@ class TestDriverGRBLRotary(unittest.TestCase):
             device(f"set -p {rotary_path} rotary_active True")
             device(f"set -p {rotary_path} rotary_scale_y 2.0")
             device.signal("rotary_active", True)
-            kernel.device.rotary.realize()  # In case signal doesn't update the device settings quickly enough.
+            # Realizing the device sends view;realized, which applies the rotary scale.
+            bootstrap.flush_signals(kernel)
             kernel.console(
                 f"rect 2cm 2cm 1cm 1cm engrave -s 15 plan copy-selected preprocess validate blob preopt optimize save_job {file1}\n"
             )
@@ -149,3 +165,185 @@ class TestDriverGRBLRotary(unittest.TestCase):
             data = f.read()
         self.assertNotEqual(gcode_rect, data)
         self.assertEqual(gcode_rect_rotary, data)
+
+
+class TestGRBLController(unittest.TestCase):
+    def test_controller_forward_buffer(self):
+        """
+        Lines sent to the device are acknowledged in order, realtime commands without a line end
+        are joined with the next line and a CRLF line end is a single line end.
+        @return:
+        """
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i grbl 0\n")
+            controller = kernel.device.controller
+            controller._forward_append(b"G1 X1\r")
+            controller._forward_append(b"?")
+            controller._forward_append(b"G1 X2\r\n")
+            controller._forward_append(b"G1 X3\nG1 X4\r")
+            self.assertEqual(controller._forward_bytes, 26)
+            self.assertEqual(controller.get_forward_command(), b"G1 X1\r")
+            self.assertEqual(controller.get_forward_command(), b"?G1 X2\r\n")
+            self.assertEqual(controller.get_forward_command(), b"G1 X3\n")
+            self.assertEqual(controller._forward_bytes, 6)
+            controller._forward_append(b"?")
+            self.assertEqual(controller.get_forward_command(), b"G1 X4\r")
+            with self.assertRaises(ValueError):
+                controller.get_forward_command()
+            self.assertEqual(controller._forward_bytes, 1)
+            controller._forward_clear()
+            self.assertEqual(controller._forward_bytes, 0)
+        finally:
+            kernel()
+
+    def test_controller_mock_throughput(self):
+        """
+        Streams lines through the controller to the mock connection and its emulator.
+        @return:
+        """
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i grbl 0\n")
+            device = kernel.device
+            device.interface = "mock"
+            controller = device.controller
+            controller.update_connection()
+            controller.start()
+            controller.force_validate()
+            count = 5000
+            t = time.time()
+            for i in range(count):
+                controller.write(f"G1 X{i % 100}.000 Y{i % 37}.500\r")
+            while len(controller) and time.time() - t < 60:
+                time.sleep(0.001)
+            t = time.time() - t
+            self.assertEqual(len(controller), 0)
+            self.assertEqual(controller._forward_bytes, 0)
+            print(f"{count} lines sent to mock connection at {count / t:.0f} lines/s")
+        finally:
+            kernel()
+
+
+def raster_gcode(image, **settings):
+    """
+    Returns the gcode the grbl driver creates for a raster of the image with the given device settings.
+    """
+    kernel = bootstrap.bootstrap()
+    try:
+        kernel.console("service device start -i grbl 0\n")
+        device = kernel.device
+        for key, value in settings.items():
+            setattr(device, key, value)
+        lines = []
+        device.driver.out_pipe = lines.append
+        cut = RasterCut(
+            image.copy(),
+            offset_x=0,
+            offset_y=0,
+            step_x=2,
+            step_y=2,
+            settings={
+                "power": 1000,
+                "speed": 50,
+                "raster_step_x": 2,
+                "raster_step_y": 2,
+            },
+        )
+        device.driver.plot(cut)
+        device.driver.plot_start()
+        return "".join(lines)
+    finally:
+        kernel()
+
+
+class BurnRecorder:
+    """
+    Driver for the gcode job which records the burned mils and their power.
+    """
+
+    def __init__(self):
+        self.burn = {}
+
+    def plot(self, plot):
+        power = plot.settings.get("power")
+        points = plot._points
+        for (x0, y0), (x1, y1), on in zip(points, points[1:], plot._powers):
+            if not on:
+                continue
+            assert x0 == x1 or y0 == y1
+            for x in range(min(x0, x1), max(x0, x1)):
+                self.burn[x, y0] = power * on
+            for y in range(min(y0, y1), max(y0, y1)):
+                self.burn[x0, y] = power * on
+
+    def plot_start(self):
+        pass
+
+    def set(self, key, value):
+        pass
+
+    def move_abs(self, x, y):
+        pass
+
+
+def burn_of(gcode):
+    recorder = BurnRecorder()
+    job = GcodeJob(
+        driver=recorder, units_to_device_matrix=Matrix.scale(1 / UNITS_PER_MIL)
+    )
+    for line in gcode.splitlines():
+        if line:
+            job._process_gcode(line)
+    job.plot_commit()
+    return recorder.burn
+
+
+class TestGRBLRasterEncoding(unittest.TestCase):
+    def raster_image(self):
+        image = Image.new("L", (200, 60), 255)
+        for y in range(10, 50):
+            for x in range(200):
+                if x < 60:
+                    image.putpixel((x, y), 0)
+                elif x < 140:
+                    image.putpixel((x, y), (x // 10) * 20)
+        return image
+
+    def test_raster_compact_burn(self):
+        """
+        The compact raster encoding burns exactly what the regular encoding burns, with far fewer bytes.
+        @return:
+        """
+        image = self.raster_image()
+        regular = raster_gcode(image)
+        compact = raster_gcode(image, raster_compact=True)
+        self.assertEqual(burn_of(regular), burn_of(compact))
+        self.assertTrue(burn_of(regular))
+        self.assertLess(len(compact) * 2, len(regular))
+        relative = raster_gcode(
+            image, raster_compact=True, raster_relative=True, raster_blank_rapid=False
+        )
+        self.assertIn("G91", relative)
+        self.assertEqual(burn_of(regular), burn_of(relative))
+        self.assertLess(len(relative) * 2, len(regular))
+        print(
+            f"raster gcode: {len(regular)} bytes regular, {len(compact)} bytes compact, {len(relative)} bytes relative"
+        )
+
+    def test_raster_compact_precision(self):
+        """
+        Reduced precision moves the burn boundaries by less than the precision.
+        @return:
+        """
+        image = self.raster_image()
+        regular = burn_of(raster_gcode(image))
+        reduced = burn_of(
+            raster_gcode(
+                image, raster_compact=True, raster_relative=True, raster_precision=2
+            )
+        )
+        # 0.01mm is less than a mil.
+        self.assertLess(abs(len(regular) - len(reduced)), len(regular) // 50)
+        for x, y in reduced:
+            self.assertTrue(any((x + dx, y) in regular for dx in range(-1, 2)))
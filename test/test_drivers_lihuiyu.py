@@ -3,8 +3,11 @@ import unittest
 
 from PIL import Image, ImageDraw
 
+from meerk40t.core.laserjob import LaserJob
 from meerk40t.core.node.elem_image import ImageNode
 from meerk40t.core.units import UNITS_PER_MM
+from meerk40t.lihuiyu.driver import ENCODE_BLOCK_SIZE, LihuiyuDriver, lhymicro_distance
+from meerk40t.lihuiyu.parser import LihuiyuParser
 from meerk40t.svgelements import Matrix
 from test import bootstrap
 
@@ -28,14 +31,6 @@ IB055R091S1P
 IV1552121G002NLBS1EDnUxTtD|aUvBtD|iUtTtD|mUtBtD|sUrTtD|uUtBtD|yUtTtD054UrBtD054UtTtD058UrBtD058UrTtD058UtBtD062UrTtD062UrBtD062UrTtD062UrBtD062UrTtD062UrBtD062UrTvD058UrBtD058UrTtD058UrBvD054UrTtD054UrBvD|yUrTvD|uUrBvD|qUrTvD|mUrBvD|iUrTxD|aUrB|aDlFNSE-
 """
 
-egv_blank = """Document type : LHYMICRO-GL file
-File version: 1.0.01
-Copyright: Unknown
-Creator-Software: MeerK40t v0.0.0-testing
-
-%0%0%0%0%
-"""
-
 egv_rect_y2_rotary = """Document type : LHYMICRO-GL file
 File version: 1.0.01
 Copyright: Unknown
@@ -68,6 +63,32 @@ ICV2452421011000060CNBRS1EMzzzwFNSE-
 ICV2490731016000027CNLBS1EDz139Rz139Tz139Lz139FNSE-
 """
 
+egv_circle_raster = """Document type : LHYMICRO-GL file
+File version: 1.0.01
+Copyright: Unknown
+Creator-Software: MeerK40t v0.0.0-testing
+
+%0%0%0%0%
+IBzzzz240Rzzzz161S1P
+ICV2490731016000027CNTRS1EDeMaRgMaRdMaRbMaRbMaRbMaRaMaRbMaRaMaRaMbRaMaRaMbRaMbRaMbRaMmTaMbTaMbTaMaTaMaTaMbTaMaTaMaTbMaTaMaTbMaTbMaTdMaTdMaToLMaTgMaTcMaTcMaTbMaTbMaTaMaTbMaTaMbTaMaTaMaTaMbTaMbTaMcTaMkLaMcLaMbLaMaLaMaLaMbLaMaLbMaLaMaLbMaLbMaLbMaLcMaLeMaLmBMaLgMaLdMaLcMaLbMaLbMaLaMaLaMaLaMaLaMaLaMaLaMaLaMbLaMbLaMdLaMjBaMcBaMaBaMbBaMaBaMaBaMaBaMaBaMaBaMaBbMaBbMaBbMaBcMaBeMaBmRMaBgMaBdMaBcMaBbMaBbMaBaMaBaMaBbMbBaMaBaMaBaMbBaMbBaMcBaMkRaMcRaMbRaMaRaMaRaMbRaMaRbMaRaMaRaMaRbMaRcMaRcMaRdMaRjUNTz139Lz099SETLD|oT079R|oB079ULNBz139Rz099SEBR@NSECV2502451021000015CNTRS1EDeMaRgMaRdMaRbMaRbMaRbMaRaMaRbMaRaMaRaMbRaMaRaMbRaMbRaMbRaMmTaMbTaMbTaMaTaMaTaMbTaMaTaMaTbMaTaMaTbMaTbMaTdMaTdMaToLMaTgMaTcMaTcMaTbMaTbMaTaMaTbMaTaMbTaMaTaMaTaMbTaMbTaMcTaMkLaMcLaMbLaMaLaMaLaMbLaMaLbMaLaMaLbMaLbMaLbMaLcMaLeMaLmBMaLgMaLdMaLcMaLbMaLbMaLaMaLaMaLaMaLaMaLaMaLaMaLaMbLaMbLaMdLaMjBaMcBaMaBaMbBaMaBaMaBaMaBaMaBaMaBaMaBbMaBbMaBbMaBcMaBeMaBmRMaBgMaBdMaBcMaBbMaBbMaBaMaBaMaBbMbBaMaBaMaBaMbBaMbBaMcBaMkRaMcRaMbRaMaRaMaRaMbRaMaRbMaRaMaRaMaRbMaRcMaRcMaRdMaRjUNTz139Lz099SETLD|oT079R|oB079ULNT082ReSETR@NSEV2112432G002NLBS1EaDgUaDhUaDhUaDhUaDgUaDhUaDhUaDhUaDhUaDfUtTtDaUaDhUaDhUaDhUaDhUaDgUaDhUaDhUaDhUaDhUaDgUuBtDhUaDhUaDhUaDhUaDgUaDhUaDhUaDhUaDgUaDhUaDfUrTtDbUaDhUaDhUaDgUaDhUaDhUaDhUaDhUaDgUaDhUaDhUaDcUrBtDeUaDhUaDgUaDhUaDhUaDhUaDhUaDgUaDhUaDhUaDhUsTtDhUaDgUaDhUaDhUaDhUaDgUaDhUaDhUaDhUaDhUaDfUrBtDaUaDhUaDhUaDhUaDhUaDgUaDhUaDhUaDhUaDhUaDgUaDdUrTtDdUaDhUaDbU062DfUaDhUsBtDgUaDhU063DhUaDfUrTtDbUaDhUaDdU062DcUaDhUaDcUrBtDeUaDhUaDaU062DfUaDhUsTtDhUaDgU062DaUaDhUaDeUrBtDbUaDhUaDdU062DdUaDhUaDbUrTtDfUaDgUaDaU062DgUaDhUrBuDhUaDfU062DbUaDgUaDeUrTtDcUaDhUaDcU062DeUaDhUaDaUrBtDfUaDhU063DhUaDgUrTtDaUaDhUaDeU062DbUaDhUaDdUrBtDdUaDhUaDbU062DeUaDhUaDaUrTtDgUaDhUaDhUaDgUaDhUaDhUaDhUaDhUaDgUaDhUaDgUrBtDaUaDhUaDhUaDgUaDhUaDhUaDhUaDhUaDgUaDhUaDhUaDdUrTtDdUaDhUaDgUaDhUaDhUaDhUaDgUaDhUaDhUaDhUaDhUaDaUrBtDfUaDhUaDhUaDhUaDhUaDgUaDhUaDhUaDhUaDhUaDgUrTuDhUaDhUaDhUaDhUaDgUaDhUaDhUaDhUaDhUaDgUaDeUrBtDcUaDhUaDhUaDgUaDhUaDhUaDhUaDhUaDgUaDhUaDhUaDbUrTvDfUaDhUaDgUaDhUaDhUaDhUaDhUaDgUaDhUaDhUaDdUrBvDdUaDhUaDgUaDhUaDhUaDhUaDhUaDgUaDhUaDhUaFNSE-
+"""
+
+
+def egv_burns(data):
+    """
+    Lines burned by an egv file, as (x0, y0, x1, y1) in mils.
+    """
+    parser = LihuiyuParser()
+    burns = []
+
+    def position(p):
+        if p is not None and parser.program_mode and parser.laser:
+            burns.append(p)
+
+    parser.position = position
+    parser.header_write(data.encode())
+    return burns
+
 
 class TestDriverLihuiyu(unittest.TestCase):
     def test_reload_devices_lihuiyu(self):
@@ -138,7 +159,9 @@ class TestDriverLihuiyu(unittest.TestCase):
 
     def test_driver_basic_rect_raster(self):
         """
-        Attempts a raster operation however wxPython isn't available so nothing is produced.
+        Performs a raster operation, without wxPython the headless rasterizer renders the rect.
+
+        The parsed egv burns the 1cm rect at 2cm, grown by its stroke, in 204 rows.
 
         @return:
         """
@@ -156,7 +179,15 @@ class TestDriverLihuiyu(unittest.TestCase):
             kernel()
         with open(file1) as f:
             data = f.read()
-        self.assertEqual(data, egv_blank)
+        burns = egv_burns(data)
+        xs = [v for burn in burns for v in (burn[0], burn[2])]
+        ys = [v for burn in burns for v in (burn[1], burn[3])]
+        self.assertTrue(all(burn[1] == burn[3] for burn in burns))
+        self.assertEqual(len(set(ys)), 204)
+        self.assertAlmostEqual(min(xs), 787, delta=15)
+        self.assertAlmostEqual(max(xs), 1181, delta=15)
+        self.assertAlmostEqual(min(ys), 787, delta=15)
+        self.assertAlmostEqual(max(ys), 1181, delta=15)
 
     def test_driver_basic_ellipse_image(self):
         """
@@ -191,6 +222,46 @@ class TestDriverLihuiyu(unittest.TestCase):
             print(f'egv_image="""{data}"""')
         self.assertEqual(data, egv_image)
 
+    def test_driver_plot_array_mode(self):
+        """
+        The plot planner produces the same jobs planning in blocks and one step at a time.
+
+        @return:
+        """
+        file1 = "testm.egv"
+        self.addCleanup(os.remove, file1)
+
+        image = Image.new("RGBA", (256, 256), "white")
+        matrix = Matrix.scale(UNITS_PER_MM / 64)
+        matrix.translate(UNITS_PER_MM * 2, UNITS_PER_MM * 2)
+        draw = ImageDraw.Draw(image)
+        draw.ellipse((50, 50, 150, 150), "black")
+
+        jobs = (
+            (None, "rect 2cm 2cm 1cm 1cm engrave", egv_rect),
+            (image, "element0 imageop", egv_image),
+        )
+        for array_mode in (True, False):
+            for job_image, command, expected in jobs:
+                kernel = bootstrap.bootstrap()
+                try:
+                    if job_image is not None:
+                        image_node = ImageNode(image=job_image, matrix=matrix)
+                        kernel.elements.elem_branch.add_node(image_node)
+                    kernel.console("service device start -i lhystudios 0\n")
+                    kernel.console("operation* remove\n")
+                    device = kernel.device
+                    device(f"set -p {device.path} plot_array_mode {array_mode}")
+                    self.assertEqual(device.plot_array_mode, array_mode)
+                    kernel.console(
+                        f"{command} -s 15 plan copy-selected preprocess validate blob preopt optimize save_job {file1}\n"
+                    )
+                finally:
+                    bootstrap.destroy(kernel)
+                    kernel()
+                with open(file1) as f:
+                    self.assertEqual(f.read(), expected)
+
 
 class TestDriverLihuiyuRotary(unittest.TestCase):
     def test_driver_rotary_engrave(self):
@@ -481,3 +552,87 @@ class TestDriverLihuiyuOverrideSpeed(unittest.TestCase):
         finally:
             bootstrap.destroy(kernel)
             kernel()
+
+
+class CapturePipe:
+    """
+    Out pipe of a driver, records the writes and never holds the driver.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+        self.writes = 0
+
+    def write(self, data):
+        self.data += data
+        self.writes += 1
+
+    def __len__(self):
+        return 0
+
+
+class TestDriverLihuiyuEncodeAhead(unittest.TestCase):
+    def test_driver_distance_table(self):
+        """
+        Distances from the precomputed table and beyond it are encoded as before.
+        """
+        expected = {
+            0: b"",
+            1: b"a",
+            25: b"y",
+            26: b"|a",
+            51: b"|z",
+            52: b"052",
+            254: b"254",
+            255: b"z",
+            256: b"za",
+            306: b"z|z",
+            307: b"z052",
+            510: b"zz",
+            4095: b"z" * 16 + b"o",
+            4096: b"z" * 16 + b"p",
+            4097: b"z" * 16 + b"q",
+            10000: b"z" * 39 + b"055",
+        }
+        for v, code in expected.items():
+            self.assertEqual(lhymicro_distance(v), code)
+        with self.assertRaises(ValueError):
+            lhymicro_distance(-1)
+
+    def test_driver_encode_ahead(self):
+        """
+        The exported job and the bytes the live driver writes, with and without
+        encoding ahead, are those of the encoder before encoding ahead existed.
+        """
+        file1 = "testa.egv"
+        self.addCleanup(os.remove, file1)
+
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i lhystudios 0\n")
+            kernel.console("operation* delete\n")
+            kernel.console("circle 3cm 3cm 2mm engrave -s 15\n")
+            kernel.console("rect 2cm 2cm 2mm 1mm raster -s 50\n")
+            kernel.console(
+                f"plan clear copy preprocess validate blob preopt optimize save_job {file1}\n"
+            )
+            with open(file1) as f:
+                self.assertEqual(f.read(), egv_circle_raster)
+            expected = egv_circle_raster.split("%0%0%0%0%\n", 1)[1].encode()
+
+            plan = list(kernel.planner.default_plan.plan)
+            writes = {}
+            for array_mode in (True, False):
+                for encode_ahead in (0, 1, ENCODE_BLOCK_SIZE):
+                    driver = LihuiyuDriver(kernel.device)
+                    driver.plot_planner.array_mode = array_mode
+                    driver.encode_ahead = encode_ahead
+                    driver.out_pipe = CapturePipe()
+                    LaserJob("encode", list(plan), driver=driver).execute()
+                    self.assertEqual(bytes(driver.out_pipe.data), expected)
+                    writes[encode_ahead] = driver.out_pipe.writes
+            self.assertLess(writes[ENCODE_BLOCK_SIZE], writes[1])
+            self.assertLess(writes[1], writes[0])
+        finally:
+            bootstrap.destroy(kernel)
+            kernel()
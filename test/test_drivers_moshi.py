@@ -1,10 +1,12 @@
 import os
+import re
 import unittest
 
 from PIL import Image, ImageDraw
 
 from meerk40t.core.node.elem_image import ImageNode
 from meerk40t.core.units import UNITS_PER_MM
+from meerk40t.moshi.builder import MoshiBuilder
 from meerk40t.svgelements import Matrix
 from test import bootstrap
 
@@ -29,8 +31,6 @@ mos_image = (
     b"\x00\x00\x00\x00\x80\x80\x80\x80\x80\x80\x80"
 )
 
-mos_blank = b""
-
 mos_rect_rotary = (
     b"\n\x0e\x0e\x00\x00\x00\x13\x03'\x06\x8a\x00\x00\x00\x00\x8a\x00\x00\x00\x00"
     b"\xd5\x8a\x01\x00\x00\xd5\x8a\x01\x13\x03\xd5\x00\x00\x13\x03\xd5"
@@ -38,6 +38,36 @@ mos_rect_rotary = (
 )
 
 
+def moshi_cuts(data):
+    """
+    Cuts of a moshi program, as (x0, y0, x1, y1) relative to its offset.
+    """
+    builder = MoshiBuilder()
+    builder.data = bytearray(data)
+    commands = []
+    builder.debug(commands.append)
+    cuts = []
+    x = y = 0
+    for command in commands:
+        match = re.match(
+            r"(move|cut) (horiz x|vert y|x): (-?\d+)(?:, y: (-?\d+))?", command
+        )
+        if match is None:
+            continue
+        kind, axis, first, second = match.groups()
+        next_x, next_y = x, y
+        if axis == "horiz x":
+            next_x = int(first)
+        elif axis == "vert y":
+            next_y = int(first)
+        else:
+            next_x, next_y = int(first), int(second)
+        if kind == "cut":
+            cuts.append((x, y, next_x, next_y))
+        x, y = next_x, next_y
+    return cuts
+
+
 class TestDriverMoshi(unittest.TestCase):
     def test_reload_devices_moshi(self):
         """
@@ -107,7 +137,9 @@ class TestDriverMoshi(unittest.TestCase):
 
     def test_driver_basic_rect_raster(self):
         """
-        Attempts a raster operation however wxPython isn't available so nothing is produced.
+        Performs a raster operation, without wxPython the headless rasterizer renders the rect.
+
+        The cuts, relative to the program offset, span the 1cm rect in 204 rows.
 
         @return:
         """
@@ -125,7 +157,13 @@ class TestDriverMoshi(unittest.TestCase):
             kernel()
         with open(file1, "rb") as f:
             data = f.read()
-        self.assertEqual(data, mos_blank)
+        cuts = moshi_cuts(data)
+        xs = [v for cut in cuts for v in (cut[0], cut[2])]
+        ys = [v for cut in cuts for v in (cut[1], cut[3])]
+        self.assertTrue(all(cut[1] == cut[3] for cut in cuts))
+        self.assertEqual(len(set(ys)), 204)
+        self.assertAlmostEqual(max(xs) - min(xs), 394, delta=20)
+        self.assertAlmostEqual(max(ys) - min(ys), 394, delta=20)
 
     def test_driver_basic_ellipse_image(self):
         """
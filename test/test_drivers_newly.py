@@ -10,8 +10,6 @@ from test import bootstrap
 
 hpgl_rect = "ZZZFile0;VP100;VK100;SP2;VQ20;VJ10;VS10;PR;PU787,787;ZED;ZZZFile0;DW;VP100;VK100;SP0;DA0;VQ20;VJ10;VS10;PR;PD0,394;PD394,0;PD0,-394;PD-394,0;ZED;GZ;VP100;VK100;SP1;DA51;VS177;PR;PD0,394;PD394,0;PD0,-394;PD-394,0;ZED;ZZZFile0;ZG0;ZED;"
 
-hpgl_blank = "ZZZFile0;VP100;VK100;SP2;VQ20;VJ10;VS10;PR;PU787,787;ZED;ZZZFile0;DW;VP100;VK100;SP0;DA0;VQ20;VJ10;VS10;PR;PD0,394;PD394,0;PD0,-394;PD-394,0;ZED;GZ;ZED;ZZZFile0;ZG0;ZED;"
-
 hpgl_image = (
     "ZZZFile0;VP100;VK100;SP2;VQ20;VJ10;VS10;"
     "PR;PU31,31;ZED;ZZZFile0;DW;VP100;VK100;S"
@@ -46,6 +44,19 @@ hpgl_image = (
 hpgl_rect_rot = "ZZZFile0;VP100;VK100;SP2;VQ20;VJ10;VS10;PR;PU1575,787;ZED;ZZZFile0;DW;VP100;VK100;SP0;DA0;VQ20;VJ10;VS10;PR;PD0,394;PD787,0;PD0,-394;PD-787,0;ZED;GZ;VP100;VK100;SP1;DA51;VS177;PR;PD0,394;PD787,0;PD0,-394;PD-787,0;ZED;ZZZFile0;ZG0;ZED;"
 
 
+def scanline_burns(data):
+    """
+    Number of burned bits of each scanline of a job.
+    """
+    burned = []
+    for command in data.split(";"):
+        if command[:2] not in ("YF", "YZ", "XF", "XZ"):
+            continue
+        bits = command[2:].encode("latin-1")[3:]
+        burned.append(bin(int.from_bytes(bits, "little")).count("1"))
+    return burned
+
+
 class TestDriverNewly(unittest.TestCase):
     def test_driver_basic_rect_engrave(self):
         """
@@ -89,7 +100,9 @@ class TestDriverNewly(unittest.TestCase):
 
     def test_driver_basic_rect_raster(self):
         """
-        Attempts a raster operation however wxPython isn't available so nothing is produced.
+        Performs a raster operation, without wxPython the headless rasterizer renders the rect.
+
+        204 scanlines burn bits, the longest spans the 1cm rect and its stroke.
 
         @return:
         """
@@ -105,9 +118,11 @@ class TestDriverNewly(unittest.TestCase):
             )
         finally:
             kernel()
-        with open(file1) as f:
-            data = f.read()
-        self.assertEqual(data, hpgl_blank)
+        with open(file1, "rb") as f:
+            data = f.read().decode(encoding="latin-1")
+        burned = scanline_burns(data)
+        self.assertEqual(len([count for count in burned if count]), 204)
+        self.assertAlmostEqual(max(burned), 394, delta=20)
 
     def test_driver_basic_ellipse_image(self):
         """
@@ -1,11 +1,58 @@
 import os
+import random
+import time
 import unittest
 
+import numpy as np
+
 from meerk40t.core.node.op_engrave import EngraveOpNode
-from meerk40t.core.units import Length
+from meerk40t.core.svg_io import SVGProcessor
+from meerk40t.core.units import DEFAULT_PPI, NATIVE_UNIT_PER_INCH, Length
+from meerk40t.svgelements import SVG
 from test import bootstrap
 
 
+def load_segments(kernel, pathname):
+    """
+    Loads the svg as the loader did before, with path data parsed into svgelements segments.
+    """
+    elements = kernel.elements
+    svg = SVG.parse(
+        source=pathname,
+        reify=False,
+        width=Length(amount=kernel.device.view.unit_width).length_mm,
+        height=Length(amount=kernel.device.view.unit_height).length_mm,
+        ppi=DEFAULT_PPI,
+        color="black",
+        parse_display_none=True,
+        transform=f"scale({NATIVE_UNIT_PER_INCH / DEFAULT_PPI})",
+    )
+    svg_processor = SVGProcessor(elements, load_operations=True)
+    svg_processor.process(svg, pathname)
+    svg_processor.cleanup()
+
+
+def random_path_data(count):
+    commands = []
+    for i in range(count):
+        x, y = random.uniform(-50, 50), random.uniform(-50, 50)
+        c = random.choice("LlCcQqSsTtHhAa")
+        if c in "Hh":
+            commands.append(f"{c}{x:.3f}")
+        elif c in "Aa":
+            commands.append(
+                f"{c}{abs(x) + 1:.2f} {abs(y) + 1:.2f} 15 0 1 {x:.3f},{y:.3f}"
+            )
+        else:
+            points = {"L": 1, "C": 3, "Q": 2, "S": 2, "T": 1}[c.upper()]
+            commands.append(
+                c + " ".join(f"{x + k:.3f},{y - k:.3f}" for k in range(points))
+            )
+        if i % 37 == 36:
+            commands.append("z")
+    return "M 10,10 " + " ".join(commands)
+
+
 class TestFileSVG(unittest.TestCase):
     def test_load_save_svg(self):
         """
@@ -174,3 +221,108 @@ class TestFileSVG(unittest.TestCase):
             self.assertEqual(len(list(engrave[0].flat(types="effect wobble"))), 1)
         finally:
             kernel()
+
+    def test_load_path_data(self):
+        """
+        Path data is tokenized straight into geomstr, loading gives the same tree as svgelements segments.
+        """
+        file1 = "test-path-data.svg"
+        self.addCleanup(os.remove, file1)
+        random.seed(7)
+        paths = "\n".join(
+            f'<path id="p{i}" d="{random_path_data(random.randint(1, 60))}"/>'
+            for i in range(40)
+        )
+        with open(file1, "w") as f:
+            f.write(
+                f"""<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" width="200mm" height="100mm" viewBox="0 0 200 100">
+            <style>.red {{ stroke: red; fill: none }}</style>
+            <g transform="rotate(15) translate(5,5)" class="red">
+            {paths}
+            <path id="dot" d="M 40 40 z"/>
+            <path id="move" d="M 40 40"/>
+            <path id="short" d="m 1 1 l 2 2"/>
+            <path id="empty" d=""/>
+            <path id="broken" d="M 1 1 L 5 5 L 6"/>
+            <path id="arcs" d="M 0 0 A 20 20 0 0 1 40 0 a 10 30 45 1 0 -20 20 Z M 0 0 L 10 10"/>
+            </g>
+            <path id="hidden" d="M 0 0 L 10 10 L 20 0" visibility="hidden"/>
+            <defs><path id="shared" d="M 0 0 C 10 10 20 10 30 0 S 50 -10 60 0"/></defs>
+            <use xlink:href="#shared" transform="scale(2)"/>
+            </svg>"""
+            )
+
+        def tree(kernel):
+            nodes = []
+            for node in kernel.elements.flat(types=("elem path", "elem point")):
+                geometry = getattr(node, "geometry", None)
+                nodes.append(
+                    (
+                        node.type,
+                        node.id,
+                        node.matrix,
+                        node.stroke,
+                        None
+                        if geometry is None
+                        else geometry.segments[: geometry.index],
+                        getattr(node, "point", None),
+                    )
+                )
+            return nodes
+
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.elements.clear_elements()
+            kernel.elements.clear_regmarks()
+            kernel.console(f"load {file1}\n")
+            loaded = tree(kernel)
+            kernel.elements.clear_elements()
+            kernel.elements.clear_regmarks()
+            load_segments(kernel, file1)
+            expected = tree(kernel)
+            self.assertEqual(len(loaded), len(expected))
+            self.assertGreater(len(loaded), 40)
+            for a, b in zip(loaded, expected):
+                self.assertEqual(a[:4], b[:4])
+                self.assertEqual(a[5], b[5])
+                if a[4] is not None:
+                    self.assertTrue(np.array_equal(a[4], b[4], equal_nan=True), a[1])
+            ids = [node[1] for node in loaded if node[0] == "elem path"]
+            for ident in ("short", "broken", "arcs", "hidden", "shared"):
+                self.assertIn(ident, ids)
+            for ident in ("dot", "move", "empty"):
+                self.assertNotIn(ident, ids)
+        finally:
+            kernel()
+
+    def test_load_path_data_benchmark(self):
+        """
+        Speed of loading a large svg with path data tokenized straight into geomstr.
+        """
+        file1 = "test-path-data-benchmark.svg"
+        self.addCleanup(os.remove, file1)
+        random.seed(8)
+        with open(file1, "w") as f:
+            f.write(
+                '<svg xmlns="http://www.w3.org/2000/svg" width="200mm" height="200mm" viewBox="0 0 200 200">\n'
+            )
+            for i in range(200):
+                f.write(f'<path d="{random_path_data(400)}"/>\n')
+            f.write("</svg>\n")
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.elements.classify_new = False
+            kernel.console("element* delete\n")
+            t = time.time()
+            kernel.console(f"load {file1}\n")
+            loaded = time.time() - t
+            kernel.console("element* delete\n")
+            t = time.time()
+            load_segments(kernel, file1)
+            segments = time.time() - t
+            print(
+                f"{os.path.getsize(file1) / 1e6:.1f}MB svg: path data {loaded:.2f}s, "
+                f"svgelements segments {segments:.2f}s"
+            )
+        finally:
+            kernel()
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import unittest
 
 from meerk40t.fill.fills import eulerian_fill, scanline_fill
@@ -16,7 +18,7 @@ def draw(fill, w, h, filename="test.png"):
         if last_x is not None:
             draw.line((last_x, last_y, x, y), fill="black")
         last_x, last_y = x, y
-    im.save(filename)
+    im.save(os.path.join(tempfile.gettempdir(), filename))
 
 
 class TestFill(unittest.TestCase):
@@ -1,5 +1,7 @@
 import math
+import os
 import random
+import tempfile
 import time
 import unittest
 from copy import copy
@@ -49,7 +51,7 @@ def draw(segments, min_x, min_y, max_x, max_y, buffer=0, filename="test.png"):
     #     t = segment[-1]
     #     draw.ellipse((f.real - 3, f.imag - 3, f.real + 3, f.imag + 3), fill="#FF0000")
     #     draw.ellipse((t.real - 2, t.imag - 2, t.real + 2, t.imag + 2), fill="#0000FF")
-    im.save(filename)
+    im.save(os.path.join(tempfile.gettempdir(), filename))
 
 
 def draw_geom(segments, min_x, min_y, max_x, max_y, buffer=0, filename="test.png"):
@@ -82,7 +84,7 @@ def draw_geom(segments, min_x, min_y, max_x, max_y, buffer=0, filename="test.png
                 ((f.real - min_x, f.imag - min_y), (t.real - min_x, t.imag - min_y)),
                 fill="#000000",
             )
-    im.save(filename)
+    im.save(os.path.join(tempfile.gettempdir(), filename))
 
 
 def random_point(i=100):
@@ -2425,7 +2427,7 @@ class TestGeomstr(unittest.TestCase):
     def test_render(self):
         rect = Geomstr.rect(x=300, y=200, width=500, height=500, rx=50, ry=50)
         image = rect.segmented().render()
-        image.save("render-test.png")
+        image.save(os.path.join(tempfile.gettempdir(), "render-test.png"))
 
     def test_point_in_polygon(self):
         t1 = 0
@@ -3339,7 +3341,7 @@ class TestGeomstr(unittest.TestCase):
         draw = ImageDraw.Draw(image)
         draw.ellipse((100, 100, 130, 130), "black")
         image = image.convert(mode="1")
-        image.save("geom.png")
+        image.save(os.path.join(tempfile.gettempdir(), "geom.png"))
         g = Geomstr.image(image)
         draw_geom(g, *g.bbox(), filename="geom2.png")
         self.assertEqual(g.index, 31)
@@ -3352,7 +3354,7 @@ class TestGeomstr(unittest.TestCase):
         draw.ellipse((100, 100, 130, 130), "black")
         draw.ellipse((100, 20, 136, 50), "black")
         image = image.convert(mode="1")
-        image.save("geom.png")
+        image.save(os.path.join(tempfile.gettempdir(), "geom.png"))
         g = Geomstr.image(image, vertical=True)
         draw_geom(g, *g.bbox(), filename="geom2.png")
 
@@ -3815,3 +3817,167 @@ class TestGeomstr(unittest.TestCase):
                        "Small geometry should be below threshold")
         self.assertGreater(geom_large.index, THRESHOLD_BBOX, 
                           "Large geometry should be above threshold")
+
+    def test_geomstr_compact(self):
+        """
+        Compact geomstr converts back and its hot paths agree with geomstr.
+        """
+        from meerk40t.tools.geomstr import FLOAT32_TOLERANCE, CompactGeomstr
+
+        path = Geomstr()
+        for i in range(200):
+            random_segment(path, i=50000, arc=False)
+            if i % 10 == 0:
+                path.end()
+        path.arc(0j, 50 + 50j, 100j)
+        path.vertex(3)
+        path.line(1 + 1j, 2 + 2j, settings=4, a=7, b=8)
+
+        precise = path.as_compact(precise=True)
+        self.assertEqual(precise.starts.dtype, np.complex128)
+        restored = Geomstr(precise)
+        self.assertTrue(
+            np.array_equal(
+                restored.segments[: restored.index],
+                path.segments[: path.index],
+                equal_nan=True,
+            )
+        )
+
+        compact = path.as_compact()
+        self.assertIsInstance(compact, CompactGeomstr)
+        self.assertEqual(compact.starts.dtype, np.complex64)
+        self.assertLess(compact.nbytes, path.segments[: path.index].nbytes)
+        restored = compact.as_geomstr()
+        self.assertEqual(restored.index, path.index)
+        segments = path.segments[: path.index]
+        difference = restored.segments[: restored.index] - segments
+        self.assertTrue(
+            np.array_equal(np.isnan(difference), np.isnan(segments))
+        )
+        self.assertLessEqual(
+            np.nanmax(np.abs(difference)), 2 * FLOAT32_TOLERANCE
+        )
+        self.assertEqual(restored.segments[restored.index - 1][1], 7)
+
+        for a, b in zip(compact.bbox(), path.bbox()):
+            self.assertAlmostEqual(a, b, delta=FLOAT32_TOLERANCE)
+        self.assertAlmostEqual(
+            compact.length(), path.length(), delta=path.index * FLOAT32_TOLERANCE
+        )
+        points = list(compact.as_points())
+        expected = list(path.as_points())
+        self.assertEqual(len(points), len(expected))
+        self.assertLessEqual(
+            np.max(np.abs(np.array(points) - np.array(expected))), FLOAT32_TOLERANCE
+        )
+
+        matrix = Matrix("rotate(30) scale(1.5) translate(10,20)")
+        path.transform(matrix)
+        compact.transform(matrix)
+        compact.translate(5, -5)
+        path.translate(5, -5)
+        for a, b in zip(compact.bbox(), path.bbox()):
+            self.assertAlmostEqual(a, b, delta=4 * FLOAT32_TOLERANCE)
+
+        # Coordinates too large for float32 switch to complex128.
+        compact.transform(Matrix.scale(1e4))
+        self.assertEqual(compact.starts.dtype, np.complex128)
+        large = Geomstr.lines(0, 0, 1e9, 1e9).as_compact()
+        self.assertEqual(large.starts.dtype, np.complex128)
+
+    def test_geomstr_compact_origin_control(self):
+        """
+        Curve controls at the origin are stored and transformed like any other control.
+        """
+        path = Geomstr()
+        path.quad(20 + 10j, 0j, 20 + 10j)
+        path.cubic(10 + 10j, 0j, 0j, 20 + 0j)
+        path.line(0j, 5 + 5j)
+        compact = path.as_compact()
+        self.assertEqual(list(compact.control_index), [0, 1])
+        compact.translate(5, 5)
+        path.translate(5, 5)
+        for a, b in zip(compact.bbox(), path.bbox()):
+            self.assertAlmostEqual(a, b, places=3)
+        restored = compact.as_geomstr()
+        self.assertTrue(
+            np.allclose(restored.segments[: restored.index], path.segments[: path.index])
+        )
+
+    def test_geomstr_compact_benchmark(self):
+        """
+        Memory and speed of compact geomstr hatch lines.
+        """
+        n = 200000
+        rng = np.random.default_rng(1)
+        points = rng.uniform(0, 500000, n) + 1j * rng.uniform(0, 500000, n)
+        path = Geomstr()
+        path.append_lines_batch(list(zip(points[::2], points[1::2])))
+        compact = path.as_compact()
+        matrix = Matrix("rotate(30) scale(1.5)")
+        results = []
+        for geometry in (path, compact):
+            t = time.time()
+            geometry.bbox()
+            geometry.length()
+            for p in geometry.as_points():
+                pass
+            geometry.transform(matrix)
+            results.append(time.time() - t)
+        print(
+            f"{path.index} segments: geomstr {path.segments[:path.index].nbytes / 1e6:.1f}MB "
+            f"{results[0]:.3f}s, compact {compact.nbytes / 1e6:.1f}MB {results[1]:.3f}s"
+        )
+        self.assertLess(compact.nbytes * 3, path.segments[: path.index].nbytes)
+
+    def test_geomstr_svg_path_data(self):
+        """
+        Path data tokenized straight into geomstr gives the geometry of svgelements paths.
+        """
+        from meerk40t.svgelements import Path
+
+        random.seed(3)
+        path_data = [
+            "M0,0 L 10 10 20 0 Z",
+            "m 1 1 l 2 2 h 3 v 4 H 1 V 2 z m 5 5 l 1 1",
+            "M0 0 Q 10 10 20 0 T 40 0 t 10 10 S 5 5 1 1",
+            "M 0 0 L 10 0 Z M 0 0 L 5 5 M 5 5 C 1 2 3 4 5 6 s 1 1 2 2",
+            "M0 0 A 10 10 0 0 1 20 0 a 5 10 30 1 0 10 10 L 0 0z",
+            "M 1 1 Q 2 2 z",
+            "M1-2.5.5e1,3",
+        ]
+        for i in range(100):
+            d = ["M", random.uniform(0, 100), random.uniform(0, 100)]
+            for j in range(random.randint(1, 20)):
+                c = random.choice("LlQqCcSsTtHhVvZzMA")
+                count = {"Z": 0, "H": 1, "V": 1, "Q": 4, "C": 6, "S": 4}.get(
+                    c.upper(), 2
+                )
+                if c == "A":
+                    d.append("A 30 20 15 1 0")
+                    count = 2
+                else:
+                    d.append(c)
+                d.extend(f"{random.uniform(-100, 100):.3f}" for k in range(count))
+            path_data.append(" ".join(str(v) for v in d))
+        for d in path_data:
+            p = Path(d)
+            for arc_error in (None, 0.1):
+                if arc_error:
+                    p.approximate_arcs_with_cubics(arc_error)
+                expected = Geomstr.svg(p)
+                g = Geomstr.svg_path_data(d, arc_error=arc_error)
+                self.assertTrue(
+                    np.array_equal(
+                        g.segments[: g.index],
+                        expected.segments[: expected.index],
+                        equal_nan=True,
+                    ),
+                    d,
+                )
+
+        # Malformed path data ends at the error.
+        self.assertEqual(
+            Geomstr.svg_path_data("M 0 0 L 1 1 L 2"), Geomstr.svg("M 0 0 L 1 1")
+        )
@@ -16,3 +16,80 @@ class TestGeomstr(unittest.TestCase):
     def test_polynode_revalidate(self):
         node = PolylineNode(Geomstr.lines(0, 0, 1, 1, 2, 2, 3, 3, 4, 4))
         node.revalidate_points()
+
+    def test_geomstr_copy_on_write(self):
+        """
+        Copies share the segments until either geomstr is edited.
+        """
+        from copy import copy
+
+        from meerk40t.svgelements import Matrix
+
+        original = Geomstr.lines(0, 0, 10, 0, 10, 10)
+        shared = Geomstr(original)
+        copied = copy(original)
+        self.assertIs(shared.segments, original.segments)
+        self.assertIs(copied.segments, original.segments)
+        shared.transform(Matrix.scale(2))
+        self.assertIsNot(shared.segments, original.segments)
+        self.assertEqual(original, Geomstr.lines(0, 0, 10, 0, 10, 10))
+        self.assertEqual(shared, Geomstr.lines(0, 0, 20, 0, 20, 20))
+        original.line(10 + 10j, 0j)
+        self.assertIsNot(original.segments, copied.segments)
+        self.assertEqual(copied, Geomstr.lines(0, 0, 10, 0, 10, 10))
+        self.assertEqual(len(original), 3)
+        # Shared segments cannot be written directly.
+        with self.assertRaises(ValueError):
+            copied.segments[0][0] = 5
+        copied.unshare()
+        copied.segments[0][0] = 5
+        self.assertEqual(copied.segments[0][0], 5)
+
+    def test_node_geometry_cache(self):
+        """
+        Transformed geometry is reused until the matrix or the geometry changes.
+        """
+        import time
+
+        from meerk40t.svgelements import Matrix
+
+        node = PolylineNode(Geomstr.lines(0, 0, 1, 1, 2, 2, 3, 3, 4, 4))
+        node.matrix = Matrix.scale(2)
+        first = node.as_geometry()
+        second = node.as_geometry()
+        self.assertIs(first.segments, second.segments)
+        self.assertEqual(first, Geomstr.lines(0, 0, 2, 2, 4, 4, 6, 6, 8, 8))
+        # Editing a returned geometry does not alter the cache.
+        first.translate(1, 1)
+        self.assertEqual(node.as_geometry(), second)
+        # Matrix changes in place are seen.
+        node.matrix.post_translate(10, 0)
+        self.assertEqual(
+            node.as_geometry(), Geomstr.lines(10, 0, 12, 2, 14, 4, 16, 6, 18, 8)
+        )
+        # Geometry edits are seen.
+        node.geometry.translate(0, 1)
+        self.assertEqual(
+            node.as_geometry(), Geomstr.lines(10, 2, 12, 4, 14, 6, 16, 8, 18, 10)
+        )
+        node.geometry.line(4 + 5j, 5 + 5j)
+        self.assertEqual(len(node.as_geometry()), 5)
+        node.geometry = Geomstr.lines(0, 0, 1, 0)
+        self.assertEqual(node.as_geometry(), Geomstr.lines(10, 0, 12, 0))
+
+        node = PolylineNode(Geomstr.lines(*range(20000)))
+        count = 200
+        t = time.time()
+        for i in range(count):
+            path = Geomstr(node.geometry)
+            path.transform(node.matrix)
+            path.bbox()
+        uncached = time.time() - t
+        t = time.time()
+        for i in range(count):
+            node.as_geometry().bbox()
+        cached = time.time() - t
+        print(
+            f"{count} reads of {len(node.geometry)} segments: "
+            f"copy and transform {uncached:.3f}s, cached {cached:.3f}s"
+        )
@@ -0,0 +1,167 @@
+import time
+import unittest
+from test import bootstrap
+
+import numpy as np
+
+from meerk40t.core.node.node import Fillrule
+from meerk40t.image.rasterizer import (
+    Rasterizer,
+    fill_edges,
+    rasterize_geometry,
+    scanline_mask,
+)
+from meerk40t.svgelements import Color, Matrix
+from meerk40t.tools.geomstr import Geomstr
+
+
+class TestRasterizer(unittest.TestCase):
+    def test_rasterizer_rect_exact(self):
+        """
+        Axis-aligned rects at pixel boundaries cover exactly their area.
+        """
+        geom = Geomstr.rect(2, 3, 10, 5)
+        image = rasterize_geometry(geom, matrix=Matrix(), width=20, height=20)
+        mask = ~np.asarray(image)
+        self.assertEqual(mask.sum(), 50)
+        self.assertTrue(mask[3:8, 2:12].all())
+
+    def test_rasterizer_matrix_size(self):
+        """
+        Without width and height the image spans the transformed geometry.
+        """
+        geom = Geomstr.rect(2, 3, 10, 5)
+        image = rasterize_geometry(geom, matrix=Matrix.scale(2))
+        self.assertEqual(image.size, (24, 16))
+        self.assertEqual((~np.asarray(image)).sum(), 20 * 10)
+        image = rasterize_geometry(geom, matrix=Matrix(), width=30)
+        self.assertEqual(image.size, (30, 8))
+
+    def test_rasterizer_fillrule(self):
+        geom = Geomstr.rect(0, 0, 100, 100)
+        geom.end()
+        geom.append(Geomstr.rect(25, 25, 50, 50))
+        nonzero = ~np.asarray(
+            rasterize_geometry(geom, matrix=Matrix(), width=100, height=100)
+        )
+        evenodd = ~np.asarray(
+            rasterize_geometry(
+                geom, matrix=Matrix(), width=100, height=100, evenodd=True
+            )
+        )
+        self.assertEqual(nonzero.sum(), 100 * 100)
+        self.assertEqual(evenodd.sum(), 100 * 100 - 50 * 50)
+        self.assertFalse(evenodd[50, 50])
+
+    def test_rasterizer_circle_area(self):
+        geom = Geomstr.circle(200, 250, 250)
+        mask = ~np.asarray(
+            rasterize_geometry(geom, matrix=Matrix(), width=500, height=500)
+        )
+        self.assertAlmostEqual(mask.sum() / (np.pi * 200 * 200), 1.0, delta=0.005)
+
+    def test_rasterizer_tiles_match(self):
+        """
+        Tiled parallel rendering gives the same result as a single tile.
+        """
+        geom = Geomstr.circle(300, 310, 290)
+        geom.append(Geomstr.rect(50, 60, 400, 100))
+        s, e = fill_edges(geom)
+        whole = scanline_mask(s, e, 0, 0, 640, 620)
+        rasterizer = Rasterizer(tile_size=97, threads=4)
+        operations = [("fill", (0, 0, 640, 620), s, e, False, (0, 0, 0))]
+        tiled = rasterizer.render(operations, 640, 620)[:, :, 0] == 0
+        self.assertTrue(np.array_equal(whole, tiled))
+
+    def test_rasterizer_make_raster(self):
+        kernel = bootstrap.bootstrap()
+        try:
+            make_raster = kernel.root.lookup("render-op/make_raster")
+            self.assertIsNotNone(make_raster)
+            elements = kernel.elements
+            geom = Geomstr.rect(0, 0, 10000, 10000)
+            geom.end()
+            geom.append(Geomstr.rect(2500, 2500, 5000, 5000))
+            node = elements.elem_branch.add(
+                type="elem path",
+                geometry=geom,
+                fill=Color("black"),
+                stroke=None,
+                fillrule=Fillrule.FILLRULE_EVENODD,
+            )
+            line = elements.elem_branch.add(
+                type="elem path",
+                geometry=Geomstr.lines(0j, 20000 + 20000j),
+                stroke=Color("black"),
+                stroke_width=1000,
+            )
+            image = make_raster(
+                [node], bounds=node.paint_bounds, step_x=100, step_y=100
+            )
+            self.assertEqual(image.size, (100, 100))
+            data = np.asarray(image.convert("L"))
+            self.assertEqual(data[5, 5], 0)
+            self.assertEqual(data[50, 50], 255)
+            image = make_raster(
+                [line], bounds=line.paint_bounds, step_x=100, step_y=100
+            )
+            data = np.asarray(image.convert("L"))
+            self.assertEqual(data[100, 100], 0)
+            self.assertEqual(data[10, 190], 255)
+        finally:
+            kernel()
+
+    def test_rasterizer_large_job(self):
+        """
+        Renders a large job, timed against the wx renderer if available.
+        """
+        kernel = bootstrap.bootstrap()
+        try:
+            elements = kernel.elements
+            nodes = []
+            for i in range(400):
+                x = (i % 20) * 5000
+                y = (i // 20) * 5000
+                geom = Geomstr.circle(2000, x + 2500, y + 2500)
+                geom.append(Geomstr.rect(x + 500, y + 500, 4000, 4000))
+                nodes.append(
+                    elements.elem_branch.add(
+                        type="elem path",
+                        geometry=geom,
+                        fill=Color("black"),
+                        stroke=Color("blue"),
+                        stroke_width=200,
+                        fillrule=Fillrule.FILLRULE_EVENODD,
+                    )
+                )
+            bounds = elements.elem_branch.add(type="group").union_bounds(
+                nodes, attr="paint_bounds"
+            )
+            rasterizer = Rasterizer()
+            t0 = time.perf_counter()
+            image = rasterizer.make_raster(nodes, bounds, step_x=25, step_y=25)
+            elapsed = time.perf_counter() - t0
+            expected = int(np.ceil((bounds[2] - bounds[0]) / 25))
+            self.assertEqual(image.size, (expected, expected))
+            # About 16 megapixels, rendered in well under a second per megapixel.
+            self.assertLess(elapsed, 10.0)
+            try:
+                import wx  # noqa: F401
+
+                from meerk40t.gui.laserrender import LaserRender
+
+                app = wx.App()
+                renderer = LaserRender(kernel.root)
+                t0 = time.perf_counter()
+                wx_image = renderer.make_raster(nodes, bounds, step_x=25, step_y=25)
+                wx_elapsed = time.perf_counter() - t0
+                self.assertLess(elapsed, 2 * wx_elapsed)
+                a = np.asarray(image.convert("L")) < 128
+                b = np.asarray(wx_image.convert("L")) < 128
+                difference = np.count_nonzero(a != b) / a.size
+                self.assertLess(difference, 0.01)
+                del app
+            except ImportError:
+                pass
+        finally:
+            kernel()
@@ -1,6 +1,6 @@
 import unittest
 
-from meerk40t.kernel import kernel_console_command, service_console_command
+from meerk40t.kernel import Service, kernel_console_command, service_console_command
 from test import bootstrap
 
 
@@ -247,3 +247,323 @@ class TestEchoCommand(unittest.TestCase):
                 kernel.console(echo + "\n")
         finally:
             kernel()
+
+
+class TestKernelScheduler(unittest.TestCase):
+    def test_scheduler_timing(self):
+        """
+        Jobs run at their time, not at the next scheduler tick.
+        """
+        import time
+
+        kernel = bootstrap.bootstrap()
+        try:
+            runs = []
+            kernel.add_job(
+                run=lambda: runs.append(time.time()),
+                name="test_timing",
+                interval=0.013,
+                times=10,
+            )
+            start = time.time()
+            while (
+                kernel.job_statistics.get("test_timing", [0])[0] < 10
+                and time.time() - start < 5
+            ):
+                time.sleep(0.01)
+            self.assertEqual(len(runs), 10)
+            self.assertNotIn("test_timing", kernel.jobs)
+            gaps = [b - a for a, b in zip(runs, runs[1:])]
+            jitter = max(abs(g - 0.013) for g in gaps)
+            print(
+                f"scheduler jitter: {jitter * 1000:.2f}ms, tick {kernel.delay * 1000:.0f}ms"
+            )
+            self.assertEqual(kernel.job_statistics["test_timing"][0], 10)
+        finally:
+            kernel()
+
+    def test_scheduler_wakeup(self):
+        """
+        Scheduling and unscheduling wake the scheduler immediately.
+        """
+        import time
+
+        kernel = bootstrap.bootstrap()
+        try:
+            runs = []
+            job = kernel.add_job(
+                run=lambda: runs.append(time.time()), name="test_late", interval=3600
+            )
+            time.sleep(0.05)
+            kernel.unschedule(job)
+            start = time.time()
+            kernel.add_job(
+                run=lambda: runs.append(time.time()),
+                name="test_soon",
+                interval=0.001,
+                times=1,
+            )
+            while not runs and time.time() - start < 5:
+                time.sleep(0.001)
+            self.assertEqual(len(runs), 1)
+            self.assertLess(runs[0] - start, 0.5)
+            kernel.set_timer("echo timer\n", name="test", times=1, interval=0.001)
+            start = time.time()
+            while "timertest" not in kernel.job_statistics and time.time() - start < 5:
+                time.sleep(0.001)
+            self.assertNotIn("timertest", kernel.jobs)
+            self.assertEqual(kernel.job_statistics["timertest"][0], 1)
+            kernel.console("schedule --stats\n")
+        finally:
+            kernel()
+
+
+class TestKernelChannel(unittest.TestCase):
+    def test_channel_deferred_log(self):
+        """
+        Deferred messages are only formatted when someone reads them.
+        """
+        from meerk40t.kernel import Channel
+
+        formatted = []
+
+        def text(value):
+            formatted.append(value)
+            return f"value {value}"
+
+        chan = Channel("test", buffer_size=2)
+        self.assertFalse(chan.watched)
+        chan.log(text, 1)
+        chan.log(text, 2)
+        chan.log(text, 3)
+        self.assertEqual(formatted, [])
+        seen = []
+        chan.watch(seen.append)
+        self.assertTrue(chan.watched)
+        # The buffer kept the last two, formatted as they are replayed.
+        self.assertEqual(seen, ["    value 2", "    value 3"])
+        self.assertEqual(formatted, [2, 3])
+        chan.log("write(%s)", b"abc")
+        self.assertEqual(seen[-1], "    write(b'abc')")
+
+    def test_channel_trace(self):
+        """
+        Traced channels record every message into the ring buffer.
+        """
+        import time
+
+        kernel = bootstrap.bootstrap()
+        try:
+            trace = kernel.trace_channels(size=4)
+            quiet = kernel.channel("quiet")
+            self.assertTrue(quiet)
+            for i in range(6):
+                quiet.log("message %d", i)
+            kernel.channel("later")("hello")
+            entries = list(trace.entries())
+            self.assertEqual(len(entries), 4)
+            self.assertEqual(
+                [(name, payload) for t, name, payload in entries],
+                [
+                    ("quiet", "message 3"),
+                    ("quiet", "message 4"),
+                    ("quiet", "message 5"),
+                    ("later", "hello"),
+                ],
+            )
+            self.assertTrue(all(t <= time.time() for t, name, payload in entries))
+            kernel.console("channel trace --dump\n")
+            kernel.console("channel trace --stop\n")
+            self.assertIsNone(quiet.trace)
+            self.assertFalse(quiet)
+
+            # Logging to unwatched channels costs next to nothing.
+            t = time.time()
+            for i in range(100000):
+                quiet.log("write(%s)", b"data")
+            t0 = time.time() - t
+            t = time.time()
+            for i in range(100000):
+                quiet(f"write({str(b'data')})")
+            t1 = time.time() - t
+            print(
+                f"100000 messages to an unwatched channel: {t0:.3f}s deferred, {t1:.3f}s formatted"
+            )
+        finally:
+            kernel()
+
+
+class TestKernelRegistry(unittest.TestCase):
+    def test_registry_literal_prefix(self):
+        from meerk40t.kernel.registry import literal_prefix
+
+        self.assertEqual(literal_prefix("path_updater/.*"), "path_updater/")
+        self.assertEqual(literal_prefix("command/None/hello"), "command/None/hello")
+        self.assertEqual(literal_prefix("service/(.*)/active"), "service/")
+        self.assertEqual(literal_prefix("op?/.*"), "o")
+        self.assertEqual(literal_prefix("tree/{3}"), "tree")
+        self.assertEqual(literal_prefix("format/a|command/b"), "")
+        self.assertEqual(literal_prefix(".*"), "")
+
+    def test_registry_find(self):
+        """
+        Indexed and cached lookups match a scan of every registered path, in order.
+        """
+        import re
+
+        kernel = bootstrap.bootstrap()
+        try:
+
+            def scan(matchtext):
+                match = re.compile(matchtext)
+                registries = [s._registered for d, s in kernel.services_active()]
+                registries.append(kernel._registered)
+                return [
+                    (registry[r], r, r.split("/")[-1])
+                    for registry in registries
+                    for r in registry
+                    if match.match(r)
+                ]
+
+            patterns = (
+                "command/.*",
+                "tree/.*",
+                "format/.*",
+                ".*",
+                "c.*",
+                "command/(None|elements)/.*",
+                "service/(.*)/available",
+                "choices/.*",
+            )
+            for matchtext in patterns:
+                self.assertEqual(list(kernel.find(matchtext)), scan(matchtext))
+                # Cached
+                self.assertEqual(list(kernel.find(matchtext)), scan(matchtext))
+            self.assertEqual(
+                list(kernel.match("format/.*", suffix=True)),
+                [r[2] for r in scan("format/.*")],
+            )
+
+            # Register, unregister and activation invalidate cached results.
+            self.assertEqual(list(kernel.lookup_all("test_registry/.*")), [])
+            kernel.register("test_registry/b", 2)
+            kernel.elements.register("test_registry/a", 1)
+            kernel.register("test_registry_other/c", 3)
+            self.assertEqual(list(kernel.lookup_all("test_registry/.*")), [1, 2])
+            kernel.unregister("test_registry/b")
+            self.assertEqual(list(kernel.lookup_all("test_registry/.*")), [1])
+            service = Service(kernel, "test_registry")
+            service.register("test_registry/d", 4)
+            self.assertEqual(list(kernel.lookup_all("test_registry/.*")), [1])
+            kernel.add_service("test_registry", service)
+            self.assertEqual(list(kernel.lookup_all("test_registry/.*")), [1, 4])
+            self.assertEqual(
+                list(kernel.find("test_registry.*")), scan("test_registry.*")
+            )
+        finally:
+            kernel()
+
+    def test_registry_find_benchmark(self):
+        import re
+        import time
+
+        kernel = bootstrap.bootstrap()
+        try:
+            registries = [s._registered for d, s in kernel.services_active()]
+            registries.append(kernel._registered)
+            count = sum(len(r) for r in registries)
+            match = re.compile("path_updater/.*")
+            t = time.time()
+            for i in range(1000):
+                [r for registry in registries for r in registry if match.match(r)]
+            t0 = time.time() - t
+            t = time.time()
+            for i in range(1000):
+                list(kernel.lookup_all("path_updater/.*"))
+            t1 = time.time() - t
+            print(
+                f"1000 lookups among {count} registered: {t0:.3f}s scanned, {t1:.3f}s indexed"
+            )
+        finally:
+            kernel()
+
+
+class TestKernelConsoleDispatch(unittest.TestCase):
+    def test_console_dispatch_order(self):
+        """
+        Exact and regex commands are tried in registration order, a rejected match falls
+        through to the next candidate, registration changes rebuild the table.
+        """
+        from meerk40t.kernel import CommandMatchRejected
+
+        kernel = bootstrap.bootstrap()
+        try:
+            calls = []
+
+            @kernel.console_command("dispatch_[a-z]+", regex=True, hidden=True)
+            def dispatch_regex(command, **kwargs):
+                calls.append(("regex", command))
+                if command == "dispatch_skip":
+                    raise CommandMatchRejected
+
+            @kernel.console_command(("dispatch_exact", "dispatch_skip"))
+            def dispatch_exact(command, **kwargs):
+                calls.append(("exact", command))
+
+            kernel.console(".dispatch_exact\n")
+            kernel.console(".dispatch_skip\n")
+            kernel.console(".dispatch_other\n")
+            self.assertEqual(
+                calls,
+                [
+                    ("regex", "dispatch_exact"),
+                    ("regex", "dispatch_skip"),
+                    ("exact", "dispatch_skip"),
+                    ("regex", "dispatch_other"),
+                ],
+            )
+            self.assertTrue(kernel.has_command("dispatch_exact"))
+            self.assertFalse(kernel.has_command("dispatch_other"))
+
+            calls.clear()
+            kernel.console_command_remove("dispatch_[a-z]+")
+            kernel.console(".dispatch_exact\n")
+            kernel.console(".dispatch_other\n")
+            self.assertEqual(calls, [("exact", "dispatch_exact")])
+
+            @kernel.console_command("dispatch_other")
+            def dispatch_other(command, **kwargs):
+                calls.append(("other", command))
+
+            kernel.console(".dispatch_other\n")
+            self.assertEqual(calls[-1], ("other", "dispatch_other"))
+        finally:
+            kernel()
+
+    def test_console_dispatch_benchmark(self):
+        """
+        Runs a large command script of chained commands.
+        """
+        import time
+
+        kernel = bootstrap.bootstrap()
+        try:
+            calls = []
+
+            @kernel.console_command("bench", output_type="bench")
+            def bench(command, data=None, **kwargs):
+                calls.append(command)
+                return "bench", data
+
+            @kernel.console_command("chain", input_type="bench", output_type="bench")
+            def chain(command, data=None, **kwargs):
+                return "bench", data
+
+            script = "".join(".bench chain chain\n" for i in range(5000))
+            t = time.time()
+            kernel.console(script)
+            t0 = time.time() - t
+            self.assertEqual(len(calls), 5000)
+            print(f"Console script of 5000 lines, 15000 commands: {t0:.3f}s")
+        finally:
+            kernel()
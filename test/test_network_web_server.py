@@ -0,0 +1,140 @@
+import http.client
+import json
+import threading
+import time
+import unittest
+from test import bootstrap
+
+
+class TestAsyncWebServer(unittest.TestCase):
+    def setUp(self):
+        self.kernel = bootstrap.bootstrap()
+        self.server = self.kernel.root.open_as(
+            "module/AsyncWebServer", "rest-server", port=0, host="127.0.0.1"
+        )
+        self.assertTrue(self.server.ready.wait(5))
+        self.assertIsNotNone(self.server.server)
+        self.port = self.server.port
+
+    def tearDown(self):
+        self.kernel.root.close("rest-server")
+        self.kernel()
+
+    def connection(self):
+        return http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+
+    def get(self, con, path):
+        con.request("GET", path)
+        response = con.getresponse()
+        return response.status, json.loads(response.read())
+
+    def test_web_server_keep_alive(self):
+        """
+        Several requests are answered over the same connection.
+        """
+        con = self.connection()
+        try:
+            status, index = self.get(con, "/api")
+            self.assertEqual(status, 200)
+            self.assertIn("GET /api/events", index["endpoints"])
+            sock = con.sock
+            status, spooler = self.get(con, "/api/spooler")
+            self.assertEqual(status, 200)
+            self.assertTrue(spooler)
+            self.assertEqual(spooler[0]["jobs"], [])
+            status, position = self.get(con, "/api/position")
+            self.assertEqual(status, 200)
+            self.assertEqual(len(position[0]["position"]), 2)
+            status, plans = self.get(con, "/api/planner")
+            self.assertEqual(status, 200)
+            self.assertIsInstance(plans, list)
+            # Same socket, the connection was kept alive.
+            self.assertIs(con.sock, sock)
+            status, error = self.get(con, "/api/missing")
+            self.assertEqual(status, 404)
+            con.request("POST", "/api/spooler")
+            response = con.getresponse()
+            response.read()
+            self.assertEqual(response.status, 405)
+        finally:
+            con.close()
+
+    def test_web_server_console(self):
+        """
+        Posted console commands are executed.
+        """
+        executed = []
+
+        @self.kernel.console_argument("value", type=int)
+        @self.kernel.console_command("webtest")
+        def webtest(value=None, **kwargs):
+            executed.append(value)
+
+        con = self.connection()
+        try:
+            con.request("POST", "/api/console", body="webtest 7\nwebtest 8\n")
+            response = con.getresponse()
+            self.assertEqual(
+                json.loads(response.read()), {"commands": ["webtest 7", "webtest 8"]}
+            )
+        finally:
+            con.close()
+        self.assertEqual(executed, [7, 8])
+
+    def test_web_server_concurrent_events(self):
+        """
+        Event streams and idle connections do not block other clients, signals are
+        streamed to every subscriber.
+        """
+        idle = self.connection()
+        idle.connect()
+        streams = [self.connection() for i in range(2)]
+        received = [[] for s in streams]
+        try:
+            responses = []
+            for con in streams:
+                con.request("GET", "/api/events")
+                response = con.getresponse()
+                self.assertEqual(response.status, 200)
+                self.assertEqual(
+                    response.getheader("Content-Type"), "text/event-stream"
+                )
+                self.assertEqual(response.readline(), b": connected\n")
+                response.readline()
+                responses.append(response)
+
+            def read(response, events):
+                while len(events) < 2:
+                    line = response.readline()
+                    if not line:
+                        break
+                    if line.startswith(b"data:"):
+                        events.append(json.loads(line[5:]))
+
+            readers = [
+                threading.Thread(target=read, args=(r, e), daemon=True)
+                for r, e in zip(responses, received)
+            ]
+            for reader in readers:
+                reader.start()
+            # Subscribers are connected, polling is still answered.
+            poll = self.connection()
+            try:
+                status, spooler = self.get(poll, "/api/spooler")
+                self.assertEqual(status, 200)
+            finally:
+                poll.close()
+            # Listeners attach when the scheduler processes the signal queue.
+            end = time.time() + 5
+            while any(len(e) < 2 for e in received) and time.time() < end:
+                self.kernel.root.signal("spooler;queue", 3)
+                self.kernel.root.signal("driver;position", (0, 0, 10.5, 20))
+                time.sleep(0.1)
+            for events in received:
+                self.assertGreaterEqual(len(events), 2)
+                args = [e["args"] for e in events]
+                self.assertTrue([3] in args or [[0, 0, 10.5, 20]] in args)
+        finally:
+            for con in streams:
+                con.close()
+            idle.close()
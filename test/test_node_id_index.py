@@ -0,0 +1,145 @@
+"""
+Unit tests for the id index of the RootNode, which backs Elemental.find_node.
+"""
+
+import time
+import unittest
+from test.bootstrap import bootstrap
+
+from meerk40t.tools.geomstr import Geomstr
+
+
+class TestNodeIdIndex(unittest.TestCase):
+    def setUp(self):
+        self.kernel = bootstrap()
+        self.elements = self.kernel.elements
+        self.root = self.elements._tree
+
+    def tearDown(self):
+        self.kernel()
+
+    def add_rect(self, parent=None, **kwargs):
+        if parent is None:
+            parent = self.elements.elem_branch
+        return parent.add(type="elem rect", x=0, y=0, width=1000, height=1000, **kwargs)
+
+    def test_find_node(self):
+        node = self.add_rect(id="rect1")
+        self.assertIs(self.elements.find_node("rect1"), node)
+        self.assertIsNone(self.elements.find_node("rect2"))
+        node.id = "rect2"
+        self.assertIsNone(self.elements.find_node("rect1"))
+        self.assertIs(self.elements.find_node("rect2"), node)
+        node.remove_node()
+        self.assertIsNone(self.elements.find_node("rect2"))
+        self.root.validate_id_index()
+
+    def test_find_nodes(self):
+        nodes = [self.add_rect(id=f"r{i}") for i in range(10)]
+        found = self.elements.find_nodes(["r1", "r5", "missing"])
+        self.assertEqual(found, {"r1": nodes[1], "r5": nodes[5]})
+
+    def test_structure_changes(self):
+        group = self.elements.elem_branch.add(type="group", id="group")
+        child = self.add_rect(parent=group, id="child")
+        self.assertIs(self.elements.find_node("child"), child)
+        # Move group with its children into another group.
+        other = self.elements.elem_branch.add(type="group", id="other")
+        other.append_child(group)
+        self.assertIs(self.elements.find_node("child"), child)
+        self.root.validate_id_index()
+        # Removing without notifications.
+        group.remove_node(fast=True)
+        self.assertIsNone(self.elements.find_node("group"))
+        self.assertIsNone(self.elements.find_node("child"))
+        self.root.validate_id_index()
+        # Group created with children before attaching.
+        group = self.elements.elem_branch.create(type="group", id="new")
+        group.add_node(self.elements.elem_branch.create(type="elem rect", id="inner"))
+        self.elements.elem_branch.add_node(group)
+        self.assertIsNotNone(self.elements.find_node("inner"))
+        self.root.validate_id_index()
+
+    def test_detached_subtree(self):
+        group = self.elements.elem_branch.add(type="group", id="group")
+        self.add_rect(parent=group, id="child")
+        self.assertIsNotNone(self.elements.find_node("child"))
+        group.remove_node(children=False)
+        self.assertNotIn("group", self.root._ids())
+        self.assertNotIn("child", self.root._ids())
+        self.root.validate_id_index()
+
+    def test_unset_ids_not_indexed(self):
+        self.root._ids()
+        nodes = [self.add_rect() for i in range(10)]
+        nodes[0].id = ""
+        self.assertNotIn(None, self.root._ids())
+        self.assertNotIn("", self.root._ids())
+        self.assertEqual(self.root.nodes_with_id(""), [nodes[0]])
+        self.root.validate_id_index()
+
+    def test_validate_ids(self):
+        a = self.add_rect(id="same")
+        b = self.add_rect(id="same")
+        c = self.add_rect()
+        self.assertTrue(self.elements.validate_ids())
+        self.assertEqual(a.id, "same")
+        self.assertNotEqual(b.id, "same")
+        self.assertIsNotNone(c.id)
+        self.assertNotEqual(b.id, c.id)
+        self.assertFalse(self.elements.validate_ids())
+        self.root.validate_id_index()
+
+    def test_tree_order(self):
+        later = self.add_rect(id="same")
+        last = self.add_rect()
+        first = self.add_rect(id="same", pos=0)
+        missing = self.add_rect(pos=0)
+        self.assertIs(self.elements.find_node("same"), first)
+        self.assertEqual(self.root.nodes_with_id("same"), [first, later])
+        self.assertTrue(self.elements.validate_ids())
+        self.assertEqual(first.id, "same")
+        # New ids are given in tree order.
+        numbers = [int(n.id.split(":")[-1]) for n in (missing, later, last)]
+        self.assertEqual(numbers, sorted(numbers))
+        # Moving a node keeps the nodes of an id in tree order.
+        group = self.elements.elem_branch.add(type="group", pos=0)
+        later.id = "same"
+        group.append_child(later)
+        self.assertEqual(self.root.nodes_with_id("same"), [later, first])
+        self.elements.elem_branch.reverse()
+        self.assertEqual(self.root.nodes_with_id("same"), [first, later])
+
+    def test_undo_restores_index(self):
+        node = self.add_rect(id="keep")
+        with self.elements.undoscope("Delete"):
+            node.remove_node()
+        self.assertIsNone(self.elements.find_node("keep"))
+        self.assertTrue(self.elements.undo.has_undo())
+        self.elements.undo.undo()
+        restored = self.elements.find_node("keep")
+        self.assertIsNotNone(restored)
+        self.assertIsNot(restored, node)
+        self.root.validate_id_index()
+
+    def test_find_node_benchmark(self):
+        for i in range(5000):
+            self.elements.elem_branch.add(
+                type="elem path", geometry=Geomstr.rect(i, i, 10, 10), id=f"p{i}"
+            )
+        t = time.time()
+        for i in range(0, 5000, 5):
+            self.assertIsNotNone(self.elements.find_node(f"p{i}"))
+        t1 = time.time() - t
+        t = time.time()
+        for i in range(0, 5000, 50):
+            next(n for n in self.elements.flat() if n.id == f"p{i}")
+        t2 = time.time() - t
+        self.assertLess(t1, t2)
+        t = time.time()
+        for i in range(5000):
+            self.add_rect()
+        self.elements.validate_ids()
+        t3 = time.time() - t
+        # Nodes without an id must not make attaching them quadratic.
+        self.assertLess(t3, 5)
@@ -0,0 +1,154 @@
+"""
+Unit tests for the spatial index of the RootNode, used for selection and hit-testing.
+"""
+
+import time
+import unittest
+from test.bootstrap import bootstrap
+
+from meerk40t.core.elements.element_types import elem_nodes
+from meerk40t.svgelements import Color
+from meerk40t.tools.geomstr import Geomstr
+
+
+class TestNodeSpatialIndex(unittest.TestCase):
+    def setUp(self):
+        self.kernel = bootstrap()
+        self.elements = self.kernel.elements
+        self.root = self.elements._tree
+
+    def tearDown(self):
+        self.kernel()
+
+    def add_rect(self, x, y, size=1000, parent=None):
+        if parent is None:
+            parent = self.elements.elem_branch
+        return parent.add(
+            type="elem path",
+            geometry=Geomstr.rect(x, y, size, size),
+            stroke=Color("black"),
+        )
+
+    def test_spatial_index_updates(self):
+        a = self.add_rect(0, 0)
+        b = self.add_rect(5000, 0)
+        self.assertEqual(self.root.nodes_at(500, 500), [a])
+        self.assertEqual(
+            set(self.root.nodes_in((-10, -10, 7000, 2000), contained=True)), {a, b}
+        )
+        self.assertEqual(
+            self.root.nodes_in((-10, -10, 3000, 2000), contained=True), [a]
+        )
+        a.matrix.post_translate(10000, 0)
+        a.translated(10000, 0)
+        self.assertEqual(self.root.nodes_at(500, 500), [])
+        self.assertEqual(self.root.nodes_at(10500, 500), [a])
+        b.matrix.post_scale(2, 2, 5000, 0)
+        b.scaled(sx=2, sy=2, ox=5000, oy=0)
+        self.assertEqual(self.root.nodes_at(6500, 1500), [b])
+        b.geometry = Geomstr.rect(20000, 20000, 10, 10)
+        b.altered()
+        self.assertEqual(self.root.nodes_at(6500, 1500), [])
+        self.root.validate_spatial_index()
+        # Removal with and without notification.
+        b.remove_node()
+        a.remove_node(fast=True)
+        self.assertEqual(self.root.nodes_at(10500, 500), [])
+        self.assertEqual(self.root.nodes_at(20005, 20005), [])
+        self.root.validate_spatial_index()
+
+    def test_spatial_index_groups(self):
+        group = self.elements.elem_branch.add(type="group")
+        child = self.add_rect(0, 0, parent=group)
+        self.assertEqual(set(self.root.nodes_at(500, 500)), {group, child})
+        child.matrix.post_translate(3000, 0)
+        child.translated(3000, 0)
+        group.set_dirty_bounds()
+        self.assertEqual(set(self.root.nodes_at(3500, 500)), {group, child})
+        self.root.validate_spatial_index()
+        distance, nearest = self.root.nodes_nearest(0, 500)[0]
+        self.assertAlmostEqual(distance, 3000)
+
+    def test_spatial_index_dirty_bounds(self):
+        a = self.add_rect(0, 0)
+        self.assertEqual(self.root.nodes_at(500, 500), [a])
+        # Bounds flagged dirty without any notification.
+        a.matrix.post_translate(10000, 0)
+        a.set_dirty_bounds()
+        self.assertEqual(self.root.nodes_at(500, 500), [])
+        self.assertEqual(self.root.nodes_at(10500, 500), [a])
+        self.root.validate_spatial_index()
+
+    def test_select_by_position(self):
+        small = self.add_rect(100, 100, size=100)
+        large = self.add_rect(0, 0, size=1000)
+        self.elements.set_emphasized_by_position((150, 150), use_smallest=True)
+        self.assertTrue(small.emphasized)
+        self.assertFalse(large.emphasized)
+        self.elements.set_emphasized_by_position((150, 150))
+        self.assertTrue(large.emphasized)
+        self.assertFalse(small.emphasized)
+        self.elements.set_emphasized_by_position((5000, 5000))
+        self.assertFalse(large.emphasized)
+
+    def test_emphasis_flagged_nodes(self):
+        a = self.add_rect(0, 0)
+        b = self.add_rect(5000, 0)
+        group = self.elements.elem_branch.add(type="group")
+        c = self.add_rect(10000, 0, parent=group)
+        self.assertEqual(self.root.flagged_nodes(), [])
+        self.elements.set_emphasis([b])
+        self.assertEqual(set(self.root.flagged_nodes()), {b})
+        # Flags set outside of set_emphasis are tracked as well.
+        a.emphasized = True
+        group.emphasized = True
+        self.assertEqual(list(self.elements.elems(emphasized=True)), [a, b, c])
+        self.assertEqual(
+            list(self.root.flat_emphasized(self.elements.elem_branch, elem_nodes)),
+            [a, b, c],
+        )
+        self.elements.set_emphasized_by_position((5500, 500), keep_old_selection=True)
+        self.assertEqual(list(self.elements.elems(emphasized=True)), [a, b, c])
+        d = self.add_rect(15000, 0)
+        self.elements.set_emphasized_by_position((15500, 500))
+        self.assertEqual(list(self.elements.elems(emphasized=True)), [d])
+        self.assertFalse(b.selected)
+        self.assertFalse(group.emphasized)
+        self.elements.set_emphasis(None)
+        self.assertFalse(self.elements.has_emphasis())
+        self.assertEqual(self.root.flagged_nodes(), [])
+
+    def test_undo_resets_spatial_index(self):
+        node = self.add_rect(0, 0)
+        self.assertEqual(self.root.nodes_at(500, 500), [node])
+        with self.elements.undoscope("Delete"):
+            node.remove_node()
+        self.assertEqual(self.root.nodes_at(500, 500), [])
+        self.assertTrue(self.elements.undo.has_undo())
+        self.elements.undo.undo()
+        self.assertEqual(len(self.root.nodes_at(500, 500)), 1)
+        self.root.validate_spatial_index()
+
+    def test_spatial_index_benchmark(self):
+        for i in range(20000):
+            self.add_rect((i % 200) * 100, (i // 200) * 100, size=50)
+        t = time.time()
+        self.root.spatial_index()
+        t0 = time.time() - t
+        t = time.time()
+        for i in range(100):
+            found = self.elements.elems_nodes_at((i * 100 + 25, 125))
+            self.assertEqual(len(found), 1)
+        t1 = (time.time() - t) / 100
+        self.elements.set_emphasized_by_position((125, 125))
+        t = time.time()
+        for i in range(100):
+            self.elements.set_emphasized_by_position((i * 100 + 25, 125))
+        t2 = (time.time() - t) / 100
+        t = time.time()
+        list(self.elements.elems())
+        t3 = time.time() - t
+        # Neither hit testing nor selecting may walk the tree.
+        self.assertLess(t1, t3 / 10)
+        self.assertLess(t2, t3 / 10)
+        self.assertLess(t0, 10)
@@ -1,11 +1,15 @@
+import time
 import unittest
 
+import numpy as np
+
 from meerk40t.core.cutcode.cutcode import CutCode
 from meerk40t.core.cutplan import CutPlan
 from meerk40t.core.node.effect_hatch import HatchEffectNode
 from meerk40t.core.node.elem_path import PathNode
 from meerk40t.core.node.op_engrave import EngraveOpNode
-from meerk40t.svgelements import Matrix, Path
+from meerk40t.svgelements import Color, Matrix, Path
+from meerk40t.tools.geomstr import CompactGeomstr, Geomstr
 from test import bootstrap
 
 
@@ -55,3 +59,131 @@ class TestHatch(unittest.TestCase):
             self.assertEqual(len(g), 0)
         finally:
             kernel()
+
+
+class TestEffectCache(unittest.TestCase):
+    def setUp(self):
+        self.kernel = bootstrap.bootstrap()
+        self.elements = self.kernel.elements
+
+    def tearDown(self):
+        self.kernel()
+
+    def add_effect(self, effect_type, **kwargs):
+        effect = self.elements.elem_branch.add(type=effect_type, **kwargs)
+        node = effect.add(
+            type="elem path",
+            geometry=Geomstr.rect(0, 0, 20000, 20000),
+            stroke=Color("black"),
+        )
+        return effect, node
+
+    def assertGeometryEqual(self, g1, g2):
+        self.assertEqual(len(g1), len(g2))
+        self.assertTrue(
+            np.allclose(
+                g1.segments[: g1.index], g2.segments[: g2.index], equal_nan=True
+            )
+        )
+
+    def count_calculations(self, effect, name):
+        calls = []
+        calculate = getattr(effect, name)
+
+        def counted(**kws):
+            calls.append(kws)
+            return calculate(**kws)
+
+        setattr(effect, name, counted)
+        return calls
+
+    def test_effect_cache_reused(self):
+        for effect_type, name in (
+            ("effect hatch", "_hatch_geometry"),
+            ("effect wobble", "_wobble_geometry"),
+            ("effect warp", "_warp_geometry"),
+        ):
+            effect, node = self.add_effect(effect_type)
+            calls = self.count_calculations(effect, name)
+            first = effect.as_geometry()
+            self.assertGeometryEqual(effect.as_geometry(), first)
+            effect.as_geometry().translate(500, 500)
+            self.assertGeometryEqual(effect.as_geometry(), first)
+            self.assertEqual(len(calls), 1, effect_type)
+
+    def test_effect_cache_translation(self):
+        effect, node = self.add_effect("effect hatch", hatch_distance="2mm")
+        calls = self.count_calculations(effect, "_hatch_geometry")
+        first = effect.as_geometry()
+        # Translation with known bounds, as within the scene.
+        self.assertIsNotNone(node.bounds)
+        node.matrix.post_translate(1000, 2000)
+        node.translated(1000, 2000)
+        moved = effect.as_geometry()
+        self.assertEqual(len(calls), 1)
+        first.translate(1000, 2000)
+        self.assertGeometryEqual(moved, first)
+        effect.effect_cache_clear()
+        self.assertGeometryEqual(effect.as_geometry(), moved)
+        self.assertEqual(len(calls), 2)
+        # Children moved by different offsets need a recalculation.
+        other = effect.add(
+            type="elem path",
+            geometry=Geomstr.rect(30000, 0, 5000, 5000),
+            stroke=Color("black"),
+        )
+        effect.as_geometry()
+        self.assertEqual(len(calls), 3)
+        self.assertIsNotNone(other.bounds)
+        other.matrix.post_translate(100, 0)
+        other.translated(100, 0)
+        effect.as_geometry()
+        self.assertEqual(len(calls), 4)
+
+    def test_effect_cache_compact(self):
+        effect, node = self.add_effect("effect hatch", hatch_distance="0.1mm")
+        first = effect.as_geometry()
+        (entry,) = effect._effect_cache.values()
+        compact = entry[1]
+        self.assertIsInstance(compact, CompactGeomstr)
+        self.assertLessEqual(compact.nbytes * 2, first.segments[: first.index].nbytes)
+        cached = effect.as_geometry()
+        self.assertTrue(
+            np.array_equal(
+                cached.segments[: cached.index],
+                first.segments[: first.index],
+                equal_nan=True,
+            )
+        )
+
+    def test_effect_cache_invalidated(self):
+        effect, node = self.add_effect("effect hatch", hatch_distance="2mm")
+        calls = self.count_calculations(effect, "_hatch_geometry")
+        first = effect.as_geometry()
+        node.geometry = Geomstr.rect(0, 0, 10000, 10000)
+        node.altered()
+        smaller = effect.as_geometry()
+        self.assertLess(len(smaller), len(first))
+        node.matrix.post_scale(2, 2)
+        node.scaled(2, 2, 0, 0)
+        self.assertEqual(len(effect.as_geometry()), len(first))
+        effect.hatch_distance = "1mm"
+        effect.recalculate()
+        self.assertGreater(len(effect.as_geometry()), len(first))
+        self.assertEqual(len(calls), 4)
+
+    def test_effect_cache_benchmark(self):
+        effect, node = self.add_effect("effect hatch", hatch_distance="0.1mm")
+        self.assertIsNotNone(node.bounds)
+        t = time.time()
+        effect.as_geometry()
+        t1 = time.time() - t
+        t = time.time()
+        for i in range(10):
+            node.matrix.post_translate(100, 0)
+            node.translated(100, 0)
+            effect.as_geometry()
+        t2 = (time.time() - t) / 10
+        print(
+            f"hatch calculated in {t1:.4f}s, moved hatch taken from cache in {t2:.4f}s"
+        )
@@ -1,4 +1,5 @@
 import unittest
+from test import bootstrap
 
 state = 0
 
@@ -16,3 +17,304 @@ class TestRuida(unittest.TestCase):
         self.assertEqual(keys[b"K\x12\x96p"], 0x11)
         self.assertEqual(keys[b"-x\xf4\n"], 0x77)
         self.assertEqual(keys[b"\xb6\xefk\x91"], 0xEE)
+
+    def test_swizzle_tables(self):
+        """
+        Translation tables match the per byte swizzle.
+        """
+        from meerk40t.ruida.rdjob import (
+            decode_bytes,
+            encode_bytes,
+            swizzle_byte,
+            unswizzle_byte,
+        )
+
+        data = bytes(range(256))
+        for magic in (0x11, 0x38, 0x88):
+            encoded = encode_bytes(data, magic)
+            self.assertEqual(encoded, bytes(swizzle_byte(b, magic) for b in data))
+            decoded = decode_bytes(encoded, magic)
+            self.assertEqual(decoded, data)
+            self.assertEqual(
+                decode_bytes(bytearray(data), magic),
+                bytes(unswizzle_byte(b, magic) for b in data),
+            )
+
+    def test_rd_decoder(self):
+        """
+        Streaming decoder gives the same commands for any chunking.
+        """
+        import random
+
+        from meerk40t.ruida.rdjob import (
+            RdDecoder,
+            decode_bytes,
+            determine_magic_via_histogram,
+            parse_commands,
+        )
+
+        data = rd_file(2000, magic=0x38)
+        self.assertEqual(determine_magic_via_histogram(data), 0x38)
+        expected = list(parse_commands(decode_bytes(data, 0x38)))
+        self.assertEqual(b"".join(expected), decode_bytes(data, 0x38))
+        rnd = random.Random(7)
+        for i in range(5):
+            decoder = RdDecoder(0x38)
+            commands = []
+            position = 0
+            while position < len(data):
+                size = rnd.randint(1, 64)
+                commands.extend(decoder.feed(data[position : position + size]))
+                position += size
+            commands.extend(decoder.flush())
+            self.assertEqual(commands, expected)
+
+    def test_rd_process_table(self):
+        """
+        Table driven processing describes and plots the commands.
+        """
+        from meerk40t.ruida.exceptions import RuidaCommandError
+        from meerk40t.ruida.rdjob import RDJob
+        from meerk40t.svgelements import Matrix
+
+        class Driver:
+            def __init__(self):
+                self.plots = []
+
+            def plot(self, plot):
+                self.plots.append(list(plot.generator()))
+
+            def plot_start(self):
+                self.plots.append("start")
+
+        driver = Driver()
+        job = RDJob(driver=driver, units_to_device_matrix=Matrix())
+        lines = []
+        job.channel = lines.append
+        commands = []
+        job.speed_laser_1(25.0, output=commands.append)
+        job.min_power_1(100.0, output=commands.append)
+        job.layer_color(0x0000FF, output=commands.append)
+        job.move_abs_xy(1000, 2000, output=commands.append)
+        job.cut_rel_xy(100, -100, output=commands.append)
+        job.cut_rel_x(50, output=commands.append)
+        job.block_end(output=commands.append)
+        job.end_of_file(output=commands.append)
+        commands.append(b"\x81\x00")
+        for command in commands:
+            job.process(command)
+        self.assertEqual(job.speed, 25.0)
+        self.assertAlmostEqual(job.power, 1000.0, delta=0.1)
+        self.assertTrue(job.color.startswith("#ff0000"))
+        self.assertEqual(
+            [line.split("\t")[1] for line in lines],
+            [
+                "(Speed Laser 1 25.0mm/s)",
+                f"(Power 1 min={job.power / 10.0})",
+                f"(Layer Color {job.color})",
+                "(Move Absolute (1000μm, 2000μm))",
+                "(Cut Relative (+100μm, -100μm))",
+                "(Cut Horizontal Relative (+50μm))",
+                "(Block End)",
+                "(End Of File)",
+                "(Unknown Command!)",
+            ],
+        )
+        self.assertEqual(len(driver.plots), 2)
+        self.assertEqual(driver.plots[-1], "start")
+        self.assertRaises(RuidaCommandError, job.process, b"\x01")
+
+    def test_rd_benchmark(self):
+        """
+        Decodes a large RD file, streamed and through the job buffer.
+        """
+        import time
+
+        from meerk40t.ruida.rdjob import RDJob
+
+        data = rd_file(100000)
+        t = time.time()
+        streamed = []
+        job = RDJob()
+        job.channel = streamed.append
+        job.process_blob(data)
+        t_stream = time.time() - t
+
+        t = time.time()
+        buffered = []
+        job = RDJob()
+        job.channel = buffered.append
+        job.write_blob(data)
+        while not job.execute():
+            pass
+        t_buffer = time.time() - t
+
+        t = time.time()
+        job = RDJob()
+        job.process_blob(data)
+        t_quiet = time.time() - t
+        self.assertEqual(streamed, buffered)
+        print(
+            f"{len(data)} bytes, {len(streamed)} commands: "
+            f"streamed {t_stream:.3f}s, buffered {t_buffer:.3f}s, without channel {t_quiet:.3f}s"
+        )
+
+
+class TestRuidaUDP(unittest.TestCase):
+    def test_udp_transport_faults(self):
+        """
+        Sends a large job to the emulator over localhost with corrupted packets and slow ACKs.
+        Every command must be decoded exactly once.
+        """
+        import time
+
+        from meerk40t.ruida.controller import RuidaController
+        from meerk40t.ruida.emulator import RuidaEmulator
+        from meerk40t.ruida.rdjob import RDJob, decode_bytes
+        from meerk40t.ruida.udp_connection import UDPConnection
+        from meerk40t.svgelements import Matrix
+
+        data = decode_bytes(rd_file(20000), 0x88)
+        kernel = bootstrap.bootstrap()
+        try:
+            kernel.console("service device start -i ruida 0\n")
+            device = kernel.device
+            device.interface = "mock"
+            kernel.console("interface_update\n")
+            device.address = "127.0.0.1"
+            for faults in (0.0, 0.05):
+                emulator = RuidaEmulator(device, Matrix())
+                relay = FaultyRelay(emulator, faults)
+                connection = UDPConnection(device)
+                connection.send_port = relay.port
+                connection.listen_port = 0
+                controller = RuidaController(device, connection.write)
+                controller.job.set_magic(emulator.magic)
+                connection.set_swizzles(
+                    controller.job.swizzle, controller.job.unswizzle
+                )
+                job = RDJob()
+                job.write_blob(data)
+                controller.job.buffer = job.buffer
+                t = time.time()
+                try:
+                    controller.start_sending()
+                    while len(relay.received()) < len(data) and time.time() - t < 60:
+                        time.sleep(0.01)
+                    elapsed = time.time() - t
+                    # Wait for the ACK of the last packet.
+                    while (
+                        connection.sends != connection.acks + connection.naks
+                        and time.time() - t < 60
+                    ):
+                        time.sleep(0.01)
+                finally:
+                    connection.close()
+                    relay.close()
+                    device.spooler.clear_queue()
+                self.assertEqual(relay.received(), data)
+                self.assertEqual(connection.sends, connection.acks + connection.naks)
+                if faults:
+                    self.assertGreater(connection.naks, 0)
+                    self.assertGreater(connection.timeouts, 0)
+                print(
+                    f"{len(data)} bytes, faults {faults:.0%}: {elapsed:.3f}s, "
+                    f"{len(data) / elapsed / 1024:.0f} KiB/s, {connection.statistics()}"
+                )
+        finally:
+            kernel()
+
+
+class FaultyRelay:
+    """
+    Delivers datagrams to the emulator and its replies back, corrupting some packets and
+    delaying some replies past the ACK timeout.
+    """
+
+    def __init__(self, emulator, faults, delay=0.3):
+        import random
+        import socket
+        import threading
+
+        self.random = random.Random(1)
+        self.faults = faults
+        self.delay = delay
+        self.emulator = emulator
+        self.address = None
+        self.decoded = []
+        emulator.reply = self.reply
+        write = emulator.write
+
+        def decode(data, unswizzle=True):
+            self.decoded.append(emulator.unswizzle(data) if unswizzle else data)
+            write(data, unswizzle=unswizzle)
+
+        emulator.write = decode
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.port = self.socket.getsockname()[1]
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            while True:
+                packet, self.address = self.socket.recvfrom(2048)
+                if self.random.random() < self.faults:
+                    # Checksum fails, the emulator answers with a NAK.
+                    packet = bytes([packet[0] ^ 0xFF]) + packet[1:]
+                self.emulator.checksum_write(packet)
+        except OSError:
+            pass
+
+    def reply(self, data):
+        import threading
+
+        if self.random.random() < self.faults:
+            threading.Timer(self.delay, self.send, (data,)).start()
+            return
+        self.send(data)
+
+    def send(self, data):
+        try:
+            self.socket.sendto(data, self.address)
+        except OSError:
+            pass
+
+    def received(self):
+        """
+        Unswizzled data decoded by the emulator, in the order it was decoded.
+        """
+        return b"".join(self.decoded)
+
+    def close(self):
+        self.socket.close()
+
+
+def rd_file(count, magic=0x88):
+    """
+    Swizzled RD file with count random moves and cuts.
+    """
+    import random
+
+    from meerk40t.ruida.rdjob import RDJob, encode_bytes
+
+    rnd = random.Random(count)
+    job = RDJob()
+    job.write_settings({"part": 0, "speed": 20.0, "power": 500.0})
+    x = y = 0
+    for i in range(count):
+        if i % 4:
+            dx = rnd.randint(-2000, 2000)
+            dy = rnd.choice((0, rnd.randint(-2000, 2000)))
+        else:
+            dx = rnd.randint(0, 300000) - x
+            dy = rnd.randint(0, 200000) - y
+        x += dx
+        y += dy
+        if i % 2:
+            job.mark(x, y, dx, dy)
+        else:
+            job.jump(x, y, dx, dy)
+    job.write_tail()
+    return encode_bytes(job.get_contents(), magic)
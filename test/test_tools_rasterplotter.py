@@ -1,4 +1,6 @@
+import random
 import time
+import tracemalloc
 import unittest
 
 # from copy import copy
@@ -16,7 +18,7 @@ from meerk40t.constants import (
     RASTER_SPIRAL,
     RASTER_T2B,
 )
-from meerk40t.tools.rasterplotter import RasterPlotter
+from meerk40t.tools.rasterplotter import METHODS, RasterPlotter
 
 
 class TestRasterPlotter(unittest.TestCase):
@@ -868,3 +870,142 @@ class TestRasterPlotter(unittest.TestCase):
         # Verify that some pixels are still covered with overlap
         self.assertGreater(len(covered_pixels_with_overlap), 0,
             "Should still cover some pixels even with overlap")
+
+    def _noise_plotter(self, width, height, **kwargs):
+        random.seed(5)
+        image = Image.new("L", (width, height), 255)
+        image.putdata([random.choice((0, 64, 128, 192, 255)) for _ in range(width * height)])
+        return RasterPlotter(
+            image.load(),
+            width,
+            height,
+            skip_pixel=255,
+            offset_x=100,
+            offset_y=50,
+            step_x=3,
+            step_y=2,
+            filter=lambda pixel: (255 - pixel) / 255.0,
+            **kwargs,
+        )
+
+    @staticmethod
+    def _span_values(plotter, spans):
+        """
+        Plot values described by the given row spans.
+        """
+        values = []
+        last = None
+        for row, start, end, on in zip(*[a.tolist() for a in spans]):
+            if last is not None and start != last:
+                values.append((start, row, 0) if plotter.horizontal else (row, start, 0))
+            values.append((end, row, on) if plotter.horizontal else (row, end, on))
+            last = end
+        return values
+
+    def test_rasterplotter_stream_replay(self):
+        """
+        The recorded plot replays the same values and distances as the first plot.
+        """
+        for use_integers in (True, False):
+            plotter = self._noise_plotter(60, 40, use_integers=use_integers)
+            first = list(plotter.plot())
+            burn, travel = plotter.distance_burn, plotter.distance_travel
+            self.assertTrue(plotter._cache.complete)
+            self.assertEqual(list(plotter.plot()), first)
+            self.assertEqual(plotter.distance_burn, burn)
+            self.assertEqual(plotter.distance_travel, travel)
+            spans = plotter.plot_spans()
+            self.assertLess(len(spans[0]), len(first))
+            self.assertEqual(self._span_values(plotter, spans), first)
+            self.assertEqual(plotter.distance_burn, burn)
+            self.assertEqual(plotter.distance_travel, travel)
+
+    def test_rasterplotter_stream_methods(self):
+        """
+        Row spans record the plots of all raster methods without loss.
+        """
+        for direction in METHODS:
+            for bidirectional in (True, False):
+                with self.subTest(direction=direction, bidirectional=bidirectional):
+                    expected = self._noise_plotter(
+                        24, 16, direction=direction, bidirectional=bidirectional
+                    )
+                    expected = list(expected._plot_values(expected._plot_pixels()))
+                    plotter = self._noise_plotter(
+                        24, 16, direction=direction, bidirectional=bidirectional
+                    )
+                    self.assertEqual(list(plotter.plot()), expected)
+                    self.assertEqual(list(plotter.plot()), expected)
+                    spans = plotter.plot_spans()
+                    self.assertEqual(self._span_values(plotter, spans), expected)
+
+    def test_rasterplotter_spans_first(self):
+        """
+        Spans of a plot which wasn't plotted before, with the distances of the plot.
+        """
+        expected = self._noise_plotter(60, 40)
+        values = list(expected.plot())
+        plotter = self._noise_plotter(60, 40)
+        spans = plotter.plot_spans()
+        self.assertEqual(self._span_values(plotter, spans), values)
+        self.assertEqual(plotter.distance_burn, expected.distance_burn)
+        self.assertEqual(plotter.distance_travel, expected.distance_travel)
+
+    def test_rasterplotter_stream_abandoned(self):
+        """
+        A plot which is stopped early is recorded in part, the next plot continues it.
+        """
+        expected = self._noise_plotter(60, 40)
+        values = list(expected.plot())
+        plotter = self._noise_plotter(60, 40)
+        for i, value in enumerate(plotter.plot()):
+            if i == 10:
+                break
+        self.assertFalse(plotter._locked)
+        self.assertFalse(plotter._cache.complete)
+        self.assertLessEqual(len(plotter._cache), 11)
+        for i, value in enumerate(plotter.plot()):
+            if i == 100:
+                break
+        self.assertEqual(list(plotter.plot()), values)
+        self.assertTrue(plotter._cache.complete)
+        self.assertEqual(plotter.distance_burn, expected.distance_burn)
+        self.assertEqual(plotter.distance_travel, expected.distance_travel)
+
+    def test_rasterplotter_stream_memory(self):
+        """
+        Peak memory of plotting a noisy image, compared to keeping the plot as a list of tuples.
+        """
+        plotter = self._noise_plotter(200, 150)
+        spans = self._noise_plotter(200, 150)
+        tracemalloc.start()
+        try:
+            t = time.time()
+            count = 0
+            for _ in plotter.plot():
+                count += 1
+            t0 = time.time() - t
+            _, peak_stream = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            t = time.time()
+            spans.plot_spans()
+            t1 = time.time() - t
+            _, peak_spans = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            t = time.time()
+            values = list(plotter.plot())
+            t2 = time.time() - t
+            _, peak_list = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        self.assertEqual(len(values), count)
+        self.assertLessEqual(len(plotter._cache), count)
+        self.assertLessEqual(plotter._cache.nbytes, 13 * len(plotter._cache))
+        self.assertLess(peak_stream, peak_list)
+        self.assertLess(peak_spans, peak_list)
+        print(
+            f"\n{count} plot values: recorded in {len(plotter._cache)} spans of "
+            f"{plotter._cache.nbytes} bytes, peak {peak_stream} bytes in {t0:.3f}s, "
+            f"as spans peak {peak_spans} bytes in {t1:.3f}s, "
+            f"replayed as list of tuples peak {peak_list} bytes in {t2:.3f}s"
+        )
@@ -0,0 +1,86 @@
+import random
+import unittest
+from math import hypot
+
+from meerk40t.tools.rtree import RTree
+
+
+def random_boxes(count, seed=1):
+    random.seed(seed)
+    boxes = {}
+    for i in range(count):
+        x = random.random() * 10000
+        y = random.random() * 10000
+        boxes[i] = (x, y, x + random.random() * 300, y + random.random() * 300)
+    return boxes
+
+
+class TestRTree(unittest.TestCase):
+    def check_queries(self, tree, boxes):
+        tree.validate()
+        random.seed(2)
+        for _ in range(50):
+            x = random.random() * 10000
+            y = random.random() * 10000
+            expected = {
+                k for k, b in boxes.items() if b[0] <= x <= b[2] and b[1] <= y <= b[3]
+            }
+            self.assertEqual(set(tree.query_point(x, y)), expected)
+            q = (x, y, x + 800, y + 500)
+            expected = {
+                k
+                for k, b in boxes.items()
+                if b[0] <= q[2] and b[2] >= q[0] and b[1] <= q[3] and b[3] >= q[1]
+            }
+            self.assertEqual(set(tree.query_rect(q)), expected)
+            expected = {
+                k
+                for k, b in boxes.items()
+                if q[0] <= b[0] and b[2] <= q[2] and q[1] <= b[1] and b[3] <= q[3]
+            }
+            self.assertEqual(set(tree.query_rect(q, contained=True)), expected)
+
+            def distance(b):
+                return hypot(max(b[0] - x, 0, x - b[2]), max(b[1] - y, 0, y - b[3]))
+
+            expected = sorted(distance(b) for b in boxes.values())[:3]
+            found = [d for d, k in tree.nearest(x, y, count=3)]
+            for a, b in zip(found, expected):
+                self.assertAlmostEqual(a, b)
+
+    def test_rtree_bulk_load(self):
+        boxes = random_boxes(2000)
+        tree = RTree(boxes.items())
+        self.assertEqual(len(tree), 2000)
+        self.check_queries(tree, boxes)
+
+    def test_rtree_incremental(self):
+        boxes = random_boxes(2000)
+        tree = RTree()
+        for k, b in boxes.items():
+            tree.insert(k, b)
+        self.check_queries(tree, boxes)
+        for k in range(0, 2000, 3):
+            self.assertTrue(tree.remove(k))
+            del boxes[k]
+        self.assertFalse(tree.remove(0))
+        for k in range(1, 2000, 3):
+            b = boxes[k]
+            boxes[k] = (b[0] + 50, b[1] - 20, b[2] + 50, b[3] - 20)
+            tree.update(k, boxes[k])
+        self.assertEqual(len(tree), len(boxes))
+        self.check_queries(tree, boxes)
+        for k in list(boxes):
+            tree.remove(k)
+        self.assertEqual(len(tree), 0)
+        self.assertEqual(list(tree.query_point(100, 100)), [])
+
+    def test_rtree_invalid_bounds(self):
+        tree = RTree()
+        tree.insert("none", None)
+        tree.insert("nan", (float("nan"), 0, 1, 1))
+        tree.insert("inverted", (5, 5, 1, 1))
+        self.assertEqual(len(tree), 0)
+        tree.insert("a", (0, 0, 1, 1))
+        tree.insert("a", None)
+        self.assertNotIn("a", tree)
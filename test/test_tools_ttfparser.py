@@ -0,0 +1,200 @@
+import os
+import struct
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from meerk40t.extra.hershey import FontPath
+from meerk40t.tools.ttfparser import (
+    ARG_1_AND_2_ARE_WORDS,
+    ARGS_ARE_XY_VALUES,
+    WE_HAVE_A_SCALE,
+    TrueTypeFont,
+)
+
+
+def simple_glyph(contours):
+    """
+    Encodes a simple glyph, contours are lists of (x, y, on_curve) with two byte deltas.
+    """
+    points = [p for contour in contours for p in contour]
+    xs = [p[0] for p in points]
+    ys = [p[1] for p in points]
+    data = struct.pack(">hhhhh", len(contours), min(xs), min(ys), max(xs), max(ys))
+    end = -1
+    for contour in contours:
+        end += len(contour)
+        data += struct.pack(">H", end)
+    data += struct.pack(">H", 0)
+    data += bytes(1 if p[2] else 0 for p in points)
+    for values in (xs, ys):
+        last = 0
+        for v in values:
+            data += struct.pack(">h", v - last)
+            last = v
+    return data
+
+
+def compound_glyph(index, dx, dy, scale):
+    flags = ARG_1_AND_2_ARE_WORDS | ARGS_ARE_XY_VALUES | WE_HAVE_A_SCALE
+    data = struct.pack(">hhhhh", -1, 0, 0, 0, 0)
+    data += struct.pack(">HHhhh", flags, index, dx, dy, int(scale * (1 << 14)))
+    return data
+
+
+def write_font(filename):
+    """
+    Writes a minimal TrueType font.
+
+    ' ' is empty, 'A' a square with a quadratic inner contour of only off curve points,
+    'B' is 'A' at half size moved right by 1000 units and '?' is a truncated glyph.
+    """
+    square = [(0, 0, True), (500, 0, True), (500, 700, True), (0, 700, True)]
+    inner = [(100, 100, False), (400, 100, False), (400, 600, False), (100, 600, False)]
+    glyphs = [
+        b"",
+        simple_glyph([square, inner]),
+        compound_glyph(1, 1000, 0, 0.5),
+        struct.pack(">hhhhh", 2, 0, 0, 1, 1) + b"\x00",
+        b"",
+    ]
+    characters = {"A": 1, "B": 2, "?": 3, " ": 4}
+    glyf = b"".join(glyphs)
+    offsets = [0]
+    for g in glyphs:
+        offsets.append(offsets[-1] + len(g))
+    loca = struct.pack(f">{len(offsets)}I", *offsets)
+    hmtx = b"".join(struct.pack(">Hh", 600, 0) for _ in glyphs)
+    # version, revision, checksum, magic, flags, units per em, created, modified,
+    # bounds, mac style, lowest ppem, direction hint, long loca, glyph data format
+    head = struct.pack(
+        ">IILLHHQQhhhhHHhhh",
+        *(1 << 16, 1 << 16, 0, 0x5F0F3CF5, 0, 1000, 0, 0),
+        *(0, 0, 1250, 700, 0, 8, 2, 1, 0),
+    )
+    # version, ascent, descent, line gap, metrics, caret, reserved, long metrics
+    hhea = struct.pack(
+        ">ihhhHhhhhhhhhhhhH",
+        *(1 << 16, 800, -200, 0, 600, 0, 0, 1250, 1, 0, 0),
+        *(0, 0, 0, 0, 0, len(glyphs)),
+    )
+    codes = sorted(ord(c) for c in characters) + [0xFFFF]
+    deltas = [(characters[chr(c)] - c) & 0xFFFF for c in codes[:-1]] + [1]
+    seg_count = len(codes)
+    subtable = struct.pack(">HHHHHHH", 4, 0, 0, seg_count * 2, 0, 0, 0)
+    subtable += struct.pack(f">{seg_count}H", *codes) + struct.pack(">H", 0)
+    subtable += struct.pack(f">{seg_count}H", *codes)
+    subtable += struct.pack(f">{seg_count}H", *deltas)
+    subtable += struct.pack(f">{seg_count}H", *[0] * seg_count)
+    cmap = struct.pack(">HHHHI", 0, 1, 3, 1, 12) + subtable
+    name = struct.pack(">HHH", 0, 0, 6)
+    tables = {
+        b"cmap": cmap,
+        b"glyf": glyf,
+        b"head": head,
+        b"hhea": hhea,
+        b"hmtx": hmtx,
+        b"loca": loca,
+        b"name": name,
+    }
+    offset = 12 + 16 * len(tables)
+    directory = struct.pack(">LHHHH", 0x00010000, len(tables), 0, 0, 0)
+    data = b""
+    for tag, table in tables.items():
+        directory += struct.pack(">4sLLL", tag, 0, offset + len(data), len(table))
+        data += table + b"\x00" * (-len(table) % 4)
+    with open(filename, "wb") as f:
+        f.write(directory + data)
+
+
+class ReplayPath:
+    """
+    Font path without glyph(), gets the outlines replayed as path commands.
+    """
+
+    def __init__(self):
+        self.path = FontPath(False)
+
+    def __getattr__(self, item):
+        if item == "glyph":
+            raise AttributeError(item)
+        return getattr(self.path, item)
+
+
+class TestTrueTypeFont(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.filename = os.path.join(self.directory, "test.ttf")
+        write_font(self.filename)
+
+    def tearDown(self):
+        os.remove(self.filename)
+        os.rmdir(self.directory)
+
+    def test_ttf_lazy_glyphs(self):
+        """
+        Glyphs are decoded on first use and their outlines are cached.
+        """
+        TrueTypeFont.glyph_geometry.cache_clear()
+        font = TrueTypeFont(self.filename)
+        self.assertTrue(font.is_okay)
+        self.assertEqual(font.glyph_count, 5)
+        self.assertEqual(TrueTypeFont.glyph_geometry.cache_info().currsize, 0)
+
+        path = FontPath(False)
+        font.render(path, "AB A", font_size=1000.0)
+        info = TrueTypeFont.glyph_geometry.cache_info()
+        self.assertEqual(info.currsize, 3)
+        self.assertEqual(info.misses, 3)
+        path = FontPath(False)
+        font.render(path, "BA", font_size=1000.0)
+        self.assertEqual(TrueTypeFont.glyph_geometry.cache_info().misses, 3)
+
+    def test_ttf_render_geometry(self):
+        """
+        Cached outlines are placed at the glyph offset, scaled and flipped.
+        """
+        font = TrueTypeFont(self.filename)
+        path = FontPath(False)
+        font.render(path, "A", font_size=1000.0)
+        self.assertEqual(path.geometry.bbox(), (0, -700, 500, 0))
+
+        path = FontPath(False)
+        font.render(path, "AB", font_size=100.0)
+        self.assertEqual(path.geometry.bbox(), (0, -70, 185, 0))
+
+        # The outline in the cache is untouched.
+        outline = font.glyph_geometry(1)
+        self.assertEqual(outline.bbox(), (0, 0, 500, 700))
+
+        path = FontPath(False)
+        font.render(path, "?A", font_size=1000.0)
+        self.assertEqual(path.geometry.bbox(), (600, -700, 1100, 0))
+
+    def test_ttf_render_replay(self):
+        """
+        Paths without glyph() get the same geometry as path commands.
+        """
+        font = TrueTypeFont(self.filename)
+        for align in ("start", "middle", "end"):
+            path = FontPath(False)
+            font.render(path, "AB A\nBA", font_size=12.0, align=align)
+            replay = ReplayPath()
+            font.render(replay, "AB A\nBA", font_size=12.0, align=align)
+            g = path.geometry
+            r = replay.path.geometry
+            self.assertTrue(
+                np.array_equal(
+                    g.segments[: g.index], r.segments[: r.index], equal_nan=True
+                )
+            )
+
+    def test_ttf_render_benchmark(self):
+        font = TrueTypeFont(self.filename)
+        t = time.time()
+        for i in range(2000):
+            path = FontPath(False)
+            font.render(path, f"AB {'A' * (i % 5)}BA", font_size=12.0)
+        print(f"Rendered 2000 serial texts in {time.time() - t:.3f}s")